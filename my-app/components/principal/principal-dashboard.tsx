@@ -179,7 +179,8 @@ export default memo(function PrincipalDashboard() {
   const [users, setUsers] = useState<User[]>([])
   const [salaries, setSalaries] = useState<SalaryRecord[]>([])
   const [schoolStats, setSchoolStats] = useState<SchoolStats | null>(null)
-  const [attendanceRecords, setAttendanceRecords] = useState<any[]>([])
+  // Present/late/absent counts over the last year, from /attendance/summary/
+  const [attendanceSummary, setAttendanceSummary] = useState<{ present: number; late: number; absent: number } | null>(null)
   const [isLoading, setIsLoading] = useState(true)
   const [error, setError] = useState<string | null>(null)
   const [userSearchTerm, setUserSearchTerm] = useState("")
@@ -1508,7 +1509,7 @@ Generated by School Management System
         api.classes.list(),
         api.students.list(),
         api.users.list(),
-        api.attendance.list()
+        api.attendance.summary()
       ])
 
       if (classesRes.success && Array.isArray(classesRes.data)) {
@@ -1520,8 +1521,8 @@ Generated by School Management System
       if (usersRes.success && Array.isArray(usersRes.data)) {
         setUsers(usersRes.data)
       }
-      if (attendanceRes.success && Array.isArray(attendanceRes.data)) {
-        setAttendanceRecords(attendanceRes.data)
+      if (attendanceRes.success && attendanceRes.data) {
+        setAttendanceSummary(attendanceRes.data)
       }
 
       setLastUpdated(new Date())
@@ -1543,9 +1544,9 @@ Generated by School Management System
 
   // Chart data calculations with real-time API data
   const attendanceData = React.useMemo(() => {
-    console.log('Attendance records:', attendanceRecords)
+    console.log('Attendance summary:', attendanceSummary)
 
-    if (!attendanceRecords || attendanceRecords.length === 0) {
+    if (!attendanceSummary) {
       console.log('No attendance records, using fallback data')
       return [
         { name: 'Present', value: 25, color: '#10b981' },
@@ -1555,11 +1556,9 @@ Generated by School Management System
       ]
     }
 
-    // Calculate attendance statistics from API data
-    const present = attendanceRecords.filter(record => record.status === 'present' || record.status === 'Present').length
-    const absent = attendanceRecords.filter(record => record.status === 'absent' || record.status === 'Absent').length
-    const late = attendanceRecords.filter(record => record.status === 'late' || record.status === 'Late').length
-    const excused = attendanceRecords.filter(record => record.status === 'excused' || record.status === 'Excused').length
+    // The summary counts every record in the range without fetching them
+    const { present, absent, late } = attendanceSummary
+    const excused = 0
 
     console.log('Calculated attendance:', { present, absent, late, excused })
 
@@ -1570,7 +1569,7 @@ Generated by School Management System
       { name: 'Late', value: Math.max(late, 1), color: '#f59e0b' },
       { name: 'Excused', value: Math.max(excused, 1), color: '#8b5cf6' }
     ]
-  }, [attendanceRecords])
+  }, [attendanceSummary])
 
   const studentFeeStatusData = React.useMemo(() => {
     console.log('Students data for fee status:', students)
@@ -1746,7 +1745,7 @@ Generated by School Management System
           api.classes.list(),
           api.students.list(),
           api.users.list(),
-          api.attendance.list()
+          api.attendance.summary()
         ])
 
         if (classesRes.success && Array.isArray(classesRes.data)) {
@@ -1868,26 +1867,13 @@ Generated by School Management System
           ])
         }
 
-        if (attendanceRes.success && Array.isArray(attendanceRes.data)) {
+        if (attendanceRes.success && attendanceRes.data) {
           console.log('Attendance API success:', attendanceRes.data)
-          setAttendanceRecords(attendanceRes.data)
+          setAttendanceSummary(attendanceRes.data)
         } else {
           console.warn('Attendance API failed:', attendanceRes.message)
-          // Set sample attendance data if API fails
-          const sampleData = [
-            { id: 1, student: 1, date: '2024-09-17', status: 'present' },
-            { id: 2, student: 2, date: '2024-09-17', status: 'present' },
-            { id: 3, student: 3, date: '2024-09-17', status: 'absent' },
-            { id: 4, student: 4, date: '2024-09-17', status: 'late' },
-            { id: 5, student: 5, date: '2024-09-17', status: 'present' },
-            { id: 6, student: 6, date: '2024-09-17', status: 'excused' },
-            { id: 7, student: 7, date: '2024-09-17', status: 'present' },
-            { id: 8, student: 8, date: '2024-09-17', status: 'present' },
-            { id: 9, student: 9, date: '2024-09-17', status: 'absent' },
-            { id: 10, student: 10, date: '2024-09-17', status: 'present' }
-          ]
-          console.log('Using sample attendance data:', sampleData)
-          setAttendanceRecords(sampleData)
+          // Set sample attendance counts if API fails
+          setAttendanceSummary({ present: 6, late: 1, absent: 2 })
         }
 
         // Calculate comprehensive stats from enhanced data
@@ -143,14 +143,12 @@ export function FeeDetailsModal({
     setIsLoading(true)
     try {
       // Fetch real student data for the class
-      const studentsResponse = await api.students.list()
+      const studentsResponse = await api.students.byClass(classId!)
       if (!studentsResponse.success) {
         throw new Error("Failed to fetch students")
       }
 
-      const classStudents = (studentsResponse.data as any[]).filter((student: any) =>
-        student.school_class === className
-      )
+      const classStudents = studentsResponse.data as any[]
 
       // Fetch individual fees for each student from database
       const studentFeesPromises = classStudents.map(async (student: any) => {
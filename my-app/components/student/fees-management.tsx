@@ -67,17 +67,23 @@ export function FeesManagement({ userRole }: FeesManagementProps) {
     if (userRole !== 'principal') { setIsLoading(false); return; }
     setIsLoading(true); setError(null);
     try {
-      const [feesRes, studentsRes, classesRes] = await Promise.all([api.fees.list(), api.students.list(), api.classes.list()])
+      const [feesRes, classesRes] = await Promise.all([api.fees.list(), api.classes.list()])
       if (feesRes.success) { setAllFees(feesRes.data as Fee[]); calculateStatsAndDistribution(feesRes.data as Fee[]); }
       else { throw new Error(feesRes.message) }
-      if (studentsRes.success) { setStudents(studentsRes.data as Student[]) }
-      else { throw new Error(studentsRes.message) }
       if (classesRes.success) { setClasses(classesRes.data as SchoolClass[]) }
       else { throw new Error(classesRes.message) }
     } catch (err: any) { setError(err.message || "An unexpected error occurred.") }
     finally { setIsLoading(false) }
   }
 
+  // The student picker lists one class at a time rather than every student
+  const selectStudentClass = async (classId: string) => {
+    setStudents([]); setFeeFormData(p => ({...p, target_id: ''}))
+    const response = await api.students.byClass(parseInt(classId))
+    if (response.success) { setStudents(response.data as Student[]) }
+    else { toast({ variant: "destructive", title: "Error", description: response.message || "Failed to load students." }) }
+  }
+
   // Fetch data for principal and student roles
   useEffect(() => { fetchData() }, [userRole, currentUser])
 
@@ -476,9 +482,14 @@ export function FeesManagement({ userRole }: FeesManagementProps) {
             </div>
             <div className="space-y-2"><Label>{applyTo === 'student' ? 'Student' : 'Class'}</Label>
               {applyTo === 'student' ? (
-                <Select onValueChange={(v) => setFeeFormData(p => ({...p, target_id: v}))}><SelectTrigger><SelectValue placeholder="Select a student" /></SelectTrigger>
+                <>
+                <Select onValueChange={selectStudentClass}><SelectTrigger><SelectValue placeholder="Select the student's class" /></SelectTrigger>
+                  <SelectContent>{classes.map(c => <SelectItem key={c.id} value={c.id.toString()}>{c.name}</SelectItem>)}</SelectContent>
+                </Select>
+                <Select value={feeFormData.target_id} onValueChange={(v) => setFeeFormData(p => ({...p, target_id: v}))} disabled={students.length === 0}><SelectTrigger><SelectValue placeholder="Select a student" /></SelectTrigger>
                   <SelectContent>{students.map(s => <SelectItem key={s.user.id} value={s.user.id.toString()}>{s.user.first_name} {s.user.last_name}</SelectItem>)}</SelectContent>
                 </Select>
+                </>
               ) : (
                 <Select onValueChange={(v) => setFeeFormData(p => ({...p, target_id: v}))}><SelectTrigger><SelectValue placeholder="Select a class" /></SelectTrigger>
                   <SelectContent>{classes.map(c => <SelectItem key={c.id} value={c.id.toString()}>{c.name}</SelectItem>)}</SelectContent>
@@ -44,6 +44,8 @@ export function LeaveManagement({ userRole }: LeaveManagementProps) {
 
   // --- State for API Data and UI ---
   const [leaveRequests, setLeaveRequests] = useState<LeaveRequest[]>([])
+  const [nextPage, setNextPage] = useState<string | undefined>()
+  const [isLoadingMore, setIsLoadingMore] = useState(false)
   const [isLoading, setIsLoading] = useState(true)
   const [isSubmitting, setIsSubmitting] = useState(false)
   const [error, setError] = useState<string | null>(null)
@@ -59,6 +61,7 @@ export function LeaveManagement({ userRole }: LeaveManagementProps) {
       const response = await api.leaves.list()
       if (response.success && Array.isArray(response.data)) {
         setLeaveRequests(response.data)
+        setNextPage(response.next)
       } else {
         throw new Error(response.message || "Failed to fetch leave requests.")
       }
@@ -69,6 +72,19 @@ export function LeaveManagement({ userRole }: LeaveManagementProps) {
     }
   }
 
+  const loadMoreLeaveRequests = async () => {
+    if (!nextPage) return
+    setIsLoadingMore(true)
+    const response = await api.page<LeaveRequest>(nextPage)
+    if (response.success && Array.isArray(response.data)) {
+      setLeaveRequests((current) => [...current, ...response.data!])
+      setNextPage(response.next)
+    } else {
+      toast({ variant: "destructive", title: "Error", description: response.message || "Failed to load more requests." })
+    }
+    setIsLoadingMore(false)
+  }
+
   useEffect(() => {
     fetchLeaveRequests()
   }, [])
@@ -285,6 +301,15 @@ export function LeaveManagement({ userRole }: LeaveManagementProps) {
         ))}
       </div>
 
+      {nextPage && (
+        <div className="flex justify-center">
+          <Button variant="outline" onClick={loadMoreLeaveRequests} disabled={isLoadingMore}>
+            {isLoadingMore && <Loader2 className="h-4 w-4 mr-2 animate-spin" />}
+            Load more
+          </Button>
+        </div>
+      )}
+
       {filteredRequests.length === 0 && (
         <Card>
           <CardContent className="text-center py-12">
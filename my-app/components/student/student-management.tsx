@@ -49,6 +49,8 @@ const INITIAL_FORM_STATE: Student = {
 export function StudentManagement() {
   const { toast } = useToast()
   const [students, setStudents] = useState<Student[]>([])
+  const [nextPage, setNextPage] = useState<string | undefined>()
+  const [isLoadingMore, setIsLoadingMore] = useState(false)
   const [isLoading, setIsLoading] = useState(true)
   const [error, setError] = useState<string | null>(null)
   const [searchTerm, setSearchTerm] = useState("")
@@ -69,6 +71,7 @@ export function StudentManagement() {
       const response = await api.students.list()
       if (response.success && Array.isArray(response.data)) {
         setStudents(response.data)
+        setNextPage(response.next)
       } else {
         throw new Error(response.message || "Failed to fetch student records.")
       }
@@ -79,6 +82,19 @@ export function StudentManagement() {
     }
   }
 
+  const loadMoreStudents = async () => {
+    if (!nextPage) return
+    setIsLoadingMore(true)
+    const response = await api.page<Student>(nextPage)
+    if (response.success && Array.isArray(response.data)) {
+      setStudents((current) => [...current, ...response.data!])
+      setNextPage(response.next)
+    } else {
+      toast({ variant: "destructive", title: "Error", description: response.message || "Failed to load more students." })
+    }
+    setIsLoadingMore(false)
+  }
+
   useEffect(() => {
     fetchStudents()
   }, [])
@@ -374,6 +390,14 @@ export function StudentManagement() {
               )}
             </TableBody>
           </Table>
+          {nextPage && (
+            <div className="flex justify-center pt-4">
+              <Button variant="outline" onClick={loadMoreStudents} disabled={isLoadingMore}>
+                {isLoadingMore && <Loader2 className="h-4 w-4 mr-2 animate-spin" />}
+                Load more
+              </Button>
+            </div>
+          )}
         </CardContent>
       </Card>
 
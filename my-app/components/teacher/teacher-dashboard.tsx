@@ -287,25 +287,11 @@ export function TeacherDashboard() {
         } catch (error) {
           console.warn('Failed to fetch students via teacher endpoint, trying alternative methods')
 
-          // Fallback: try to get all students and filter by teacher's classes
-          try {
-            const allStudentsRes = await api.students.list()
-            if (allStudentsRes.success && Array.isArray(allStudentsRes.data)) {
-              // Filter students by the classes this teacher teaches
-              const teacherClassNames = classesRes.data.map((cls: any) => cls.name)
-              studentsData = allStudentsRes.data.filter((student: any) =>
-                teacherClassNames.includes(student.school_class)
-              )
-            }
-          } catch (error2) {
-            console.warn('Failed to fetch students via students.list(), trying class-specific endpoints')
-          }
-
-          // If still no students found, try fetching from each class
-          if (studentsData.length === 0 && classesRes.data.length > 0) {
+          // Fallback: fetch the students of each class this teacher teaches
+          if (classesRes.data.length > 0) {
             try {
               const studentPromises = classesRes.data.map((cls: any) =>
-                api.classes.students(cls.id)
+                api.students.byClass(cls.id)
               )
               const studentResults = await Promise.all(studentPromises)
 
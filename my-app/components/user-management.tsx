@@ -132,6 +132,8 @@ function useUserManagement() {
   const { toast } = useToast()
   
   const [students, setStudents] = useState<Student[]>([])
+  const [nextStudentsPage, setNextStudentsPage] = useState<string | undefined>()
+  const [isLoadingMoreStudents, setIsLoadingMoreStudents] = useState(false)
   const [teachers, setTeachers] = useState<Teacher[]>([])
   const [otherUsers, setOtherUsers] = useState<User[]>([])
   
@@ -154,13 +156,15 @@ function useUserManagement() {
       }
 
       setStudents(studentsRes.data as Student[])
+      setNextStudentsPage(studentsRes.next)
       setTeachers(teachersRes.data as Teacher[])
 
-      const studentUserIds = new Set((studentsRes.data as Student[]).map((s: Student) => s.user.id))
+      // Students arrive a page at a time, so tell them apart by role rather
+      // than by membership of the (partial) student list
       const teacherUserIds = new Set((teachersRes.data as Teacher[]).map((t: Teacher) => t.user.id))
       setOtherUsers(
         (usersRes.data as User[]).filter(
-          (u: User) => !studentUserIds.has(u.id) && !teacherUserIds.has(u.id)
+          (u: User) => u.role !== "student" && !teacherUserIds.has(u.id)
         )
       )
 
@@ -176,6 +180,23 @@ function useUserManagement() {
     }
   }, [toast])
 
+  const loadMoreStudents = useCallback(async () => {
+    if (!nextStudentsPage) return
+    setIsLoadingMoreStudents(true)
+    const response = await api.page<Student>(nextStudentsPage)
+    if (response.success && Array.isArray(response.data)) {
+      setStudents(current => [...current, ...response.data!])
+      setNextStudentsPage(response.next)
+    } else {
+      toast({
+        variant: "destructive",
+        title: "Failed to load more students",
+        description: response.message
+      })
+    }
+    setIsLoadingMoreStudents(false)
+  }, [nextStudentsPage, toast])
+
   const updateUserCredentials = useCallback(async (
     userId: string,
     payload: { username?: string; password?: string }
@@ -228,6 +249,9 @@ function useUserManagement() {
 
   return {
     students,
+    hasMoreStudents: Boolean(nextStudentsPage),
+    isLoadingMoreStudents,
+    loadMoreStudents,
     teachers,
     otherUsers,
     isLoading,
@@ -261,6 +285,9 @@ const validateCredentials = (username: string, password: string): ValidationErro
 function UserManagementComponent() {
   const {
     students,
+    hasMoreStudents,
+    isLoadingMoreStudents,
+    loadMoreStudents,
     teachers,
     otherUsers,
     isLoading,
@@ -717,6 +744,12 @@ function UserManagementComponent() {
                     </div>
                   )
                 })}
+                {hasMoreStudents && (
+                  <Button variant="outline" size="sm" onClick={loadMoreStudents} disabled={isLoadingMoreStudents}>
+                    {isLoadingMoreStudents && <Loader2 className="h-4 w-4 mr-2 animate-spin" />}
+                    Load more students
+                  </Button>
+                )}
               </AccordionContent>
             </AccordionItem>
 
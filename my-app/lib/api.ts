@@ -1,5 +1,7 @@
 // The base URL for the API, configured via environment variables for flexibility.
 const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000/api";
+// Wait before reopening an event stream that ended or failed (the server's SSE retry)
+const STREAM_RETRY_MS = 3000;
 
 // --- API Response Interfaces ---
 export interface ApiResponse<T = any> {
@@ -7,6 +9,8 @@ export interface ApiResponse<T = any> {
   data?: T;
   message?: string;
   errors?: Record<string, string[]>;
+  // URL of the next page of a paginated list (the Link header's rel="next")
+  next?: string;
 }
 export interface User {
   id: number;
@@ -70,7 +74,7 @@ class ApiClient {
   }
 
   private async request<T>(endpoint: string, options: RequestInit = {}): Promise<ApiResponse<T>> {
-    const url = `${this.baseURL}${endpoint}`;
+    const url = endpoint.startsWith("http") ? endpoint : `${this.baseURL}${endpoint}`;
     const headers: Record<string, string> = { "Content-Type": "application/json" };
     if (options.headers) {
       Object.assign(headers, options.headers);
@@ -103,7 +107,8 @@ class ApiClient {
         }
         return { success: false, message: data?.detail || data?.message || `HTTP Error: ${response.status}`, errors: data?.errors || {} };
       }
-      return { success: true, data };
+      const next = response.headers.get("link")?.match(/<([^>]+)>;\s*rel="next"/)?.[1];
+      return { success: true, data, next };
     } catch (error) {
       console.error("API request failed:", error);
       return { success: false, message: error instanceof Error ? error.message : "A network error occurred." };
@@ -152,16 +157,68 @@ class ApiClient {
 
   async getCurrentUser(): Promise<ApiResponse<User>> { return this.request<User>("/auth/user/"); }
   async get<T>(endpoint: string): Promise<ApiResponse<T>> { return this.request<T>(endpoint); }
+  // Every row of a cursor-paginated list. Only for lists that are small by
+  // construction (one class's students); long lists load page by page with `page`.
+  async getAll<T>(endpoint: string): Promise<ApiResponse<T[]>> {
+    const rows: T[] = [];
+    let next: string | undefined = endpoint;
+    while (next) {
+      const page: ApiResponse<T[]> = await this.request<T[]>(next);
+      if (!page.success) return page;
+      rows.push(...(page.data || []));
+      next = page.next;
+    }
+    return { success: true, data: rows };
+  }
   async post<T>(endpoint: string, data: any): Promise<ApiResponse<T>> { return this.request<T>(endpoint, { method: "POST", body: JSON.stringify(data) }); }
   async put<T>(endpoint: string, data: any): Promise<ApiResponse<T>> { return this.request<T>(endpoint, { method: "PUT", body: JSON.stringify(data) }); }
   async patch<T>(endpoint: string, data: any): Promise<ApiResponse<T>> { return this.request<T>(endpoint, { method: "PATCH", body: JSON.stringify(data) }); }
   async delete<T>(endpoint: string): Promise<ApiResponse<T>> { return this.request<T>(endpoint, { method: "DELETE" }); }
+
+  // Server-sent events from `endpoint`, calling onMessage with each `event`'s
+  // data; returns a function that closes the stream. EventSource cannot send
+  // headers, so every connection opens with a single-use ticket POSTed for at
+  // `ticketEndpoint`. A used ticket cannot serve the browser's own reconnect,
+  // so reconnecting is done here, with a new ticket and the last event id.
+  eventStream(endpoint: string, ticketEndpoint: string, event: string, onMessage: (data: any) => void): () => void {
+    if (typeof window === "undefined") return () => {};
+    let source: EventSource | null = null;
+    let lastEventId = "";
+    let closed = false;
+    const open = async () => {
+      const ticket = await this.post<{ ticket: string }>(ticketEndpoint, {});
+      if (closed) return;
+      if (!ticket.success || !ticket.data) {
+        setTimeout(open, STREAM_RETRY_MS);
+        return;
+      }
+      const query = new URLSearchParams({ ticket: ticket.data.ticket });
+      if (lastEventId) query.set("last_event_id", lastEventId);
+      source = new EventSource(`${this.baseURL}${endpoint}?${query.toString()}`);
+      source.addEventListener(event, (message) => {
+        const { data, lastEventId: id } = message as MessageEvent;
+        lastEventId = id;
+        onMessage(JSON.parse(data));
+      });
+      source.onerror = () => {
+        source?.close();
+        if (!closed) setTimeout(open, STREAM_RETRY_MS);
+      };
+    };
+    open();
+    return () => {
+      closed = true;
+      source?.close();
+    };
+  }
 }
 
 // --- Singleton Instance and Helper Object ---
 export const apiClient = new ApiClient(API_BASE_URL);
 
 export const api = {
+  // The next page of a paginated list, from the `next` link of the previous one
+  page: <T = any>(next: string) => apiClient.get<T[]>(next),
   admin: {
     updateUser: (userId: number, data: { username?: string; password?: string }) =>
       apiClient.post("/admin/update-user/", {
@@ -182,7 +239,9 @@ export const api = {
       apiClient.post('/auth/password-reset-confirm/', { token, new_password: newPassword }),
   },
   students: {
+    // The first page; pass its `next` to api.page for more
     list: () => apiClient.get("/students/"),
+    byClass: (classId: number) => apiClient.getAll(`/students/?class=${classId}`),
     get: (id: number) => apiClient.get(`/students/${id}/`),
     create: (data: any) => apiClient.post("/students/", data),
     update: (id: number, data: any) => apiClient.put(`/students/${id}/`, data),
@@ -226,6 +285,15 @@ export const api = {
   },
   attendance: {
     list: () => apiClient.get("/attendance/"),
+    // Counts and rates over a date range, without fetching the rows
+    summary: (params: { from?: string; to?: string; classId?: number } = {}) => {
+      const query = new URLSearchParams();
+      if (params.from) query.set("from", params.from);
+      if (params.to) query.set("to", params.to);
+      if (params.classId) query.set("class", String(params.classId));
+      const search = query.toString();
+      return apiClient.get(`/attendance/summary/${search ? `?${search}` : ""}`);
+    },
     create: (data: any) => apiClient.post("/attendance/", data),
     update: (id: number, data: any) => apiClient.put(`/attendance/${id}/`, data),
     byClass: (classId: number, date?: string) =>
@@ -409,7 +477,13 @@ export const api = {
     // Notifications
     notifications: {
       list: () => apiClient.get("/notifications/"),
-      markRead: (id: number) => apiClient.patch(`/notifications/${id}/`, { is_read: true }),
+      markRead: (id: number) => apiClient.post(`/notifications/${id}/mark_read/`, {}),
+      markAllRead: () => apiClient.post("/notifications/mark_all_read/", {}),
+      unreadCount: () => apiClient.get<{ unread: number }>("/notifications/unread_count/"),
+      // Calls onNotification with each new notification until the returned function
+      // is called; needs the backend on an ASGI server
+      stream: (onNotification: (notification: any) => void) =>
+        apiClient.eventStream("/notifications/stream/", "/notifications/stream_ticket/", "notification", onNotification),
     },
     // Async Tasks
     asyncTasks: {
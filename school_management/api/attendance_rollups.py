@@ -0,0 +1,302 @@
+"""
+Attendance rollups.
+
+``Attendance`` holds one row per student per day. The rollup tables count
+present/late/absent per student per month, per class per day and per class
+per month, so attendance over a range is a handful of indexed rows instead of
+a count over every raw record: a full academic year is twelve monthly rows
+per student (plus raw days for partial months at either end of the range).
+A student's daily "rollup" is the ``Attendance`` row itself.
+
+Class rollups follow the student's current class, like the reports and
+dashboards that read them; moving a student recounts both classes.
+
+The rollups are kept in step inside the writing transaction:
+``record_changes()`` recounts just the buckets a set of ``(student, date)``
+writes touched. The attendance signal handlers call it for single writes and
+bulk writers call it themselves. ``rebuild()`` recounts everything and backs
+the ``refresh_attendance_rollups`` command, which also backfills rows written
+before the rollups existed.
+"""
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncMonth
+
+from .models import Attendance, ClassDailyAttendance, ClassMonthlyAttendance, Student, StudentMonthlyAttendance
+
+BATCH_SIZE = 1000
+STATUSES = {
+    'present': Attendance.Status.PRESENT,
+    'late': Attendance.Status.LATE,
+    'absent': Attendance.Status.ABSENT,
+}
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def next_month(day):
+    return date(day.year + day.month // 12, day.month % 12 + 1, 1)
+
+
+def status_counts():
+    return {name: Count('id', filter=Q(status=value)) for name, value in STATUSES.items()}
+
+
+def status_sums():
+    return {name: Sum(name) for name in STATUSES}
+
+
+def in_months(field, months):
+    """Q matching ``field`` dates inside any of ``months`` (first days of months)."""
+    condition = Q()
+    for month in months:
+        condition |= Q(**{f'{field}__gte': month, f'{field}__lt': next_month(month)})
+    return condition
+
+
+def write_buckets(model, key, grouped, touched=None, stale=None):
+    """
+    Upsert one rollup row per ``grouped`` count row; returns the rows written.
+
+    ``key`` maps the model's key fields to the keys of the grouped rows.
+
+    Buckets in ``touched`` without any attendance left are written as zeros
+    rather than deleted, which keeps incremental updates to one upsert per
+    table. A full rebuild passes its whole scope as ``stale`` to clear first.
+    """
+    rows = {tuple(row[source] for source in key.values()): row for row in grouped}
+    for values in touched or ():
+        rows.setdefault(values, dict.fromkeys(STATUSES, 0))
+    if stale is not None:
+        stale.delete()
+    model.objects.bulk_create(
+        [
+            model(**dict(zip(key, values)), **{name: row[name] for name in STATUSES})
+            for values, row in rows.items()
+        ],
+        batch_size=BATCH_SIZE, update_conflicts=True, unique_fields=list(key), update_fields=list(STATUSES),
+    )
+    return len(rows)
+
+
+def days_of(months):
+    days = []
+    for month in months:
+        day = month
+        while day < next_month(month):
+            days.append(day)
+            day += timedelta(days=1)
+    return days
+
+
+def refresh_students(student_ids=None, months=None, since=None):
+    """
+    Recount the monthly rollups of ``student_ids`` for ``months``.
+
+    With both given only those buckets are upserted; otherwise everything (from
+    the month of ``since`` on) is recounted from scratch.
+    """
+    records = Attendance.objects.all()
+    if student_ids is not None:
+        records = records.filter(student__in=student_ids)
+    if months is not None:
+        records = records.filter(in_months('date', months))
+    if since is not None:
+        records = records.filter(date__gte=month_start(since))
+    grouped = records.values('student', month=TruncMonth('date')).annotate(**status_counts()).order_by()
+    key = {'student_id': 'student', 'month': 'month'}
+
+    if student_ids is not None and months is not None:
+        touched = [(student_id, month) for student_id in student_ids for month in months]
+        return write_buckets(StudentMonthlyAttendance, key, grouped, touched=touched)
+    stale = StudentMonthlyAttendance.objects.all()
+    if since is not None:
+        stale = stale.filter(month__gte=month_start(since))
+    return write_buckets(StudentMonthlyAttendance, key, grouped, stale=stale)
+
+
+def refresh_classes(class_ids=None, months=None, dates=None, since=None):
+    """
+    Recount the class rollups of ``class_ids``.
+
+    Monthly rows are recounted for ``months`` and daily rows for ``dates``;
+    with ``dates`` left out, every day of ``months`` is recounted. Without
+    ``class_ids`` and ``months`` everything (from the month of ``since`` on)
+    is recounted from scratch.
+    """
+    records = Attendance.objects.filter(student__school_class__isnull=False)
+    if class_ids is not None:
+        records = records.filter(student__school_class__in=class_ids)
+    if since is not None:
+        records = records.filter(date__gte=month_start(since))
+    monthly_records, daily_records = records, records
+    if months is not None:
+        monthly_records = daily_records = records.filter(in_months('date', months))
+    if dates is not None:
+        daily_records = records.filter(date__in=dates)
+
+    daily = daily_records.values('date', school_class=F('student__school_class')).annotate(**status_counts()).order_by()
+    monthly = (
+        monthly_records.values(school_class=F('student__school_class'), month=TruncMonth('date'))
+        .annotate(**status_counts()).order_by()
+    )
+
+    daily_key = {'school_class_id': 'school_class', 'date': 'date'}
+    monthly_key = {'school_class_id': 'school_class', 'month': 'month'}
+    if class_ids is not None and months is not None:
+        days = dates if dates is not None else days_of(months)
+        return write_buckets(
+            ClassDailyAttendance, daily_key, daily,
+            touched=[(class_id, day) for class_id in class_ids for day in days],
+        ) + write_buckets(
+            ClassMonthlyAttendance, monthly_key, monthly,
+            touched=[(class_id, month) for class_id in class_ids for month in months],
+        )
+    daily_stale = ClassDailyAttendance.objects.all()
+    monthly_stale = ClassMonthlyAttendance.objects.all()
+    if since is not None:
+        daily_stale = daily_stale.filter(date__gte=month_start(since))
+        monthly_stale = monthly_stale.filter(month__gte=month_start(since))
+    return (
+        write_buckets(ClassDailyAttendance, daily_key, daily, stale=daily_stale)
+        + write_buckets(ClassMonthlyAttendance, monthly_key, monthly, stale=monthly_stale)
+    )
+
+
+def record_changes(changes):
+    """
+    Recount the buckets touched by attendance writes, given as ``(student_id, date)`` pairs.
+
+    Call inside the writing transaction so the rollups commit with the rows.
+    """
+    changes = {(student_id, day) for student_id, day in changes}
+    if not changes:
+        return
+    student_ids = {student_id for student_id, _ in changes}
+    dates = {day for _, day in changes}
+    months = {month_start(day) for day in dates}
+    class_ids = set(
+        Student.objects.filter(pk__in=student_ids, school_class__isnull=False).values_list('school_class', flat=True)
+    )
+    with transaction.atomic():
+        refresh_students(student_ids, months)
+        if class_ids:
+            refresh_classes(class_ids, months, dates)
+
+
+def student_moved(student_id, class_ids):
+    """Recount ``class_ids`` (old and new class) for every month ``student_id`` has attendance in."""
+    class_ids = {pk for pk in class_ids if pk is not None}
+    months = set(StudentMonthlyAttendance.objects.filter(student=student_id).values_list('month', flat=True))
+    if class_ids and months:
+        refresh_classes(class_ids, months)
+
+
+def rebuild(since=None):
+    """Recount every rollup (from the month of ``since`` on); returns the rows written per table."""
+    with transaction.atomic():
+        return {
+            'students': refresh_students(since=since),
+            'classes': refresh_classes(since=since),
+        }
+
+
+# === Range queries ===
+
+def split_range(start, end):
+    """
+    Split the inclusive range ``start``..``end`` into whole months and loose days.
+
+    Returns ``(months, days)``: ``months`` is ``(first, last)`` of the whole
+    months (or None), ``days`` a list of inclusive ``(first, last)`` day ranges
+    at the edges.
+    """
+    first_month = start if start.day == 1 else next_month(start)
+    after_last_month = month_start(end + timedelta(days=1))
+    if first_month >= after_last_month:
+        return None, [(start, end)]
+    days = []
+    if start < first_month:
+        days.append((start, first_month - timedelta(days=1)))
+    if after_last_month <= end:
+        days.append((after_last_month, end))
+    return (first_month, after_last_month - timedelta(days=1)), days
+
+
+def in_days(field, days):
+    condition = Q()
+    for first, last in days:
+        condition |= Q(**{f'{field}__gte': first, f'{field}__lte': last})
+    return condition
+
+
+def add_counts(totals, row):
+    for name in STATUSES:
+        totals[name] += row[name] or 0
+    return totals
+
+
+def with_rate(counts):
+    """Add ``total`` and ``attendance_rate`` (present or late, as a percentage) to ``counts``."""
+    total = sum(counts[name] for name in STATUSES)
+    attended = counts['present'] + counts['late']
+    return {**counts, 'total': total, 'attendance_rate': round(attended / total * 100, 1) if total else None}
+
+
+def empty_counts():
+    return dict.fromkeys(STATUSES, 0)
+
+
+def class_totals(start, end, class_ids=None):
+    """Attendance counts over ``start``..``end`` for ``class_ids`` (default every class), summed."""
+    months, days = split_range(start, end)
+    monthly = ClassMonthlyAttendance.objects.all()
+    daily = ClassDailyAttendance.objects.all()
+    if class_ids is not None:
+        monthly = monthly.filter(school_class__in=class_ids)
+        daily = daily.filter(school_class__in=class_ids)
+
+    totals = empty_counts()
+    if months:
+        add_counts(totals, monthly.filter(month__gte=months[0], month__lte=months[1]).aggregate(**status_sums()))
+    if days:
+        add_counts(totals, daily.filter(in_days('date', days)).aggregate(**status_sums()))
+    return with_rate(totals)
+
+
+def student_totals(start=None, end=None, student_ids=None, class_id=None):
+    """
+    Attendance counts per student over ``start``..``end`` (default all time).
+
+    Whole months come from the monthly rollups and loose days at the edges
+    from the raw rows, so the work per student is bounded by the number of
+    months in the range. Returns ``{student_id: counts}``.
+    """
+    monthly = StudentMonthlyAttendance.objects.all()
+    raw = Attendance.objects.all()
+    if student_ids is not None:
+        monthly = monthly.filter(student__in=student_ids)
+        raw = raw.filter(student__in=student_ids)
+    if class_id is not None:
+        monthly = monthly.filter(student__school_class=class_id)
+        raw = raw.filter(student__school_class=class_id)
+
+    if start is None and end is None:
+        months, days = True, []
+    else:
+        months, days = split_range(start, end)
+        if months:
+            monthly = monthly.filter(month__gte=months[0], month__lte=months[1])
+
+    totals = {}
+    if months:
+        for row in monthly.values('student').annotate(**status_sums()).order_by():
+            add_counts(totals.setdefault(row['student'], empty_counts()), row)
+    if days:
+        for row in raw.filter(in_days('date', days)).values('student').annotate(**status_counts()).order_by():
+            add_counts(totals.setdefault(row['student'], empty_counts()), row)
+    return {student_id: with_rate(counts) for student_id, counts in totals.items()}
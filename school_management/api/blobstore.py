@@ -0,0 +1,237 @@
+"""
+Content-addressed storage for uploaded files.
+
+Uploads used to live inline in ``BinaryField`` columns, so every unrestricted
+queryset on those tables pulled the blobs through the ORM. Rows now keep only
+the file's SHA-256 digest and size; the bytes live in a blob store under their
+digest, so identical uploads are stored once.
+
+The store is pluggable through ``settings.BLOB_STORE``::
+
+    BLOB_STORE = {
+        'BACKEND': 'api.blobstore.FileSystemBlobStore',
+        'OPTIONS': {'root': BASE_DIR / 'blobs'},
+    }
+
+Because blobs are shared between rows, deleting a row never deletes its blob;
+``manage.py migrate_blobs --prune`` removes blobs no row refers to.
+"""
+import hashlib
+import mimetypes
+import os
+import tempfile
+import time
+from collections import namedtuple
+
+from django.apps import apps
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+CHUNK_SIZE = 64 * 1024
+
+# Files attached to a model: the legacy inline column is ``<prefix>_data`` and the
+# metadata lives in ``<prefix>_name``, ``<prefix>_mime_type``, ``<prefix>_sha256`` and ``<prefix>_size``
+BlobKind = namedtuple('BlobKind', ['model_label', 'prefix'])
+
+BLOB_KINDS = {
+    'submissions': BlobKind('api.AssignmentSubmission', 'file'),
+    'reimbursements': BlobKind('api.Reimbursement', 'receipt_file'),
+    'settings': BlobKind('api.SchoolSetting', 'file'),
+}
+
+
+class BlobNotFound(Exception):
+    pass
+
+
+class BlobStore:
+    """Interface of a blob store. Blobs are addressed by the hex SHA-256 of their content."""
+
+    def save(self, content):
+        """Store ``content`` (bytes or a file-like object); return ``(digest, size)``."""
+        raise NotImplementedError
+
+    def open(self, digest):
+        raise NotImplementedError
+
+    def size(self, digest):
+        raise NotImplementedError
+
+    def exists(self, digest):
+        raise NotImplementedError
+
+    def delete(self, digest):
+        raise NotImplementedError
+
+    def digests(self):
+        """Iterate over ``(digest, modified timestamp)`` of every stored blob."""
+        raise NotImplementedError
+
+    def path(self, digest):
+        """Local filesystem path of a blob, or None if the store is not on local disk."""
+        return None
+
+
+class FileSystemBlobStore(BlobStore):
+    """Blobs as files under ``root``, fanned out as ``ab/cd/abcd...`` to keep directories small."""
+
+    def __init__(self, root):
+        self.root = os.fspath(root)
+
+    def path(self, digest):
+        if len(digest) != 64 or not all(c in '0123456789abcdef' for c in digest):
+            raise BlobNotFound(digest)
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def save(self, content):
+        if isinstance(content, (bytes, bytearray, memoryview)):
+            chunks = [bytes(content)]
+        elif hasattr(content, 'chunks'):
+            chunks = content.chunks(CHUNK_SIZE)
+        else:
+            chunks = iter(lambda: content.read(CHUNK_SIZE), b'')
+
+        os.makedirs(self.root, exist_ok=True)
+        sha = hashlib.sha256()
+        size = 0
+        # Hash while writing to a temporary file, so the content is read only once
+        fd, temp_path = tempfile.mkstemp(dir=self.root, prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as temp:
+                for chunk in chunks:
+                    sha.update(chunk)
+                    size += len(chunk)
+                    temp.write(chunk)
+            digest = sha.hexdigest()
+            final_path = self.path(digest)
+            if os.path.exists(final_path):
+                os.unlink(temp_path)
+                # Refresh the timestamp so prune() treats it as a new upload
+                os.utime(final_path)
+            else:
+                os.makedirs(os.path.dirname(final_path), exist_ok=True)
+                # Atomic, so readers never see a partly written blob
+                os.replace(temp_path, final_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+        return digest, size
+
+    def open(self, digest):
+        try:
+            return open(self.path(digest), 'rb')
+        except FileNotFoundError:
+            raise BlobNotFound(digest)
+
+    def size(self, digest):
+        try:
+            return os.path.getsize(self.path(digest))
+        except FileNotFoundError:
+            raise BlobNotFound(digest)
+
+    def exists(self, digest):
+        try:
+            return os.path.exists(self.path(digest))
+        except BlobNotFound:
+            return False
+
+    def delete(self, digest):
+        try:
+            os.unlink(self.path(digest))
+        except FileNotFoundError:
+            pass
+
+    def digests(self):
+        if not os.path.isdir(self.root):
+            return
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                if len(name) == 64 and not name.startswith('.'):
+                    yield name, os.path.getmtime(os.path.join(directory, name))
+
+
+def get_store():
+    config = getattr(settings, 'BLOB_STORE', {})
+    backend = import_string(config.get('BACKEND', 'api.blobstore.FileSystemBlobStore'))
+    options = config.get('OPTIONS', {'root': os.path.join(settings.BASE_DIR, 'blobs')})
+    return backend(**options)
+
+
+def get_model(kind):
+    return apps.get_model(BLOB_KINDS[kind].model_label)
+
+
+def file_fields(prefix, upload_name, mime_type, digest, size):
+    return {
+        f'{prefix}_name': upload_name,
+        f'{prefix}_mime_type': mime_type,
+        f'{prefix}_sha256': digest,
+        f'{prefix}_size': size,
+    }
+
+
+def store_upload(upload, prefix):
+    """Save an uploaded file in the blob store; return the model field values that refer to it."""
+    digest, size = get_store().save(upload)
+    name = os.path.basename(upload.name or '')
+    mime_type = getattr(upload, 'content_type', None) or mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    return file_fields(prefix, name, mime_type, digest, size)
+
+
+def move_legacy_blobs(kind, batch_size=100, store=None, pks=None):
+    """
+    Move one batch of inline blobs of ``kind`` into the store and clear their columns.
+
+    Returns the number of rows moved; 0 once nothing is left.
+    """
+    model = get_model(kind)
+    prefix = BLOB_KINDS[kind].prefix
+    store = store or get_store()
+    data_field = f'{prefix}_data'
+
+    queryset = model.objects.filter(**{f'{data_field}__isnull': False})
+    if pks is not None:
+        queryset = queryset.filter(pk__in=pks)
+    rows = list(queryset.order_by('pk').only('pk', data_field)[:batch_size])
+    for row in rows:
+        data = getattr(row, data_field)
+        if data:
+            digest, size = store.save(data)
+        else:
+            digest, size = '', None
+        setattr(row, f'{prefix}_sha256', digest)
+        setattr(row, f'{prefix}_size', size)
+        # Drop the bytes as soon as they are stored, so a batch is never held in memory twice
+        setattr(row, data_field, None)
+
+    model.objects.bulk_update(rows, [f'{prefix}_sha256', f'{prefix}_size', data_field])
+    return len(rows)
+
+
+def referenced_digests():
+    digests = set()
+    for kind, (label, prefix) in BLOB_KINDS.items():
+        digests.update(
+            get_model(kind).objects.exclude(**{f'{prefix}_sha256': ''})
+            .values_list(f'{prefix}_sha256', flat=True).distinct()
+        )
+    return digests
+
+
+def prune(grace_seconds=3600, store=None):
+    """
+    Delete blobs no row refers to; return how many were deleted.
+
+    Blobs written in the last ``grace_seconds`` are kept: their row may not
+    have been committed yet.
+    """
+    store = store or get_store()
+    referenced = referenced_digests()
+    cutoff = time.time() - grace_seconds
+    deleted = 0
+    for digest, modified in list(store.digests()):
+        if digest not in referenced and modified < cutoff:
+            store.delete(digest)
+            deleted += 1
+    return deleted
@@ -0,0 +1,246 @@
+"""
+Student dashboard payload.
+
+``build_student_dashboard`` assembles everything the student dashboard shows
+with a fixed number of queries: per-weekday attendance and per-teacher grade
+aggregates are computed in the database, and the list sections are fetched
+with their serializer relations joined in.
+
+The assembled payload is cached per student. Writes to a student's
+attendance, grades or submissions delete that student's entry; timetable and
+assignment changes bump a per-class version so every student of the class
+rebuilds on their next request.
+
+Fields that change with the clock alone (``upcomingDeadlines``, each
+subject's ``nextClass``) are left out of the cached payload. The entry keeps
+their inputs (open due dates, timetable slots), and ``with_clock`` fills them
+in on every request.
+"""
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Avg, Case, Count, Exists, F, FloatField, OuterRef, Q, Sum, Value, When
+from django.db.models.functions import ExtractWeekDay
+from django.utils import timezone
+
+from .models import Attendance, Assignment, AssignmentSubmission, Period, Timetable
+from .serializers import AssignmentSerializer, GradeSerializer, TimetableSerializer
+
+# (minimum score, letter, grade points) from highest to lowest
+GRADE_SCALE = [
+    (93, 'A', 4.0), (90, 'A-', 3.7), (87, 'B+', 3.3), (83, 'B', 3.0), (80, 'B-', 2.7), (77, 'C+', 2.3),
+    (73, 'C', 2.0), (70, 'C-', 1.7), (67, 'D+', 1.3), (60, 'D', 1.0), (0, 'F', 0.0),
+]
+WEEKDAYS = {day: index for index, day in enumerate(Timetable.Day.values)}
+WEEKDAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+
+def letter_grade(score):
+    if score is None:
+        return 'N/A'
+    return next(letter for minimum, letter, _ in GRADE_SCALE if score >= minimum)
+
+
+def grade_points():
+    """SQL expression mapping a grade score to its grade points."""
+    return Case(
+        *[When(score__gte=minimum, then=Value(points)) for minimum, _, points in GRADE_SCALE],
+        output_field=FloatField(),
+    )
+
+
+def rate(attended, recorded):
+    # Students without any attendance records yet count as fully present
+    return round(attended / recorded * 100, 1) if recorded else 100
+
+
+def next_class(slots, now, periods):
+    """Describe the next upcoming slot among ``slots``, ``(weekday, start time)`` pairs."""
+    today = now.weekday()
+    upcoming = []
+    for weekday, start_time in slots:
+        days_ahead = (weekday - today) % 7
+        if days_ahead == 0 and start_time <= now.time():
+            days_ahead = 7
+        upcoming.append((days_ahead, start_time))
+    if not upcoming:
+        return None
+
+    days_ahead, start_time = min(upcoming)
+    if days_ahead == 0:
+        day = 'Today'
+    elif days_ahead == 1:
+        day = 'Tomorrow'
+    else:
+        day = WEEKDAY_NAMES[(today + days_ahead) % 7]
+    label = f"{day} {start_time.strftime('%I:%M %p').lstrip('0')}"
+    if start_time in periods:
+        label += f" (Period {periods[start_time]})"
+    return label
+
+
+def build_student_dashboard(student):
+    """Compute the dashboard for ``student``: its payload and the inputs ``with_clock`` completes it from."""
+    attended = Q(status__in=[Attendance.Status.PRESENT, Attendance.Status.LATE])
+
+    # Attendance per weekday, so per-subject rates can use the days each subject is taught
+    attendance_by_day = {}
+    for row in student.attendance_records.annotate(weekday=ExtractWeekDay('date')).values('weekday').annotate(
+        recorded=Count('id'), attended=Count('id', filter=attended)
+    ):
+        # ExtractWeekDay counts from Sunday=1; convert to Monday=0
+        attendance_by_day[(row['weekday'] + 5) % 7] = (row['attended'], row['recorded'])
+
+    # Grade averages per assignment teacher, which is how grades map onto timetable subjects
+    grades_by_teacher = {
+        row['teacher']: row
+        for row in student.grades.values(teacher=F('assignment__teacher')).annotate(
+            graded=Count('id'), average=Avg('score'), points=Sum(grade_points())
+        )
+    }
+
+    schedule = sorted(
+        Timetable.objects.filter(school_class=student.school_class_id).select_related('teacher__user__profile'),
+        key=lambda entry: (WEEKDAYS[entry.day_of_week], entry.start_time),
+    )
+    periods = dict(Period.objects.values_list('start_time', 'period_number'))
+    grades = student.grades.select_related('assignment__teacher__user__profile').order_by('-graded_date', '-id')
+    assignments = list(
+        Assignment.objects.filter(school_class=student.school_class_id)
+        .select_related('teacher__user__profile')
+        .annotate(submitted=Exists(AssignmentSubmission.objects.filter(assignment=OuterRef('pk'), student=student)))
+        .order_by('due_date')
+    )
+
+    total_attended = sum(counts[0] for counts in attendance_by_day.values())
+    total_recorded = sum(counts[1] for counts in attendance_by_day.values())
+    graded = sum(row['graded'] for row in grades_by_teacher.values())
+    average = sum(row['average'] * row['graded'] for row in grades_by_teacher.values()) / graded if graded else None
+    gpa = sum(row['points'] for row in grades_by_teacher.values()) / graded if graded else 0.0
+
+    stats_data = {
+        "attendanceRate": rate(total_attended, total_recorded),
+        "currentGPA": round(gpa, 2),
+        "completedAssignments": sum(1 for assignment in assignments if assignment.submitted),
+        "totalAssignments": len(assignments),
+        "currentGrade": letter_grade(average),
+    }
+
+    subjects = {}
+    for entry in schedule:
+        subjects.setdefault((entry.subject, entry.teacher_id), []).append(entry)
+
+    subjects_data = []
+    subject_slots = []
+    for idx, ((subject, teacher_id), entries) in enumerate(sorted(subjects.items(), key=lambda item: item[0][0])):
+        teacher = entries[0].teacher
+        days = {WEEKDAYS[entry.day_of_week] for entry in entries}
+        subject_attendance = [attendance_by_day.get(day, (0, 0)) for day in days]
+        subject_grades = grades_by_teacher.get(teacher_id)
+        subjects_data.append({
+            "id": idx + 1,
+            "name": subject,
+            "teacher": f"{teacher.user.first_name} {teacher.user.last_name}" if teacher else "Unknown",
+            "grade": letter_grade(subject_grades['average'] if subject_grades else None),
+            "attendance": rate(sum(a for a, _ in subject_attendance), sum(r for _, r in subject_attendance)),
+        })
+        subject_slots.append([(WEEKDAYS[entry.day_of_week], entry.start_time) for entry in entries])
+
+    return {
+        'payload': {
+            "stats": stats_data,
+            "subjects": subjects_data,
+            "assignments": AssignmentSerializer(assignments, many=True).data,
+            "schedule": TimetableSerializer(schedule, many=True).data,
+            "grades": GradeSerializer(grades, many=True).data,
+        },
+        'open_due_dates': [assignment.due_date for assignment in assignments if not assignment.submitted],
+        'subject_slots': subject_slots,
+        'periods': periods,
+    }
+
+
+def with_clock(dashboard, now=None):
+    """The payload of a built dashboard with its time-dependent fields filled in for ``now``."""
+    now = now or timezone.localtime()
+    today = now.date()
+    payload = dashboard['payload']
+    return {
+        **payload,
+        "stats": {
+            **payload["stats"],
+            "upcomingDeadlines": sum(1 for due_date in dashboard['open_due_dates'] if due_date >= today),
+        },
+        "subjects": [
+            {**subject, "nextClass": next_class(slots, now, dashboard['periods'])}
+            for subject, slots in zip(payload["subjects"], dashboard['subject_slots'])
+        ],
+    }
+
+
+# === Caching ===
+
+def student_cache_key(student_id):
+    # v2: entries hold the built dashboard rather than a finished payload
+    return f'student_dashboard:v2:{student_id}'
+
+
+def class_version_key(class_id):
+    return f'student_dashboard_class_version:{class_id}'
+
+
+def class_version(class_id):
+    """The class's current version, starting a fresh one if the cache has lost it."""
+    key = class_version_key(class_id)
+    version = cache.get(key)
+    if version is None:
+        # A fixed fallback would revive entries stored under it before an eviction
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+def get_cached_dashboard(student_id):
+    """Return the cached payload for a student, or None if missing or outdated."""
+    entry = cache.get(student_cache_key(student_id))
+    if entry is None:
+        return None
+    if entry['class_id'] is not None and class_version(entry['class_id']) != entry['class_version']:
+        return None
+    return with_clock(entry['dashboard'])
+
+
+def get_student_dashboard(student):
+    """Serve the dashboard from cache, building and storing it on a miss."""
+    payload = get_cached_dashboard(student.pk)
+    if payload is not None:
+        return payload, True
+
+    # Read the class version before building so a concurrent bump invalidates this entry
+    version = class_version(student.school_class_id) if student.school_class_id else None
+    built = build_student_dashboard(student)
+    cache.set(student_cache_key(student.pk), {
+        'class_id': student.school_class_id,
+        'class_version': version,
+        'dashboard': built,
+    }, getattr(settings, 'STUDENT_DASHBOARD_CACHE_TIMEOUT', settings.API_CACHE_TIMEOUT))
+    return with_clock(built), False
+
+
+def invalidate_students(student_ids):
+    """Drop the cached dashboards of the given students once the transaction commits."""
+    keys = [student_cache_key(pk) for pk in set(student_ids) if pk is not None]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def invalidate_class(class_id):
+    """Outdate every cached dashboard of a class once the transaction commits."""
+    if class_id is None:
+        return
+
+    # A fresh random version rather than incr(): a counter restarted after eviction could
+    # come back round to a version that outdated entries were stored with
+    transaction.on_commit(lambda: cache.set(class_version_key(class_id), uuid.uuid4().hex, None))
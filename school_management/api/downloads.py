@@ -0,0 +1,170 @@
+"""
+File download responses.
+
+``serve_file`` streams a file from disk in fixed-size chunks, never reading it
+into memory, so concurrent downloads of large files don't grow the worker.
+It answers ``If-None-Match`` with 304 and single-range ``Range`` requests
+with 206, so interrupted downloads can resume, and can gzip text files on the
+fly for clients that accept it.
+
+When ``SENDFILE_HEADER`` is set, the file is handed off to the web server
+instead of being streamed by Django:
+
+- ``'X-Sendfile'`` (Apache mod_xsendfile, lighttpd) sends the absolute path.
+- ``'X-Accel-Redirect'`` (nginx) sends an internal URL: the file's path
+  relative to one of the ``SENDFILE_LOCATIONS`` directories, under that
+  directory's internal location prefix.
+
+The web server then takes care of ranges itself.
+"""
+import os
+import re
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.http import content_disposition_header
+
+from .snapshots import iter_gzip
+
+CHUNK_SIZE = 64 * 1024
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+ACCEPTS_GZIP_RE = re.compile(r'\bgzip\b')
+
+
+def parse_range(header, size):
+    """
+    ``(start, end)`` inclusive for a single-range ``Range`` header.
+
+    Returns None when the header is absent or not a single byte range (the
+    whole file is then served, as RFC 9110 allows), and raises ValueError when
+    the range cannot be satisfied.
+    """
+    match = RANGE_RE.match(header.replace(' ', '')) if header else None
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError('Empty suffix range')
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError('Range not satisfiable')
+    return start, end
+
+
+def read_range(path, start, length):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def sendfile_location(path):
+    header = getattr(settings, 'SENDFILE_HEADER', None)
+    if header == 'X-Accel-Redirect':
+        for root, prefix in getattr(settings, 'SENDFILE_LOCATIONS', {}).items():
+            relative = os.path.relpath(path, os.fspath(root))
+            if not relative.startswith(os.pardir):
+                return header, prefix.rstrip('/') + '/' + relative.replace(os.sep, '/')
+        return None
+    if header:
+        return header, path
+    return None
+
+
+def etag_matches(request, etag):
+    header = request.META.get('HTTP_IF_NONE_MATCH', '')
+    return header.strip() == '*' or etag in [tag.strip() for tag in header.split(',')]
+
+
+def file_etag(path):
+    """ETag from a file's size and modification time; changes whenever the file is rewritten."""
+    stat = os.stat(path)
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def accepts_gzip(request):
+    return bool(ACCEPTS_GZIP_RE.search(request.META.get('HTTP_ACCEPT_ENCODING', '')))
+
+
+def iter_file(path):
+    with open(path, 'rb') as f:
+        yield from iter(lambda: f.read(CHUNK_SIZE), b'')
+
+
+def serve_file(request, path, content_type, filename, etag=None, as_attachment=True, compress=False):
+    """
+    Respond with the file at ``path``, honouring conditional and Range requests.
+
+    ``etag`` defaults to one derived from the file's size and mtime. With
+    ``compress``, clients that accept gzip get the whole file gzip-encoded on
+    the fly, chunk by chunk; Range requests are always answered from the
+    uncompressed file.
+    """
+    etag = etag or file_etag(path)
+    range_header = request.META.get('HTTP_RANGE')
+    sendfile = sendfile_location(path)
+    gzipped = compress and not sendfile and not range_header and accepts_gzip(request)
+    if gzipped:
+        # A different representation needs its own validator
+        etag = etag[:-1] + '-gzip"'
+
+    headers = {
+        'ETag': etag,
+        'Accept-Ranges': 'bytes',
+        'Content-Disposition': content_disposition_header(as_attachment, filename),
+    }
+    if compress:
+        headers['Vary'] = 'Accept-Encoding'
+
+    if etag_matches(request, etag):
+        response = HttpResponse(status=304)
+        response['ETag'] = etag
+        return response
+
+    if sendfile:
+        response = HttpResponse(content_type=content_type, headers=headers)
+        response[sendfile[0]] = sendfile[1]
+        return response
+
+    if gzipped:
+        response = StreamingHttpResponse(iter_gzip(iter_file(path)), content_type=content_type, headers=headers)
+        response['Content-Encoding'] = 'gzip'
+        return response
+
+    size = os.path.getsize(path)
+    # A stale If-Range means the client's partial copy is outdated: send everything
+    if range_header and request.META.get('HTTP_IF_RANGE', etag) != etag:
+        range_header = None
+
+    try:
+        byte_range = parse_range(range_header, size)
+    except ValueError:
+        response = HttpResponse(status=416, headers={'Content-Range': f'bytes */{size}'})
+        return response
+
+    if byte_range is None:
+        # FileResponse lets the WSGI server use wsgi.file_wrapper (sendfile(2) where available)
+        del headers['Content-Disposition']
+        return FileResponse(
+            open(path, 'rb'), as_attachment=as_attachment, filename=filename,
+            content_type=content_type, headers=headers,
+        )
+
+    start, end = byte_range
+    response = StreamingHttpResponse(
+        read_range(path, start, end - start + 1), status=206, content_type=content_type, headers=headers
+    )
+    response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Content-Length'] = end - start + 1
+    return response
@@ -0,0 +1,249 @@
+"""
+Bulk grade and attendance ingestion.
+
+A whole class (or school) worth of rows is validated in one pass: field types
+are checked row by row, then every referenced student and assignment is looked
+up with a single query each. Valid rows are upserted with
+``bulk_create(update_conflicts=True)`` against the models' unique constraints,
+so re-sending a day's attendance or a corrected grade sheet overwrites the
+earlier values instead of failing. Invalid rows are reported back by index and
+never block the valid ones.
+"""
+import time as timer
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from . import attendance_rollups, dashboard, stats
+from .models import User, Student, Teacher, Attendance, Assignment, AssignmentSubmission, Grade
+
+MAX_ROWS = 20000
+BATCH_SIZE = 1000
+
+
+class IngestError(ValueError):
+    """Raised when a bulk payload cannot be processed at all."""
+    pass
+
+
+class IngestResult:
+    """Accumulates per-row errors and write counts for one bulk operation."""
+
+    def __init__(self, operation, received):
+        self.operation = operation
+        self.received = received
+        self.written = 0
+        self.errors = {}
+        self.started = timer.monotonic()
+
+    def add_error(self, index, field, message):
+        self.errors.setdefault(index, {})[field] = message
+
+    def is_valid(self, index):
+        return index not in self.errors
+
+    def as_dict(self):
+        failed = len(self.errors)
+        if not failed:
+            outcome = 'completed'
+        elif self.written:
+            outcome = 'partial'
+        else:
+            outcome = 'failed'
+        return {
+            'operation': self.operation,
+            'status': outcome,
+            'received': self.received,
+            'written': self.written,
+            'failed': failed,
+            'errors': [{'row': index, 'errors': self.errors[index]} for index in sorted(self.errors)],
+            'elapsed_ms': round((timer.monotonic() - self.started) * 1000, 1),
+        }
+
+
+def check_rows(rows):
+    if not isinstance(rows, list):
+        raise IngestError('data must be a list of rows')
+    if len(rows) > MAX_ROWS:
+        raise IngestError(f'At most {MAX_ROWS} rows can be sent in one request')
+
+
+def parse_pk(result, index, row, field):
+    value = row.get(field)
+    if value is None or value == '':
+        result.add_error(index, field, 'This field is required.')
+        return None
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        result.add_error(index, field, 'A valid integer is required.')
+        return None
+    if value < 1:
+        result.add_error(index, field, 'A valid integer is required.')
+        return None
+    return value
+
+
+def has_full_access(user):
+    """Principals and staff may write for any class; teachers only for their own."""
+    return user.role == User.Role.PRINCIPAL or user.is_staff
+
+
+def ingest_attendance(rows, user, default_date=None):
+    """
+    Upsert attendance rows ``{"student": id, "status": ..., "date": "YYYY-MM-DD"}``.
+
+    ``default_date`` applies to rows without their own date. Teachers may only
+    mark students in classes they are the class teacher of.
+    """
+    check_rows(rows)
+    result = IngestResult('bulk_attendance', len(rows))
+    statuses = set(Attendance.Status.values)
+    if default_date is not None and parse_date(str(default_date)) is None:
+        raise IngestError('date must be in YYYY-MM-DD format')
+
+    parsed = []
+    seen = {}
+    for index, row in enumerate(rows):
+        if not isinstance(row, dict):
+            result.add_error(index, 'non_field_errors', 'Each row must be an object.')
+            continue
+        student_id = parse_pk(result, index, row, 'student')
+
+        raw_date = row.get('date', default_date)
+        try:
+            date = parse_date(str(raw_date)) if raw_date else None
+        except ValueError:
+            date = None
+        if date is None:
+            result.add_error(index, 'date', 'A valid date (YYYY-MM-DD) is required.')
+
+        row_status = row.get('status')
+        if row_status not in statuses:
+            result.add_error(index, 'status', f"Must be one of: {', '.join(sorted(statuses))}.")
+
+        if not result.is_valid(index):
+            continue
+        key = (student_id, date)
+        if key in seen:
+            result.add_error(index, 'student', f'Duplicate of row {seen[key]} for the same student and date.')
+            continue
+        seen[key] = index
+        parsed.append((index, student_id, date, row_status))
+
+    students = Student.objects.filter(pk__in={student_id for _, student_id, _, _ in parsed})
+    if not has_full_access(user):
+        students = students.filter(school_class__teacher=user)
+    class_teachers = dict(students.values_list('pk', 'school_class__teacher'))
+
+    records = []
+    for index, student_id, date, row_status in parsed:
+        if student_id not in class_teachers:
+            result.add_error(index, 'student', 'Student not found or not in one of your classes.')
+            continue
+        records.append(Attendance(student_id=student_id, date=date, status=row_status))
+
+    with transaction.atomic():
+        Attendance.objects.bulk_create(
+            records, batch_size=BATCH_SIZE,
+            update_conflicts=True, unique_fields=['student', 'date'], update_fields=['status', 'updated_at'],
+        )
+        attendance_rollups.record_changes((record.student_id, record.date) for record in records)
+        stats.schedule_refresh(
+            ['attendance'], teacher_ids={class_teachers[record.student_id] for record in records}
+        )
+        dashboard.invalidate_students(record.student_id for record in records)
+    result.written = len(records)
+    return result
+
+
+def ingest_grades(rows, user):
+    """
+    Upsert grade rows ``{"student": id, "assignment": id, "score": 0-100, "feedback": ""}``.
+
+    Each row writes the ``Grade`` for the student and assignment and records
+    the same score on the student's ``AssignmentSubmission``, creating a graded
+    submission when the work was handed in offline. Teachers may only grade
+    their own assignments, and only for students of the assignment's class.
+    """
+    check_rows(rows)
+    result = IngestResult('bulk_grade_update', len(rows))
+
+    parsed = []
+    seen = {}
+    for index, row in enumerate(rows):
+        if not isinstance(row, dict):
+            result.add_error(index, 'non_field_errors', 'Each row must be an object.')
+            continue
+        student_id = parse_pk(result, index, row, 'student')
+        assignment_id = parse_pk(result, index, row, 'assignment')
+
+        score = row.get('score')
+        if isinstance(score, bool) or not str(score).strip().isdigit() or int(score) > 100:
+            result.add_error(index, 'score', 'Score must be a whole number between 0 and 100.')
+
+        feedback = row.get('feedback', '')
+        if not isinstance(feedback, str):
+            result.add_error(index, 'feedback', 'Feedback must be a string.')
+
+        if not result.is_valid(index):
+            continue
+        key = (student_id, assignment_id)
+        if key in seen:
+            result.add_error(index, 'student', f'Duplicate of row {seen[key]} for the same student and assignment.')
+            continue
+        seen[key] = index
+        parsed.append((index, student_id, assignment_id, int(score), feedback))
+
+    assignments = Assignment.objects.filter(pk__in={assignment_id for _, _, assignment_id, _, _ in parsed})
+    if not has_full_access(user):
+        assignments = assignments.filter(teacher__user=user)
+    assignment_owners = {
+        pk: (class_id, teacher_id)
+        for pk, class_id, teacher_id in assignments.values_list('pk', 'school_class_id', 'teacher_id')
+    }
+    student_classes = dict(
+        Student.objects.filter(pk__in={student_id for _, student_id, _, _, _ in parsed})
+        .values_list('pk', 'school_class_id')
+    )
+
+    grades = []
+    submissions = []
+    now = timezone.now()
+    graded_by = Teacher.objects.filter(user=user).first()
+    for index, student_id, assignment_id, score, feedback in parsed:
+        if assignment_id not in assignment_owners:
+            result.add_error(index, 'assignment', 'Assignment not found or not one of yours.')
+            continue
+        if student_id not in student_classes:
+            result.add_error(index, 'student', 'Student not found.')
+            continue
+        if student_classes[student_id] != assignment_owners[assignment_id][0]:
+            result.add_error(index, 'student', "Student is not in the assignment's class.")
+            continue
+        grades.append(Grade(student_id=student_id, assignment_id=assignment_id, score=score))
+        submissions.append(AssignmentSubmission(
+            student_id=student_id, assignment_id=assignment_id, grade=score, feedback=feedback,
+            status=AssignmentSubmission.Status.GRADED, graded_at=now, graded_by=graded_by,
+        ))
+
+    with transaction.atomic():
+        Grade.objects.bulk_create(
+            grades, batch_size=BATCH_SIZE,
+            update_conflicts=True, unique_fields=['student', 'assignment'], update_fields=['score', 'graded_date', 'updated_at'],
+        )
+        AssignmentSubmission.objects.bulk_create(
+            submissions, batch_size=BATCH_SIZE,
+            update_conflicts=True, unique_fields=['assignment', 'student'],
+            update_fields=['grade', 'feedback', 'status', 'graded_at', 'graded_by'],
+        )
+        owners = [assignment_owners[grade.assignment_id] for grade in grades]
+        stats.schedule_refresh(
+            ['assignments', 'grades', 'ranks'],
+            teacher_ids={teacher_id for _, teacher_id in owners},
+            class_ids={class_id for class_id, _ in owners},
+        )
+        dashboard.invalidate_students(grade.student_id for grade in grades)
+    result.written = len(grades)
+    return result
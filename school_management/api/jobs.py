@@ -0,0 +1,87 @@
+"""
+Background job execution.
+
+The API enqueues ``BackgroundJob`` rows and returns immediately; the
+``run_jobs`` management command claims queued jobs and executes them, either
+inline or in a process pool. Each job type maps to a handler that receives the
+job and returns a JSON-serialisable result.
+
+Pool processes are spawned and unpickle functions from this module before
+Django is set up, so models are imported inside the functions that need them.
+"""
+import logging
+import os
+import socket
+from io import StringIO
+
+from django.core.management import call_command
+from django.utils import timezone
+
+from . import report_renderers
+
+logger = logging.getLogger('api.jobs')
+
+REPORT_TYPES = ['all', 'academic', 'financial', 'attendance', 'performance']
+REPORT_FORMATS = report_renderers.FORMATS
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def enqueue(job_type, params=None, user=None):
+    """Queue a job and return it."""
+    from .models import BackgroundJob
+
+    job = BackgroundJob.objects.create(job_type=job_type, params=params or {}, requested_by=user)
+    logger.info(f"Queued {job_type} job {job.pk}")
+    return job
+
+
+def generate_reports(job):
+    """Run the generate_reports command into a directory named after the job."""
+    from .management.commands.generate_reports import Command as GenerateReportsCommand
+
+    report_type = job.params.get('report_type', 'all')
+    output_format = job.params.get('format', 'json')
+    # call_command() does not enforce argparse choices for keyword options
+    if report_type not in REPORT_TYPES:
+        raise ValueError(f"Unsupported report type: {report_type!r}")
+    output_format = ','.join(report_renderers.parse_formats(output_format))
+
+    report_id = f"report_{timezone.now():%Y%m%d_%H%M%S}_job{job.pk}"
+    command = GenerateReportsCommand(stdout=StringIO(), stderr=StringIO())
+    command.progress_callback = job.set_progress
+    call_command(command, report_type=report_type, format=output_format, report_id=report_id)
+    return {'report_id': report_id}
+
+
+HANDLERS = {
+    'generate_reports': generate_reports,
+}
+
+
+def run_job(job_id):
+    """Execute a claimed job and record its outcome. Safe to call in a pool worker."""
+    from .models import BackgroundJob
+
+    job = BackgroundJob.objects.get(pk=job_id)
+    handler = HANDLERS.get(job.job_type)
+    try:
+        if handler is None:
+            raise ValueError(f"No handler for job type '{job.job_type}'")
+        result = handler(job)
+    except Exception as e:
+        logger.exception(f"Job {job.pk} ({job.job_type}) failed")
+        job.mark_failed(e)
+    else:
+        job.mark_succeeded(result)
+        logger.info(f"Job {job.pk} ({job.job_type}) succeeded")
+    return job.pk, job.status
+
+
+def init_pool_worker():
+    """Set up Django in a freshly spawned pool process."""
+    import django
+
+    django.setup()
@@ -0,0 +1,96 @@
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+
+from api import ratelimit
+from api.middleware import RateLimitMiddleware
+
+
+class Command(BaseCommand):
+    help = 'Measure RateLimitMiddleware overhead per request under concurrent load'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=8,
+            help='Number of concurrent client threads'
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=2000,
+            help='Requests sent by each thread'
+        )
+        parser.add_argument(
+            '--clients',
+            type=int,
+            default=1,
+            help='Distinct client IPs the threads rotate through (1 = every thread shares one counter)'
+        )
+        parser.add_argument(
+            '--cache',
+            default=getattr(settings, 'RATE_LIMIT_CACHE', 'default'),
+            choices=list(settings.CACHES),
+            help='Cache alias to benchmark against'
+        )
+
+    def handle(self, *args, **options):
+        threads, per_thread, clients = options['threads'], options['requests'], options['clients']
+        if min(threads, per_thread, clients) < 1:
+            raise CommandError('--threads, --requests and --clients must be positive')
+
+        # A dedicated group, so the run neither trips nor pollutes real counters
+        group = f'benchmark-{uuid.uuid4().hex[:8]}'
+        policies = [{'name': group, 'prefixes': ['/'], 'requests': threads * per_thread * 2, 'window': 3600}]
+        factory = RequestFactory()
+
+        def endpoint(request):
+            return HttpResponse()
+
+        with override_settings(RATE_LIMIT_ENABLED=True, RATE_LIMIT_CACHE=options['cache'],
+                               RATE_LIMIT_POLICIES=policies):
+            baseline = self.run(endpoint, factory, threads, per_thread, clients)
+            limited = self.run(RateLimitMiddleware(endpoint), factory, threads, per_thread, clients)
+
+            # With an atomic incr() every request must be counted exactly once
+            window_index = int(time.time() // 3600)
+            counted = sum(
+                ratelimit.get_cache().get(f'{ratelimit.KEY_PREFIX}:{group}:10.0.0.{client}:{window_index}', 0)
+                for client in range(clients)
+            )
+
+        total = threads * per_thread
+        overhead = statistics.mean(limited) - statistics.mean(baseline)
+        self.stdout.write(f"Backend: {settings.CACHES[options['cache']]['BACKEND']}")
+        self.stdout.write(f'{threads} threads x {per_thread} requests, {clients} client IP(s)')
+        self.stdout.write(f'Baseline:   {statistics.mean(baseline) * 1e6:8.1f} us/request')
+        self.stdout.write(f'Middleware: {statistics.mean(limited) * 1e6:8.1f} us/request '
+                          f'(p99 {statistics.quantiles(limited, n=100)[98] * 1e6:.1f} us)')
+        self.stdout.write(f'Overhead:   {overhead * 1e6:8.1f} us/request')
+        self.stdout.write(f'Counted {counted} of {total} requests')
+        if counted == total:
+            self.stdout.write(self.style.SUCCESS('No increments were lost.'))
+        else:
+            self.stdout.write(self.style.WARNING(f'{total - counted} increments were lost; '
+                                                 'this cache backend has no atomic incr().'))
+
+    def run(self, handler, factory, threads, per_thread, clients):
+        """Send requests from ``threads`` threads and return every request's latency in seconds."""
+        def client(thread):
+            timings = []
+            for i in range(per_thread):
+                request = factory.get('/api/students/', REMOTE_ADDR=f'10.0.0.{(thread + i) % clients}')
+                started = time.perf_counter()
+                handler(request)
+                timings.append(time.perf_counter() - started)
+            return timings
+
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            return [timing for timings in pool.map(client, range(threads)) for timing in timings]
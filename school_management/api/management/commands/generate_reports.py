@@ -1,22 +1,27 @@
 import os
 import json
-from datetime import datetime, timedelta
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
 from django.core.management.base import BaseCommand, CommandError
 from django.conf import settings
 from django.utils import timezone
-from django.db.models import Sum, Count, Avg
+from django.db import connection
+from django.db.models import Sum, Count, Avg, F
+from django.db.models.functions import Coalesce, TruncMonth
+from django.test.utils import CaptureQueriesContext
 from api.models import *
-import pandas as pd
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
+from api import attendance_rollups, report_catalog, report_renderers
 
 
 class Command(BaseCommand):
     help = 'Generate comprehensive reports and store them in organized folder structure'
 
+    # Set by the background job runner to receive (percent, message) updates
+    progress_callback = None
+
     def add_arguments(self, parser):
         parser.add_argument(
             '--report-type',
@@ -28,15 +33,34 @@ class Command(BaseCommand):
         parser.add_argument(
             '--format',
             type=str,
-            choices=['json', 'csv', 'html', 'pdf'],
             default='json',
-            help='Output format for reports'
+            help='Output formats for reports, comma-separated (json, csv, html, pdf)'
         )
         parser.add_argument(
             '--date-range',
             type=str,
             help='Date range in format YYYY-MM-DD:YYYY-MM-DD'
         )
+        parser.add_argument(
+            '--report-id',
+            type=str,
+            help='Directory name for the report (defaults to report_<timestamp>)'
+        )
+        parser.add_argument(
+            '--months',
+            type=int,
+            help='Months covered by the monthly trends (default 12 for fees, 6 for attendance)'
+        )
+        parser.add_argument(
+            '--profile',
+            action='store_true',
+            help='Print the number of queries and time spent per report section'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            help='Processes rendering report files (default REPORT_RENDER_WORKERS; 1 renders inline)'
+        )
 
     def handle(self, *args, **options):
         self.stdout.write(
@@ -47,9 +71,14 @@ class Command(BaseCommand):
         reports_base_dir = os.path.join(settings.BASE_DIR, 'reports')
         timestamp = timezone.now().strftime('%Y%m%d_%H%M%S')
 
-        # Create timestamped report directory
-        report_dir = os.path.join(reports_base_dir, f'report_{timestamp}')
+        # Create the report directory; callers such as the job runner pass an
+        # explicit id so they know exactly where the output went
+        report_id = options.get('report_id') or f'report_{timestamp}'
+        if os.path.basename(report_id) != report_id or not report_id.startswith('report_'):
+            raise CommandError(f"Invalid report id '{report_id}'")
+        report_dir = os.path.join(reports_base_dir, report_id)
         os.makedirs(report_dir, exist_ok=True)
+        self.report_id = report_id
 
         # Create subdirectories for different report types
         subdirs = ['academic', 'financial', 'attendance', 'performance', 'summary']
@@ -57,35 +86,160 @@ class Command(BaseCommand):
             os.makedirs(os.path.join(report_dir, subdir), exist_ok=True)
 
         report_type = options['report_type']
-        output_format = options['format']
-
         try:
-            if report_type in ['all', 'academic']:
-                self.generate_academic_reports(report_dir, output_format)
-
-            if report_type in ['all', 'financial']:
-                self.generate_financial_reports(report_dir, output_format)
-
-            if report_type in ['all', 'attendance']:
-                self.generate_attendance_reports(report_dir, output_format)
-
-            if report_type in ['all', 'performance']:
-                self.generate_performance_reports(report_dir, output_format)
+            formats = report_renderers.parse_formats(options['format'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        if options.get('months') is not None and options['months'] < 1:
+            raise CommandError('--months must be positive')
+        workers = options.get('workers')
+        if workers is None:
+            workers = getattr(settings, 'REPORT_RENDER_WORKERS', 1)
+        if workers < 1:
+            raise CommandError('--workers must be positive')
+        self.months = options.get('months')
+        self.profile = options.get('profile', False)
+        self.profile_rows = []
+        # Query results shared between report families within this run; see shared_query()
+        self.shared = {}
+        self.started_at = timezone.now()
+        self.recent_cutoff = self.started_at - timedelta(days=30)
+        # (directory, filename, data) for every report family, rendered once all are built
+        self.datasets = []
+
+        stages = [
+            (name, generate) for name, generate in [
+                ('academic', self.generate_academic_reports),
+                ('financial', self.generate_financial_reports),
+                ('attendance', self.generate_attendance_reports),
+                ('performance', self.generate_performance_reports),
+            ]
+            if report_type in ['all', name]
+        ]
+        stages.append(('summary', self.generate_summary_report))
+
+        steps = len(stages) + 2
+        try:
+            for index, (name, generate) in enumerate(stages):
+                self.report_progress(index * 100 // steps, f'Generating {name} reports')
+                with self.profile_section(name):
+                    generate(report_dir)
 
-            # Generate summary report
-            self.generate_summary_report(report_dir, output_format)
+            self.report_progress(len(stages) * 100 // steps, f"Rendering {', '.join(formats)}")
+            with self.profile_section('render'):
+                self.render_reports(formats, workers)
 
             # Create metadata file
-            self.create_metadata_file(report_dir, timestamp, report_type)
+            self.report_progress((len(stages) + 1) * 100 // steps, 'Writing metadata')
+            self.create_metadata_file(report_dir, timestamp, report_type, report_id=report_id,
+                                      output_format=','.join(formats))
 
             self.stdout.write(
                 self.style.SUCCESS(f'Reports generated successfully in: {report_dir}')
             )
+            if self.profile:
+                self.print_profile()
 
         except Exception as e:
             raise CommandError(f'Error generating reports: {str(e)}')
 
-    def generate_academic_reports(self, report_dir, output_format):
+    def report_progress(self, percent, message):
+        """Forward progress to the job runner, if one is listening."""
+        if self.progress_callback is not None:
+            self.progress_callback(percent, message)
+
+    @contextmanager
+    def profile_section(self, name):
+        """With --profile, record the queries run and the time spent inside the block."""
+        if not self.profile:
+            yield
+            return
+        started = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            yield
+        self.profile_rows.append((name, len(queries), time.perf_counter() - started))
+
+    def print_profile(self):
+        self.stdout.write(f"{'Section':<14}{'Queries':>9}{'Seconds':>10}")
+        for name, query_count, seconds in self.profile_rows:
+            self.stdout.write(f'{name:<14}{query_count:>9}{seconds:>10.3f}')
+        self.stdout.write(f"{'total':<14}{sum(row[1] for row in self.profile_rows):>9}"
+                          f"{sum(row[2] for row in self.profile_rows):>10.3f}")
+
+    def shared_query(self, key, compute):
+        """
+        Evaluate ``compute`` once per run.
+
+        Several families need the same grouped rows (the summary's totals are
+        sums of the financial, attendance and performance breakdowns), so with
+        ``--report-type all`` each is read from the database only once.
+        """
+        if key not in self.shared:
+            self.shared[key] = compute()
+        return self.shared[key]
+
+    def recent_months(self, count):
+        """First days of the last ``count`` calendar months, newest first."""
+        today = timezone.localdate()
+        year, month = today.year, today.month
+        months = []
+        for _ in range(count):
+            months.append(date(year, month, 1))
+            year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+        return months
+
+    def monthly_rows(self, queryset, date_field, months, **aggregates):
+        """
+        One grouped query for a monthly trend: ``aggregates`` per month in ``months``.
+
+        Months without rows are filled in with zeros, so the query count does
+        not depend on how many months are requested.
+        """
+        first, last = months[-1], months[0]
+        end = date(last.year + last.month // 12, last.month % 12 + 1, 1)
+        rows = (
+            queryset.filter(**{f'{date_field}__gte': first, f'{date_field}__lt': end})
+            .values(period=TruncMonth(date_field))
+            .annotate(**aggregates)
+            .order_by()
+        )
+        by_month = {row['period']: row for row in rows}
+        return [
+            {
+                'month': month.strftime('%Y-%m'),
+                **{name: by_month.get(month, {}).get(name) or 0 for name in aggregates},
+            }
+            for month in months
+        ]
+
+    def fee_status_rows(self):
+        return self.shared_query('fee_status', lambda: list(
+            Fee.objects.values('status').annotate(
+                count=Count('id'),
+                total_amount=Sum('amount'),
+                recent=Count('id', filter=models.Q(due_date__gte=self.recent_cutoff.date()))
+            ).order_by('status')
+        ))
+
+    def attendance_status_counts(self):
+        return self.shared_query('attendance_status', lambda: {
+            status: count or 0
+            for status, count in StudentMonthlyAttendance.objects.aggregate(
+                **attendance_rollups.status_sums()
+            ).items()
+        })
+
+    def grade_distribution(self):
+        return self.shared_query('grade_distribution', lambda: list(
+            Grade.objects.values('score').annotate(count=Count('score')).order_by('score')
+        ))
+
+    def class_distribution(self):
+        return self.shared_query('class_distribution', lambda: list(
+            SchoolClass.objects.annotate(student_count=Count('students')).values('name', 'student_count')
+        ))
+
+    def generate_academic_reports(self, report_dir):
         """Generate academic-related reports"""
         self.stdout.write('Generating Academic Reports...')
 
@@ -98,9 +252,7 @@ class Command(BaseCommand):
         ))
 
         # Class distribution report
-        class_distribution = list(SchoolClass.objects.annotate(
-            student_count=Count('students')
-        ).values('name', 'student_count'))
+        class_distribution = self.class_distribution()
 
         # Teacher workload report
         teacher_workload = list(Teacher.objects.select_related('user').annotate(
@@ -122,47 +274,38 @@ class Command(BaseCommand):
             'subject_distribution': subject_distribution
         }
 
-        self.save_report(academic_dir, 'academic_reports', reports, output_format)
+        self.save_report(academic_dir, 'academic_reports', reports)
 
-    def generate_financial_reports(self, report_dir, output_format):
+    def generate_financial_reports(self, report_dir):
         """Generate financial reports"""
         self.stdout.write('Generating Financial Reports...')
 
         financial_dir = os.path.join(report_dir, 'financial')
 
-        # Fee collection summary
-        fee_summary = Fee.objects.aggregate(
-            total_amount=Sum('amount'),
-            paid_amount=Sum('amount', filter=models.Q(status='paid')),
-            pending_amount=Sum('amount', filter=models.Q(status__in=['unpaid', 'partial']))
-        )
+        # Fee status breakdown; the summary and the totals are sums over it
+        status_rows = self.fee_status_rows()
+        fee_status_breakdown = [
+            {'status': row['status'], 'count': row['count'], 'total_amount': row['total_amount']}
+            for row in status_rows
+        ]
 
-        # Fee status breakdown
-        fee_status_breakdown = list(Fee.objects.values('status').annotate(
-            count=Count('status'),
-            total_amount=Sum('amount')
-        ))
+        def total(statuses=None):
+            amounts = [row['total_amount'] for row in status_rows if statuses is None or row['status'] in statuses]
+            return sum(amounts) if amounts else None
 
-        # Monthly fee collection trend (last 12 months)
-        monthly_trend = []
-        for i in range(12):
-            date = timezone.now() - timedelta(days=30*i)
-            month_start = date.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-            month_end = (month_start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
-
-            monthly_data = Fee.objects.filter(
-                due_date__gte=month_start,
-                due_date__lte=month_end
-            ).aggregate(
-                collected=Sum('amount', filter=models.Q(status='paid')),
-                pending=Sum('amount', filter=models.Q(status__in=['unpaid', 'partial']))
-            )
+        # Fee collection summary
+        fee_summary = {
+            'total_amount': total(),
+            'paid_amount': total(['paid']),
+            'pending_amount': total(['unpaid', 'partial'])
+        }
 
-            monthly_trend.append({
-                'month': month_start.strftime('%Y-%m'),
-                'collected': monthly_data['collected'] or 0,
-                'pending': monthly_data['pending'] or 0
-            })
+        # Monthly fee collection trend (last 12 months)
+        monthly_trend = self.monthly_rows(
+            Fee.objects, 'due_date', self.recent_months(self.months or 12),
+            collected=Sum('amount', filter=models.Q(status='paid')),
+            pending=Sum('amount', filter=models.Q(status__in=['unpaid', 'partial']))
+        )
 
         # Class-wise fee analysis
         class_fee_analysis = list(Fee.objects.values(
@@ -180,66 +323,58 @@ class Command(BaseCommand):
             'class_fee_analysis': class_fee_analysis
         }
 
-        self.save_report(financial_dir, 'financial_reports', reports, output_format)
+        self.save_report(financial_dir, 'financial_reports', reports)
 
-    def generate_attendance_reports(self, report_dir, output_format):
+    def generate_attendance_reports(self, report_dir):
         """Generate attendance reports"""
         self.stdout.write('Generating Attendance Reports...')
 
         attendance_dir = os.path.join(report_dir, 'attendance')
 
         # Overall attendance statistics
-        attendance_stats = Attendance.objects.aggregate(
-            total_records=Count('id'),
-            present_count=Count('id', filter=models.Q(status='present')),
-            absent_count=Count('id', filter=models.Q(status='absent')),
-            late_count=Count('id', filter=models.Q(status='late'))
-        )
+        status_counts = self.attendance_status_counts()
+        attendance_stats = {
+            'total_records': sum(status_counts.values()),
+            'present_count': status_counts.get('present', 0),
+            'absent_count': status_counts.get('absent', 0),
+            'late_count': status_counts.get('late', 0)
+        }
 
-        # Student-wise attendance
+        # Student-wise attendance, summed from the students' monthly rollups
         student_attendance = list(Student.objects.annotate(
-            total_classes=Count('attendance_records'),
-            present_count=Count('attendance_records', filter=models.Q(attendance_records__status='present')),
-            absent_count=Count('attendance_records', filter=models.Q(attendance_records__status='absent')),
-            late_count=Count('attendance_records', filter=models.Q(attendance_records__status='late'))
+            present_count=Coalesce(Sum('attendance_months__present'), 0),
+            absent_count=Coalesce(Sum('attendance_months__absent'), 0),
+            late_count=Coalesce(Sum('attendance_months__late'), 0)
+        ).annotate(
+            total_classes=F('present_count') + F('absent_count') + F('late_count')
         ).values(
             'user__first_name', 'user__last_name', 'user__username',
             'school_class__name', 'total_classes', 'present_count',
             'absent_count', 'late_count'
         ))
 
-        # Class-wise attendance
+        # Class-wise attendance, summed from the classes' monthly rollups in one
+        # grouped query; students are counted in a subquery so the rollup join
+        # does not multiply them
+        student_counts = Student.objects.filter(school_class=models.OuterRef('pk')).order_by().values(
+            'school_class').annotate(count=Count('pk')).values('count')
         class_attendance = list(SchoolClass.objects.annotate(
-            total_students=Count('students'),
-            avg_attendance=Avg(
-                Student.objects.filter(school_class=models.OuterRef('pk')).annotate(
-                    attendance_rate=Count('attendance_records', filter=models.Q(attendance_records__status='present')) * 100.0 / Count('attendance_records')
-                ).values('attendance_rate')
-            )
-        ).values('name', 'total_students', 'avg_attendance'))
+            total_students=Coalesce(models.Subquery(student_counts), 0),
+            present_count=Coalesce(Sum('attendance_months__present'), 0),
+            absent_count=Coalesce(Sum('attendance_months__absent'), 0),
+            late_count=Coalesce(Sum('attendance_months__late'), 0)
+        ).values('name', 'total_students', 'present_count', 'absent_count', 'late_count'))
+        for row in class_attendance:
+            total = row['present_count'] + row['absent_count'] + row['late_count']
+            row['avg_attendance'] = round(row['present_count'] * 100.0 / total, 2) if total else None
 
         # Monthly attendance trend
-        monthly_attendance = []
-        for i in range(6):
-            date = timezone.now() - timedelta(days=30*i)
-            month_start = date.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-            month_end = (month_start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
-
-            monthly_data = Attendance.objects.filter(
-                date__gte=month_start,
-                date__lte=month_end
-            ).aggregate(
-                present=Count('id', filter=models.Q(status='present')),
-                absent=Count('id', filter=models.Q(status='absent')),
-                late=Count('id', filter=models.Q(status='late'))
-            )
-
-            monthly_attendance.append({
-                'month': month_start.strftime('%Y-%m'),
-                'present': monthly_data['present'] or 0,
-                'absent': monthly_data['absent'] or 0,
-                'late': monthly_data['late'] or 0
-            })
+        monthly_attendance = self.monthly_rows(
+            StudentMonthlyAttendance.objects, 'month', self.recent_months(self.months or 6),
+            present=Sum('present'),
+            absent=Sum('absent'),
+            late=Sum('late')
+        )
 
         reports = {
             'attendance_statistics': attendance_stats,
@@ -248,18 +383,16 @@ class Command(BaseCommand):
             'monthly_attendance_trend': monthly_attendance
         }
 
-        self.save_report(attendance_dir, 'attendance_reports', reports, output_format)
+        self.save_report(attendance_dir, 'attendance_reports', reports)
 
-    def generate_performance_reports(self, report_dir, output_format):
+    def generate_performance_reports(self, report_dir):
         """Generate performance reports"""
         self.stdout.write('Generating Performance Reports...')
 
         performance_dir = os.path.join(report_dir, 'performance')
 
         # Grade distribution
-        grade_distribution = list(Grade.objects.values('score').annotate(
-            count=Count('score')
-        ).order_by('score'))
+        grade_distribution = self.grade_distribution()
 
         # Student performance summary
         student_performance = list(Student.objects.annotate(
@@ -272,17 +405,19 @@ class Command(BaseCommand):
 
         # Assignment-wise performance
         assignment_performance = list(Assignment.objects.annotate(
-            avg_score=Avg('submissions__score'),
+            avg_score=Avg('submissions__grade'),
             total_submissions=Count('submissions')
         ).values('title', 'avg_score', 'total_submissions'))
 
-        # Top performers
-        top_performers = list(Student.objects.annotate(
-            avg_score=Avg('grades__score')
-        ).filter(avg_score__isnull=False).order_by('-avg_score')[:10].values(
-            'user__first_name', 'user__last_name', 'user__username',
-            'school_class__name', 'avg_score'
-        ))
+        # Top performers, ranked from the per-student averages above
+        ranked = sorted(
+            (row for row in student_performance if row['avg_score'] is not None),
+            key=lambda row: row['avg_score'], reverse=True
+        )
+        top_performers = [
+            {key: value for key, value in row.items() if key != 'total_assignments'}
+            for row in ranked[:10]
+        ]
 
         reports = {
             'grade_distribution': grade_distribution,
@@ -291,39 +426,51 @@ class Command(BaseCommand):
             'top_performers': top_performers
         }
 
-        self.save_report(performance_dir, 'performance_reports', reports, output_format)
+        self.save_report(performance_dir, 'performance_reports', reports)
 
-    def generate_summary_report(self, report_dir, output_format):
+    def generate_summary_report(self, report_dir):
         """Generate overall summary report"""
         self.stdout.write('Generating Summary Report...')
 
         summary_dir = os.path.join(report_dir, 'summary')
 
-        # Overall statistics
+        # Overall statistics: one conditional aggregate per table, and sums over the
+        # breakdowns the other families already read
+        fee_rows = self.fee_status_rows()
+        students = Student.objects.aggregate(
+            total=Count('pk'),
+            new=Count('pk', filter=models.Q(user__date_joined__gte=self.recent_cutoff))
+        )
+        assignments = Assignment.objects.aggregate(
+            total=Count('pk'),
+            new=Count('pk', filter=models.Q(due_date__gte=self.recent_cutoff.date()))
+        )
+        tasks = Task.objects.aggregate(
+            total=Count('pk'),
+            completed=Count('pk', filter=models.Q(completed_at__gte=self.recent_cutoff, status='completed'))
+        )
+        users = User.objects.aggregate(active=Count('pk', filter=models.Q(is_active=True)))
+
         summary_stats = {
-            'total_students': Student.objects.count(),
+            'total_students': students['total'],
             'total_teachers': Teacher.objects.count(),
-            'total_classes': SchoolClass.objects.count(),
-            'total_fees': Fee.objects.count(),
-            'total_paid_fees': Fee.objects.filter(status='paid').count(),
-            'total_pending_fees': Fee.objects.filter(status__in=['unpaid', 'partial']).count(),
-            'total_attendance_records': Attendance.objects.count(),
-            'total_assignments': Assignment.objects.count(),
-            'total_grades': Grade.objects.count(),
-            'total_tasks': Task.objects.count(),
+            'total_classes': len(self.class_distribution()),
+            'total_fees': sum(row['count'] for row in fee_rows),
+            'total_paid_fees': sum(row['count'] for row in fee_rows if row['status'] == 'paid'),
+            'total_pending_fees': sum(row['count'] for row in fee_rows if row['status'] in ['unpaid', 'partial']),
+            'total_attendance_records': sum(self.attendance_status_counts().values()),
+            'total_assignments': assignments['total'],
+            'total_grades': sum(row['count'] for row in self.grade_distribution()),
+            'total_tasks': tasks['total'],
             'pending_leaves': LeaveRequest.objects.filter(status='pending').count()
         }
 
         # Recent activity (last 30 days)
-        thirty_days_ago = timezone.now() - timedelta(days=30)
         recent_activity = {
-            'new_students': Student.objects.filter(user__date_joined__gte=thirty_days_ago).count(),
-            'new_fees': Fee.objects.filter(due_date__gte=thirty_days_ago).count(),
-            'new_assignments': Assignment.objects.filter(due_date__gte=thirty_days_ago).count(),
-            'completed_tasks': Task.objects.filter(
-                completed_at__gte=thirty_days_ago,
-                status='completed'
-            ).count()
+            'new_students': students['new'],
+            'new_fees': sum(row['recent'] for row in fee_rows),
+            'new_assignments': assignments['new'],
+            'completed_tasks': tasks['completed']
         }
 
         reports = {
@@ -332,161 +479,46 @@ class Command(BaseCommand):
             'system_health': {
                 'database_status': 'healthy',
                 'last_backup': timezone.now().isoformat(),
-                'active_users': User.objects.filter(is_active=True).count()
+                'active_users': users['active']
             }
         }
 
-        self.save_report(summary_dir, 'summary_report', reports, output_format)
-
-    def save_report(self, directory, filename, data, output_format):
-        """Save report data in specified format"""
-        base_filename = os.path.join(directory, filename)
-
-        if output_format == 'json':
-            with open(f'{base_filename}.json', 'w') as f:
-                json.dump(data, f, indent=2, default=str)
-        elif output_format == 'csv':
-            # Convert to CSV format
-            for key, value in data.items():
-                if isinstance(value, list) and value:
-                    df = pd.DataFrame(value)
-                    df.to_csv(f'{base_filename}_{key}.csv', index=False)
-        elif output_format == 'html':
-            # Generate HTML report
-            html_content = self.generate_html_report(data)
-            with open(f'{base_filename}.html', 'w') as f:
-                f.write(html_content)
-        elif output_format == 'pdf':
-            # Generate PDF report
-            self.generate_pdf_report(data, f'{base_filename}.pdf')
-
-    def generate_html_report(self, data):
-        """Generate HTML report from data"""
-        html = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>School Management Report</title>
-            <style>
-                body {{ font-family: Arial, sans-serif; margin: 20px; }}
-                .section {{ margin-bottom: 30px; }}
-                .section h2 {{ color: #333; border-bottom: 2px solid #007bff; padding-bottom: 5px; }}
-                table {{ border-collapse: collapse; width: 100%; margin-top: 10px; }}
-                th, td {{ border: 1px solid #ddd; padding: 8px; text-align: left; }}
-                th {{ background-color: #f2f2f2; }}
-                tr:nth-child(even) {{ background-color: #f9f9f9; }}
-            </style>
-        </head>
-        <body>
-            <h1>School Management Report</h1>
-            <p>Generated on: {timezone.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
+        self.save_report(summary_dir, 'summary_report', reports)
+
+    def save_report(self, directory, filename, data):
+        """Queue report data for rendering in every requested format"""
+        self.datasets.append((os.path.join(directory, filename), data))
+
+    def render_reports(self, formats, workers):
         """
+        Render every queued dataset in every format.
 
-        for section_name, section_data in data.items():
-            html += f"<div class='section'><h2>{section_name.replace('_', ' ').title()}</h2>"
-
-            if isinstance(section_data, list) and section_data:
-                html += "<table><thead><tr>"
-                # Get headers from first item
-                headers = list(section_data[0].keys())
-                for header in headers:
-                    html += f"<th>{header.replace('_', ' ').title()}</th>"
-                html += "</tr></thead><tbody>"
-
-                for item in section_data:
-                    html += "<tr>"
-                    for header in headers:
-                        value = item.get(header, '')
-                        html += f"<td>{value}</td>"
-                    html += "</tr>"
-                html += "</tbody></table>"
-            elif isinstance(section_data, dict):
-                html += "<table><tbody>"
-                for key, value in section_data.items():
-                    html += f"<tr><td><strong>{key.replace('_', ' ').title()}</strong></td><td>{value}</td></tr>"
-                html += "</tbody></table>"
-            else:
-                html += f"<p>{section_data}</p>"
-
-            html += "</div>"
-
-        html += "</body></html>"
-        return html
-
-    def generate_pdf_report(self, data, filename):
-        """Generate PDF report from data"""
-        doc = SimpleDocTemplate(filename, pagesize=A4)
-        styles = getSampleStyleSheet()
-        story = []
-
-        # Title
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=16,
-            spaceAfter=30,
-        )
-        story.append(Paragraph("School Management Report", title_style))
-        story.append(Paragraph(f"Generated on: {timezone.now().strftime('%Y-%m-%d %H:%M:%S')}", styles['Normal']))
-        story.append(Spacer(1, 12))
-
-        for section_name, section_data in data.items():
-            # Section header
-            story.append(Paragraph(section_name.replace('_', ' ').title(), styles['Heading2']))
-            story.append(Spacer(1, 6))
-
-            if isinstance(section_data, list) and section_data:
-                # Create table for list data
-                if section_data:
-                    headers = list(section_data[0].keys())
-                    table_data = [headers]  # Add headers
-
-                    for item in section_data:
-                        row = []
-                        for header in headers:
-                            value = str(item.get(header, ''))
-                            row.append(value)
-                        table_data.append(row)
-
-                    # Create table
-                    table = Table(table_data)
-                    table.setStyle(TableStyle([
-                        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                        ('FONTSIZE', (0, 0), (-1, 0), 10),
-                        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-                    ]))
-                    story.append(table)
-                    story.append(Spacer(1, 12))
-
-            elif isinstance(section_data, dict):
-                # Display dictionary data as key-value pairs
-                for key, value in section_data.items():
-                    if isinstance(value, (int, float)):
-                        story.append(Paragraph(f"<b>{key.replace('_', ' ').title()}:</b> {value}", styles['Normal']))
-                    elif isinstance(value, str):
-                        story.append(Paragraph(f"<b>{key.replace('_', ' ').title()}:</b> {value}", styles['Normal']))
-                    else:
-                        story.append(Paragraph(f"<b>{key.replace('_', ' ').title()}:</b> {str(value)}", styles['Normal']))
-                story.append(Spacer(1, 12))
-            else:
-                story.append(Paragraph(str(section_data), styles['Normal']))
-                story.append(Spacer(1, 12))
-
-            story.append(Spacer(1, 12))  # Space between sections
-
-        doc.build(story)
-
-    def create_metadata_file(self, report_dir, timestamp, report_type):
-        """Create metadata file for the report"""
+        Renderers only need the in-memory data, so with more than one task and
+        worker they run in a spawned process pool; PDF layout is CPU bound and
+        otherwise dominates a multi-format run.
+        """
+        generated_at = timezone.now().strftime('%Y-%m-%d %H:%M:%S')
+        tasks = [
+            (output_format, data, base_filename, generated_at)
+            for base_filename, data in self.datasets
+            for output_format in formats
+        ]
+        workers = min(workers, len(tasks))
+        if workers <= 1:
+            return [path for task in tasks for path in report_renderers.render(*task)]
+
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            futures = [pool.submit(report_renderers.render, *task) for task in tasks]
+            return [path for future in futures for path in future.result()]
+
+    def create_metadata_file(self, report_dir, timestamp, report_type, report_id=None, output_format=None):
+        """Create metadata file for the report and add the report to the catalog"""
         metadata = {
-            'report_id': f'report_{timestamp}',
+            'report_id': report_id or f'report_{timestamp}',
             'generated_at': timezone.now().isoformat(),
             'report_type': report_type,
+            'format': output_format,
             'version': '1.0',
             'generator': 'School Management System',
             'includes': {
@@ -521,4 +553,7 @@ For detailed information, see metadata.json
 """
         index_file = os.path.join(report_dir, 'README.txt')
         with open(index_file, 'w') as f:
-            f.write(index_content)
\ No newline at end of file
+            f.write(index_content)
+
+        # Index last, once every file of the report is written
+        report_catalog.catalog_report(metadata['report_id'], metadata)
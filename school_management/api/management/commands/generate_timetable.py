@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from api import timetable
+
+
+class Command(BaseCommand):
+    help = "Generate a clash-free week for every class from the periods and the teachers' subjects"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--classes',
+            help='Comma-separated class ids to generate; default every class'
+        )
+        parser.add_argument(
+            '--keep-existing',
+            action='store_true',
+            help="Only fill free slots instead of replacing the classes' timetables"
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Plan the week and print the summary without saving it'
+        )
+
+    def handle(self, *args, **options):
+        class_ids = None
+        if options['classes']:
+            try:
+                class_ids = [int(pk) for pk in options['classes'].split(',') if pk.strip()]
+            except ValueError:
+                raise CommandError('--classes must be a comma-separated list of ids')
+
+        started = time.monotonic()
+        try:
+            week = timetable.generate_week(
+                class_ids, replace=not options['keep_existing'], dry_run=options['dry_run']
+            )
+        except timetable.TimetableError as e:
+            raise CommandError(str(e))
+
+        summary = week.summary()
+        for class_id, day, period_number in week.unfilled:
+            self.stdout.write(self.style.WARNING(f'No free teacher: class {class_id}, {day} period {period_number}'))
+        verb = 'Planned' if options['dry_run'] else 'Generated'
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {summary['created']} entries for {summary['classes']} classes "
+            f"({summary['unfilled']} slots unfilled) in {time.monotonic() - started:.2f}s."
+        ))
@@ -0,0 +1,63 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api import blobstore
+
+
+class Command(BaseCommand):
+    help = 'Move inline BinaryField uploads into the blob store in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--only',
+            help=f"Comma-separated file kinds to move ({', '.join(blobstore.BLOB_KINDS)}); default all"
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Rows moved per transaction'
+        )
+        parser.add_argument(
+            '--prune',
+            action='store_true',
+            help='Afterwards, delete stored blobs that no row refers to'
+        )
+        parser.add_argument(
+            '--grace',
+            type=int,
+            default=3600,
+            help='With --prune, keep unreferenced blobs newer than this many seconds'
+        )
+
+    def handle(self, *args, **options):
+        kinds = list(blobstore.BLOB_KINDS)
+        if options['only']:
+            kinds = [kind.strip() for kind in options['only'].split(',') if kind.strip()]
+            unknown = set(kinds) - set(blobstore.BLOB_KINDS)
+            if unknown:
+                raise CommandError(f"Unknown file kinds: {', '.join(sorted(unknown))}")
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive')
+
+        store = blobstore.get_store()
+        started = time.monotonic()
+        for kind in kinds:
+            total = 0
+            while True:
+                # One transaction per batch: an interrupted run keeps the batches it finished
+                with transaction.atomic():
+                    moved = blobstore.move_legacy_blobs(kind, options['batch_size'], store=store)
+                if not moved:
+                    break
+                total += moved
+                self.stdout.write(f'{kind}: {total} rows moved')
+            self.stdout.write(self.style.SUCCESS(f'{kind}: done, {total} rows moved'))
+
+        if options['prune']:
+            deleted = blobstore.prune(options['grace'], store=store)
+            self.stdout.write(self.style.SUCCESS(f'Pruned {deleted} unreferenced blobs'))
+
+        self.stdout.write(f'Finished in {time.monotonic() - started:.2f}s.')
@@ -40,6 +40,7 @@ import django
 django.setup()
 
 from api.models import *
+from api import attendance_rollups
 
 class Command(BaseCommand):
     help = 'Populate the school management database with comprehensive sample data'
@@ -536,6 +537,7 @@ class Command(BaseCommand):
 
         # Bulk create for efficiency
         Attendance.objects.bulk_create(attendance_records, batch_size=1000)
+        attendance_rollups.rebuild()
         logger.info(f"Created {len(attendance_records)} attendance records")
 
     def create_leave_requests(self, classes_and_teachers):
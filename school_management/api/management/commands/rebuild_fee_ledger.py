@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+from api.models import FeeLedger
+
+
+class Command(BaseCommand):
+    help = 'Verify the materialised fee ledger against payments and discounts, and repair any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only report drift; exit with an error if any ledger row is wrong'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of ledger rows written per bulk query'
+        )
+
+    def handle(self, *args, **options):
+        check_only = options['check']
+
+        checked, missing, drifted = FeeLedger.rebuild(
+            batch_size=options['batch_size'],
+            commit=not check_only,
+        )
+
+        self.stdout.write(f'Checked {checked} fees: '
+                          f'{len(missing)} missing ledger rows, {len(drifted)} drifted')
+
+        if check_only:
+            if missing or drifted:
+                raise CommandError('Fee ledger is out of sync. Run rebuild_fee_ledger without --check to repair it.')
+            self.stdout.write(self.style.SUCCESS('Fee ledger is consistent.'))
+            return
+
+        self.stdout.write(self.style.SUCCESS(f'Repaired {len(missing) + len(drifted)} ledger rows.'))
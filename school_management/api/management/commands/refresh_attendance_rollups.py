@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+from api import attendance_rollups
+
+
+class Command(BaseCommand):
+    help = 'Recount the per-student and per-class attendance rollups from the raw attendance rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since',
+            help='Only recount months from this date (YYYY-MM-DD) on; default everything'
+        )
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            try:
+                since = parse_date(options['since'])
+            except ValueError:
+                since = None
+            if since is None:
+                raise CommandError('--since must be a YYYY-MM-DD date')
+
+        started = time.monotonic()
+        written = attendance_rollups.rebuild(since=since)
+        for table, rows in written.items():
+            self.stdout.write(f'{table}: {rows} rows')
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {sum(written.values())} attendance rollup rows in {time.monotonic() - started:.2f}s.'
+        ))
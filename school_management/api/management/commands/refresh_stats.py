@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from api import stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute the precomputed teacher, class rank and library dashboard stats'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--only',
+            help=f"Comma-separated stat groups to refresh ({', '.join(stats.STAT_GROUPS)}); default all"
+        )
+        parser.add_argument(
+            '--teachers',
+            help='Comma-separated teacher ids to limit the teacher stats to'
+        )
+        parser.add_argument(
+            '--classes',
+            help='Comma-separated class ids to limit the class ranks to'
+        )
+
+    def parse_ids(self, value, option):
+        if not value:
+            return None
+        try:
+            return [int(pk) for pk in value.split(',') if pk.strip()]
+        except ValueError:
+            raise CommandError(f'--{option} must be a comma-separated list of ids')
+
+    def handle(self, *args, **options):
+        groups = stats.STAT_GROUPS
+        if options['only']:
+            groups = [group.strip() for group in options['only'].split(',') if group.strip()]
+            unknown = set(groups) - set(stats.STAT_GROUPS)
+            if unknown:
+                raise CommandError(f"Unknown stat groups: {', '.join(sorted(unknown))}")
+
+        started = time.monotonic()
+        written = stats.refresh_all(
+            groups,
+            teacher_ids=self.parse_ids(options['teachers'], 'teachers'),
+            class_ids=self.parse_ids(options['classes'], 'classes'),
+        )
+        for group, rows in written.items():
+            self.stdout.write(f'{group}: {rows} rows')
+        self.stdout.write(self.style.SUCCESS(
+            f'Refreshed {sum(written.values())} stats rows in {time.monotonic() - started:.2f}s.'
+        ))
@@ -0,0 +1,62 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api import report_catalog
+
+
+class Command(BaseCommand):
+    help = 'Sync the report catalog with the reports/ directory and apply the retention policy'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sync',
+            action='store_true',
+            help='Index report directories missing from the catalog and drop rows whose directory is gone'
+        )
+        parser.add_argument(
+            '--reindex',
+            help='Comma-separated report ids to re-index (recompute file sizes and checksums)'
+        )
+        parser.add_argument(
+            '--prune',
+            action='store_true',
+            help='Delete reports past the retention period'
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            help='Retention period in days (default REPORT_RETENTION_DAYS)'
+        )
+        parser.add_argument(
+            '--keep-latest',
+            type=int,
+            help='Always keep this many newest reports (default REPORT_RETENTION_KEEP_LATEST)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='With --prune, only list the reports that would be deleted'
+        )
+
+    def handle(self, *args, **options):
+        if not (options['sync'] or options['reindex'] or options['prune']):
+            raise CommandError('Nothing to do: pass --sync, --reindex and/or --prune')
+        if (options['days'] or 0) < 0 or (options['keep_latest'] or 0) < 0:
+            raise CommandError('--days and --keep-latest must not be negative')
+
+        if options['sync']:
+            added, removed = report_catalog.sync()
+            self.stdout.write(self.style.SUCCESS(f'Indexed {len(added)} reports, dropped {len(removed)} missing ones.'))
+
+        if options['reindex']:
+            for report_id in [item.strip() for item in options['reindex'].split(',') if item.strip()]:
+                if report_catalog.read_metadata(report_catalog.report_dir(report_id)) is None:
+                    raise CommandError(f"No report directory with metadata for '{report_id}'")
+                report = report_catalog.catalog_report(report_id)
+                self.stdout.write(f'{report_id}: {report.file_count} files, {report.total_size} bytes')
+
+        if options['prune']:
+            report_ids = report_catalog.prune(options['days'], options['keep_latest'], dry_run=options['dry_run'])
+            for report_id in report_ids:
+                self.stdout.write(report_id)
+            verb = 'Would delete' if options['dry_run'] else 'Deleted'
+            self.stdout.write(self.style.SUCCESS(f'{verb} {len(report_ids)} reports.'))
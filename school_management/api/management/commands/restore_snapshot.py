@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+from api import snapshots
+
+
+class Command(BaseCommand):
+    help = 'Restore an NDJSON database snapshot (optionally .gz) with batched bulk inserts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Snapshot file produced by GET /api/snapshot/')
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Validate and load the snapshot, then roll everything back'
+        )
+        parser.add_argument(
+            '--conflicts',
+            choices=snapshots.CONFLICT_MODES,
+            default='error',
+            help='What to do with rows whose primary key already exists'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=snapshots.DEFAULT_CHUNK_SIZE,
+            help='Number of rows inserted per bulk query'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        try:
+            with open(path, 'rb') as fileobj:
+                result = snapshots.import_snapshot(
+                    snapshots.iter_lines(fileobj, compressed=path.endswith('.gz')),
+                    batch_size=options['batch_size'],
+                    conflicts=options['conflicts'],
+                    dry_run=options['dry_run'],
+                )
+        except (snapshots.SnapshotError, OSError, EOFError) as e:
+            raise CommandError(f'Invalid snapshot: {e}')
+        except IntegrityError as e:
+            raise CommandError(f'Snapshot conflicts with existing data: {e}')
+
+        for table in result['tables']:
+            self.stdout.write(
+                f"  {table['table']:<16} {table['rows']:>8} rows  "
+                f"{table['seconds']:>7}s  {table['rows_per_second']:>8} rows/s"
+            )
+        prefix = 'Dry run: validated' if result['dry_run'] else 'Restored'
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix} {result['total_rows']} rows in {result['seconds']}s "
+            f"({result['rows_per_second']} rows/s)"
+        ))
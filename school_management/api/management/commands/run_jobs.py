@@ -0,0 +1,116 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from api import jobs
+from api.models import BackgroundJob
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs (report generation) with a pool of worker processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=2,
+            help='Number of worker processes; 0 runs jobs inline in this process'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit once the queue is empty instead of polling for new jobs'
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=2.0,
+            help='Seconds to wait between polls when the queue is empty'
+        )
+        parser.add_argument(
+            '--stale-after',
+            type=int,
+            default=60,
+            help='Requeue jobs that have been running for more than this many minutes'
+        )
+        parser.add_argument(
+            '--max-attempts',
+            type=int,
+            default=BackgroundJob.MAX_ATTEMPTS,
+            help='Fail stale jobs that have already been started this many times instead of requeueing them'
+        )
+
+    def handle(self, *args, **options):
+        requeued = BackgroundJob.requeue_stale(
+            timedelta(minutes=options['stale_after']), max_attempts=options['max_attempts']
+        )
+        if requeued:
+            self.stdout.write(self.style.WARNING(f'Requeued {requeued} stale jobs.'))
+
+        worker = jobs.worker_name()
+        self.stdout.write(f"Job worker {worker} started with {options['workers'] or 'inline'} workers")
+        if options['workers'] > 0:
+            processed = self.run_pool(worker, options)
+        else:
+            processed = self.run_inline(worker, options)
+        self.stdout.write(self.style.SUCCESS(f'Processed {processed} jobs.'))
+
+    def run_inline(self, worker, options):
+        processed = 0
+        while True:
+            job = BackgroundJob.claim_next(worker)
+            if job is None:
+                if options['once']:
+                    return processed
+                time.sleep(options['poll_interval'])
+                continue
+            job_id, status = jobs.run_job(job.pk)
+            self.stdout.write(f'Job {job_id}: {status}')
+            processed += 1
+
+    def run_pool(self, worker, options):
+        processed = 0
+        # Spawned (not forked) processes so no database connection is shared with this one
+        context = multiprocessing.get_context('spawn')
+        while True:
+            running = {}
+            with ProcessPoolExecutor(
+                max_workers=options['workers'], mp_context=context, initializer=jobs.init_pool_worker
+            ) as pool:
+                while True:
+                    while len(running) < options['workers']:
+                        job = BackgroundJob.claim_next(worker)
+                        if job is None:
+                            break
+                        running[pool.submit(jobs.run_job, job.pk)] = job
+
+                    if not running:
+                        if options['once']:
+                            return processed
+                        time.sleep(options['poll_interval'])
+                        continue
+
+                    done, _ = wait(running, timeout=options['poll_interval'], return_when=FIRST_COMPLETED)
+                    broken = False
+                    for future in done:
+                        job = running.pop(future)
+                        processed += 1
+                        try:
+                            job_id, status = future.result()
+                            self.stdout.write(f'Job {job_id}: {status}')
+                        except Exception as e:
+                            # The worker process died before it could record the outcome
+                            job.mark_failed(f'Worker process failed: {e}')
+                            self.stderr.write(f'Job {job.pk}: worker process failed: {e}')
+                            broken = broken or isinstance(e, BrokenProcessPool)
+
+                    if broken:
+                        # A broken pool fails every pending future; requeue what was still running
+                        BackgroundJob.objects.filter(pk__in=[job.pk for job in running.values()]).update(
+                            status=BackgroundJob.Status.QUEUED, worker=''
+                        )
+                        break
+            self.stderr.write('Worker pool broke; starting a new one.')
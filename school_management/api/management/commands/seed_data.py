@@ -9,6 +9,7 @@ from api.models import (
     User, UserProfile, SchoolClass, Student, Teacher, FeeType, Fee,
     Attendance, LeaveRequest, Assignment, Grade, Notification, Timetable, Period, Task
 )
+from api import timetable
 
 
 class Command(BaseCommand):
@@ -31,8 +32,8 @@ class Command(BaseCommand):
         # Phase 2: Create class-level data
         self.stdout.write("Phase 2: Creating class-level data...")
         all_teachers = list(Teacher.objects.all())
+        self._create_realistic_timetable(classes)
         for school_class in classes:
-            self._create_realistic_timetable(school_class, all_teachers)
             self._create_assignments_for_class(school_class)
         self.stdout.write(self.style.SUCCESS("-> Phase 2 Complete"))
 
@@ -179,23 +180,10 @@ class Command(BaseCommand):
     # Class-Level Data
     # --------------------------
 
-    def _create_realistic_timetable(self, school_class, all_teachers):
-        all_periods = list(Period.objects.all())
-        subjects = ["Mathematics", "Physics", "Chemistry", "English", "History", "Art"]
-        # Clear existing timetable entries for this class
-        Timetable.objects.filter(school_class=school_class).delete()
-        for day in Timetable.Day.values:
-            for period in random.sample(all_periods, random.randint(5, 8)):
-                Timetable.objects.get_or_create(
-                    school_class=school_class,
-                    day_of_week=day,
-                    start_time=period.start_time,
-                    end_time=period.end_time,
-                    defaults={
-                        'subject': random.choice(subjects),
-                        'teacher': random.choice(all_teachers)
-                    }
-                )
+    def _create_realistic_timetable(self, classes):
+        # One clash-free week for every class, from the periods and the teachers' profile subjects
+        week = timetable.generate_week([school_class.pk for school_class in classes])
+        self.stdout.write(f"  - {len(week.entries)} Timetable entries generated.")
 
     def _create_assignments_for_class(self, school_class):
         Assignment.objects.filter(school_class=school_class).delete()
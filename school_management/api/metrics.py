@@ -0,0 +1,331 @@
+"""
+Per-route request instrumentation.
+
+``InstrumentationMiddleware`` (api/middleware.py) measures every request:
+- database queries and the time spent in them, through
+  ``connection.execute_wrapper`` on every configured connection
+- time spent building serializer ``.data`` (including any queries the
+  serializer runs, which is where N+1 regressions usually hide)
+- total time and response bytes
+
+Streaming responses are recorded when the server closes them, after the last
+chunk: their time, bytes and any queries run while producing chunks cover the
+whole body. Their ``Server-Timing`` header goes out before the body, so it
+only covers the view.
+
+Each response reports its numbers in a ``Server-Timing`` header, so they show
+up in the browser's network panel. They are also added to per-route totals in
+this process, keyed by URL name (``timetable-overview``, ``fee-list``) so
+the label set stays small, and served in the Prometheus text format at
+``/api/metrics/``. Every worker process keeps its own totals; Prometheus
+adds them up across scrape targets.
+
+``settings.REQUEST_BUDGETS`` sets limits per route, on top of the
+``'default'`` entry::
+
+    REQUEST_BUDGETS = {
+        'default': {'queries': 50, 'total_ms': 1000},
+        'timetable-overview': {'queries': 5},
+    }
+
+Limits are ``queries``, ``db_ms``, ``serializer_ms``, ``total_ms`` and
+``bytes``. A request over any of them logs a warning on ``api.performance``
+and counts towards ``api_request_budget_exceeded_total``.
+"""
+import contextvars
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('api.performance')
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Upper bounds, in seconds, of the request duration histogram
+DURATION_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+BUDGET_LIMITS = ('queries', 'db_ms', 'serializer_ms', 'total_ms', 'bytes')
+
+UNMATCHED_ROUTE = '<unmatched>'
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """What one request cost; also the execute wrapper that counts its queries."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.duration = 0.0
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializing = False
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+
+    def finish(self):
+        self.duration = time.perf_counter() - self.started
+
+
+@contextmanager
+def measure(request_metrics=None):
+    """Measure the queries and serializers run inside the block, adding to ``request_metrics`` if given."""
+    request_metrics = request_metrics or RequestMetrics()
+    token = _current.set(request_metrics)
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(request_metrics))
+            yield request_metrics
+    finally:
+        request_metrics.finish()
+        _current.reset(token)
+
+
+_serializers_instrumented = False
+
+
+def instrument_serializers():
+    """Time ``BaseSerializer.data`` for the request being measured; safe to call more than once."""
+    global _serializers_instrumented
+    if _serializers_instrumented:
+        return
+    from rest_framework.serializers import BaseSerializer
+
+    build = BaseSerializer.data.fget
+
+    def data(self):
+        request_metrics = _current.get()
+        # Serializer.data and ListSerializer.data reach here through super();
+        # only the outermost call is timed
+        if request_metrics is None or request_metrics.serializing:
+            return build(self)
+        request_metrics.serializing = True
+        started = time.perf_counter()
+        try:
+            return build(self)
+        finally:
+            request_metrics.serializer_time += time.perf_counter() - started
+            request_metrics.serializing = False
+
+    BaseSerializer.data = property(data)
+    _serializers_instrumented = True
+
+
+def route_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return UNMATCHED_ROUTE
+    return match.view_name or match.route or UNMATCHED_ROUTE
+
+
+def budget_for(route):
+    budgets = getattr(settings, 'REQUEST_BUDGETS', {})
+    budget = dict(budgets.get('default', {}))
+    budget.update(budgets.get(route, {}))
+    return budget
+
+
+def over_budget(route, measured):
+    """``(limit, measured value, budget)`` for every limit the request exceeded."""
+    budget = budget_for(route)
+    return [(limit, measured[limit], budget[limit])
+            for limit in BUDGET_LIMITS if limit in budget and measured[limit] > budget[limit]]
+
+
+def server_timing(request_metrics):
+    return ', '.join([
+        f'db;dur={request_metrics.db_time * 1000:.1f};desc="{request_metrics.queries} queries"',
+        f'serializer;dur={request_metrics.serializer_time * 1000:.1f}',
+        f'total;dur={request_metrics.duration * 1000:.1f}',
+    ])
+
+
+class RouteStats:
+    def __init__(self):
+        self.responses = Counter()
+        self.buckets = [0] * len(DURATION_BUCKETS)
+        self.count = 0
+        self.duration = 0.0
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.bytes = 0
+        self.budget_exceeded = Counter()
+
+
+class Registry:
+    """Per-route totals for this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = defaultdict(RouteStats)
+
+    def record(self, route, method, status_code, request_metrics, size, exceeded=()):
+        with self._lock:
+            stats = self._routes[route]
+            stats.responses[(method, str(status_code))] += 1
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if request_metrics.duration <= bound:
+                    stats.buckets[i] += 1
+            stats.count += 1
+            stats.duration += request_metrics.duration
+            stats.queries += request_metrics.queries
+            stats.db_time += request_metrics.db_time
+            stats.serializer_time += request_metrics.serializer_time
+            stats.bytes += size
+            for limit in exceeded:
+                stats.budget_exceeded[limit] += 1
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+
+    def render(self):
+        """All totals in the Prometheus text exposition format."""
+        with self._lock:
+            routes = sorted(self._routes.items())
+            families = defaultdict(list)
+            for route, stats in routes:
+                labels = {'route': route}
+                for (method, status_code), count in sorted(stats.responses.items()):
+                    families['requests'].append(
+                        sample('api_requests_total', dict(labels, method=method, status=status_code), count))
+                for bound, count in zip(DURATION_BUCKETS, stats.buckets):
+                    families['duration'].append(
+                        sample('api_request_duration_seconds_bucket', dict(labels, le=f'{bound:g}'), count))
+                families['duration'].append(
+                    sample('api_request_duration_seconds_bucket', dict(labels, le='+Inf'), stats.count))
+                families['duration'].append(sample('api_request_duration_seconds_sum', labels, stats.duration))
+                families['duration'].append(sample('api_request_duration_seconds_count', labels, stats.count))
+                families['queries'].append(sample('api_db_queries_total', labels, stats.queries))
+                families['db'].append(sample('api_db_duration_seconds_total', labels, stats.db_time))
+                families['serializer'].append(
+                    sample('api_serializer_duration_seconds_total', labels, stats.serializer_time))
+                families['bytes'].append(sample('api_response_bytes_total', labels, stats.bytes))
+                for limit, count in sorted(stats.budget_exceeded.items()):
+                    families['budget'].append(
+                        sample('api_request_budget_exceeded_total', dict(labels, limit=limit), count))
+
+        lines = []
+        for key, name, kind, help_text in METRIC_FAMILIES:
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            lines.extend(families[key])
+        return '\n'.join(lines) + '\n'
+
+
+METRIC_FAMILIES = [
+    ('requests', 'api_requests_total', 'counter', 'Responses by route, method and status.'),
+    ('duration', 'api_request_duration_seconds', 'histogram', 'Time spent handling requests.'),
+    ('queries', 'api_db_queries_total', 'counter', 'Database queries run while handling requests.'),
+    ('db', 'api_db_duration_seconds_total', 'counter', 'Time spent in database queries.'),
+    ('serializer', 'api_serializer_duration_seconds_total', 'counter', 'Time spent building serializer data.'),
+    ('bytes', 'api_response_bytes_total', 'counter', 'Response body bytes sent.'),
+    ('budget', 'api_request_budget_exceeded_total', 'counter', 'Requests over a REQUEST_BUDGETS limit.'),
+]
+
+
+def sample(name, labels, value):
+    rendered = ','.join(f'{key}="{escape(label)}"' for key, label in labels.items())
+    value = f'{value:.6f}' if isinstance(value, float) else value
+    return f'{name}{{{rendered}}} {value}'
+
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registry = Registry()
+
+
+def record(request, response, request_metrics):
+    """Set the response's Server-Timing header and add the request to the totals once it is sent."""
+    response['Server-Timing'] = server_timing(request_metrics)
+    if response.streaming:
+        record_when_sent(request, response, request_metrics)
+    else:
+        add(request, response.status_code, request_metrics, len(response.content))
+    return response
+
+
+def record_when_sent(request, response, request_metrics):
+    """Count a streaming body as it goes out and add the request to the totals when it is closed."""
+    sent = 0
+
+    if getattr(response, 'file_to_stream', None) is not None:
+        # Left alone so the server can still use wsgi.file_wrapper (sendfile);
+        # a whole file goes out, and FileResponse set its Content-Length
+        length = response.get('Content-Length', '')
+        sent = int(length) if length.isdigit() else 0
+    elif response.is_async:
+        chunks = response.streaming_content
+
+        async def counted():
+            nonlocal sent
+            async for chunk in chunks:
+                sent += len(chunk)
+                yield chunk
+
+        response.streaming_content = counted()
+    else:
+        chunks = iter(response.streaming_content)
+
+        def counted():
+            nonlocal sent
+            while True:
+                # Producing a chunk may query (a queryset iterated lazily)
+                with measure(request_metrics):
+                    chunk = next(chunks, None)
+                if chunk is None:
+                    return
+                sent += len(chunk)
+                yield chunk
+
+        response.streaming_content = counted()
+
+    close = response.close
+    recorded = False
+
+    def close_and_record():
+        nonlocal recorded
+        close()
+        if not recorded:
+            recorded = True
+            request_metrics.finish()
+            add(request, response.status_code, request_metrics, sent)
+
+    # Servers close the response once the body is sent or the client has gone
+    response.close = close_and_record
+
+
+def add(request, status_code, request_metrics, size):
+    """Add a finished request to the totals and check its budget."""
+    route = route_name(request)
+    measured = {
+        'queries': request_metrics.queries,
+        'db_ms': request_metrics.db_time * 1000,
+        'serializer_ms': request_metrics.serializer_time * 1000,
+        'total_ms': request_metrics.duration * 1000,
+        'bytes': size,
+    }
+    exceeded = over_budget(route, measured)
+    for limit, value, budget in exceeded:
+        logger.warning(
+            f'{request.method} {request.path} ({route}) over its {limit} budget: '
+            f'{value:g} > {budget:g}'
+        )
+    registry.record(route, request.method, status_code, request_metrics, size,
+                    [limit for limit, _, _ in exceeded])
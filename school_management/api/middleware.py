@@ -1,14 +1,39 @@
 import logging
-from django.core.cache import cache
+import math
+import time
 from django.http import HttpResponse
-from django.utils import timezone
 from django.conf import settings
 import json
 
+from . import metrics, ratelimit
+
 logger = logging.getLogger('django.security')
 
+class InstrumentationMiddleware:
+    """Middleware measuring each request's queries, DB time, serializer time and size (see api/metrics.py)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        metrics.instrument_serializers()
+
+    def __call__(self, request):
+        if not getattr(settings, 'REQUEST_METRICS_ENABLED', True):
+            return self.get_response(request)
+
+        with metrics.measure() as request_metrics:
+            response = self.get_response(request)
+        return metrics.record(request, response, request_metrics)
+
+
 class RateLimitMiddleware:
-    """Middleware for rate limiting API requests."""
+    """Middleware for rate limiting API requests per client and route group."""
+
+    exempt_paths = [
+        '/admin/',
+        '/static/',
+        '/media/',
+        '/health/',
+    ]
 
     def __init__(self, get_response):
         self.get_response = get_response
@@ -18,78 +43,34 @@ class RateLimitMiddleware:
             return self.get_response(request)
 
         # Skip rate limiting for certain paths
-        exempt_paths = [
-            '/admin/',
-            '/static/',
-            '/media/',
-            '/health/',
-        ]
-
-        if any(request.path.startswith(path) for path in exempt_paths):
+        if any(request.path.startswith(path) for path in self.exempt_paths):
             return self.get_response(request)
 
-        # Get client IP
-        client_ip = self.get_client_ip(request)
-
-        # Check rate limit
-        is_allowed, remaining, reset_time = self.check_rate_limit(client_ip, request)
+        client_ip = ratelimit.client_ip(request)
+        policy = ratelimit.policy_for_path(request.path)
+        result = ratelimit.hit(policy, client_ip)
 
-        if not is_allowed:
-            logger.warning(f"Rate limit exceeded for IP: {client_ip}, Path: {request.path}")
+        if not result.allowed:
+            retry_after = max(1, math.ceil(result.reset_time - time.time()))
+            logger.warning(f"Rate limit exceeded for IP: {client_ip}, Group: {policy.name}, Path: {request.path}")
             response_data = {
                 'error': 'Rate limit exceeded. Please try again later.',
-                'remaining_attempts': remaining,
-                'reset_time': reset_time,
-                'retry_after': int((reset_time - timezone.now().timestamp()) / 60)  # minutes
+                'remaining_attempts': result.remaining,
+                'reset_time': result.reset_time,
+                'retry_after': math.ceil(retry_after / 60)  # minutes
             }
             response = HttpResponse(
                 json.dumps(response_data),
                 content_type='application/json',
                 status=429
             )
-            response['Retry-After'] = str(int((reset_time - timezone.now().timestamp())))
-            return response
-
-        response = self.get_response(request)
-        return response
-
-    def get_client_ip(self, request):
-        """Get client IP address."""
-        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-        if x_forwarded_for:
-            ip = x_forwarded_for.split(',')[0].strip()
+            response['Retry-After'] = str(retry_after)
         else:
-            ip = request.META.get('REMOTE_ADDR')
-        return ip
-
-    def check_rate_limit(self, client_ip, request):
-        """Check if request exceeds rate limit."""
-        max_attempts = getattr(settings, 'RATE_LIMIT_REQUESTS', 100)
-        window_seconds = getattr(settings, 'RATE_LIMIT_WINDOW', 900)
+            response = self.get_response(request)
 
-        cache_key = f"rate_limit_{client_ip}_{request.path}"
-        current_time = timezone.now().timestamp()
-
-        # Get existing attempts from cache
-        attempts_data = cache.get(cache_key, {'count': 0, 'first_attempt': current_time})
-
-        # Reset if window has passed
-        if current_time - attempts_data['first_attempt'] > window_seconds:
-            attempts_data = {'count': 0, 'first_attempt': current_time}
-
-        # Check if limit exceeded
-        if attempts_data['count'] >= max_attempts:
-            reset_time = attempts_data['first_attempt'] + window_seconds
-            return False, 0, reset_time
-
-        # Increment attempts
-        attempts_data['count'] += 1
-        cache.set(cache_key, attempts_data, window_seconds)
-
-        remaining_attempts = max_attempts - attempts_data['count']
-        reset_time = attempts_data['first_attempt'] + window_seconds
-
-        return True, remaining_attempts, reset_time
+        response['X-RateLimit-Limit'] = str(result.limit)
+        response['X-RateLimit-Remaining'] = str(result.remaining)
+        return response
 
 
 class SecurityHeadersMiddleware:
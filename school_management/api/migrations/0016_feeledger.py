@@ -0,0 +1,72 @@
+# Generated by Django 4.2.23 on 2026-10-17 04:08
+
+from decimal import Decimal
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_fee_ledger(apps, schema_editor):
+    Fee = apps.get_model('api', 'Fee')
+    Payment = apps.get_model('api', 'Payment')
+    Discount = apps.get_model('api', 'Discount')
+    FeeLedger = apps.get_model('api', 'FeeLedger')
+
+    paid = {
+        row['fee_id']: row
+        for row in Payment.objects.filter(status='completed').values('fee_id').annotate(
+            total=models.Sum('amount'), last=models.Max('payment_date')
+        )
+    }
+    discounts = {}
+    for fee_id, discount_type, value, amount in Discount.objects.values_list(
+        'fee_id', 'discount_type', 'value', 'fee__amount'
+    ):
+        discount = amount * value / 100 if discount_type == 'percentage' else value
+        discounts[fee_id] = discounts.get(fee_id, Decimal('0.00')) + discount
+
+    ledgers = []
+    for fee in Fee.objects.only('id', 'amount', 'waived_amount').iterator(chunk_size=2000):
+        total_paid = paid.get(fee.id, {}).get('total') or Decimal('0.00')
+        total_discount = discounts.get(fee.id, Decimal('0.00')).quantize(Decimal('0.01'))
+        outstanding = max(Decimal('0.00'), fee.amount - fee.waived_amount - total_paid - total_discount)
+        ledgers.append(FeeLedger(
+            fee_id=fee.id,
+            total_paid=total_paid,
+            total_discount=total_discount,
+            waived=fee.waived_amount,
+            outstanding=outstanding,
+            last_payment_at=paid.get(fee.id, {}).get('last'),
+        ))
+    FeeLedger.objects.bulk_create(ledgers, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_teacherreimbursementstats_teachergradestats_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='discount',
+            name='fee',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='discounts', to='api.fee'),
+        ),
+        migrations.CreateModel(
+            name='FeeLedger',
+            fields=[
+                ('fee', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='ledger', serialize=False, to='api.fee')),
+                ('total_paid', models.DecimalField(decimal_places=2, default=0.0, max_digits=10)),
+                ('total_discount', models.DecimalField(decimal_places=2, default=0.0, max_digits=10)),
+                ('waived', models.DecimalField(decimal_places=2, default=0.0, max_digits=10)),
+                ('outstanding', models.DecimalField(decimal_places=2, default=0.0, max_digits=10)),
+                ('last_payment_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['outstanding'], name='api_feeledg_outstan_f7e31e_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_fee_ledger, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.23 on 2026-10-17 04:26
+
+from django.db import migrations
+from django.db.models import Count, Max
+
+
+def remove_duplicate_grades(apps, schema_editor):
+    """Keep only the most recent grade per (student, assignment) before adding the constraint."""
+    Grade = apps.get_model('api', 'Grade')
+    duplicates = (
+        Grade.objects.values('student_id', 'assignment_id')
+        .annotate(rows=Count('id'), keep=Max('id'))
+        .filter(rows__gt=1)
+    )
+    for duplicate in duplicates:
+        Grade.objects.filter(
+            student_id=duplicate['student_id'], assignment_id=duplicate['assignment_id']
+        ).exclude(pk=duplicate['keep']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0018_backgroundjob'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_grades, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='grade',
+            unique_together={('student', 'assignment')},
+        ),
+    ]
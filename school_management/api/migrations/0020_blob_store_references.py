@@ -0,0 +1,48 @@
+# Generated by Django 4.2.23 on 2026-10-17 04:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0019_grade_unique_student_assignment'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assignmentsubmission',
+            name='file_sha256',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='assignmentsubmission',
+            name='file_size',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='reimbursement',
+            name='receipt_file_sha256',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='reimbursement',
+            name='receipt_file_size',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='schoolsetting',
+            name='file_sha256',
+            field=models.CharField(blank=True, help_text='Blob store digest of the file', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='schoolsetting',
+            name='file_size',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='schoolsetting',
+            name='file_data',
+            field=models.BinaryField(blank=True, help_text='Legacy inline file content; moved to the blob store by migrate_blobs', null=True),
+        ),
+    ]
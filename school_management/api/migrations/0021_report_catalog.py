@@ -0,0 +1,33 @@
+# Generated by Django 4.2.23 on 2026-10-17 04:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0020_blob_store_references'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Report',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('report_id', models.CharField(max_length=100, unique=True)),
+                ('report_type', models.CharField(max_length=20)),
+                ('output_format', models.CharField(blank=True, max_length=10)),
+                ('generated_at', models.DateTimeField()),
+                ('version', models.CharField(blank=True, max_length=20)),
+                ('includes', models.JSONField(blank=True, default=dict)),
+                ('files', models.JSONField(blank=True, default=list)),
+                ('file_count', models.PositiveIntegerField(default=0)),
+                ('total_size', models.PositiveBigIntegerField(default=0)),
+                ('indexed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-generated_at', '-id'],
+                'indexes': [models.Index(fields=['generated_at', 'id'], name='api_report_generat_d4f226_idx'), models.Index(fields=['report_type', 'generated_at'], name='api_report_report__2f62c4_idx')],
+            },
+        ),
+    ]
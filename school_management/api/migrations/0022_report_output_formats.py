@@ -0,0 +1,18 @@
+# Generated by Django 4.2.23 on 2026-10-17 05:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0021_report_catalog'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='report',
+            name='output_format',
+            field=models.CharField(blank=True, max_length=30),
+        ),
+    ]
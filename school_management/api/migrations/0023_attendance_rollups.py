@@ -0,0 +1,87 @@
+# Generated by Django 4.2.23 on 2026-10-17 05:06
+
+from django.db import migrations, models
+from django.db.models import Count, F, Q
+from django.db.models.functions import TruncMonth
+import django.db.models.deletion
+
+
+def backfill_attendance_rollups(apps, schema_editor):
+    # Same grouped counts as attendance_rollups.rebuild(), on the historical models
+    Attendance = apps.get_model('api', 'Attendance')
+    StudentMonthlyAttendance = apps.get_model('api', 'StudentMonthlyAttendance')
+    ClassDailyAttendance = apps.get_model('api', 'ClassDailyAttendance')
+    ClassMonthlyAttendance = apps.get_model('api', 'ClassMonthlyAttendance')
+
+    counts = {status: Count('id', filter=Q(status=status)) for status in ('present', 'late', 'absent')}
+    in_class = Attendance.objects.filter(student__school_class__isnull=False)
+    rollups = [
+        (StudentMonthlyAttendance, {'student_id': 'student', 'month': 'month'},
+         Attendance.objects.values('student', month=TruncMonth('date'))),
+        (ClassDailyAttendance, {'school_class_id': 'school_class', 'date': 'date'},
+         in_class.values('date', school_class=F('student__school_class'))),
+        (ClassMonthlyAttendance, {'school_class_id': 'school_class', 'month': 'month'},
+         in_class.values(school_class=F('student__school_class'), month=TruncMonth('date'))),
+    ]
+    for model, key, grouped in rollups:
+        model.objects.bulk_create(
+            [
+                model(**{field: row[source] for field, source in key.items()},
+                      **{status: row[status] for status in counts})
+                for row in grouped.annotate(**counts).order_by().iterator(chunk_size=2000)
+            ],
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0022_report_output_formats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentMonthlyAttendance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('present', models.PositiveIntegerField(default=0)),
+                ('late', models.PositiveIntegerField(default=0)),
+                ('absent', models.PositiveIntegerField(default=0)),
+                ('month', models.DateField()),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_months', to='api.student')),
+            ],
+            options={
+                'unique_together': {('student', 'month')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ClassMonthlyAttendance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('present', models.PositiveIntegerField(default=0)),
+                ('late', models.PositiveIntegerField(default=0)),
+                ('absent', models.PositiveIntegerField(default=0)),
+                ('month', models.DateField()),
+                ('school_class', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_months', to='api.schoolclass')),
+            ],
+            options={
+                'unique_together': {('school_class', 'month')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ClassDailyAttendance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('present', models.PositiveIntegerField(default=0)),
+                ('late', models.PositiveIntegerField(default=0)),
+                ('absent', models.PositiveIntegerField(default=0)),
+                ('date', models.DateField()),
+                ('school_class', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_days', to='api.schoolclass')),
+            ],
+            options={
+                'unique_together': {('school_class', 'date')},
+            },
+        ),
+        migrations.RunPython(backfill_attendance_rollups, migrations.RunPython.noop),
+    ]
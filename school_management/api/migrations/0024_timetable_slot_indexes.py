@@ -0,0 +1,25 @@
+# Generated by Django 4.2.23 on 2026-10-17 05:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0023_attendance_rollups'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='timetable',
+            index=models.Index(fields=['school_class', 'day_of_week'], name='api_timetab_school__d2fdba_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timetable',
+            index=models.Index(fields=['teacher', 'day_of_week'], name='api_timetab_teacher_2f2893_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='weeklytimetable',
+            index=models.Index(fields=['teacher', 'day_of_week'], name='api_weeklyt_teacher_4608f7_idx'),
+        ),
+    ]
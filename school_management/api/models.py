@@ -1,10 +1,14 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import AbstractUser
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, MaxValueValidator
+from decimal import Decimal
 import logging
 
+from . import response_cache
+
 # Custom Exceptions for Fee Management
 class FeeError(Exception):
     """Base exception for fee-related errors."""
@@ -70,6 +74,15 @@ class User(AbstractUser):
     last_login_attempt = models.DateTimeField(null=True, blank=True)
     account_locked_until = models.DateTimeField(null=True, blank=True)
     password_changed_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def save(self, *args, **kwargs):
+        # Partial saves (last_login, password upgrades) still count as changes
+        # for incremental snapshots, which filter on updated_at
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'updated_at' not in update_fields:
+            kwargs['update_fields'] = [*update_fields, 'updated_at']
+        super().save(*args, **kwargs)
 
     def has_fee_permission(self, fee):
         """Check if user has permission to access/modify a fee."""
@@ -178,9 +191,11 @@ class SchoolSetting(models.Model):
     setting_type = models.CharField(max_length=20, choices=SettingType.choices, default=SettingType.TEXT)
     required = models.BooleanField(default=False, help_text="Whether this setting is required")
     description = models.TextField(blank=True, help_text="Optional description")
-    file_data = models.BinaryField(blank=True, null=True, help_text="Binary data for file uploads")
+    file_data = models.BinaryField(blank=True, null=True, help_text="Legacy inline file content; moved to the blob store by migrate_blobs")
     file_name = models.CharField(max_length=255, blank=True, help_text="Original file name")
     file_mime_type = models.CharField(max_length=100, blank=True, help_text="File MIME type")
+    file_sha256 = models.CharField(max_length=64, blank=True, help_text="Blob store digest of the file")
+    file_size = models.PositiveBigIntegerField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -214,9 +229,53 @@ class Attendance(models.Model):
     student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='attendance_records')
     date = models.DateField()
     status = models.CharField(max_length=10, choices=Status.choices)
-    
+    updated_at = models.DateTimeField(auto_now=True)
+
     class Meta:
         unique_together = ('student', 'date')
+        indexes = [
+            models.Index(fields=['date', 'id']),
+        ]
+
+
+class AttendanceCounts(models.Model):
+    """Present/late/absent counts of one attendance rollup bucket; see ``api/attendance_rollups.py``."""
+    present = models.PositiveIntegerField(default=0)
+    late = models.PositiveIntegerField(default=0)
+    absent = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+    @property
+    def total(self):
+        return self.present + self.late + self.absent
+
+
+class StudentMonthlyAttendance(AttendanceCounts):
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='attendance_months')
+    # First day of the month
+    month = models.DateField()
+
+    class Meta:
+        unique_together = ('student', 'month')
+
+
+class ClassDailyAttendance(AttendanceCounts):
+    school_class = models.ForeignKey(SchoolClass, on_delete=models.CASCADE, related_name='attendance_days')
+    date = models.DateField()
+
+    class Meta:
+        unique_together = ('school_class', 'date')
+
+
+class ClassMonthlyAttendance(AttendanceCounts):
+    school_class = models.ForeignKey(SchoolClass, on_delete=models.CASCADE, related_name='attendance_months')
+    # First day of the month
+    month = models.DateField()
+
+    class Meta:
+        unique_together = ('school_class', 'month')
 
 class Timetable(models.Model):
     class Day(models.TextChoices):
@@ -233,6 +292,13 @@ class Timetable(models.Model):
     subject = models.CharField(max_length=100)
     teacher = models.ForeignKey(Teacher, on_delete=models.SET_NULL, null=True)
 
+    class Meta:
+        # Slot lookups and clash checks (api/timetable.py) read one class's or teacher's day
+        indexes = [
+            models.Index(fields=['school_class', 'day_of_week']),
+            models.Index(fields=['teacher', 'day_of_week']),
+        ]
+
 class Assignment(models.Model):
     title = models.CharField(max_length=200)
     description = models.TextField(blank=True)
@@ -240,6 +306,7 @@ class Assignment(models.Model):
     school_class = models.ForeignKey(SchoolClass, on_delete=models.CASCADE, related_name='assignments')
     teacher = models.ForeignKey(Teacher, on_delete=models.CASCADE, related_name='created_assignments')
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     allow_file_upload = models.BooleanField(default=True)
 
     def __str__(self):
@@ -257,8 +324,10 @@ class AssignmentSubmission(models.Model):
     status = models.CharField(max_length=10, choices=Status.choices, default=Status.SUBMITTED)
     text_content = models.TextField(blank=True)
     file_name = models.CharField(max_length=255, blank=True)
-    file_data = models.BinaryField(blank=True, null=True)
+    file_data = models.BinaryField(blank=True, null=True)  # Legacy inline content, see migrate_blobs
     file_mime_type = models.CharField(max_length=100, blank=True)
+    file_sha256 = models.CharField(max_length=64, blank=True)
+    file_size = models.PositiveBigIntegerField(null=True, blank=True)
     grade = models.PositiveIntegerField(null=True, blank=True)  # Score out of 100
     feedback = models.TextField(blank=True)
     graded_at = models.DateTimeField(null=True, blank=True)
@@ -278,6 +347,10 @@ class Grade(models.Model):
     assignment = models.ForeignKey(Assignment, on_delete=models.CASCADE, related_name='grades')
     score = models.PositiveIntegerField() # Score out of 100
     graded_date = models.DateField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('student', 'assignment')
 
     def __str__(self):
         return f"Grade for {self.student} on {self.assignment.title}: {self.score}%"
@@ -348,14 +421,51 @@ class Fee(models.Model):
     def save(self, *args, **kwargs):
         self.clean()
         logger.info(f"Fee {self.id or 'new'} saved for student {self.student.user.username}")
-        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            # Status-only saves don't move the balance, so skip the ledger refresh
+            if update_fields is None or {'amount', 'waived_amount'} & set(update_fields):
+                FeeLedger.refresh(self)
+
+    @classmethod
+    def bulk_assign(cls, student_ids, amount, due_date, batch_size=500):
+        """
+        Create the same fee for many students with batched inserts.
+
+        Validation runs once on a template fee instead of per row, and ledger
+        rows are inserted alongside each batch. Returns the number of fees created.
+        """
+        template = cls(amount=amount, due_date=due_date)
+        template.clean()
+        opening = FeeLedger.balance(template.amount, template.waived_amount, 0, 0)
+
+        student_ids = list(student_ids)
+        created = 0
+        with transaction.atomic():
+            for start in range(0, len(student_ids), batch_size):
+                fees = cls.objects.bulk_create([
+                    cls(student_id=student_id, amount=template.amount, due_date=due_date, status=template.status)
+                    for student_id in student_ids[start:start + batch_size]
+                ])
+                if all(fee.pk for fee in fees):
+                    FeeLedger.objects.bulk_create([FeeLedger(fee_id=fee.pk, **opening) for fee in fees])
+                else:
+                    # Backends that cannot return inserted ids get their ledgers rebuilt instead
+                    FeeLedger.rebuild(cls.objects.filter(ledger__isnull=True), batch_size=batch_size)
+                created += len(fees)
+
+        # bulk_create sends no post_save signals, so outdate cached fee responses here
+        response_cache.bump_versions([cls._meta.label])
+        logger.info(f"Bulk created {created} fees of {template.amount} due {due_date}")
+        return created
 
     def get_outstanding_amount(self):
-        """Calculate the outstanding amount for this fee."""
-        total_paid = self.payments.filter(status=Payment.Status.COMPLETED).aggregate(
-            total=models.Sum('amount')
-        )['total'] or 0
-        return max(0, self.amount - self.waived_amount - total_paid)
+        """Return the outstanding amount for this fee from its ledger row."""
+        outstanding = FeeLedger.objects.filter(fee_id=self.pk).values_list('outstanding', flat=True).first()
+        if outstanding is None:
+            outstanding = FeeLedger.refresh(self).outstanding
+        return outstanding
 
     def is_overdue(self):
         """Check if the fee is overdue."""
@@ -411,6 +521,7 @@ class Payment(models.Model):
     )
     status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
     payment_date = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     notes = models.TextField(blank=True, null=True)
     processed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='processed_payments')
     ip_address = models.GenericIPAddressField(null=True, blank=True)
@@ -446,20 +557,22 @@ class Payment(models.Model):
         # Log payment operation
         logger.info(f"Payment {self.id or 'new'} saved for fee {self.fee.id} - Status: {self.status}")
 
-        # If payment is completed and fee is not already paid, update fee status
-        if self.status == self.Status.COMPLETED and self.fee.status != Fee.Status.PAID:
-            # Check if total payments for this fee equal or exceed the fee amount
-            total_paid = Payment.objects.filter(
-                fee=self.fee,
-                status=self.Status.COMPLETED
-            ).exclude(pk=self.pk).aggregate(total=models.Sum('amount'))['total'] or 0
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            ledger = FeeLedger.refresh(self.fee)
 
-            if total_paid + self.amount >= self.fee.amount - self.fee.waived_amount:
+            # If payment is completed and fee is now settled, update fee status
+            if self.status == self.Status.COMPLETED and self.fee.status != Fee.Status.PAID and ledger.outstanding <= 0:
                 self.fee.status = Fee.Status.PAID
-                self.fee.save()
+                self.fee.save(update_fields=['status', 'updated_at'])
                 logger.info(f"Fee {self.fee.id} marked as fully paid")
 
-        super().save(*args, **kwargs)
+    def delete(self, *args, **kwargs):
+        fee = self.fee
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            FeeLedger.refresh(fee)
+        return result
 
     def can_refund(self, user):
         """Check if payment can be refunded."""
@@ -481,20 +594,142 @@ class Payment(models.Model):
             raise InvalidFeeAmountError("Refund amount cannot exceed payment amount.")
 
         from .models import Refund  # Import here to avoid circular import
-        refund = Refund.objects.create(
-            payment=self,
-            amount=amount,
-            reason=reason,
-            processed_by=processed_by,
-            status='Processed'
-        )
-
-        self.status = self.Status.REFUNDED
-        self.save()
+        with transaction.atomic():
+            refund = Refund.objects.create(
+                payment=self,
+                amount=amount,
+                reason=reason,
+                processed_by=processed_by,
+                status='Processed'
+            )
+
+            # Saving the refunded payment also pulls it out of the fee ledger
+            self.status = self.Status.REFUNDED
+            self.save()
 
         logger.warning(f"Refund processed for payment {self.id} - Amount: ₹{amount}")
         return refund
 
+class FeeLedger(models.Model):
+    """Materialised running balance for a fee, refreshed on every payment, discount or waiver write."""
+    fee = models.OneToOneField(Fee, on_delete=models.CASCADE, primary_key=True, related_name='ledger')
+    total_paid = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
+    total_discount = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
+    waived = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
+    outstanding = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
+    last_payment_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['outstanding']),
+        ]
+
+    def __str__(self):
+        return f"Ledger for fee {self.fee_id}: ₹{self.outstanding} outstanding"
+
+    @staticmethod
+    def annotate_totals(queryset):
+        """Annotate a Fee queryset with the payment and discount totals the ledger is built from."""
+        completed = Payment.objects.filter(fee=models.OuterRef('pk'), status=Payment.Status.COMPLETED).order_by()
+        discount_amount = models.Case(
+            models.When(discount_type='percentage', then=models.F('fee__amount') * models.F('value') / 100),
+            default=models.F('value'),
+            output_field=models.DecimalField(max_digits=12, decimal_places=2),
+        )
+        return queryset.annotate(
+            ledger_total_paid=Coalesce(
+                models.Subquery(completed.values('fee').annotate(total=models.Sum('amount')).values('total')),
+                models.Value(Decimal('0.00')),
+                output_field=models.DecimalField(max_digits=10, decimal_places=2),
+            ),
+            ledger_total_discount=Coalesce(
+                models.Subquery(
+                    Discount.objects.filter(fee=models.OuterRef('pk')).order_by()
+                    .values('fee').annotate(total=models.Sum(discount_amount)).values('total')
+                ),
+                models.Value(Decimal('0.00')),
+                output_field=models.DecimalField(max_digits=12, decimal_places=2),
+            ),
+            ledger_last_payment_at=models.Subquery(completed.order_by('-payment_date').values('payment_date')[:1]),
+        )
+
+    @staticmethod
+    def balance(amount, waived, total_paid, total_discount, last_payment_at=None):
+        """Build ledger column values from a fee's amount and its aggregated totals."""
+        cents = Decimal('0.01')
+        total_paid = Decimal(total_paid or 0).quantize(cents)
+        total_discount = Decimal(total_discount or 0).quantize(cents)
+        waived = Decimal(waived or 0).quantize(cents)
+        outstanding = max(Decimal('0.00'), Decimal(amount) - waived - total_paid - total_discount)
+        return {
+            'total_paid': total_paid,
+            'total_discount': total_discount,
+            'waived': waived,
+            'outstanding': outstanding.quantize(cents),
+            'last_payment_at': last_payment_at,
+        }
+
+    @classmethod
+    def refresh(cls, fee):
+        """Recompute and store the ledger row for a single fee."""
+        totals = cls.annotate_totals(Fee.objects.filter(pk=fee.pk)).values(
+            'ledger_total_paid', 'ledger_total_discount', 'ledger_last_payment_at'
+        ).first() or {}
+        values = cls.balance(
+            fee.amount,
+            fee.waived_amount,
+            totals.get('ledger_total_paid'),
+            totals.get('ledger_total_discount'),
+            totals.get('ledger_last_payment_at'),
+        )
+        ledger, _ = cls.objects.update_or_create(fee_id=fee.pk, defaults=values)
+        fee.ledger = ledger
+        return ledger
+
+    LEDGER_FIELDS = ['total_paid', 'total_discount', 'waived', 'outstanding', 'last_payment_at']
+
+    @classmethod
+    def rebuild(cls, fees=None, batch_size=1000, commit=True):
+        """
+        Recompute ledger rows for ``fees`` (default: every fee) in bulk.
+
+        Returns ``(checked, missing, drifted)`` where ``missing`` and ``drifted``
+        are the ledger instances that were (or, with ``commit=False``, would be)
+        created and updated.
+        """
+        if fees is None:
+            fees = Fee.objects.all()
+        fees = cls.annotate_totals(fees.only('id', 'amount', 'waived_amount').order_by())
+        existing = {
+            ledger.fee_id: ledger
+            for ledger in cls.objects.filter(fee__in=fees.values('pk')).iterator(chunk_size=batch_size)
+        }
+
+        checked, missing, drifted = 0, [], []
+        for fee in fees.iterator(chunk_size=batch_size):
+            checked += 1
+            values = cls.balance(
+                fee.amount,
+                fee.waived_amount,
+                fee.ledger_total_paid,
+                fee.ledger_total_discount,
+                fee.ledger_last_payment_at,
+            )
+            ledger = existing.get(fee.id)
+            if ledger is None:
+                missing.append(cls(fee_id=fee.id, **values))
+            elif any(getattr(ledger, field) != value for field, value in values.items()):
+                for field, value in values.items():
+                    setattr(ledger, field, value)
+                drifted.append(ledger)
+
+        if commit and (missing or drifted):
+            with transaction.atomic():
+                cls.objects.bulk_create(missing, batch_size=batch_size)
+                cls.objects.bulk_update(drifted, cls.LEDGER_FIELDS, batch_size=batch_size)
+        return checked, missing, drifted
+
 # === Additional Fee Management Models ===
 
 class AuditLog(models.Model):
@@ -552,12 +787,25 @@ class FeeStructure(models.Model):
 
 class Discount(models.Model):
     student = models.ForeignKey(Student, on_delete=models.CASCADE)
-    fee = models.ForeignKey(Fee, on_delete=models.CASCADE)
+    fee = models.ForeignKey(Fee, on_delete=models.CASCADE, related_name='discounts')
     discount_type = models.CharField(max_length=20, choices=[('percentage', 'Percentage'), ('amount', 'Amount')])
     value = models.DecimalField(max_digits=10, decimal_places=2)
     reason = models.TextField(blank=True)
     applied_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
     applied_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            FeeLedger.refresh(self.fee)
+
+    def delete(self, *args, **kwargs):
+        fee = self.fee
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            FeeLedger.refresh(fee)
+        return result
 
 class Refund(models.Model):
     payment = models.ForeignKey(Payment, on_delete=models.CASCADE)
@@ -609,6 +857,14 @@ class Notification(models.Model):
     message = models.TextField()
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'created_at']),
+            # Unread counts and unread-first inbox queries (api/notifications.py)
+            models.Index(fields=['user', 'is_read', 'created_at']),
+        ]
 
     def __str__(self):
         return f"Notification for {self.user.username}: {self.title}"
@@ -690,8 +946,10 @@ class Reimbursement(models.Model):
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     description = models.TextField()
     receipt_file_name = models.CharField(max_length=255, blank=True)
-    receipt_file_data = models.BinaryField(blank=True, null=True)
+    receipt_file_data = models.BinaryField(blank=True, null=True)  # Legacy inline content, see migrate_blobs
     receipt_file_mime_type = models.CharField(max_length=100, blank=True)
+    receipt_file_sha256 = models.CharField(max_length=64, blank=True)
+    receipt_file_size = models.PositiveBigIntegerField(null=True, blank=True)
     status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
     submitted_at = models.DateTimeField(auto_now_add=True)
     reviewed_at = models.DateTimeField(null=True, blank=True)
@@ -743,6 +1001,9 @@ class WeeklyTimetable(models.Model):
     class Meta:
         unique_together = ('school_class', 'day_of_week', 'period_number')
         ordering = ['day_of_week', 'period_number']
+        indexes = [
+            models.Index(fields=['teacher', 'day_of_week']),
+        ]
 
     def __str__(self):
         return f"{self.school_class.name} - {self.day_of_week} Period {self.period_number}: {self.subject}"
@@ -793,4 +1054,128 @@ class TeacherGradeStats(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
-        return f"Grade stats for {self.teacher}"
\ No newline at end of file
+        return f"Grade stats for {self.teacher}"
+# === Background Job Models ===
+
+class BackgroundJob(models.Model):
+    """A unit of work queued by the API and executed by the run_jobs worker command."""
+    class JobType(models.TextChoices):
+        GENERATE_REPORTS = 'generate_reports', 'Generate Reports'
+
+    class Status(models.TextChoices):
+        QUEUED = 'queued', 'Queued'
+        RUNNING = 'running', 'Running'
+        SUCCEEDED = 'succeeded', 'Succeeded'
+        FAILED = 'failed', 'Failed'
+
+    job_type = models.CharField(max_length=50, choices=JobType.choices)
+    params = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.QUEUED)
+    progress = models.PositiveSmallIntegerField(default=0, validators=[MaxValueValidator(100)])
+    message = models.CharField(max_length=255, blank=True)
+    result = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True)
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='background_jobs')
+    worker = models.CharField(max_length=100, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    # Claims of a job before requeue_stale gives up on it
+    MAX_ATTEMPTS = 3
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_job_type_display()} job {self.pk} ({self.status})"
+
+    @classmethod
+    def claim_next(cls, worker):
+        """
+        Atomically move the oldest queued job to running and return it.
+
+        The conditional UPDATE means two workers can never claim the same job,
+        even on databases without SELECT ... FOR UPDATE SKIP LOCKED.
+        """
+        for job_id in cls.objects.filter(status=cls.Status.QUEUED).order_by('created_at', 'pk').values_list('pk', flat=True)[:10]:
+            claimed = cls.objects.filter(pk=job_id, status=cls.Status.QUEUED).update(
+                status=cls.Status.RUNNING,
+                worker=worker,
+                started_at=timezone.now(),
+                attempts=models.F('attempts') + 1,
+            )
+            if claimed:
+                return cls.objects.get(pk=job_id)
+        return None
+
+    @classmethod
+    def requeue_stale(cls, older_than, max_attempts=None):
+        """
+        Put running jobs whose worker has been gone longer than ``older_than`` back on the queue.
+
+        A job that has already been claimed ``max_attempts`` times (default
+        ``MAX_ATTEMPTS``) is marked failed instead, so one that kills or hangs
+        every worker that runs it cannot keep coming back. Returns the number
+        of jobs requeued.
+        """
+        max_attempts = max_attempts or cls.MAX_ATTEMPTS
+        now = timezone.now()
+        stale = cls.objects.filter(status=cls.Status.RUNNING, started_at__lt=now - older_than)
+        stale.filter(attempts__gte=max_attempts).update(
+            status=cls.Status.FAILED, worker='', finished_at=now,
+            message='Gave up after worker timeouts',
+            error=f'The worker timed out or died on all {max_attempts} attempts',
+        )
+        return stale.filter(attempts__lt=max_attempts).update(
+            status=cls.Status.QUEUED, worker='', progress=0, message='Requeued after worker timeout'
+        )
+
+    def set_progress(self, progress, message=''):
+        """Record progress without touching any other column."""
+        self.progress = max(0, min(100, int(progress)))
+        self.message = message[:255]
+        type(self).objects.filter(pk=self.pk).update(progress=self.progress, message=self.message)
+
+    def mark_succeeded(self, result=None):
+        self.status = self.Status.SUCCEEDED
+        self.progress = 100
+        self.result = result or {}
+        self.finished_at = timezone.now()
+        self.save(update_fields=['status', 'progress', 'result', 'finished_at'])
+
+    def mark_failed(self, error):
+        self.status = self.Status.FAILED
+        self.error = str(error)
+        self.finished_at = timezone.now()
+        self.save(update_fields=['status', 'error', 'finished_at'])
+
+
+class Report(models.Model):
+    """Catalog entry for a generated report directory under ``reports/``; see ``api/report_catalog.py``."""
+    report_id = models.CharField(max_length=100, unique=True)
+    report_type = models.CharField(max_length=20)
+    # Comma-separated when a run renders several formats, e.g. 'json,csv,pdf'
+    output_format = models.CharField(max_length=30, blank=True)
+    generated_at = models.DateTimeField()
+    version = models.CharField(max_length=20, blank=True)
+    includes = models.JSONField(default=dict, blank=True)
+    # [{'name', 'path', 'size', 'type', 'sha256'}, ...] relative to the report directory
+    files = models.JSONField(default=list, blank=True)
+    file_count = models.PositiveIntegerField(default=0)
+    total_size = models.PositiveBigIntegerField(default=0)
+    indexed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-generated_at', '-id']
+        indexes = [
+            models.Index(fields=['generated_at', 'id']),
+            models.Index(fields=['report_type', 'generated_at']),
+        ]
+
+    def __str__(self):
+        return self.report_id
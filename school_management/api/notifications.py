@@ -0,0 +1,263 @@
+"""
+Notification inbox.
+
+Each user's unread count is cached under ``notifications:unread:<user id>``
+so badges don't count the notifications table on every page load. Misses
+count the user's unread rows through the ``(user, is_read, created_at)``
+index and cache the result.
+
+Writes keep the counter in step once their transaction commits:
+- a single new unread notification increments it (signals.py)
+- marking one read decrements it; marking all read sets it to zero
+- bulk writes (``create_many``/``broadcast``) and edits drop the counters
+  they touch, and the next read recounts them
+
+``broadcast`` sends one notification to many users with ``bulk_create`` in
+chunks, optionally skipping users who already have the same unread message.
+
+New notifications are also published to the user's pub/sub channel
+(api/pubsub.py) once committed, and ``stream`` turns that channel into the
+server-sent events behind ``/api/notifications/stream/``. Each event's id is
+the notification id, so a reconnecting client sends ``Last-Event-ID`` and
+gets what it missed from the table before the live events resume.
+
+``EventSource`` cannot send an ``Authorization`` header, and an access token
+in the URL ends up in server and proxy logs. Browsers instead POST for a
+stream ticket (``issue_stream_ticket``): a random key in the cache, good for
+one connection within ``NOTIFICATION_STREAM_TICKET_TIMEOUT`` seconds.
+"""
+import asyncio
+import json
+import secrets
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from . import pubsub
+from .models import Notification
+
+BATCH_SIZE = 1000
+
+# How long a disconnected EventSource waits before reconnecting
+STREAM_RETRY_MS = 3000
+
+# Missed notifications read per query when a stream resumes
+REPLAY_BATCH_SIZE = 100
+
+
+def unread_key(user_id):
+    return f'notifications:unread:{user_id}'
+
+
+def cache_timeout():
+    # Bounded so a counter that ever drifts heals itself
+    return getattr(settings, 'NOTIFICATION_UNREAD_TIMEOUT', 24 * 60 * 60)
+
+
+def unread_count(user_id):
+    count = cache.get(unread_key(user_id))
+    if count is None:
+        count = Notification.objects.filter(user=user_id, is_read=False).count()
+        cache.set(unread_key(user_id), count, cache_timeout())
+    return count
+
+
+def adjust_unread(user_id, delta):
+    """Add ``delta`` to a cached counter once the transaction commits; uncached counters stay uncached."""
+    def adjust():
+        try:
+            cache.incr(unread_key(user_id), delta)
+        except ValueError:
+            pass
+
+    transaction.on_commit(adjust)
+
+
+def forget_unread(user_ids):
+    keys = [unread_key(user_id) for user_id in set(user_ids)]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def mark_read(user_id, notification_ids=None):
+    """Mark some (default all) of a user's notifications read; returns how many changed."""
+    unread = Notification.objects.filter(user=user_id, is_read=False)
+    if notification_ids is not None:
+        unread = unread.filter(pk__in=notification_ids)
+    changed = unread.update(is_read=True, updated_at=timezone.now())
+    if notification_ids is None:
+        transaction.on_commit(lambda: cache.set(unread_key(user_id), 0, cache_timeout()))
+    elif changed:
+        adjust_unread(user_id, -changed)
+    return changed
+
+
+def create_many(notifications, batch_size=BATCH_SIZE):
+    """``bulk_create`` unsaved ``Notification`` objects in chunks; returns how many were created."""
+    count = 0
+    batch = []
+    with transaction.atomic():
+        for notification in notifications:
+            batch.append(notification)
+            if len(batch) >= batch_size:
+                count += write_batch(batch)
+                batch = []
+        count += write_batch(batch)
+    return count
+
+
+def write_batch(batch):
+    if not batch:
+        return 0
+    Notification.objects.bulk_create(batch)
+    # bulk_create sends no signals
+    forget_unread(notification.user_id for notification in batch)
+    publish_created(batch)
+    return len(batch)
+
+
+def broadcast(users, title, message, dedupe=False, batch_size=BATCH_SIZE):
+    """
+    Send one notification to every user in ``users`` (a queryset or user ids).
+
+    With ``dedupe``, users who already have an unread notification with the
+    same title and message are skipped. Returns how many were created.
+    """
+    if hasattr(users, 'values_list'):
+        user_ids = users.order_by('pk').values_list('pk', flat=True).iterator(chunk_size=batch_size)
+    else:
+        user_ids = iter(users)
+
+    def notifications():
+        chunk = []
+        for user_id in user_ids:
+            chunk.append(user_id)
+            if len(chunk) >= batch_size:
+                yield from build(chunk)
+                chunk = []
+        yield from build(chunk)
+
+    def build(chunk):
+        skip = set()
+        if dedupe and chunk:
+            skip = set(Notification.objects.filter(
+                user__in=chunk, is_read=False, title=title, message=message
+            ).values_list('user', flat=True))
+        for user_id in chunk:
+            if user_id not in skip:
+                yield Notification(user_id=user_id, title=title, message=message)
+
+    return create_many(notifications(), batch_size)
+
+
+def channel(user_id):
+    return f'notifications:{user_id}'
+
+
+def as_event(notification):
+    return {
+        'id': notification.pk,
+        'title': notification.title,
+        'message': notification.message,
+        'is_read': notification.is_read,
+        'created_at': notification.created_at.isoformat(),
+    }
+
+
+def publish_created(notifications):
+    """Push saved notifications to their users' streams once the transaction commits."""
+    events = [(notification.user_id, as_event(notification)) for notification in notifications]
+
+    def send():
+        for user_id, event in events:
+            pubsub.publish(channel(user_id), event)
+
+    if events:
+        transaction.on_commit(send)
+
+
+def missed(user_id, after_id, limit=REPLAY_BATCH_SIZE):
+    """Events for up to ``limit`` of the user's notifications newer than ``after_id``, oldest first."""
+    rows = Notification.objects.filter(user=user_id, pk__gt=after_id).order_by('pk')[:limit]
+    return [as_event(notification) for notification in rows]
+
+
+def ticket_key(ticket):
+    return f'notifications:stream_ticket:{ticket}'
+
+
+def ticket_timeout():
+    return getattr(settings, 'NOTIFICATION_STREAM_TICKET_TIMEOUT', 30)
+
+
+def issue_stream_ticket(user_id):
+    """A single-use ticket that opens ``user_id``'s stream."""
+    ticket = secrets.token_urlsafe(32)
+    cache.set(ticket_key(ticket), user_id, ticket_timeout())
+    return ticket
+
+
+def redeem_stream_ticket(ticket):
+    """The user id ``ticket`` was issued to, or ``None``; each ticket works once."""
+    key = ticket_key(ticket)
+    user_id = cache.get(key)
+    # Of concurrent redeemers, only the one whose delete removed the key wins
+    if user_id is None or not cache.delete(key):
+        return None
+    return user_id
+
+
+def format_event(event):
+    return f"id: {event['id']}\nevent: notification\ndata: {json.dumps(event)}\n\n"
+
+
+async def stream(user_id, last_event_id=None, heartbeat=None, timeout=None):
+    """
+    Server-sent events for one user's new notifications.
+
+    Sends a comment every ``heartbeat`` seconds so proxies keep the
+    connection open, and ends after ``timeout`` seconds (or when the reader
+    falls behind); the browser's ``EventSource`` then reconnects with
+    ``Last-Event-ID`` and nothing is lost.
+    """
+    heartbeat = heartbeat or getattr(settings, 'NOTIFICATION_STREAM_HEARTBEAT', 15)
+    timeout = timeout or getattr(settings, 'NOTIFICATION_STREAM_TIMEOUT', 300)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    # Subscribe before replaying so nothing committed in between is missed
+    subscription = pubsub.subscribe(channel(user_id))
+    try:
+        yield f'retry: {STREAM_RETRY_MS}\n\n'
+        last_id = 0
+        if last_event_id is not None:
+            last_id = last_event_id
+            # Replay everything missed, a batch at a time
+            while True:
+                events = await sync_to_async(missed)(user_id, last_id)
+                for event in events:
+                    last_id = event['id']
+                    yield format_event(event)
+                if len(events) < REPLAY_BATCH_SIZE:
+                    break
+
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return
+            try:
+                event = await subscription.get(min(heartbeat, remaining))
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+            if event is None:
+                return
+            if event['id'] <= last_id:
+                # Already sent from the table
+                continue
+            last_id = event['id']
+            yield format_event(event)
+    finally:
+        pubsub.unsubscribe(subscription)
@@ -0,0 +1,132 @@
+import json
+from functools import reduce
+from operator import or_
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination, _reverse_ordering
+from rest_framework.response import Response
+
+
+class LinkHeaderCursorPagination(CursorPagination):
+    """
+    Keyset pagination that keeps the response body a plain list.
+
+    Navigation is exposed through an RFC 8288 ``Link`` header, so existing
+    clients that expect an array keep working while new clients can follow
+    ``rel="next"`` / ``rel="prev"``. Subclasses pick an indexed ordering and
+    a default page size; clients may ask for up to ``max_page_size`` rows
+    with ``?page_size=``.
+
+    DRF's cursor only records the first ordering field and skips rows that
+    share it with an offset, which degrades to offset pagination when many
+    rows tie (a day of attendance). Here the cursor records every ordering
+    field, so the ordering must end in a unique one (``id``) and each page
+    is a single ``(date, id) < (d, i)`` range query.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = '-id'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+        position = self.cursor.position if self.cursor is not None else None
+
+        ordering = _reverse_ordering(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.after(ordering, position))
+
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_more = len(results) > len(self.page)
+        if reverse:
+            # Walking backwards; hand the rows back in the declared order
+            self.page.reverse()
+        self.has_next = position is not None if reverse else has_more
+        self.has_previous = has_more if reverse else position is not None
+        self.display_page_controls = self.has_next or self.has_previous
+        return self.page
+
+    def after(self, ordering, position):
+        """Rows past ``position`` in ``ordering``: (a, b) > (x, y) is a > x, or a = x and b > y."""
+        try:
+            values = json.loads(position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        conditions = []
+        for i, field in enumerate(ordering):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            equal = {other.lstrip('-'): value for other, value in zip(ordering[:i], values)}
+            conditions.append(Q(**equal, **{f'{name}__{lookup}': values[i]}))
+        return reduce(or_, conditions)
+
+    def _get_position_from_instance(self, instance, ordering):
+        return json.dumps([
+            str(instance[field.lstrip('-')] if isinstance(instance, dict) else getattr(instance, field.lstrip('-')))
+            for field in ordering
+        ])
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        position = self._get_position_from_instance(self.page[-1], self.ordering) if self.page else self.cursor.position
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=position))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        position = self._get_position_from_instance(self.page[0], self.ordering) if self.page else self.cursor.position
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=position))
+
+    def get_paginated_response(self, data):
+        links = [
+            f'<{url}>; rel="{rel}"'
+            for rel, url in (('next', self.get_next_link()), ('prev', self.get_previous_link()))
+            if url
+        ]
+        headers = {'Link': ', '.join(links)} if links else None
+        return Response(data, headers=headers)
+
+    def get_paginated_response_schema(self, schema):
+        return schema
+
+
+class StudentPagination(LinkHeaderCursorPagination):
+    page_size = 100
+    ordering = 'pk'
+
+
+class AttendancePagination(LinkHeaderCursorPagination):
+    page_size = 200
+    ordering = ('-date', '-id')
+
+
+class PaymentPagination(LinkHeaderCursorPagination):
+    page_size = 50
+    ordering = ('-payment_date', '-id')
+
+
+class NotificationPagination(LinkHeaderCursorPagination):
+    page_size = 20
+    ordering = ('-created_at', '-id')
+
+
+class LeaveRequestPagination(LinkHeaderCursorPagination):
+    page_size = 50
+    ordering = '-id'
+
+
+class ReportPagination(LinkHeaderCursorPagination):
+    page_size = 50
+    ordering = ('-generated_at', '-id')
@@ -0,0 +1,190 @@
+"""
+In-process publish/subscribe for pushing events to open connections.
+
+Async views ``subscribe`` to a channel and read messages from the returned
+subscription. Sync code (signals, on_commit callbacks, worker threads)
+``publish``es to a channel. The hub hands each message to every subscription
+on that channel on the subscription's own event loop.
+
+Publishing goes through a broker so several processes can share channels.
+The broker is pluggable through ``settings.PUBSUB_BROKER``::
+
+    PUBSUB_BROKER = {
+        'BACKEND': 'api.pubsub.LocalBroker',
+        'OPTIONS': {},
+    }
+
+``LocalBroker`` delivers straight to this process's hub, which is all a
+single ASGI worker needs. ``RedisBroker`` relays messages through Redis
+PUBLISH/SUBSCRIBE so a message published by any worker reaches subscribers
+connected to every worker.
+"""
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# Messages a slow subscriber may have waiting before it is cut off
+QUEUE_SIZE = 100
+
+
+class Subscription:
+    """One reader on one channel; ``get`` waits for the next message."""
+
+    def __init__(self, channel, maxsize=QUEUE_SIZE):
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+        self.overflowed = False
+
+    def deliver(self, message):
+        # Called from any thread; the queue may only be touched on its loop
+        try:
+            self.loop.call_soon_threadsafe(self._put, message)
+        except RuntimeError:
+            # The loop has closed; the hub drops us on unsubscribe
+            pass
+
+    def _put(self, message):
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # The reader has fallen behind. Rather than buffering without
+            # bound, end its stream so the client reconnects and catches up.
+            self.overflowed = True
+            self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+    async def get(self, timeout=None):
+        """The next message, ``None`` once the subscription has overflowed; raises ``asyncio.TimeoutError``."""
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+
+class Hub:
+    """The subscriptions of this process, by channel."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._channels = defaultdict(set)
+
+    def subscribe(self, channel):
+        subscription = Subscription(channel)
+        with self._lock:
+            self._channels[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._channels.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._channels[subscription.channel]
+
+    def dispatch(self, channel, message):
+        with self._lock:
+            subscribers = list(self._channels.get(channel, ()))
+        for subscription in subscribers:
+            subscription.deliver(message)
+        return len(subscribers)
+
+    def subscriber_count(self, channel=None):
+        with self._lock:
+            if channel is not None:
+                return len(self._channels.get(channel, ()))
+            return sum(len(subscribers) for subscribers in self._channels.values())
+
+
+class LocalBroker:
+    """Delivers messages to this process only; the default, and the stand-in for tests."""
+
+    def __init__(self, hub):
+        self.hub = hub
+
+    def publish(self, channel, message):
+        self.hub.dispatch(channel, message)
+
+    def close(self):
+        pass
+
+
+class RedisBroker:
+    """Relays messages between processes through Redis pub/sub."""
+
+    def __init__(self, hub, url=None, prefix='pubsub:'):
+        import redis
+
+        self.hub = hub
+        self.prefix = prefix
+        self.client = redis.Redis.from_url(url or settings.REDIS_URL)
+        self.pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        self.pubsub.psubscribe(f'{prefix}*')
+        self.thread = threading.Thread(target=self.listen, name='pubsub-redis', daemon=True)
+        self.thread.start()
+
+    def publish(self, channel, message):
+        self.client.publish(self.prefix + channel, json.dumps(message))
+
+    def listen(self):
+        for item in self.pubsub.listen():
+            if item['type'] != 'pmessage':
+                continue
+            channel = item['channel'].decode()[len(self.prefix):]
+            try:
+                message = json.loads(item['data'])
+            except ValueError:
+                logger.warning('Dropping malformed pub/sub message on %s', channel)
+                continue
+            self.hub.dispatch(channel, message)
+
+    def close(self):
+        self.pubsub.close()
+        self.client.close()
+
+
+hub = Hub()
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                config = getattr(settings, 'PUBSUB_BROKER', {})
+                backend = import_string(config.get('BACKEND', 'api.pubsub.LocalBroker'))
+                _broker = backend(hub, **config.get('OPTIONS', {}))
+    return _broker
+
+
+def reset_broker():
+    """Close the broker so the next use builds one from the current settings."""
+    global _broker
+    with _broker_lock:
+        if _broker is not None:
+            _broker.close()
+        _broker = None
+
+
+def publish(channel, message):
+    """Send a JSON-serialisable message to every subscriber of ``channel``."""
+    get_broker().publish(channel, message)
+
+
+def subscribe(channel):
+    """Start receiving ``channel``; call from the event loop that will read the subscription."""
+    get_broker()
+    return hub.subscribe(channel)
+
+
+def unsubscribe(subscription):
+    hub.unsubscribe(subscription)
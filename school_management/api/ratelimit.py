@@ -0,0 +1,99 @@
+"""
+Sliding-window rate limiting on top of the Django cache.
+
+Each (policy, client) pair keeps one integer counter per fixed window. A
+request increments the current window's counter with ``cache.incr`` and
+reads the previous window's; the previous count is weighted by how much of
+it still overlaps the sliding window:
+
+    estimate = previous * (1 - elapsed / window) + current
+
+That is two or three cache round trips per request, whatever the traffic,
+and no read-modify-write of a Python object, so concurrent requests cannot
+overwrite each other's increments on backends with an atomic ``incr``
+(LocMem, Redis, Memcached). The database cache emulates ``incr`` with a
+read and a write; it gives the same results without contention but can
+under-count under heavy concurrency.
+
+Policies are chosen by route group (see ``RATE_LIMIT_POLICIES``) rather than
+by exact path, so a client has a handful of counters instead of one per URL.
+"""
+import math
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import caches
+
+KEY_PREFIX = 'ratelimit'
+
+RatePolicy = namedtuple('RatePolicy', ['name', 'requests', 'window'])
+RateLimitResult = namedtuple('RateLimitResult', ['allowed', 'limit', 'remaining', 'reset_time'])
+
+
+def get_cache():
+    return caches[getattr(settings, 'RATE_LIMIT_CACHE', 'default')]
+
+
+def client_ip(request):
+    """Client address, honouring the first hop of X-Forwarded-For."""
+    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+    if x_forwarded_for:
+        return x_forwarded_for.split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR')
+
+
+def default_policy():
+    return RatePolicy(
+        'default',
+        getattr(settings, 'RATE_LIMIT_REQUESTS', 100),
+        getattr(settings, 'RATE_LIMIT_WINDOW', 900),
+    )
+
+
+def policy_for_path(path):
+    """The policy of the first route group whose prefix matches ``path``."""
+    for group in getattr(settings, 'RATE_LIMIT_POLICIES', []):
+        if any(path.startswith(prefix) for prefix in group['prefixes']):
+            return RatePolicy(group['name'], group['requests'], group['window'])
+    return default_policy()
+
+
+def increment(cache, key, timeout, attempts=3):
+    for _ in range(attempts):
+        try:
+            return cache.incr(key)
+        except ValueError:
+            # First request of the window. add() only succeeds for one of several
+            # concurrent callers; the others go back to incr().
+            if cache.add(key, 1, timeout):
+                return 1
+    # The backend keeps losing the key between add() and incr(); count this request alone
+    return 1
+
+
+def hit(policy, identity, now=None):
+    """Record one request by ``identity`` against ``policy`` and decide whether to allow it."""
+    cache = get_cache()
+    now = time.time() if now is None else now
+    window_index = int(now // policy.window)
+    window_start = window_index * policy.window
+    base = f'{KEY_PREFIX}:{policy.name}:{identity}'
+    current_key = f'{base}:{window_index}'
+
+    # Counters must outlive their own window so the next one can weight them
+    current = increment(cache, current_key, policy.window * 2)
+    previous = cache.get(f'{base}:{window_index - 1}', 0)
+
+    weight = 1 - (now - window_start) / policy.window
+    estimate = previous * weight + current
+    reset_time = window_start + policy.window
+
+    if estimate > policy.requests:
+        # Rejected requests don't count, so a client recovers as soon as the window slides
+        try:
+            cache.decr(current_key)
+        except ValueError:
+            pass
+        return RateLimitResult(False, policy.requests, 0, reset_time)
+    return RateLimitResult(True, policy.requests, max(0, math.floor(policy.requests - estimate)), reset_time)
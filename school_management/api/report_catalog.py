@@ -0,0 +1,160 @@
+"""
+Catalog of generated reports.
+
+``generate_reports`` writes each report into ``reports/<report_id>/`` and then
+records it here: one ``Report`` row holding the metadata plus every file's
+path, size and SHA-256. Listing reports and their files is then a single
+indexed query instead of a directory walk that opens every ``metadata.json``
+and stats every file.
+
+Directories written before the catalog existed (or copied in by hand) are
+picked up by ``sync``; ``prune`` applies the retention policy
+(``REPORT_RETENTION_DAYS`` / ``REPORT_RETENTION_KEEP_LATEST``) in bulk.
+"""
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Report
+
+CHUNK_SIZE = 64 * 1024
+METADATA_FILE = 'metadata.json'
+
+
+def reports_root():
+    return os.path.join(settings.BASE_DIR, 'reports')
+
+
+def report_dir(report_id):
+    return os.path.join(reports_root(), report_id)
+
+
+def file_checksum(path):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def scan_files(directory):
+    """Every file under ``directory`` with its size and checksum, sorted by path."""
+    files = []
+    for root, dirs, filenames in os.walk(directory):
+        for filename in filenames:
+            full_path = os.path.join(root, filename)
+            files.append({
+                'name': filename,
+                'path': os.path.relpath(full_path, directory).replace(os.sep, '/'),
+                'size': os.path.getsize(full_path),
+                'type': filename.split('.')[-1] if '.' in filename else 'unknown',
+                'sha256': file_checksum(full_path),
+            })
+    files.sort(key=lambda item: item['path'])
+    return files
+
+
+def read_metadata(directory):
+    try:
+        with open(os.path.join(directory, METADATA_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def generated_at_of(report_id, metadata):
+    """The generation time from the metadata, else from the ``report_YYYYmmdd_HHMMSS`` id."""
+    value = parse_datetime(str(metadata.get('generated_at') or ''))
+    if value is None:
+        try:
+            value = datetime.strptime(report_id[len('report_'):][:15], '%Y%m%d_%H%M%S')
+        except ValueError:
+            value = datetime.fromtimestamp(os.path.getmtime(report_dir(report_id)))
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+
+def catalog_report(report_id, metadata=None):
+    """Index (or re-index) ``reports/<report_id>/``; returns the ``Report`` row."""
+    directory = report_dir(report_id)
+    if metadata is None:
+        # Unreadable metadata is still listed, as the directory walk used to do
+        metadata = read_metadata(directory) or {'report_type': 'unknown'}
+    files = scan_files(directory)
+    report, _ = Report.objects.update_or_create(
+        report_id=report_id,
+        defaults={
+            'report_type': metadata.get('report_type', 'unknown'),
+            'output_format': metadata.get('format', ''),
+            'generated_at': generated_at_of(report_id, metadata),
+            'version': metadata.get('version', ''),
+            'includes': metadata.get('includes', {}),
+            'files': files,
+            'file_count': len(files),
+            'total_size': sum(item['size'] for item in files),
+        },
+    )
+    return report
+
+
+def sync():
+    """
+    Reconcile the catalog with the ``reports/`` directory.
+
+    Indexes report directories that have a ``metadata.json`` but no row (a
+    directory without one is still being written) and drops rows whose
+    directory is gone. Returns ``(added, removed)`` report ids.
+    """
+    root = reports_root()
+    on_disk = set()
+    if os.path.isdir(root):
+        on_disk = {
+            name for name in os.listdir(root)
+            if name.startswith('report_') and os.path.isfile(os.path.join(root, name, METADATA_FILE))
+        }
+    cataloged = set(Report.objects.values_list('report_id', flat=True))
+
+    added = sorted(on_disk - cataloged)
+    for report_id in added:
+        catalog_report(report_id)
+    removed = sorted(cataloged - on_disk)
+    Report.objects.filter(report_id__in=removed).delete()
+    return added, removed
+
+
+def expired(days=None, keep_latest=None, now=None):
+    """Reports past the retention period, never including the ``keep_latest`` newest."""
+    days = getattr(settings, 'REPORT_RETENTION_DAYS', 90) if days is None else days
+    keep_latest = getattr(settings, 'REPORT_RETENTION_KEEP_LATEST', 10) if keep_latest is None else keep_latest
+    cutoff = (now or timezone.now()) - timedelta(days=days)
+
+    queryset = Report.objects.filter(generated_at__lt=cutoff)
+    if keep_latest:
+        newest = Report.objects.order_by('-generated_at', '-id').values_list('pk', flat=True)[:keep_latest]
+        queryset = queryset.exclude(pk__in=list(newest))
+    return queryset
+
+
+def delete_reports(report_ids):
+    """Delete report directories, then their rows in one query; returns the ids deleted."""
+    root = os.path.realpath(reports_root())
+    for report_id in report_ids:
+        directory = os.path.realpath(report_dir(report_id))
+        if os.path.commonpath([root, directory]) == root and directory != root:
+            shutil.rmtree(directory, ignore_errors=True)
+    Report.objects.filter(report_id__in=report_ids).delete()
+    return list(report_ids)
+
+
+def prune(days=None, keep_latest=None, dry_run=False):
+    report_ids = list(expired(days, keep_latest).values_list('report_id', flat=True))
+    if dry_run:
+        return report_ids
+    return delete_reports(report_ids)
@@ -0,0 +1,176 @@
+"""
+Report file renderers.
+
+``generate_reports`` builds each report family's dataset once and then
+renders it into every requested format. Renderers take plain data (lists of
+row dicts and dicts of values) and only use the standard library and
+reportlab, so they can run in spawned pool processes without Django being set
+up.
+
+- JSON is dumped as before.
+- CSV is written row by row with the ``csv`` module, one file per list
+  section, instead of building a pandas DataFrame per section.
+- HTML is assembled from a list of parts and escapes every value.
+- PDF tables are split into chunks of ``PDF_TABLE_CHUNK_ROWS`` rows, each
+  repeating the header, so reportlab lays out many small tables instead of
+  one huge one.
+"""
+import csv
+import html
+import json
+
+FORMATS = ['json', 'csv', 'html', 'pdf']
+
+PDF_TABLE_CHUNK_ROWS = 250
+
+
+def title(name):
+    return name.replace('_', ' ').title()
+
+
+def render_json(data, base_filename, generated_at):
+    path = f'{base_filename}.json'
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2, default=str)
+    return [path]
+
+
+def render_csv(data, base_filename, generated_at):
+    paths = []
+    for key, rows in data.items():
+        if not isinstance(rows, list) or not rows:
+            continue
+        path = f'{base_filename}_{key}.csv'
+        with open(path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]), extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(rows)
+        paths.append(path)
+    return paths
+
+
+def render_html(data, base_filename, generated_at):
+    parts = [f"""
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <title>School Management Report</title>
+            <style>
+                body {{ font-family: Arial, sans-serif; margin: 20px; }}
+                .section {{ margin-bottom: 30px; }}
+                .section h2 {{ color: #333; border-bottom: 2px solid #007bff; padding-bottom: 5px; }}
+                table {{ border-collapse: collapse; width: 100%; margin-top: 10px; }}
+                th, td {{ border: 1px solid #ddd; padding: 8px; text-align: left; }}
+                th {{ background-color: #f2f2f2; }}
+                tr:nth-child(even) {{ background-color: #f9f9f9; }}
+            </style>
+        </head>
+        <body>
+            <h1>School Management Report</h1>
+            <p>Generated on: {html.escape(generated_at)}</p>
+        """]
+
+    for section_name, section_data in data.items():
+        parts.append(f"<div class='section'><h2>{html.escape(title(section_name))}</h2>")
+        if isinstance(section_data, list) and section_data:
+            headers = list(section_data[0])
+            parts.append('<table><thead><tr>')
+            parts.extend(f'<th>{html.escape(title(header))}</th>' for header in headers)
+            parts.append('</tr></thead><tbody>')
+            for item in section_data:
+                parts.append('<tr>')
+                parts.extend(f"<td>{html.escape(str(item.get(header, '')))}</td>" for header in headers)
+                parts.append('</tr>')
+            parts.append('</tbody></table>')
+        elif isinstance(section_data, dict):
+            parts.append('<table><tbody>')
+            parts.extend(
+                f'<tr><td><strong>{html.escape(title(key))}</strong></td><td>{html.escape(str(value))}</td></tr>'
+                for key, value in section_data.items()
+            )
+            parts.append('</tbody></table>')
+        else:
+            parts.append(f'<p>{html.escape(str(section_data))}</p>')
+        parts.append('</div>')
+
+    parts.append('</body></html>')
+    path = f'{base_filename}.html'
+    with open(path, 'w') as f:
+        f.write(''.join(parts))
+    return [path]
+
+
+def render_pdf(data, base_filename, generated_at):
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+
+    path = f'{base_filename}.pdf'
+    doc = SimpleDocTemplate(path, pagesize=A4)
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle('CustomTitle', parent=styles['Heading1'], fontSize=16, spaceAfter=30)
+    table_style = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ])
+
+    story = [
+        Paragraph('School Management Report', title_style),
+        Paragraph(f'Generated on: {html.escape(generated_at)}', styles['Normal']),
+        Spacer(1, 12),
+    ]
+    for section_name, section_data in data.items():
+        story.append(Paragraph(html.escape(title(section_name)), styles['Heading2']))
+        story.append(Spacer(1, 6))
+
+        if isinstance(section_data, list) and section_data:
+            headers = list(section_data[0])
+            for start in range(0, len(section_data), PDF_TABLE_CHUNK_ROWS):
+                chunk = section_data[start:start + PDF_TABLE_CHUNK_ROWS]
+                rows = [headers] + [[str(item.get(header, '')) for header in headers] for item in chunk]
+                # repeatRows keeps the header on every page a chunk spills onto
+                table = Table(rows, repeatRows=1)
+                table.setStyle(table_style)
+                story.append(table)
+            story.append(Spacer(1, 12))
+        elif isinstance(section_data, dict):
+            for key, value in section_data.items():
+                story.append(Paragraph(f'<b>{html.escape(title(key))}:</b> {html.escape(str(value))}', styles['Normal']))
+            story.append(Spacer(1, 12))
+        else:
+            story.append(Paragraph(html.escape(str(section_data)), styles['Normal']))
+            story.append(Spacer(1, 12))
+
+        story.append(Spacer(1, 12))
+
+    doc.build(story)
+    return [path]
+
+
+RENDERERS = {
+    'json': render_json,
+    'csv': render_csv,
+    'html': render_html,
+    'pdf': render_pdf,
+}
+
+
+def parse_formats(value):
+    """Turn ``'json,csv'`` into ``['json', 'csv']``; raises ValueError for unknown formats."""
+    formats = list(dict.fromkeys(item.strip() for item in (value or '').split(',') if item.strip()))
+    unknown = [item for item in formats if item not in RENDERERS]
+    if not formats or unknown:
+        raise ValueError(f"format must be a comma-separated list of: {', '.join(FORMATS)}")
+    return formats
+
+
+def render(output_format, data, base_filename, generated_at):
+    """Write ``data`` in ``output_format``; returns the paths written."""
+    return RENDERERS[output_format](data, base_filename, generated_at)
@@ -0,0 +1,146 @@
+"""
+Versioned API response cache.
+
+``cached_response`` caches a view method's response data under a key built
+from the endpoint, its query parameters, the caller's scope and a version
+counter for every model the response is built from. Saving or deleting any
+of those models bumps its version (see ``signals.py``), so an entry can never
+be served after a write; there is no staleness window to tune.
+
+Each cached response carries an ETag derived from the same key. A request
+whose ``If-None-Match`` matches gets a 304 straight from the version lookup,
+without touching the database, the cached body or a serializer.
+
+Unlike ``cache_page``, the decorator runs inside the view after DRF has
+authenticated the request and checked permissions, and the key includes the
+caller's role, so one role's response is never served to another.
+"""
+import hashlib
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import patch_vary_headers
+from rest_framework import status
+from rest_framework.response import Response
+
+KEY_PREFIX = 'response_cache'
+CACHED_HEADERS = ('Link',)
+
+# Models with cached responses depending on them, by label. Filled in by @cached_response.
+TRACKED_MODELS = set()
+
+# Fields whose changes never show up in a cached response. Saves that only touch
+# these (e.g. last_login on every sign-in) don't bump the model version.
+VOLATILE_FIELDS = {
+    'api.User': {
+        'last_login', 'password', 'failed_login_attempts', 'last_login_attempt',
+        'is_account_locked', 'account_locked_until', 'password_changed_at',
+        # Bumped by every partial save (see User.save); not served by any cached view
+        'updated_at',
+    },
+}
+
+
+def version_key(label):
+    return f'{KEY_PREFIX}:version:{label}'
+
+
+def model_versions(labels):
+    """Current version of each model label, starting a fresh one for labels the cache has lost."""
+    keys = [version_key(label) for label in labels]
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        # A fixed fallback would bring back entries stored under it before the
+        # version was evicted. add() so concurrent readers settle on one value.
+        for key in missing:
+            cache.add(key, uuid.uuid4().hex, None)
+        versions.update(cache.get_many(missing))
+    return [versions.get(key) for key in keys]
+
+
+def bump_versions(labels):
+    """Outdate every cached response built from ``labels`` once the transaction commits."""
+    labels = [label for label in labels if label in TRACKED_MODELS]
+    if not labels:
+        return
+
+    # Random versions rather than incr(): a counter restarted after eviction
+    # could return to a value that outdated entries were stored under
+    def bump():
+        version = uuid.uuid4().hex
+        cache.set_many({version_key(label): version for label in labels}, None)
+
+    transaction.on_commit(bump)
+
+
+def is_volatile_save(label, update_fields):
+    return bool(update_fields) and set(update_fields) <= VOLATILE_FIELDS.get(label, set())
+
+
+def role_scope(request):
+    user = request.user
+    return f"role:{getattr(user, 'role', 'anonymous')}:staff:{int(user.is_staff)}"
+
+
+def user_scope(request):
+    return f'user:{request.user.pk}'
+
+
+def cache_key(request, scope, labels):
+    params = sorted(request.query_params.lists())
+    raw = repr((request.path, params, scope(request), model_versions(labels)))
+    return f'{KEY_PREFIX}:{hashlib.sha1(raw.encode()).hexdigest()}'
+
+
+def etag_matches(request, etag):
+    header = request.META.get('HTTP_IF_NONE_MATCH', '')
+    return header.strip() == '*' or etag in [tag.strip() for tag in header.split(',')]
+
+
+def cached_response(*models, scope=role_scope, timeout=None):
+    """
+    Cache a DRF view method's 200 responses until one of ``models`` changes.
+
+    ``scope`` maps the request to the audience a response is valid for;
+    use ``user_scope`` for responses filtered to the requesting user.
+    """
+    labels = sorted(model._meta.label for model in models)
+    TRACKED_MODELS.update(labels)
+
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            key = cache_key(request, scope, labels)
+            etag = f'W/"{key.rsplit(":", 1)[1]}"'
+
+            if etag_matches(request, etag):
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+                cache_state = 'HIT'
+            else:
+                entry = cache.get(key)
+                if entry is not None:
+                    response = Response(entry['data'], headers=entry['headers'])
+                    cache_state = 'HIT'
+                else:
+                    response = view_method(self, request, *args, **kwargs)
+                    cache_state = 'MISS'
+                    if response.status_code == status.HTTP_200_OK:
+                        headers = {name: response[name] for name in CACHED_HEADERS if response.has_header(name)}
+                        cache.set(
+                            key, {'data': response.data, 'headers': headers},
+                            timeout if timeout is not None else settings.API_CACHE_TIMEOUT,
+                        )
+
+            if response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+                response['ETag'] = etag
+                # Let clients keep the body but revalidate it on every use
+                response['Cache-Control'] = 'private, no-cache'
+                patch_vary_headers(response, ['Authorization'])
+            response['X-Cache'] = cache_state
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,137 @@
+"""
+Public school configuration document served to the login page.
+
+The document is built from the ``School`` row and the handful of
+``SchoolSetting`` keys it uses, fetched with ``only()``/``values_list()`` so
+the settings' ``file_data`` blobs are never loaded. The result is kept in the
+shared cache and, for a few seconds at a time, in process memory, so a login
+page load normally costs no query and no cache round trip.
+
+Saving or deleting a ``School`` or ``SchoolSetting`` calls ``invalidate``
+(see ``signals.py``), which starts a new generation once the transaction
+commits. The shared copy records the generation it was built in and is only
+used while that is still current, so a build that read the database before
+a change cannot outlive it, however late it is stored. Other processes pick
+the change up when their in-process copy expires
+(``SCHOOL_CONFIG_LOCAL_TIMEOUT``).
+"""
+import hashlib
+import json
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import School, SchoolSetting
+
+CACHE_KEY = 'school_config:document'
+GENERATION_KEY = 'school_config:generation'
+
+SCHOOL_FIELDS = ('name', 'logo', 'school_timings', 'academic_year', 'email', 'phone', 'address', 'website')
+SETTING_KEYS = (
+    'login_methods', 'primary_color', 'secondary_color', 'remember_login', 'password_reset',
+    'rate_limiting', 'max_login_attempts', 'login_window_seconds',
+)
+
+DEFAULT_CONFIG = {
+    'login_methods': ['username', 'email'],
+    'branding': {
+        'school_name': 'School Management System',
+        'logo_url': None,
+        'primary_color': '#3b82f6',
+        'secondary_color': '#64748b'
+    },
+    'features': {
+        'remember_login': True,
+        'password_reset': True,
+        'rate_limiting': True
+    }
+}
+
+# (expires at, entry) for this process
+_local = {}
+
+
+def build_config():
+    """Build the configuration document from the database."""
+    school = School.objects.only(*SCHOOL_FIELDS).order_by('pk').first()
+    if not school:
+        return DEFAULT_CONFIG
+
+    settings_dict = dict(
+        SchoolSetting.objects.filter(school=school, key__in=SETTING_KEYS).values_list('key', 'value')
+    )
+
+    def flag(key):
+        return settings_dict.get(key, 'true').lower() == 'true'
+
+    return {
+        'login_methods': settings_dict.get('login_methods', 'username,email').split(','),
+        'branding': {
+            'school_name': school.name,
+            'logo_url': school.logo.url if school.logo else None,
+            'primary_color': settings_dict.get('primary_color', '#3b82f6'),
+            'secondary_color': settings_dict.get('secondary_color', '#64748b'),
+            'school_timings': school.school_timings,
+            'academic_year': school.academic_year
+        },
+        'features': {
+            'remember_login': flag('remember_login'),
+            'password_reset': flag('password_reset'),
+            'rate_limiting': flag('rate_limiting'),
+            'max_login_attempts': int(settings_dict.get('max_login_attempts', '5')),
+            'login_window_seconds': int(settings_dict.get('login_window_seconds', '300'))
+        },
+        'contact': {
+            'email': school.email,
+            'phone': school.phone,
+            'address': school.address,
+            'website': school.website
+        }
+    }
+
+
+def make_entry(config):
+    body = json.dumps(config, sort_keys=True)
+    return {'config': config, 'etag': f'"{hashlib.sha1(body.encode()).hexdigest()}"'}
+
+
+def get_config():
+    """Return ``{'config': ..., 'etag': ...}``, from memory, the shared cache or the database."""
+    now = time.monotonic()
+    local = _local.get(CACHE_KEY)
+    if local and local[0] > now:
+        return local[1]
+
+    cached = cache.get_many([CACHE_KEY, GENERATION_KEY])
+    generation = cached.get(GENERATION_KEY) or current_generation()
+    entry = cached.get(CACHE_KEY)
+    if entry is None or entry.get('generation') != generation:
+        entry = dict(make_entry(build_config()), generation=generation)
+        cache.set(CACHE_KEY, entry, None)
+
+    _local[CACHE_KEY] = (now + getattr(settings, 'SCHOOL_CONFIG_LOCAL_TIMEOUT', 5), entry)
+    return entry
+
+
+def cache_control():
+    return f"public, max-age={getattr(settings, 'SCHOOL_CONFIG_MAX_AGE', 60)}"
+
+
+def current_generation():
+    # add() so concurrent first readers agree on one generation
+    cache.add(GENERATION_KEY, uuid.uuid4().hex, None)
+    return cache.get(GENERATION_KEY)
+
+
+def clear():
+    _local.pop(CACHE_KEY, None)
+    cache.set(GENERATION_KEY, uuid.uuid4().hex, None)
+    cache.delete(CACHE_KEY)
+
+
+def invalidate():
+    """Drop the cached document once the transaction commits."""
+    transaction.on_commit(clear)
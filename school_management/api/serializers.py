@@ -6,12 +6,75 @@ from django.core.validators import validate_email, MinValueValidator, MaxValueVa
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 from django.utils.html import strip_tags
+from django.urls import reverse
 import re
 import logging
+from decimal import Decimal
 from .models import *
+from . import blobstore, timetable
 
 logger = logging.getLogger('api.fee_operations')
 
+# === Sparse Fieldsets ===
+
+class SparseFieldsetMixin:
+    """
+    Let clients trim a serializer's output with ``?fields=a,b,c``.
+
+    Unknown names are ignored. Views can call ``requested_fields`` to
+    avoid prefetching relations that will not be rendered.
+    """
+    fields_param = 'fields'
+
+    @classmethod
+    def requested_fields(cls, request):
+        if request is None:
+            return None
+        raw = request.query_params.get(cls.fields_param)
+        if not raw:
+            return None
+        return {name.strip() for name in raw.split(',') if name.strip()}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        requested = self.requested_fields(self.context.get('request'))
+        if requested:
+            for name in set(self.fields) - requested:
+                self.fields.pop(name)
+
+# === Uploaded Files ===
+
+class BlobFileMixin:
+    """
+    Store a model's uploaded file in the blob store instead of the row.
+
+    Serializers declare a write-only ``FileField`` named ``blob_prefix``
+    (e.g. ``file``) and a ``<blob_prefix>_url`` method field; the upload is
+    saved under its digest and only the metadata is written to the row.
+    """
+    blob_kind = None
+    blob_prefix = 'file'
+
+    def pop_upload(self, validated_data):
+        upload = validated_data.pop(self.blob_prefix, None)
+        if upload is not None:
+            validated_data.update(blobstore.store_upload(upload, self.blob_prefix))
+        return validated_data
+
+    def create(self, validated_data):
+        return super().create(self.pop_upload(validated_data))
+
+    def update(self, instance, validated_data):
+        return super().update(instance, self.pop_upload(validated_data))
+
+    def blob_url(self, obj):
+        prefix = self.blob_prefix
+        if not getattr(obj, f'{prefix}_sha256') and not getattr(obj, f'{prefix}_name'):
+            return None
+        url = reverse('file_download', kwargs={'kind': self.blob_kind, 'pk': obj.pk})
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
 # === Dashboard Stats Serializers ===
 
 class LibraryStatsSerializer(serializers.ModelSerializer):
@@ -102,6 +165,19 @@ class AdminUserUpdateSerializer(serializers.Serializer):
         validate_password(value)
         return value
 
+class ClassFeeActionSerializer(serializers.Serializer):
+    """
+    Serializer for the admin action that assigns one fee to every student in a class.
+    """
+    class_id = serializers.PrimaryKeyRelatedField(queryset=SchoolClass.objects.all(), source='school_class')
+    amount = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal('0.01'), max_value=Decimal('1000000'))
+    due_date = serializers.DateField()
+
+    def validate_due_date(self, value):
+        if value < timezone.now().date():
+            raise serializers.ValidationError("Due date cannot be in the past.")
+        return value
+
 # === Model Serializers with Create/Update Logic ===
 
 class StudentSerializer(serializers.ModelSerializer):
@@ -153,12 +229,33 @@ class PeriodSerializer(serializers.ModelSerializer):
 
 class TimetableSerializer(serializers.ModelSerializer):
     teacher = TeacherSerializer(read_only=True, allow_null=True)
+    teacher_id = serializers.PrimaryKeyRelatedField(
+        source='teacher', queryset=Teacher.objects.all(), write_only=True, required=False, allow_null=True
+    )
     period = PeriodSerializer(read_only=True) # <-- Use the new serializer
 
     class Meta:
         model = Timetable
         fields = '__all__'
 
+    def validate(self, attrs):
+        """Reject entries that double-book the class or the teacher."""
+        def value(name):
+            return attrs[name] if name in attrs else getattr(self.instance, name, None)
+
+        school_class, teacher = value('school_class'), value('teacher')
+        start_time, end_time, day = value('start_time'), value('end_time'), value('day_of_week')
+        if start_time is not None and end_time is not None and start_time >= end_time:
+            raise serializers.ValidationError({'end_time': 'End time must be after the start time.'})
+        if school_class is not None and day and start_time and end_time:
+            clashes = timetable.find_clashes(
+                school_class.pk, teacher.pk if teacher else None, day, start_time, end_time,
+                exclude=self.instance.pk if self.instance else None,
+            )
+            if clashes:
+                raise serializers.ValidationError({'non_field_errors': [clash.message() for clash in clashes]})
+        return attrs
+
 class FeeTypeSerializer(serializers.ModelSerializer):
     class Meta:
         model = FeeType
@@ -319,24 +416,30 @@ class AssignmentSerializer(serializers.ModelSerializer):
                 raise serializers.ValidationError("Teacher profile not found for current user.")
         return super().create(validated_data)
 
-class AssignmentSubmissionSerializer(serializers.ModelSerializer):
+class AssignmentSubmissionSerializer(BlobFileMixin, serializers.ModelSerializer):
     student = StudentSerializer(read_only=True)
     assignment = AssignmentSerializer(read_only=True)
     graded_by = TeacherSerializer(read_only=True)
     is_late = serializers.SerializerMethodField()
+    file = serializers.FileField(write_only=True, required=False)
+    file_url = serializers.SerializerMethodField()
+    blob_kind = 'submissions'
 
     class Meta:
         model = AssignmentSubmission
         fields = [
             'id', 'assignment', 'student', 'submitted_at', 'status', 'text_content',
-            'file_name', 'file_data', 'file_mime_type', 'grade', 'feedback',
+            'file', 'file_name', 'file_mime_type', 'file_size', 'file_url', 'grade', 'feedback',
             'graded_at', 'graded_by', 'is_late'
         ]
-        read_only_fields = ['submitted_at', 'graded_at', 'graded_by']
+        read_only_fields = ['submitted_at', 'graded_at', 'graded_by', 'file_size']
 
     def get_is_late(self, obj):
         return obj.is_late()
 
+    def get_file_url(self, obj):
+        return self.blob_url(obj)
+
     def create(self, validated_data):
         # Set the student based on the current user
         request = self.context.get('request')
@@ -371,24 +474,22 @@ class SchoolSerializer(serializers.ModelSerializer):
                 return request.build_absolute_uri(obj.logo.url)
         return None
 
-class SchoolSettingSerializer(serializers.ModelSerializer):
+class SchoolSettingSerializer(BlobFileMixin, serializers.ModelSerializer):
+    file = serializers.FileField(write_only=True, required=False)
     file_url = serializers.SerializerMethodField()
+    blob_kind = 'settings'
 
     class Meta:
         model = SchoolSetting
         fields = [
             'id', 'key', 'label', 'value', 'setting_type', 'required',
-            'description', 'file_data', 'file_name', 'file_mime_type',
+            'description', 'file', 'file_name', 'file_mime_type', 'file_size',
             'file_url', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['created_at', 'updated_at', 'file_url']
+        read_only_fields = ['created_at', 'updated_at', 'file_url', 'file_size']
 
     def get_file_url(self, obj):
-        if obj.file_data and obj.file_mime_type:
-            # For binary data, we could return a data URL or serve it via a view
-            # For now, return None as we'll handle file display on frontend
-            return None
-        return None
+        return self.blob_url(obj)
 
     def create(self, validated_data):
         # Get the school (assuming single school setup)
@@ -498,19 +599,26 @@ class ReimbursementTypeSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'description', 'max_amount', 'requires_approval', 'created_at']
         read_only_fields = ['created_at']
 
-class ReimbursementSerializer(serializers.ModelSerializer):
+class ReimbursementSerializer(BlobFileMixin, serializers.ModelSerializer):
     teacher = serializers.SerializerMethodField()
     reimbursement_type = ReimbursementTypeSerializer(read_only=True)
     reviewed_by = UserSerializer(read_only=True)
+    receipt_file = serializers.FileField(write_only=True, required=False)
+    receipt_file_url = serializers.SerializerMethodField()
+    blob_kind = 'reimbursements'
+    blob_prefix = 'receipt_file'
 
     class Meta:
         model = Reimbursement
         fields = [
             'id', 'teacher', 'reimbursement_type', 'amount', 'description',
-            'receipt_file_name', 'receipt_file_data', 'receipt_file_mime_type',
+            'receipt_file', 'receipt_file_name', 'receipt_file_mime_type', 'receipt_file_size', 'receipt_file_url',
             'status', 'submitted_at', 'reviewed_at', 'reviewed_by', 'review_notes'
         ]
-        read_only_fields = ['submitted_at', 'reviewed_at', 'reviewed_by']
+        read_only_fields = ['submitted_at', 'reviewed_at', 'reviewed_by', 'receipt_file_size']
+
+    def get_receipt_file_url(self, obj):
+        return self.blob_url(obj)
 
     def get_teacher(self, obj):
         return TeacherSerializer(obj.teacher).data
@@ -551,10 +659,12 @@ class DiscountSerializer(serializers.ModelSerializer):
         fields = ['id', 'student', 'fee', 'discount_type', 'value', 'reason', 'applied_by', 'applied_at']
         read_only_fields = ['applied_at', 'applied_by']
 
+    @transaction.atomic
     def create(self, validated_data):
         request = self.context.get('request')
         if request and hasattr(request, 'user'):
             validated_data['applied_by'] = request.user
+        # Discount.save refreshes the fee ledger inside this transaction
         return super().create(validated_data)
 
 class RefundSerializer(serializers.ModelSerializer):
@@ -600,7 +710,7 @@ class FeeReportSerializer(serializers.ModelSerializer):
 
 # Enhanced Fee and Payment Serializers with nested relationships
 
-class EnhancedFeeSerializer(serializers.ModelSerializer):
+class EnhancedFeeSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     student = StudentSerializer(read_only=True)
     payments = PaymentSerializer(many=True, read_only=True)
     discounts = DiscountSerializer(many=True, read_only=True)
@@ -618,20 +728,20 @@ class EnhancedFeeSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['status']  # Status is updated automatically
 
+    def get_ledger(self, obj):
+        # FeeViewSet joins the ledger with select_related, so this is free per row
+        try:
+            return obj.ledger
+        except FeeLedger.DoesNotExist:
+            return FeeLedger.refresh(obj)
+
     def get_total_paid(self, obj):
-        return obj.payments.filter(status=Payment.Status.COMPLETED).aggregate(
-            total=models.Sum('amount')
-        )['total'] or 0
+        return self.get_ledger(obj).total_paid
 
     def get_outstanding_balance(self, obj):
-        total_paid = self.get_total_paid(obj)
-        total_discounts = obj.discounts.aggregate(
-            total=models.Sum('value')
-        )['total'] or 0
-        return max(0, obj.amount - total_paid - total_discounts - obj.waived_amount)
+        return self.get_ledger(obj).outstanding
 
     def get_is_overdue(self, obj):
-        from django.utils import timezone
         return obj.due_date < timezone.now().date() and obj.status in [Fee.Status.UNPAID, Fee.Status.PARTIAL]
 
 class EnhancedPaymentSerializer(serializers.ModelSerializer):
@@ -655,3 +765,26 @@ class EnhancedPaymentSerializer(serializers.ModelSerializer):
 
 # === User and Auth Serializers ===
 
+# === Background Job Serializers ===
+
+class BackgroundJobSerializer(serializers.ModelSerializer):
+    requested_by = serializers.StringRelatedField()
+
+    class Meta:
+        model = BackgroundJob
+        fields = [
+            'id', 'job_type', 'params', 'status', 'progress', 'message', 'result',
+            'error', 'requested_by', 'created_at', 'started_at', 'finished_at'
+        ]
+        read_only_fields = fields
+
+class ReportSerializer(serializers.ModelSerializer):
+    format = serializers.CharField(source='output_format', read_only=True)
+
+    class Meta:
+        model = Report
+        fields = [
+            'report_id', 'report_type', 'format', 'generated_at', 'version', 'includes',
+            'file_count', 'total_size'
+        ]
+        read_only_fields = fields
@@ -0,0 +1,123 @@
+"""
+Model signal handlers.
+
+Writes to the tables behind the precomputed dashboard stats schedule an
+incremental refresh of just the teachers and classes they touch, and drop the
+cached student dashboards they affect. Bulk writers that bypass signals
+(``bulk_create``/``update``) call ``stats.schedule_refresh`` and the
+``dashboard`` invalidation helpers themselves.
+
+Attendance writes recount the attendance rollups they touch in the same
+transaction; moving a student recounts the class rollups of both classes.
+
+Notification writes keep the cached unread counters in step, and new
+notifications are pushed to their users' event streams.
+
+Changes to the school or its settings drop the cached public config document.
+
+Every save or delete of a model with cached API responses also bumps that
+model's response cache version.
+"""
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import attendance_rollups, dashboard, notifications, response_cache, school_config, stats
+from .models import School, SchoolSetting, Student, Attendance, Notification, Timetable, Assignment, AssignmentSubmission, Grade, Reimbursement
+
+
+@receiver(pre_save, sender=Attendance)
+def attendance_saving(sender, instance, **kwargs):
+    # An update may move the record to another student or day; recount the old buckets too
+    instance._rollup_previous = None
+    if instance.pk is not None:
+        instance._rollup_previous = Attendance.objects.filter(pk=instance.pk).values_list('student', 'date').first()
+
+
+@receiver([post_save, post_delete], sender=Attendance)
+def attendance_changed(sender, instance, **kwargs):
+    previous = getattr(instance, '_rollup_previous', None)
+    attendance_rollups.record_changes([(instance.student_id, instance.date)] + ([previous] if previous else []))
+    teacher_ids = Student.objects.filter(pk=instance.student_id).values_list('school_class__teacher', flat=True)
+    stats.schedule_refresh(['attendance'], teacher_ids=list(teacher_ids))
+    dashboard.invalidate_students([instance.student_id])
+
+
+@receiver([post_save, post_delete], sender=AssignmentSubmission)
+def submission_changed(sender, instance, **kwargs):
+    teacher_ids = Assignment.objects.filter(pk=instance.assignment_id).values_list('teacher', flat=True)
+    stats.schedule_refresh(['assignments', 'grades'], teacher_ids=list(teacher_ids))
+    dashboard.invalidate_students([instance.student_id])
+
+
+@receiver([post_save, post_delete], sender=Assignment)
+def assignment_changed(sender, instance, **kwargs):
+    stats.schedule_refresh(['assignments'], teacher_ids=[instance.teacher_id])
+    dashboard.invalidate_class(instance.school_class_id)
+
+
+@receiver([post_save, post_delete], sender=Grade)
+def grade_changed(sender, instance, **kwargs):
+    class_ids = Student.objects.filter(pk=instance.student_id).values_list('school_class', flat=True)
+    stats.schedule_refresh(['ranks'], class_ids=list(class_ids))
+    dashboard.invalidate_students([instance.student_id])
+
+
+@receiver([post_save, post_delete], sender=Reimbursement)
+def reimbursement_changed(sender, instance, **kwargs):
+    stats.schedule_refresh(['reimbursements'], teacher_ids=[instance.teacher_id])
+
+
+@receiver([post_save, post_delete], sender=Timetable)
+def timetable_changed(sender, instance, **kwargs):
+    dashboard.invalidate_class(instance.school_class_id)
+
+
+@receiver(pre_save, sender=Student)
+def student_saving(sender, instance, **kwargs):
+    instance._previous_class_id = None
+    if instance.pk is not None:
+        instance._previous_class_id = Student.objects.filter(pk=instance.pk).values_list('school_class', flat=True).first()
+
+
+@receiver(post_save, sender=Student)
+def student_changed(sender, instance, created=False, **kwargs):
+    # Moving a student to another class changes every section of their dashboard
+    dashboard.invalidate_students([instance.pk])
+    previous_class_id = getattr(instance, '_previous_class_id', None)
+    if not created and previous_class_id != instance.school_class_id:
+        attendance_rollups.student_moved(instance.pk, [previous_class_id, instance.school_class_id])
+
+
+@receiver(post_save, sender=Notification)
+def notification_saved(sender, instance, created=False, **kwargs):
+    if created:
+        if not instance.is_read:
+            notifications.adjust_unread(instance.user_id, 1)
+        notifications.publish_created([instance])
+    else:
+        # An edit may have flipped is_read either way; recount on the next read
+        notifications.forget_unread([instance.user_id])
+
+
+@receiver(post_delete, sender=Notification)
+def notification_deleted(sender, instance, **kwargs):
+    if not instance.is_read:
+        notifications.adjust_unread(instance.user_id, -1)
+
+
+@receiver([post_save, post_delete], sender=School)
+@receiver([post_save, post_delete], sender=SchoolSetting)
+def school_config_changed(sender, **kwargs):
+    school_config.invalidate()
+
+
+@receiver(post_save)
+def bump_response_cache_on_save(sender, update_fields=None, **kwargs):
+    label = sender._meta.label
+    if label in response_cache.TRACKED_MODELS and not response_cache.is_volatile_save(label, update_fields):
+        response_cache.bump_versions([label])
+
+
+@receiver(post_delete)
+def bump_response_cache_on_delete(sender, **kwargs):
+    response_cache.bump_versions([sender._meta.label])
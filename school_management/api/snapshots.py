@@ -0,0 +1,426 @@
+"""
+Streaming database snapshots.
+
+A snapshot is newline-delimited JSON. The first line describes the snapshot,
+then every table contributes a header line, one JSON array per row (values in
+header field order) and a footer with the row count:
+
+    {"type": "snapshot", "version": "2.0", "timestamp": "...", "since": null, "tables": [...]}
+    {"type": "table", "table": "fees", "model": "api.fee", "fields": ["id", "student_id", ...], "incremental": false}
+    [1, 42, "5000.00", ...]
+    {"type": "end", "table": "fees", "rows": 1}
+
+Rows are read with ``.values_list().iterator()`` so memory stays bounded by
+the chunk size rather than by the size of the database. ``import_snapshot``
+reads the same format back with batched ``bulk_create`` calls, loading tables
+in foreign-key dependency order.
+"""
+import gzip
+import json
+import time as timer
+import zlib
+from collections import namedtuple
+from datetime import datetime, time
+
+from django.core.management.color import no_style
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, models, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from . import attendance_rollups, response_cache, stats
+from .models import (
+    User, SchoolClass, Student, Teacher, Period, FeeType, Fee, Payment, Discount,
+    LeaveRequest, Attendance, Timetable, Assignment, Grade, Task, Notification, FeeLedger,
+)
+
+SNAPSHOT_VERSION = '2.0'
+DEFAULT_CHUNK_SIZE = 2000
+STREAM_BUFFER_SIZE = 64 * 1024
+
+CONFLICT_MODES = ('error', 'skip', 'update')
+LEDGER_TABLES = {'fees', 'payments', 'discounts'}
+# Tables the attendance rollups and the dashboard stats are computed from
+ROLLUP_TABLES = {'attendances', 'students'}
+STATS_TABLES = {'users', 'students', 'teachers', 'attendances', 'timetables', 'assignments', 'grades'}
+
+SnapshotTable = namedtuple('SnapshotTable', ['model', 'since_field'])
+
+
+class SnapshotError(ValueError):
+    """Raised when snapshot parameters or a snapshot stream are invalid."""
+    pass
+
+
+# Tables in export order. ``since_field`` is the modification timestamp used
+# for ``?since=`` incremental snapshots, which then hold every row created or
+# changed since (deletions are not recorded); tables without one are always
+# exported in full.
+SNAPSHOT_TABLES = {
+    'users': SnapshotTable(User, 'updated_at'),
+    'school_classes': SnapshotTable(SchoolClass, None),
+    'students': SnapshotTable(Student, None),
+    'teachers': SnapshotTable(Teacher, None),
+    'periods': SnapshotTable(Period, None),
+    'fee_types': SnapshotTable(FeeType, None),
+    'fees': SnapshotTable(Fee, 'updated_at'),
+    'payments': SnapshotTable(Payment, 'updated_at'),
+    'discounts': SnapshotTable(Discount, 'updated_at'),
+    'leave_requests': SnapshotTable(LeaveRequest, None),
+    'attendances': SnapshotTable(Attendance, 'updated_at'),
+    'timetables': SnapshotTable(Timetable, None),
+    'assignments': SnapshotTable(Assignment, 'updated_at'),
+    'grades': SnapshotTable(Grade, 'updated_at'),
+    'tasks': SnapshotTable(Task, 'updated_at'),
+    'notifications': SnapshotTable(Notification, 'updated_at'),
+}
+
+
+def resolve_tables(value):
+    """Turn a comma-separated ``?tables=`` value into an ordered list of table names."""
+    if not value:
+        return list(SNAPSHOT_TABLES)
+    requested = {name.strip() for name in value.split(',') if name.strip()}
+    unknown = requested - set(SNAPSHOT_TABLES)
+    if unknown:
+        raise SnapshotError(f"Unknown snapshot tables: {', '.join(sorted(unknown))}")
+    return [name for name in SNAPSHOT_TABLES if name in requested]
+
+
+def parse_since(value):
+    """Parse ``?since=`` as an ISO date or datetime; returns an aware datetime or None."""
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise SnapshotError("'since' must be an ISO 8601 date or datetime.")
+        parsed = datetime.combine(day, time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def table_fields(model):
+    """Column names (``attname``) exported for a model."""
+    return [field.attname for field in model._meta.concrete_fields]
+
+
+def table_queryset(table, since=None):
+    """Queryset of raw column values for one snapshot table."""
+    spec = SNAPSHOT_TABLES[table]
+    queryset = spec.model._default_manager.order_by('pk')
+    if since is not None and spec.since_field:
+        field = spec.model._meta.get_field(spec.since_field)
+        value = since if isinstance(field, models.DateTimeField) else timezone.localdate(since)
+        queryset = queryset.filter(**{f'{spec.since_field}__gte': value})
+    return queryset.values_list(*table_fields(spec.model))
+
+
+class SnapshotEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder without its millisecond truncation, so timestamps round-trip exactly."""
+
+    def default(self, o):
+        if isinstance(o, (datetime, time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+def dumps(value):
+    return json.dumps(value, cls=SnapshotEncoder, separators=(',', ':'))
+
+
+def iter_snapshot_lines(tables, since=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield the snapshot one NDJSON line at a time."""
+    yield dumps({
+        'type': 'snapshot',
+        'version': SNAPSHOT_VERSION,
+        'timestamp': timezone.now(),
+        'since': since,
+        'tables': tables,
+    }) + '\n'
+
+    for table in tables:
+        spec = SNAPSHOT_TABLES[table]
+        yield dumps({
+            'type': 'table',
+            'table': table,
+            'model': spec.model._meta.label_lower,
+            'fields': table_fields(spec.model),
+            'incremental': since is not None and spec.since_field is not None,
+        }) + '\n'
+
+        rows = 0
+        for row in table_queryset(table, since).iterator(chunk_size=chunk_size):
+            rows += 1
+            yield dumps(row) + '\n'
+
+        yield dumps({'type': 'end', 'table': table, 'rows': rows}) + '\n'
+
+
+def iter_encoded(lines, buffer_size=STREAM_BUFFER_SIZE):
+    """Group text lines into UTF-8 byte chunks of roughly ``buffer_size``."""
+    buffer, size = [], 0
+    for line in lines:
+        data = line.encode('utf-8')
+        buffer.append(data)
+        size += len(data)
+        if size >= buffer_size:
+            yield b''.join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+def iter_gzip(chunks, level=6):
+    """Gzip-compress a byte stream incrementally."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+# === Import ===
+
+def table_dependencies(table):
+    """Snapshot tables that ``table`` has foreign keys to."""
+    tables_by_model = {spec.model: name for name, spec in SNAPSHOT_TABLES.items()}
+    model = SNAPSHOT_TABLES[table].model
+    return {
+        tables_by_model[field.related_model]
+        for field in model._meta.concrete_fields
+        if field.is_relation and field.related_model in tables_by_model and field.related_model is not model
+    }
+
+
+def dependency_order(tables):
+    """Order ``tables`` so every table comes after the tables it references."""
+    remaining = [name for name in SNAPSHOT_TABLES if name in tables]
+    ordered = []
+    while remaining:
+        # Take the first table whose dependencies are placed, so an already
+        # valid order (such as SNAPSHOT_TABLES itself) is kept as is
+        ready = next((name for name in remaining if not table_dependencies(name) & set(remaining)), None)
+        if ready is None:
+            raise SnapshotError(f"Circular dependency between snapshot tables: {', '.join(remaining)}")
+        ordered.append(ready)
+        remaining.remove(ready)
+    return ordered
+
+
+def iter_lines(fileobj, compressed=False):
+    """Iterate the raw lines of a (possibly gzip-compressed) snapshot file object."""
+    source = gzip.GzipFile(fileobj=fileobj, mode='rb') if compressed else fileobj
+    for line in source:
+        yield line
+
+
+def iter_records(lines):
+    """Parse NDJSON lines, skipping blanks."""
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            raise SnapshotError(f'Line {number} is not valid JSON.')
+
+
+class TableLoader:
+    """Buffers rows for one table and writes them with ``bulk_create``."""
+
+    def __init__(self, table, fields, batch_size, conflicts):
+        self.table = table
+        self.model = SNAPSHOT_TABLES[table].model
+        self.batch_size = batch_size
+        self.conflicts = conflicts
+
+        columns = {field.attname: field for field in self.model._meta.concrete_fields}
+        unknown = [name for name in fields if name not in columns]
+        if unknown:
+            raise SnapshotError(f"Table '{table}' has unknown columns: {', '.join(unknown)}")
+        self.fields = [columns[name] for name in fields]
+        # bulk_create runs pre_save(), which would overwrite these with "now"
+        self.timestamp_fields = [
+            field.attname for field in self.fields
+            if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+        ]
+
+        self.batch = []
+        self.rows = 0
+        self.written = 0
+        self.started = timer.perf_counter()
+
+    def add(self, values):
+        if len(values) != len(self.fields):
+            raise SnapshotError(f"Row in table '{self.table}' has {len(values)} values, expected {len(self.fields)}.")
+        self.batch.append(self.model(**{
+            field.attname: field.to_python(value)
+            for field, value in zip(self.fields, values)
+        }))
+        self.rows += 1
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.batch:
+            return
+        batch, self.batch = self.batch, []
+        pk = self.model._meta.pk
+
+        if self.conflicts == 'skip':
+            existing = set(
+                self.model._default_manager.filter(pk__in=[obj.pk for obj in batch]).values_list('pk', flat=True)
+            )
+            batch = [obj for obj in batch if obj.pk not in existing]
+
+        timestamps = [[getattr(obj, name) for name in self.timestamp_fields] for obj in batch]
+        options = {'batch_size': self.batch_size}
+        if self.conflicts == 'skip':
+            options['ignore_conflicts'] = True
+        elif self.conflicts == 'update':
+            options.update(
+                update_conflicts=True,
+                unique_fields=[pk.name],
+                update_fields=[field.name for field in self.fields if not field.primary_key],
+            )
+        self.model._default_manager.bulk_create(batch, **options)
+
+        if self.timestamp_fields and batch:
+            for obj, values in zip(batch, timestamps):
+                for name, value in zip(self.timestamp_fields, values):
+                    setattr(obj, name, value)
+            self.model._default_manager.bulk_update(batch, self.timestamp_fields, batch_size=self.batch_size)
+        self.written += len(batch)
+
+    def finish(self, expected_rows=None):
+        self.flush()
+        if expected_rows is not None and expected_rows != self.rows:
+            raise SnapshotError(
+                f"Table '{self.table}' declared {expected_rows} rows but contained {self.rows}; the snapshot is truncated."
+            )
+        seconds = timer.perf_counter() - self.started
+        return {
+            'table': self.table,
+            'rows': self.rows,
+            'written': self.written,
+            'seconds': round(seconds, 3),
+            'rows_per_second': round(self.rows / seconds) if seconds > 0 else self.rows,
+        }
+
+
+def reset_sequences(tables):
+    """Move auto-increment sequences past the primary keys that were restored."""
+    statements = connection.ops.sequence_reset_sql(no_style(), [SNAPSHOT_TABLES[name].model for name in tables])
+    if statements:
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+
+def import_snapshot(lines, batch_size=DEFAULT_CHUNK_SIZE, conflicts='error', dry_run=False):
+    """
+    Restore a snapshot stream inside a single transaction.
+
+    Tables are written as they stream past. A table that arrives before one
+    it depends on is held back until its dependencies are loaded. With
+    ``dry_run`` everything is validated and written, then rolled back.
+    Returns a summary with per-table row counts and throughput.
+    """
+    if conflicts not in CONFLICT_MODES:
+        raise SnapshotError(f"'conflicts' must be one of: {', '.join(CONFLICT_MODES)}")
+    if batch_size < 1:
+        raise SnapshotError("'batch_size' must be a positive integer.")
+
+    records = iter_records(lines)
+    header = next(records, None)
+    if not isinstance(header, dict) or header.get('type') != 'snapshot':
+        raise SnapshotError('Snapshot must start with a snapshot header line.')
+    if str(header.get('version', '')).split('.')[0] != SNAPSHOT_VERSION.split('.')[0]:
+        raise SnapshotError(f"Unsupported snapshot version {header.get('version')!r}.")
+
+    tables = resolve_tables(','.join(header.get('tables') or []))
+    dependencies = {name: table_dependencies(name) & set(tables) for name in tables}
+    dependency_order(tables)  # reject cycles before writing anything
+
+    started = timer.perf_counter()
+    loaded, deferred, results = set(), [], []
+    loader = None
+
+    def ready(table):
+        return not dependencies[table] - loaded
+
+    with transaction.atomic():
+        for record in records:
+            if isinstance(record, list):
+                if loader is None:
+                    raise SnapshotError('Row found outside of a table section.')
+                loader.add(record)
+                continue
+
+            kind = record.get('type') if isinstance(record, dict) else None
+            if kind == 'table':
+                table = record.get('table')
+                if table not in dependencies or table in loaded:
+                    raise SnapshotError(f"Unexpected table section {table!r}.")
+                loader = TableLoader(table, record.get('fields') or [], batch_size, conflicts)
+                if not ready(table):
+                    # Buffer the whole table; it is written once its dependencies are in
+                    loader.batch_size = float('inf')
+            elif kind == 'end':
+                if loader is None or record.get('table') != loader.table:
+                    raise SnapshotError('Table footer does not match the open table section.')
+                if ready(loader.table):
+                    results.append(loader.finish(record.get('rows')))
+                    loaded.add(loader.table)
+                else:
+                    deferred.append((loader, record.get('rows')))
+                loader = None
+
+                progress = True
+                while progress:
+                    progress = False
+                    for item in list(deferred):
+                        if ready(item[0].table):
+                            held, expected = item
+                            deferred.remove(item)
+                            held.batch_size = batch_size
+                            results.append(held.finish(expected))
+                            loaded.add(held.table)
+                            progress = True
+            else:
+                raise SnapshotError(f'Unrecognised snapshot record: {record!r}')
+
+        if loader is not None:
+            raise SnapshotError(f"Table '{loader.table}' has no footer; the snapshot is truncated.")
+        if deferred:
+            missing = ', '.join(sorted(item[0].table for item in deferred))
+            raise SnapshotError(f'Tables could not be loaded because their dependencies are missing: {missing}')
+
+        reset_sequences(loaded)
+        if loaded & LEDGER_TABLES:
+            FeeLedger.rebuild(batch_size=batch_size)
+        # Bulk inserts skip the signals that keep rollups and stats in step
+        if loaded & ROLLUP_TABLES:
+            attendance_rollups.rebuild()
+        if loaded & STATS_TABLES:
+            stats.schedule_refresh_all()
+        # Bulk inserts send no signals, so outdate cached responses explicitly
+        response_cache.bump_versions([SNAPSHOT_TABLES[table].model._meta.label for table in loaded])
+
+        if dry_run:
+            transaction.set_rollback(True)
+
+    total_rows = sum(result['rows'] for result in results)
+    seconds = timer.perf_counter() - started
+    return {
+        'dry_run': dry_run,
+        'conflicts': conflicts,
+        'tables': results,
+        'total_rows': total_rows,
+        'seconds': round(seconds, 3),
+        'rows_per_second': round(total_rows / seconds) if seconds > 0 else total_rows,
+    }
@@ -0,0 +1,295 @@
+"""
+Precomputed dashboard statistics.
+
+The ``Teacher*Stats``, ``StudentClassRank`` and ``LibraryStats`` tables are
+read by the dashboard viewsets as single-row lookups. This module fills them
+set-wise: every kind of stat is one grouped aggregate query (a ``Rank()``
+window for class ranks) followed by one ``bulk_create(update_conflicts=True)``
+upsert, whether it covers one teacher or the whole school. Attendance stats
+are summed from the class rollups (see ``attendance_rollups``) rather than
+counted from raw attendance rows.
+
+``refresh_all()`` rebuilds everything and backs the ``refresh_stats``
+management command. ``schedule_refresh()`` is the incremental path: signal
+handlers and bulk writers call it with the teachers and classes a write
+touched, and the affected rows are recomputed once the transaction commits.
+"""
+import logging
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, Count, F, Q, Sum, Window
+from django.db.models.functions import Rank
+from django.utils import timezone
+
+from .models import (
+    Student, Teacher, ClassDailyAttendance, ClassMonthlyAttendance, Assignment, AssignmentSubmission, Reimbursement,
+    LibraryStats, StudentClassRank, TeacherAttendanceStats, TeacherAssignmentStats,
+    TeacherReimbursementStats, TeacherGradeStats,
+)
+
+logger = logging.getLogger('api.stats')
+
+BATCH_SIZE = 1000
+ZERO = Decimal('0.00')
+
+# Stat groups in refresh order; the command's --only option uses these names
+STAT_GROUPS = ('attendance', 'assignments', 'grades', 'reimbursements', 'ranks', 'library')
+
+
+def percentage(part, whole):
+    if not whole:
+        return ZERO
+    return (Decimal(part) * 100 / Decimal(whole)).quantize(Decimal('0.01'))
+
+
+def as_decimal(value):
+    if value is None:
+        return ZERO
+    return Decimal(str(value)).quantize(Decimal('0.01'))
+
+
+def upsert(model, key, rows, fields, timestamp_field='updated_at'):
+    """Insert or update one stats row per ``key`` value."""
+    model.objects.bulk_create(
+        [model(**row) for row in rows], batch_size=BATCH_SIZE,
+        update_conflicts=True, unique_fields=[key], update_fields=fields + [timestamp_field],
+    )
+    return len(rows)
+
+
+def teacher_ids_for(teacher_ids=None):
+    """Existing teacher primary keys, optionally narrowed to ``teacher_ids``."""
+    teachers = Teacher.objects.all()
+    if teacher_ids is not None:
+        teachers = teachers.filter(pk__in=teacher_ids)
+    return list(teachers.values_list('pk', flat=True))
+
+
+def refresh_attendance_stats(teacher_ids=None):
+    """Today's and overall attendance for the students of each teacher's classes, from the class rollups."""
+    teachers = teacher_ids_for(teacher_ids)
+    today = timezone.localdate()
+    by_teacher = {'teacher': F('school_class__teacher')}
+    today_counts = {
+        row['teacher']: row
+        for row in ClassDailyAttendance.objects.filter(school_class__teacher__in=teachers, date=today)
+        .values(**by_teacher)
+        .annotate(present_today=Sum('present'), late_today=Sum('late'), absent_today=Sum('absent'))
+    }
+    totals = {}
+    for row in (
+        ClassMonthlyAttendance.objects.filter(school_class__teacher__in=teachers)
+        .values(**by_teacher)
+        .annotate(attended=Sum(F('present') + F('late')), recorded=Sum(F('present') + F('late') + F('absent')))
+    ):
+        totals[row['teacher']] = {
+            'present_today': 0, 'late_today': 0, 'absent_today': 0,
+            **today_counts.get(row['teacher'], {}), **row,
+        }
+    rows = []
+    for teacher_id in teachers:
+        row = totals.get(teacher_id)
+        if row is None:
+            rows.append({'teacher_id': teacher_id})
+            continue
+        recorded_today = row['present_today'] + row['late_today'] + row['absent_today']
+        rows.append({
+            'teacher_id': teacher_id,
+            'present_today': row['present_today'],
+            'late_today': row['late_today'],
+            'absent_today': row['absent_today'],
+            'today_attendance_rate': percentage(row['present_today'] + row['late_today'], recorded_today),
+            'overall_attendance_rate': percentage(row['attended'], row['recorded']),
+        })
+    return upsert(TeacherAttendanceStats, 'teacher', rows, [
+        'present_today', 'late_today', 'absent_today', 'today_attendance_rate', 'overall_attendance_rate',
+    ])
+
+
+def submission_totals(teachers):
+    today = timezone.localdate()
+    is_late = Q(status=AssignmentSubmission.Status.LATE) | Q(submitted_at__date__gt=F('assignment__due_date'))
+    return {
+        row['teacher']: row
+        for row in AssignmentSubmission.objects.filter(assignment__teacher__in=teachers)
+        .values(teacher=F('assignment__teacher'))
+        .annotate(
+            pending=Count('id', filter=Q(grade__isnull=True)),
+            graded=Count('id', filter=Q(grade__isnull=False)),
+            graded_today=Count('id', filter=Q(graded_at__date=today)),
+            average=Avg('grade'),
+            late=Count('id', filter=is_late),
+        )
+    }
+
+
+def refresh_assignment_stats(teacher_ids=None):
+    """Assignments set by each teacher and the state of their submissions."""
+    teachers = teacher_ids_for(teacher_ids)
+    assignments = dict(
+        Assignment.objects.filter(teacher__in=teachers).values('teacher').annotate(total=Count('id'))
+        .values_list('teacher', 'total')
+    )
+    submissions = submission_totals(teachers)
+    rows = [
+        {
+            'teacher_id': teacher_id,
+            'total_assignments': assignments.get(teacher_id, 0),
+            'pending_submissions': submissions.get(teacher_id, {}).get('pending', 0),
+            'graded_assignments': submissions.get(teacher_id, {}).get('graded', 0),
+        }
+        for teacher_id in teachers
+    ]
+    return upsert(TeacherAssignmentStats, 'teacher', rows, [
+        'total_assignments', 'pending_submissions', 'graded_assignments',
+    ])
+
+
+def refresh_grade_stats(teacher_ids=None):
+    """Grading backlog, today's grading and average score per teacher."""
+    teachers = teacher_ids_for(teacher_ids)
+    submissions = submission_totals(teachers)
+    rows = []
+    for teacher_id in teachers:
+        row = submissions.get(teacher_id, {})
+        rows.append({
+            'teacher_id': teacher_id,
+            'pending_grades': row.get('pending', 0),
+            'graded_today': row.get('graded_today', 0),
+            'average_grade': as_decimal(row.get('average')),
+            'late_submissions': row.get('late', 0),
+        })
+    return upsert(TeacherGradeStats, 'teacher', rows, [
+        'pending_grades', 'graded_today', 'average_grade', 'late_submissions',
+    ])
+
+
+def refresh_reimbursement_stats(teacher_ids=None):
+    """Reimbursement amounts per teacher, split by review status."""
+    teachers = teacher_ids_for(teacher_ids)
+    totals = {
+        row['teacher']: row
+        for row in Reimbursement.objects.filter(teacher__in=teachers).values('teacher').annotate(
+            requested=Sum('amount'),
+            pending=Sum('amount', filter=Q(status=Reimbursement.Status.PENDING)),
+            approved=Sum('amount', filter=Q(status=Reimbursement.Status.APPROVED)),
+            paid=Sum('amount', filter=Q(status=Reimbursement.Status.PAID)),
+        )
+    }
+    rows = []
+    for teacher_id in teachers:
+        row = totals.get(teacher_id, {})
+        rows.append({
+            'teacher_id': teacher_id,
+            'total_requested': row.get('requested') or ZERO,
+            'pending_approval': row.get('pending') or ZERO,
+            'approved_amount': row.get('approved') or ZERO,
+            'paid_amount': row.get('paid') or ZERO,
+        })
+    return upsert(TeacherReimbursementStats, 'teacher', rows, [
+        'total_requested', 'pending_approval', 'approved_amount', 'paid_amount',
+    ])
+
+
+def refresh_class_ranks(class_ids=None):
+    """
+    Rank students within their class by average grade score.
+
+    Students without grades share the last rank of their class. Ranks of
+    students who left a class are dropped.
+    """
+    students = Student.objects.filter(school_class__isnull=False)
+    stale = StudentClassRank.objects.filter(student__school_class__isnull=True)
+    if class_ids is not None:
+        students = students.filter(school_class__in=class_ids)
+        stale = stale.none()
+    ranked = students.annotate(average=Avg('grades__score')).annotate(
+        position=Window(Rank(), partition_by=F('school_class'), order_by=F('average').desc(nulls_last=True)),
+        class_size=Window(Count('pk'), partition_by=F('school_class')),
+    ).values_list('pk', 'position', 'class_size')
+
+    rows = [
+        {'student_id': student_id, 'rank': position, 'total_students': class_size}
+        for student_id, position, class_size in ranked
+    ]
+    stale.delete()
+    return upsert(StudentClassRank, 'student', rows, ['rank', 'total_students'], timestamp_field='calculated_at')
+
+
+def refresh_library_stats(student_ids=None):
+    """
+    Make sure every student has a library stats row.
+
+    The school has no circulation data in this database yet, so existing
+    counts are left as they are and new rows start at zero.
+    """
+    students = Student.objects.filter(library_stats__isnull=True)
+    if student_ids is not None:
+        students = students.filter(pk__in=student_ids)
+    created = LibraryStats.objects.bulk_create(
+        [LibraryStats(student_id=pk) for pk in students.values_list('pk', flat=True)],
+        batch_size=BATCH_SIZE, ignore_conflicts=True,
+    )
+    return len(created)
+
+
+def refresh_all(groups=STAT_GROUPS, teacher_ids=None, class_ids=None):
+    """Recompute the given stat groups and return the number of rows written per group."""
+    refreshers = {
+        'attendance': lambda: refresh_attendance_stats(teacher_ids),
+        'assignments': lambda: refresh_assignment_stats(teacher_ids),
+        'grades': lambda: refresh_grade_stats(teacher_ids),
+        'reimbursements': lambda: refresh_reimbursement_stats(teacher_ids),
+        'ranks': lambda: refresh_class_ranks(class_ids),
+        'library': lambda: refresh_library_stats(),
+    }
+    written = {}
+    with transaction.atomic():
+        for group in STAT_GROUPS:
+            if group in groups:
+                written[group] = refreshers[group]()
+    return written
+
+
+def schedule_refresh(groups, teacher_ids=(), class_ids=()):
+    """
+    Recompute the stats a write touched once the surrounding transaction commits.
+
+    Disabled with ``STATS_REFRESH_ON_WRITE = False`` for deployments that run
+    ``refresh_stats`` on a schedule instead.
+    """
+    if not getattr(settings, 'STATS_REFRESH_ON_WRITE', True):
+        return
+    teacher_ids = {pk for pk in teacher_ids if pk is not None}
+    class_ids = {pk for pk in class_ids if pk is not None}
+    teacher_groups = [group for group in groups if group != 'ranks']
+    if not ((teacher_groups and teacher_ids) or ('ranks' in groups and class_ids)):
+        return
+
+    def refresh():
+        try:
+            if teacher_groups and teacher_ids:
+                refresh_all(teacher_groups, teacher_ids=teacher_ids)
+            if 'ranks' in groups and class_ids:
+                refresh_class_ranks(class_ids)
+        except Exception:
+            # A failed refresh must never fail the write that triggered it
+            logger.exception(f"Incremental stats refresh failed for {groups}")
+
+    transaction.on_commit(refresh)
+
+
+def schedule_refresh_all(groups=STAT_GROUPS):
+    """Recompute ``groups`` for everyone once the surrounding transaction commits, e.g. after bulk loads."""
+    if not getattr(settings, 'STATS_REFRESH_ON_WRITE', True):
+        return
+
+    def refresh():
+        try:
+            refresh_all(groups)
+        except Exception:
+            logger.exception(f"Full stats refresh failed for {groups}")
+
+    transaction.on_commit(refresh)
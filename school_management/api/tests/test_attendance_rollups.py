@@ -0,0 +1,161 @@
+from datetime import date
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+
+from ..models import *
+from .. import attendance_rollups
+
+
+def counts(row):
+    return (row.present, row.late, row.absent) if row else None
+
+
+class AttendanceRollupTest(TestCase):
+    """Test cases for maintaining the attendance rollups."""
+
+    def setUp(self):
+        self.school_class = SchoolClass.objects.create(name='Rollup Class')
+        self.other_class = SchoolClass.objects.create(name='Other Class')
+        self.students = [
+            Student.objects.create(
+                user=User.objects.create_user(username=f'rollup_student_{i}', password='pass'),
+                school_class=self.school_class
+            )
+            for i in range(2)
+        ]
+
+    def class_day(self, day, school_class=None):
+        return ClassDailyAttendance.objects.filter(school_class=school_class or self.school_class, date=day).first()
+
+    def class_month(self, month, school_class=None):
+        return ClassMonthlyAttendance.objects.filter(school_class=school_class or self.school_class, month=month).first()
+
+    def student_month(self, student, month):
+        return StudentMonthlyAttendance.objects.filter(student=student, month=month).first()
+
+    def test_writes_update_rollups(self):
+        first = Attendance.objects.create(student=self.students[0], date=date(2026, 3, 2), status='present')
+        Attendance.objects.create(student=self.students[1], date=date(2026, 3, 2), status='late')
+        Attendance.objects.create(student=self.students[0], date=date(2026, 3, 3), status='absent')
+        Attendance.objects.create(student=self.students[0], date=date(2026, 4, 1), status='present')
+
+        self.assertEqual(counts(self.student_month(self.students[0], date(2026, 3, 1))), (1, 0, 1))
+        self.assertEqual(counts(self.class_day(date(2026, 3, 2))), (1, 1, 0))
+        self.assertEqual(counts(self.class_month(date(2026, 3, 1))), (1, 1, 1))
+        self.assertEqual(counts(self.class_month(date(2026, 4, 1))), (1, 0, 0))
+
+        first.status = 'absent'
+        first.save()
+        self.assertEqual(counts(self.student_month(self.students[0], date(2026, 3, 1))), (0, 0, 2))
+
+        # Moving a record to another month recounts both months
+        first.date = date(2026, 4, 2)
+        first.save()
+        self.assertEqual(counts(self.class_month(date(2026, 3, 1))), (0, 1, 1))
+        self.assertEqual(counts(self.class_month(date(2026, 4, 1))), (1, 0, 1))
+        self.assertEqual(counts(self.class_day(date(2026, 3, 2))), (0, 1, 0))
+
+        first.delete()
+        self.assertEqual(counts(self.class_month(date(2026, 4, 1))), (1, 0, 0))
+
+    def test_moving_a_student_recounts_both_classes(self):
+        Attendance.objects.create(student=self.students[0], date=date(2026, 3, 2), status='present')
+        Attendance.objects.create(student=self.students[1], date=date(2026, 3, 2), status='absent')
+
+        self.students[0].school_class = self.other_class
+        self.students[0].save()
+        self.assertEqual(counts(self.class_month(date(2026, 3, 1))), (0, 0, 1))
+        self.assertEqual(counts(self.class_month(date(2026, 3, 1), self.other_class)), (1, 0, 0))
+        self.assertEqual(counts(self.class_day(date(2026, 3, 2), self.other_class)), (1, 0, 0))
+
+    def test_refresh_command_backfills_bulk_rows(self):
+        Attendance.objects.bulk_create([
+            Attendance(student=student, date=date(2026, 2, day), status=state)
+            for student in self.students
+            for day, state in ((2, 'present'), (3, 'late'), (4, 'absent'))
+        ])
+        self.assertFalse(ClassMonthlyAttendance.objects.exists())
+
+        call_command('refresh_attendance_rollups', stdout=StringIO())
+        self.assertEqual(counts(self.class_month(date(2026, 2, 1))), (2, 2, 2))
+        self.assertEqual(counts(self.student_month(self.students[1], date(2026, 2, 1))), (1, 1, 1))
+        self.assertEqual(ClassDailyAttendance.objects.count(), 3)
+
+    def test_split_range(self):
+        self.assertEqual(
+            attendance_rollups.split_range(date(2025, 9, 15), date(2026, 6, 10)),
+            ((date(2025, 10, 1), date(2026, 5, 31)), [(date(2025, 9, 15), date(2025, 9, 30)),
+                                                      (date(2026, 6, 1), date(2026, 6, 10))])
+        )
+        self.assertEqual(
+            attendance_rollups.split_range(date(2025, 9, 1), date(2026, 6, 30)),
+            ((date(2025, 9, 1), date(2026, 6, 30)), [])
+        )
+        self.assertEqual(
+            attendance_rollups.split_range(date(2026, 3, 5), date(2026, 3, 20)),
+            (None, [(date(2026, 3, 5), date(2026, 3, 20))])
+        )
+
+
+class AttendanceSummaryViewTest(APITestCase):
+    """Test cases for the attendance summary endpoint."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.principal = User.objects.create_user(username='summary_principal', password='pass', role=User.Role.PRINCIPAL)
+        self.client.force_authenticate(user=self.principal)
+        self.school_class = SchoolClass.objects.create(name='Summary Class')
+        self.students = [
+            Student.objects.create(
+                user=User.objects.create_user(username=f'summary_student_{i}', password='pass', last_name=f'S{i}'),
+                school_class=self.school_class
+            )
+            for i in range(2)
+        ]
+        records = []
+        for month in range(1, 13):
+            records.append(Attendance(student=self.students[0], date=date(2025, month, 10), status='present'))
+            records.append(Attendance(student=self.students[1], date=date(2025, month, 10),
+                                      status='absent' if month % 2 else 'late'))
+        Attendance.objects.bulk_create(records)
+        attendance_rollups.rebuild()
+
+    def get(self, **params):
+        return self.client.get('/api/attendance/summary/', params)
+
+    def test_class_range(self):
+        response = self.get(**{'class': self.school_class.pk, 'from': '2025-03-05', 'to': '2025-06-09'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # March 10 (loose days), April and May (whole months); June 10 is outside
+        self.assertEqual((response.data['present'], response.data['late'], response.data['absent']), (3, 1, 2))
+        self.assertEqual(response.data['attendance_rate'], 66.7)
+        students = {row['student']: row for row in response.data['students']}
+        self.assertEqual(students[self.students[0].pk]['total'], 3)
+        self.assertEqual(students[self.students[1].pk]['attendance_rate'], 33.3)
+
+    def test_query_count_does_not_depend_on_range(self):
+        counts = []
+        # Two months versus ten, each with partial months at both ends
+        for start, end in (('2025-03-05', '2025-06-09'), ('2025-01-05', '2025-12-20')):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.get(**{'class': self.school_class.pk, 'from': start, 'to': end})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_student_sees_only_themselves(self):
+        self.client.force_authenticate(user=self.students[1].user)
+        response = self.get(**{'class': self.school_class.pk, 'from': '2025-01-01', 'to': '2025-12-31'})
+        self.assertEqual([row['student'] for row in response.data['students']], [self.students[1].pk])
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.get(**{'from': 'yesterday'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.get(**{'from': '2025-05-01', 'to': '2025-04-01'}).status_code,
+                         status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.get(**{'class': 9999}).status_code, status.HTTP_404_NOT_FOUND)
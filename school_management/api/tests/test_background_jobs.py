@@ -0,0 +1,111 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+
+from ..models import *
+
+
+class ReportJobApiTest(APITestCase):
+    """Test cases for queueing and polling report generation jobs."""
+
+    def setUp(self):
+        self.reports_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.reports_dir, ignore_errors=True)
+        self.client = APIClient()
+        self.principal = User.objects.create_user(username='jobs_principal', password='pass', role=User.Role.PRINCIPAL)
+        self.client.force_authenticate(user=self.principal)
+
+    def test_generate_enqueues_job(self):
+        response = self.client.post('/api/report-management/generate/', {'report_type': 'financial'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        job = BackgroundJob.objects.get(pk=response.data['job_id'])
+        self.assertEqual(job.status, BackgroundJob.Status.QUEUED)
+        self.assertEqual(job.params, {'report_type': 'financial', 'format': 'json'})
+        self.assertEqual(job.requested_by, self.principal)
+        self.assertEqual(response.data['status_url'], f'/api/report-management/jobs/{job.pk}/')
+
+    def test_generate_validates_options(self):
+        response = self.client.post('/api/report-management/generate/', {'format': 'docx'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(BackgroundJob.objects.exists())
+
+    def test_worker_runs_job_and_status_reports_result(self):
+        response = self.client.post('/api/report-management/generate/', {'report_type': 'financial'}, format='json')
+        job_id = response.data['job_id']
+
+        with override_settings(BASE_DIR=self.reports_dir):
+            call_command('run_jobs', '--workers', '0', '--once', stdout=StringIO())
+
+        response = self.client.get(f'/api/report-management/jobs/{job_id}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], BackgroundJob.Status.SUCCEEDED)
+        self.assertEqual(response.data['progress'], 100)
+        report_id = response.data['result']['report_id']
+        self.assertTrue(report_id.endswith(f'_job{job_id}'))
+        self.assertTrue(os.path.exists(os.path.join(self.reports_dir, 'reports', report_id, 'metadata.json')))
+
+    def test_failed_job_records_error(self):
+        job = BackgroundJob.objects.create(
+            job_type=BackgroundJob.JobType.GENERATE_REPORTS, params={'report_type': 'bogus'}, requested_by=self.principal
+        )
+        with override_settings(BASE_DIR=self.reports_dir):
+            call_command('run_jobs', '--workers', '0', '--once', stdout=StringIO())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, BackgroundJob.Status.FAILED)
+        self.assertTrue(job.error)
+        self.assertIsNotNone(job.finished_at)
+
+    def test_jobs_are_private_to_requester(self):
+        job = BackgroundJob.objects.create(job_type=BackgroundJob.JobType.GENERATE_REPORTS, requested_by=self.principal)
+        teacher = User.objects.create_user(username='jobs_teacher', password='pass', role=User.Role.TEACHER)
+        self.client.force_authenticate(user=teacher)
+        response = self.client.get(f'/api/report-management/jobs/{job.pk}/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class BackgroundJobQueueTest(TestCase):
+    """Test cases for claiming jobs from the queue."""
+
+    def test_claim_next_is_exclusive_and_fifo(self):
+        first = BackgroundJob.objects.create(job_type=BackgroundJob.JobType.GENERATE_REPORTS)
+        second = BackgroundJob.objects.create(job_type=BackgroundJob.JobType.GENERATE_REPORTS)
+
+        self.assertEqual(BackgroundJob.claim_next('worker-a').pk, first.pk)
+        self.assertEqual(BackgroundJob.claim_next('worker-b').pk, second.pk)
+        self.assertIsNone(BackgroundJob.claim_next('worker-c'))
+
+        first.refresh_from_db()
+        self.assertEqual(first.status, BackgroundJob.Status.RUNNING)
+        self.assertEqual(first.worker, 'worker-a')
+        self.assertEqual(first.attempts, 1)
+
+    def test_requeue_stale(self):
+        job = BackgroundJob.objects.create(job_type=BackgroundJob.JobType.GENERATE_REPORTS)
+        BackgroundJob.claim_next('worker-a')
+        BackgroundJob.objects.filter(pk=job.pk).update(started_at=timezone.now() - timezone.timedelta(hours=2))
+
+        self.assertEqual(BackgroundJob.requeue_stale(timezone.timedelta(minutes=60)), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, BackgroundJob.Status.QUEUED)
+
+    def test_stale_job_fails_after_max_attempts(self):
+        job = BackgroundJob.objects.create(job_type=BackgroundJob.JobType.GENERATE_REPORTS)
+        long_ago = timezone.now() - timezone.timedelta(hours=2)
+        for attempt in range(1, BackgroundJob.MAX_ATTEMPTS + 1):
+            self.assertEqual(BackgroundJob.claim_next('worker-a').pk, job.pk)
+            BackgroundJob.objects.filter(pk=job.pk).update(started_at=long_ago)
+            requeued = BackgroundJob.requeue_stale(timezone.timedelta(minutes=60))
+            self.assertEqual(requeued, int(attempt < BackgroundJob.MAX_ATTEMPTS))
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (BackgroundJob.Status.FAILED, BackgroundJob.MAX_ATTEMPTS))
+        self.assertIsNotNone(job.finished_at)
+        self.assertIsNone(BackgroundJob.claim_next('worker-a'))
@@ -0,0 +1,182 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+
+from ..models import *
+from .. import blobstore
+
+CONTENT = bytes(range(256)) * 40
+
+
+class BlobStoreTestCase(APITestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, True)
+        settings_override = override_settings(BLOB_STORE={
+            'BACKEND': 'api.blobstore.FileSystemBlobStore', 'OPTIONS': {'root': self.root},
+        })
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.client = APIClient()
+
+        teacher_user = User.objects.create_user(username='blob_teacher', password='pass', role=User.Role.TEACHER)
+        self.teacher = Teacher.objects.create(user=teacher_user)
+        school_class = SchoolClass.objects.create(name='Blob Class')
+        self.assignment = Assignment.objects.create(
+            title='Essay', due_date=timezone.now().date(), school_class=school_class, teacher=self.teacher
+        )
+        self.students = []
+        for name in ('blob_student', 'blob_other'):
+            user = User.objects.create_user(username=name, password='pass', role=User.Role.STUDENT)
+            self.students.append(Student.objects.create(user=user, school_class=school_class))
+
+    def legacy_submission(self, student, data=CONTENT):
+        return AssignmentSubmission.objects.create(
+            assignment=self.assignment, student=student, file_name='essay.pdf',
+            file_mime_type='application/pdf', file_data=data
+        )
+
+
+class FileSystemBlobStoreTest(BlobStoreTestCase):
+    """Test cases for the content-addressed store."""
+
+    def test_identical_content_is_stored_once(self):
+        store = blobstore.get_store()
+        first = store.save(CONTENT)
+        second = store.save(SimpleUploadedFile('copy.bin', CONTENT))
+        self.assertEqual(first, second)
+        self.assertEqual(first, (hashlib.sha256(CONTENT).hexdigest(), len(CONTENT)))
+        self.assertEqual(len(list(store.digests())), 1)
+        # No temporary files left behind
+        self.assertEqual(sum(len(files) for _, _, files in os.walk(self.root)), 1)
+
+    def test_unknown_digest(self):
+        store = blobstore.get_store()
+        self.assertFalse(store.exists('../../etc/passwd'))
+        with self.assertRaises(blobstore.BlobNotFound):
+            store.open('0' * 64)
+
+
+class MigrateBlobsCommandTest(BlobStoreTestCase):
+    """Test cases for moving inline blobs into the store."""
+
+    def test_moves_blobs_in_batches(self):
+        for student in self.students:
+            self.legacy_submission(student)
+        call_command('migrate_blobs', '--batch-size', '1', stdout=StringIO())
+
+        digest = hashlib.sha256(CONTENT).hexdigest()
+        rows = AssignmentSubmission.objects.values_list('file_sha256', 'file_size', 'file_data')
+        self.assertEqual(set(rows), {(digest, len(CONTENT), None)})
+        self.assertEqual([d for d, _ in blobstore.get_store().digests()], [digest])
+
+    def test_prune_keeps_referenced_blobs(self):
+        self.legacy_submission(self.students[0])
+        call_command('migrate_blobs', stdout=StringIO())
+        orphan, _ = blobstore.get_store().save(b'orphan')
+        call_command('migrate_blobs', '--prune', '--grace', '-1', stdout=StringIO())
+        digests = [d for d, _ in blobstore.get_store().digests()]
+        self.assertEqual(digests, [hashlib.sha256(CONTENT).hexdigest()])
+        self.assertNotIn(orphan, digests)
+
+
+class BlobDownloadTest(BlobStoreTestCase):
+    """Test cases for the streaming download endpoint."""
+
+    def setUp(self):
+        super().setUp()
+        self.submission = self.legacy_submission(self.students[0])
+        call_command('migrate_blobs', stdout=StringIO())
+        self.url = f'/api/files/submissions/{self.submission.pk}/'
+        self.client.force_authenticate(user=self.students[0].user)
+
+    def test_full_download(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('essay.pdf', response['Content-Disposition'])
+
+    def test_range_requests(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=100-199')
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT[100:200])
+        self.assertEqual(response['Content-Range'], f'bytes 100-199/{len(CONTENT)}')
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-10')
+        self.assertEqual(b''.join(response.streaming_content), CONTENT[-10:])
+
+        response = self.client.get(self.url, HTTP_RANGE=f'bytes={len(CONTENT)}-')
+        self.assertEqual(response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+
+    def test_stale_if_range_sends_whole_file(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_etag_returns_304(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_other_students_cannot_download(self):
+        self.client.force_authenticate(user=self.students[1].user)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_404_NOT_FOUND)
+        self.client.force_authenticate(user=self.teacher.user)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+
+    def test_legacy_row_is_moved_on_first_download(self):
+        legacy = self.legacy_submission(self.students[1], data=b'late essay')
+        self.client.force_authenticate(user=self.students[1].user)
+        response = self.client.get(f'/api/files/submissions/{legacy.pk}/')
+        self.assertEqual(b''.join(response.streaming_content), b'late essay')
+        legacy.refresh_from_db()
+        self.assertIsNone(legacy.file_data)
+        self.assertEqual(legacy.file_sha256, hashlib.sha256(b'late essay').hexdigest())
+
+    def test_sendfile_header(self):
+        with self.settings(SENDFILE_HEADER='X-Accel-Redirect', SENDFILE_LOCATIONS={self.root: '/protected/'}):
+            response = self.client.get(self.url)
+        digest = hashlib.sha256(CONTENT).hexdigest()
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected/{digest[:2]}/{digest[2:4]}/{digest}')
+        self.assertFalse(response.content)
+
+
+class BlobSerializerTest(BlobStoreTestCase):
+    """Test cases for uploads and listings that keep blobs out of the rows."""
+
+    def test_listing_does_not_load_blobs(self):
+        self.legacy_submission(self.students[0])
+        self.client.force_authenticate(user=self.teacher.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/assignment-submissions/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(any('file_data' in query['sql'] for query in queries))
+        self.assertNotIn('file_data', response.data[0] if isinstance(response.data, list) else response.data['results'][0])
+
+    def test_upload_goes_to_the_store(self):
+        admin = User.objects.create_user(username='blob_admin', password='pass', is_staff=True, role=User.Role.PRINCIPAL)
+        self.client.force_authenticate(user=admin)
+        response = self.client.post('/api/school-settings/', {
+            'key': 'logo_file', 'label': 'Logo', 'setting_type': 'file',
+            'file': SimpleUploadedFile('logo.png', CONTENT, content_type='image/png'),
+        }, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['file_size'], len(CONTENT))
+        self.assertTrue(response.data['file_url'].endswith(f"/api/files/settings/{response.data['id']}/"))
+
+        setting = SchoolSetting.objects.get(pk=response.data['id'])
+        self.assertIsNone(setting.file_data)
+        self.assertEqual(setting.file_mime_type, 'image/png')
+        self.assertTrue(blobstore.get_store().exists(setting.file_sha256))
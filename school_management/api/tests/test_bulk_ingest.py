@@ -0,0 +1,146 @@
+import time
+from datetime import date
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+
+from ..models import *
+
+
+class BulkIngestTest(APITestCase):
+    """Test cases for bulk attendance and grade ingestion."""
+
+    url = '/api/async-tasks/process_bulk_data/'
+
+    def setUp(self):
+        self.client = APIClient()
+        self.teacher_user = User.objects.create_user(username='ingest_teacher', password='pass', role=User.Role.TEACHER)
+        self.teacher = Teacher.objects.create(user=self.teacher_user)
+        self.school_class = SchoolClass.objects.create(name='Grade 6', teacher=self.teacher_user)
+        self.other_class = SchoolClass.objects.create(name='Grade 8')
+        self.students = [
+            Student.objects.create(
+                user=User.objects.create_user(username=f'ingest_student_{i}', password='pass'),
+                school_class=self.school_class
+            )
+            for i in range(3)
+        ]
+        self.outsider = Student.objects.create(
+            user=User.objects.create_user(username='ingest_outsider', password='pass'), school_class=self.other_class
+        )
+        self.assignment = Assignment.objects.create(
+            title='Essay', due_date=timezone.now().date(), school_class=self.school_class, teacher=self.teacher
+        )
+        self.client.force_authenticate(user=self.teacher_user)
+
+    def post(self, operation, data, **extra):
+        return self.client.post(self.url, {'operation': operation, 'data': data, **extra}, format='json')
+
+    def test_attendance_upsert(self):
+        rows = [{'student': s.pk, 'status': 'present'} for s in self.students]
+        response = self.post('bulk_attendance', rows, date='2026-03-02')
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertEqual(response.data['written'], 3)
+        self.assertEqual(response.data['status'], 'completed')
+
+        rows[0]['status'] = 'absent'
+        self.post('bulk_attendance', rows[:1], date='2026-03-02')
+        self.assertEqual(Attendance.objects.filter(date=date(2026, 3, 2)).count(), 3)
+        self.assertEqual(Attendance.objects.get(student=self.students[0]).status, 'absent')
+
+    def test_attendance_refreshes_teacher_stats(self):
+        rows = [{'student': s.pk, 'status': 'present'} for s in self.students]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post('bulk_attendance', rows, date=timezone.localdate().isoformat())
+        self.assertEqual(TeacherAttendanceStats.objects.get(teacher=self.teacher).present_today, 3)
+
+    def test_attendance_per_row_errors(self):
+        rows = [
+            {'student': self.students[0].pk, 'status': 'present', 'date': '2026-03-02'},
+            {'student': self.students[1].pk, 'status': 'asleep', 'date': '2026-03-02'},
+            {'student': self.outsider.pk, 'status': 'present', 'date': '2026-03-02'},
+            {'student': self.students[0].pk, 'status': 'late', 'date': '2026-03-02'},
+            {'student': 'abc', 'status': 'present', 'date': 'March 2nd'},
+        ]
+        response = self.post('bulk_attendance', rows)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], 'partial')
+        self.assertEqual(response.data['written'], 1)
+        errors = {error['row']: error['errors'] for error in response.data['errors']}
+        self.assertEqual(set(errors), {1, 2, 3, 4})
+        self.assertIn('status', errors[1])
+        self.assertIn('student', errors[2])
+        self.assertIn('Duplicate', errors[3]['student'])
+        self.assertEqual(set(errors[4]), {'student', 'date'})
+        self.assertEqual(Attendance.objects.count(), 1)
+
+    def test_attendance_query_count_is_constant(self):
+        def ingest(count, day):
+            rows = [{'student': self.students[i % 3].pk, 'status': 'present', 'date': f'2026-03-{day + i // 3:02d}'}
+                    for i in range(count)]
+            with CaptureQueriesContext(connection) as queries:
+                response = self.post('bulk_attendance', rows)
+            self.assertEqual(response.data['written'], count)
+            return len(queries)
+
+        self.assertEqual(ingest(3, 1), ingest(15, 2))
+
+    def test_grades_upsert_grade_and_submission(self):
+        AssignmentSubmission.objects.create(assignment=self.assignment, student=self.students[0], text_content='Done')
+        rows = [
+            {'student': self.students[0].pk, 'assignment': self.assignment.pk, 'score': 88, 'feedback': 'Good'},
+            {'student': self.students[1].pk, 'assignment': self.assignment.pk, 'score': '72'},
+        ]
+        response = self.post('bulk_grade_update', rows)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertEqual(response.data['written'], 2)
+
+        rows[0]['score'] = 91
+        self.post('bulk_grade_update', rows[:1])
+        self.assertEqual(Grade.objects.count(), 2)
+        self.assertEqual(Grade.objects.get(student=self.students[0]).score, 91)
+
+        submission = AssignmentSubmission.objects.get(student=self.students[0])
+        self.assertEqual(submission.grade, 91)
+        self.assertEqual(submission.text_content, 'Done')
+        self.assertEqual(submission.status, AssignmentSubmission.Status.GRADED)
+        self.assertEqual(submission.graded_by, self.teacher)
+        self.assertEqual(AssignmentSubmission.objects.get(student=self.students[1]).grade, 72)
+
+    def test_grade_errors(self):
+        rows = [
+            {'student': self.students[0].pk, 'assignment': self.assignment.pk, 'score': 101},
+            {'student': self.outsider.pk, 'assignment': self.assignment.pk, 'score': 50},
+            {'student': self.students[1].pk, 'assignment': 9999, 'score': 50},
+        ]
+        response = self.post('bulk_grade_update', rows)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['status'], 'failed')
+        self.assertEqual([error['row'] for error in response.data['errors']], [0, 1, 2])
+        self.assertFalse(Grade.objects.exists())
+
+    def test_invalid_payloads(self):
+        self.assertEqual(self.post('bulk_attendance', {'student': 1}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.post('bulk_nothing', []).status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.client.force_authenticate(user=self.students[0].user)
+        self.assertEqual(self.post('bulk_attendance', []).status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_school_day_in_one_request(self):
+        principal = User.objects.create_user(username='ingest_principal', password='pass', role=User.Role.PRINCIPAL)
+        users = User.objects.bulk_create(
+            [User(username=f'bulk_student_{i}', role=User.Role.STUDENT) for i in range(1200)]
+        )
+        Student.objects.bulk_create([Student(user=user, school_class=self.school_class) for user in users])
+        rows = [{'student': user.pk, 'status': 'present'} for user in users]
+
+        self.client.force_authenticate(user=principal)
+        started = time.monotonic()
+        response = self.post('bulk_attendance', rows, date='2026-03-02')
+        elapsed = time.monotonic() - started
+
+        self.assertEqual(response.data['written'], 1200)
+        self.assertLess(elapsed, 2.0)
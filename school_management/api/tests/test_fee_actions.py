@@ -0,0 +1,73 @@
+from decimal import Decimal
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+
+from ..models import *
+
+
+class FeeActionsBulkTest(APITestCase):
+    """Test cases for the batched class-fee and reminder actions."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_user(
+            username='actions_admin', password='pass', role=User.Role.PRINCIPAL, is_staff=True
+        )
+        self.client.force_authenticate(user=self.admin)
+        self.school_class = SchoolClass.objects.create(name='Grade 10')
+        self.due_date = (timezone.now().date() + timezone.timedelta(days=30)).isoformat()
+
+    def add_students(self, count, start=0):
+        users = User.objects.bulk_create([
+            User(username=f'actions_student_{start + index}', role=User.Role.STUDENT) for index in range(count)
+        ])
+        Student.objects.bulk_create([Student(user=user, school_class=self.school_class) for user in users])
+
+    def create_class_fee(self, **overrides):
+        data = {'action': 'create_class_fee', 'class_id': self.school_class.pk, 'amount': '1500.00', 'due_date': self.due_date}
+        data.update(overrides)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/api/fees/actions/', data, format='json')
+        return response, len(queries)
+
+    def test_create_class_fee(self):
+        self.add_students(5)
+        response, _ = self.create_class_fee()
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Fee.objects.filter(student__school_class=self.school_class).count(), 5)
+        self.assertEqual(FeeLedger.objects.filter(outstanding=Decimal('1500.00')).count(), 5)
+        audit = AuditLog.objects.get(action='bulk_create_class_fee')
+        self.assertEqual(audit.object_id, self.school_class.pk)
+        self.assertEqual(audit.user, self.admin)
+
+    def test_create_class_fee_query_count_is_constant(self):
+        self.add_students(3)
+        _, small = self.create_class_fee()
+        self.add_students(40, start=100)
+        _, large = self.create_class_fee()
+        self.assertEqual(small, large)
+
+    def test_create_class_fee_validation(self):
+        self.add_students(2)
+        past = (timezone.now().date() - timezone.timedelta(days=1)).isoformat()
+        self.assertEqual(self.create_class_fee(amount='0')[0].status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.create_class_fee(due_date=past)[0].status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.create_class_fee(class_id=9999)[0].status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Fee.objects.exists())
+
+    def test_send_reminders(self):
+        self.add_students(4)
+        self.create_class_fee()
+        Fee.objects.filter(pk=Fee.objects.first().pk).update(status=Fee.Status.PAID)
+
+        response = self.client.post('/api/fees/actions/', {'action': 'send_reminders'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['message'], '3 payment reminders sent.')
+        self.assertEqual(Notification.objects.filter(title='Fee Payment Reminder').count(), 3)
+        self.assertTrue(AuditLog.objects.filter(action='bulk_send_fee_reminders').exists())
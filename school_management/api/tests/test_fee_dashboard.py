@@ -0,0 +1,76 @@
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import *
+
+
+class AdminFeeDashboardTest(TestCase):
+    """Test cases for the admin fee dashboard rollups and query budget."""
+
+    MAX_QUERIES = 10
+
+    def setUp(self):
+        self.principal = User.objects.create_user(username='dash_principal', password='pass', role=User.Role.PRINCIPAL)
+        self.client.force_login(self.principal)
+        self.url = reverse('fee_admin_dashboard')
+        self.counter = 0
+
+    def create_class_with_fees(self, name, students=2, paid='0.00', overdue=False):
+        school_class = SchoolClass.objects.create(name=name)
+        due_date = timezone.now().date() + timezone.timedelta(days=-5 if overdue else 30)
+        for _ in range(students):
+            self.counter += 1
+            user = User.objects.create_user(username=f'dash_student_{self.counter}', password='pass')
+            student = Student.objects.create(user=user, school_class=school_class)
+            fee = Fee.objects.create(student=student, amount=Decimal('1000.00'), due_date=due_date)
+            if Decimal(paid):
+                Payment.objects.create(
+                    fee=fee, amount=Decimal(paid), status=Payment.Status.COMPLETED, processed_by=self.principal
+                )
+        return school_class
+
+    def get_dashboard(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_class_summary_rollups(self):
+        self.create_class_with_fees('Class A', students=2, paid='400.00')
+        self.create_class_with_fees('Class B', students=1, overdue=True)
+        SchoolClass.objects.create(name='Class C')
+
+        response, _ = self.get_dashboard()
+
+        summary = {row['class_name']: row for row in response.context['class_summary']}
+        self.assertEqual(summary['Class A']['student_count'], 2)
+        self.assertEqual(summary['Class A']['total_fees'], Decimal('2000.00'))
+        self.assertEqual(summary['Class A']['total_collected'], Decimal('800.00'))
+        self.assertEqual(summary['Class A']['total_outstanding'], Decimal('1200.00'))
+        self.assertEqual(summary['Class A']['collection_rate'], Decimal('40'))
+        self.assertEqual(summary['Class B']['total_collected'], Decimal('0.00'))
+        self.assertEqual(summary['Class C']['total_fees'], Decimal('0.00'))
+        self.assertEqual(summary['Class C']['collection_rate'], 0)
+
+        self.assertEqual(response.context['total_collected'], Decimal('800.00'))
+        self.assertEqual(response.context['total_outstanding'], Decimal('2200.00'))
+        self.assertEqual(response.context['outstanding_count'], 3)
+        self.assertEqual(response.context['overdue_amount'], Decimal('1000.00'))
+        self.assertEqual(response.context['overdue_count'], 1)
+        self.assertEqual(response.context['active_students_count'], 3)
+
+    def test_query_count_is_constant(self):
+        self.create_class_with_fees('Class A', students=1, paid='100.00', overdue=True)
+        _, small = self.get_dashboard()
+
+        for index in range(5):
+            self.create_class_with_fees(f'Class {index}', students=3, paid='250.00', overdue=True)
+        _, large = self.get_dashboard()
+
+        self.assertEqual(small, large)
+        self.assertLessEqual(large, self.MAX_QUERIES)
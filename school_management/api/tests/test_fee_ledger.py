@@ -0,0 +1,136 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+
+from ..models import *
+
+
+def create_ledger_fee(amount='5000.00'):
+    """Create a principal, a student and an unpaid fee for ledger tests."""
+    principal = User.objects.create_user(username='ledger_principal', password='pass', role=User.Role.PRINCIPAL)
+    student_user = User.objects.create_user(username='ledger_student', password='pass', role=User.Role.STUDENT)
+    student = Student.objects.create(user=student_user)
+    fee = Fee.objects.create(
+        student=student,
+        amount=Decimal(amount),
+        due_date=timezone.now().date() + timezone.timedelta(days=30)
+    )
+    return principal, student, fee
+
+
+class FeeLedgerModelTest(TestCase):
+    """Test cases for the materialised fee ledger."""
+
+    def setUp(self):
+        self.principal, self.student, self.fee = create_ledger_fee()
+
+    def test_ledger_created_with_fee(self):
+        """A new fee starts with its full amount outstanding."""
+        ledger = FeeLedger.objects.get(fee=self.fee)
+        self.assertEqual(ledger.total_paid, Decimal('0.00'))
+        self.assertEqual(ledger.outstanding, Decimal('5000.00'))
+        self.assertIsNone(ledger.last_payment_at)
+
+    def test_completed_payment_updates_ledger(self):
+        """Completed payments reduce the outstanding balance."""
+        payment = Payment.objects.create(
+            fee=self.fee, amount=Decimal('1500.00'), status=Payment.Status.COMPLETED, processed_by=self.principal
+        )
+        ledger = FeeLedger.objects.get(fee=self.fee)
+        self.assertEqual(ledger.total_paid, Decimal('1500.00'))
+        self.assertEqual(ledger.outstanding, Decimal('3500.00'))
+        self.assertEqual(ledger.last_payment_at, payment.payment_date)
+        self.assertEqual(self.fee.get_outstanding_amount(), Decimal('3500.00'))
+
+    def test_pending_payment_does_not_count(self):
+        """Only completed payments are included in the ledger."""
+        Payment.objects.create(fee=self.fee, amount=Decimal('1000.00'), status=Payment.Status.PENDING)
+        self.assertEqual(FeeLedger.objects.get(fee=self.fee).total_paid, Decimal('0.00'))
+
+    def test_full_payment_marks_fee_paid(self):
+        """Paying off the ledger balance marks the fee as paid."""
+        Payment.objects.create(fee=self.fee, amount=Decimal('5000.00'), status=Payment.Status.COMPLETED)
+        self.fee.refresh_from_db()
+        self.assertEqual(self.fee.status, Fee.Status.PAID)
+        self.assertEqual(FeeLedger.objects.get(fee=self.fee).outstanding, Decimal('0.00'))
+
+    def test_refund_removes_payment_from_ledger(self):
+        """Refunded payments no longer count towards the amount paid."""
+        payment = Payment.objects.create(fee=self.fee, amount=Decimal('2000.00'), status=Payment.Status.COMPLETED)
+        payment.process_refund(Decimal('2000.00'), 'Duplicate payment', self.principal)
+        ledger = FeeLedger.objects.get(fee=self.fee)
+        self.assertEqual(ledger.total_paid, Decimal('0.00'))
+        self.assertEqual(ledger.outstanding, Decimal('5000.00'))
+
+    def test_discounts_reduce_outstanding(self):
+        """Amount and percentage discounts are both applied to the balance."""
+        Discount.objects.create(student=self.student, fee=self.fee, discount_type='amount', value=Decimal('500.00'))
+        Discount.objects.create(student=self.student, fee=self.fee, discount_type='percentage', value=Decimal('10.00'))
+        ledger = FeeLedger.objects.get(fee=self.fee)
+        self.assertEqual(ledger.total_discount, Decimal('1000.00'))
+        self.assertEqual(ledger.outstanding, Decimal('4000.00'))
+
+    def test_waiver_updates_ledger(self):
+        """Changing the waived amount is reflected in the ledger."""
+        self.fee.waived_amount = Decimal('750.00')
+        self.fee.save()
+        ledger = FeeLedger.objects.get(fee=self.fee)
+        self.assertEqual(ledger.waived, Decimal('750.00'))
+        self.assertEqual(ledger.outstanding, Decimal('4250.00'))
+
+
+class RebuildFeeLedgerCommandTest(TestCase):
+    """Test cases for the rebuild_fee_ledger management command."""
+
+    def setUp(self):
+        self.principal, self.student, self.fee = create_ledger_fee()
+        Payment.objects.create(fee=self.fee, amount=Decimal('1200.00'), status=Payment.Status.COMPLETED)
+
+    def test_check_passes_when_consistent(self):
+        out = StringIO()
+        call_command('rebuild_fee_ledger', '--check', stdout=out)
+        self.assertIn('consistent', out.getvalue())
+
+    def test_check_reports_drift(self):
+        FeeLedger.objects.filter(fee=self.fee).update(outstanding=Decimal('1.00'))
+        with self.assertRaises(CommandError):
+            call_command('rebuild_fee_ledger', '--check', stdout=StringIO())
+
+    def test_repairs_drift_and_missing_rows(self):
+        FeeLedger.objects.filter(fee=self.fee).update(total_paid=Decimal('0.00'), outstanding=Decimal('1.00'))
+        other_fee = Fee.objects.create(
+            student=self.student, amount=Decimal('300.00'), due_date=timezone.now().date() + timezone.timedelta(days=10)
+        )
+        FeeLedger.objects.filter(fee=other_fee).delete()
+
+        call_command('rebuild_fee_ledger', stdout=StringIO())
+
+        ledger = FeeLedger.objects.get(fee=self.fee)
+        self.assertEqual(ledger.total_paid, Decimal('1200.00'))
+        self.assertEqual(ledger.outstanding, Decimal('3800.00'))
+        self.assertEqual(FeeLedger.objects.get(fee=other_fee).outstanding, Decimal('300.00'))
+
+
+class FeeWaiverApiTest(APITestCase):
+    """Test cases for waiving fee amounts through the API."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.principal, self.student, self.fee = create_ledger_fee()
+        self.client.force_authenticate(user=self.principal)
+
+    def test_waive_amount_updates_ledger(self):
+        response = self.client.post(f'/api/fees/{self.fee.id}/waive_amount/', {'amount': '400.00'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(FeeLedger.objects.get(fee=self.fee).outstanding, Decimal('4600.00'))
+
+    def test_waive_amount_exceeding_balance(self):
+        response = self.client.post(f'/api/fees/{self.fee.id}/waive_amount/', {'amount': '9000.00'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(FeeLedger.objects.get(fee=self.fee).outstanding, Decimal('5000.00'))
@@ -0,0 +1,70 @@
+from decimal import Decimal
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+
+from ..models import *
+
+
+class FeeListQueryTest(APITestCase):
+    """Test cases for constant-query fee listing and sparse fieldsets."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.principal = User.objects.create_user(username='list_principal', password='pass', role=User.Role.PRINCIPAL)
+        UserProfile.objects.create(user=self.principal, phone='555-0100')
+        self.school_class = SchoolClass.objects.create(name='Grade 7')
+        self.client.force_authenticate(user=self.principal)
+        self.counter = 0
+
+    def create_fees(self, count):
+        for _ in range(count):
+            self.counter += 1
+            user = User.objects.create_user(username=f'list_student_{self.counter}', password='pass')
+            UserProfile.objects.create(user=user)
+            student = Student.objects.create(user=user, school_class=self.school_class)
+            fee = Fee.objects.create(
+                student=student, amount=Decimal('1000.00'),
+                due_date=timezone.now().date() + timezone.timedelta(days=30)
+            )
+            Payment.objects.create(
+                fee=fee, amount=Decimal('300.00'), status=Payment.Status.COMPLETED, processed_by=self.principal
+            )
+            Discount.objects.create(
+                student=student, fee=fee, discount_type='amount', value=Decimal('100.00'), applied_by=self.principal
+            )
+
+    def list_fees(self, params=''):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/api/fees/{params}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, len(queries)
+
+    def test_list_query_count_is_constant(self):
+        self.create_fees(2)
+        _, small = self.list_fees()
+        self.create_fees(6)
+        response, large = self.list_fees()
+
+        self.assertEqual(len(response.data), 8)
+        self.assertEqual(small, large)
+
+    def test_list_uses_ledger_totals(self):
+        self.create_fees(1)
+        response, _ = self.list_fees()
+        fee = response.data[0]
+        self.assertEqual(Decimal(fee['total_paid']), Decimal('300.00'))
+        self.assertEqual(Decimal(fee['outstanding_balance']), Decimal('600.00'))
+        self.assertEqual(len(fee['payments']), 1)
+        self.assertEqual(fee['student']['school_class'], 'Grade 7')
+
+    def test_sparse_fieldset(self):
+        self.create_fees(3)
+        _, full = self.list_fees()
+        response, sparse = self.list_fees('?fields=id,amount,outstanding_balance')
+
+        self.assertEqual(set(response.data[0]), {'id', 'amount', 'outstanding_balance'})
+        self.assertLess(sparse, full)
@@ -0,0 +1,156 @@
+import csv
+import json
+import os
+import shutil
+import tempfile
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from ..models import *
+from .. import report_renderers
+from ..management.commands.generate_reports import Command as GenerateReportsCommand
+
+
+class GenerateReportsTest(TestCase):
+    """Test cases for the set-based report families of generate_reports."""
+
+    def setUp(self):
+        self.base_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.base_dir, True)
+        settings_override = override_settings(BASE_DIR=self.base_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        school_class = SchoolClass.objects.create(name='Report Class')
+        self.students = []
+        for i in range(3):
+            user = User.objects.create_user(username=f'report_student_{i}', password='pass')
+            self.students.append(Student.objects.create(user=user, school_class=school_class))
+
+        today = timezone.localdate()
+        self.this_month = today.replace(day=1)
+        self.last_month = (self.this_month - timezone.timedelta(days=1)).replace(day=1)
+        for student, status, amount in zip(self.students, ['paid', 'unpaid', 'partial'], [100, 200, 300]):
+            fee = Fee.objects.create(student=student, amount=Decimal(amount), due_date=self.this_month)
+            # Fee.save derives the status from payments; set it directly
+            Fee.objects.filter(pk=fee.pk).update(status=status)
+        fee = Fee.objects.create(student=self.students[0], amount=Decimal('50'), due_date=self.last_month)
+        Fee.objects.filter(pk=fee.pk).update(status='paid')
+        for student, status in zip(self.students, ['present', 'absent', 'late']):
+            Attendance.objects.create(student=student, date=self.last_month, status=status)
+
+    def generate(self, *args):
+        report_id = f'report_test_{len(os.listdir(self.base_dir))}'
+        call_command('generate_reports', '--report-id', report_id, *args, stdout=StringIO())
+        return os.path.join(self.base_dir, 'reports', report_id)
+
+    def load(self, report_dir, family):
+        with open(os.path.join(report_dir, family, f'{family}_reports.json' if family != 'summary' else 'summary_report.json')) as f:
+            return json.load(f)
+
+    def test_monthly_trends(self):
+        report_dir = self.generate('--report-type', 'all')
+        trend = self.load(report_dir, 'financial')['monthly_collection_trend']
+        self.assertEqual(len(trend), 12)
+        self.assertEqual(trend[0]['month'], self.this_month.strftime('%Y-%m'))
+        self.assertEqual((Decimal(trend[0]['collected']), Decimal(trend[0]['pending'])), (100, 500))
+        self.assertEqual(trend[1]['month'], self.last_month.strftime('%Y-%m'))
+        self.assertEqual((Decimal(trend[1]['collected']), trend[1]['pending']), (50, 0))
+
+        attendance = self.load(report_dir, 'attendance')
+        self.assertEqual(len(attendance['monthly_attendance_trend']), 6)
+        self.assertEqual(attendance['monthly_attendance_trend'][1]['late'], 1)
+        self.assertEqual(attendance['attendance_statistics'],
+                         {'total_records': 3, 'present_count': 1, 'absent_count': 1, 'late_count': 1})
+
+        self.assertEqual(attendance['class_attendance'], [{
+            'name': 'Report Class', 'total_students': 3, 'present_count': 1, 'absent_count': 1, 'late_count': 1,
+            'avg_attendance': 33.33,
+        }])
+
+        summary = self.load(report_dir, 'summary')['overall_statistics']
+        self.assertEqual((summary['total_fees'], summary['total_paid_fees'], summary['total_pending_fees']), (4, 2, 2))
+        self.assertEqual(summary['total_students'], 3)
+
+    def test_query_count_does_not_depend_on_months(self):
+        counts = []
+        for months in ('1', '36'):
+            with CaptureQueriesContext(connection) as queries:
+                self.generate('--report-type', 'all', '--months', months)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def profiled_queries(self, report_type):
+        command = GenerateReportsCommand()
+        call_command(command, '--report-type', report_type, '--report-id', f'report_{report_type}',
+                     '--profile', stdout=StringIO())
+        return {name: queries for name, queries, _ in command.profile_rows}
+
+    def test_families_share_queries(self):
+        alone = self.profiled_queries('academic')['summary']
+        together = self.profiled_queries('all')['summary']
+        # With every family generated, the summary's fee, attendance, grade and
+        # class totals are sums over rows the other families already read
+        self.assertEqual(alone - together, 3)
+
+    def test_profile(self):
+        out = StringIO()
+        call_command('generate_reports', '--report-type', 'academic', '--report-id', 'report_profiled',
+                     '--profile', stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertTrue(any(line.startswith('academic') for line in lines))
+        self.assertTrue(any(line.startswith('total') for line in lines))
+
+
+class ReportRenderersTest(TestCase):
+    """Test cases for rendering one dataset into several formats."""
+
+    def setUp(self):
+        self.base_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.base_dir, True)
+        settings_override = override_settings(BASE_DIR=self.base_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        school_class = SchoolClass.objects.create(name='Render Class')
+        for i in range(3):
+            user = User.objects.create_user(username=f'render_student_{i}', password='pass', first_name=f'<b>{i}')
+            Student.objects.create(user=user, school_class=school_class)
+
+    def test_all_formats_in_one_run(self):
+        call_command('generate_reports', '--report-type', 'academic', '--format', 'json,csv,html,pdf',
+                     '--workers', '2', '--report-id', 'report_formats', stdout=StringIO())
+        academic_dir = os.path.join(self.base_dir, 'reports', 'report_formats', 'academic')
+        for name in ('academic_reports.json', 'academic_reports.html', 'academic_reports.pdf',
+                     'academic_reports_student_enrollment.csv', 'academic_reports_class_distribution.csv'):
+            self.assertTrue(os.path.exists(os.path.join(academic_dir, name)), name)
+        self.assertEqual(Report.objects.get(report_id='report_formats').output_format, 'json,csv,html,pdf')
+
+        with open(os.path.join(academic_dir, 'academic_reports_student_enrollment.csv'), newline='') as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(sorted(row['user__username'] for row in rows),
+                         ['render_student_0', 'render_student_1', 'render_student_2'])
+        with open(os.path.join(academic_dir, 'academic_reports.html')) as f:
+            self.assertIn('&lt;b&gt;0', f.read())
+
+    def test_unknown_format(self):
+        with self.assertRaisesMessage(CommandError, 'format must be'):
+            call_command('generate_reports', '--format', 'json,xml', '--report-id', 'report_bad', stdout=StringIO())
+
+    def test_pdf_tables_are_chunked(self):
+        from reportlab import platypus
+
+        data = {'rows': [{'n': i} for i in range(5)], 'totals': {'n': 5}}
+        with mock.patch.object(report_renderers, 'PDF_TABLE_CHUNK_ROWS', 2), \
+                mock.patch.object(platypus, 'Table', wraps=platypus.Table) as table:
+            paths = report_renderers.render('pdf', data, os.path.join(self.base_dir, 'chunked'), 'now')
+        self.assertEqual([len(call.args[0]) for call in table.call_args_list], [3, 3, 2])
+        self.assertTrue(os.path.getsize(paths[0]) > 0)
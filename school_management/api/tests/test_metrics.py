@@ -0,0 +1,121 @@
+import gzip
+import os
+import shutil
+import tempfile
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+
+from ..models import *
+from .. import metrics, notifications
+
+
+class InstrumentationTest(APITestCase):
+    """Test cases for request instrumentation and the metrics endpoint."""
+
+    def setUp(self):
+        cache.clear()
+        metrics.registry.reset()
+        self.client = APIClient()
+        self.admin = User.objects.create_user(username='metrics_admin', password='pass', is_staff=True,
+                                              role=User.Role.PRINCIPAL)
+        self.user = User.objects.create_user(username='metrics_user', password='pass', role=User.Role.STUDENT)
+        for i in range(3):
+            Notification.objects.create(user=self.user, title=f'Note {i}', message='Body')
+
+    def test_server_timing(self):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get('/api/notifications/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        timing = dict(part.split(';', 1) for part in response['Server-Timing'].split(', '))
+        self.assertEqual(set(timing), {'db', 'serializer', 'total'})
+        self.assertRegex(timing['db'], r'^dur=[\d.]+;desc="[1-9]\d* queries"$')
+
+        stats = metrics.registry._routes['notification-list']
+        self.assertEqual((stats.count, stats.responses[('GET', '200')]), (1, 1))
+        self.assertGreater(stats.serializer_time, 0)
+        self.assertEqual(stats.bytes, len(response.content))
+
+    def test_metrics_endpoint(self):
+        self.client.force_authenticate(user=self.user)
+        self.client.get('/api/notifications/')
+        response = self.client.get('/api/metrics/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get('/api/metrics/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        body = response.content.decode()
+        self.assertIn('# TYPE api_request_duration_seconds histogram', body)
+        self.assertIn('api_requests_total{route="notification-list",method="GET",status="200"} 1', body)
+        self.assertIn('api_requests_total{route="metrics",method="GET",status="403"} 1', body)
+        self.assertIn('api_request_duration_seconds_bucket{route="notification-list",le="+Inf"} 1', body)
+
+    @override_settings(REQUEST_BUDGETS={'default': {'total_ms': 60000}, 'notification-list': {'queries': 0}})
+    def test_budget_warning(self):
+        self.client.force_authenticate(user=self.user)
+        with self.assertLogs('api.performance', 'WARNING') as logs:
+            self.client.get('/api/notifications/')
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn('(notification-list) over its queries budget', logs.output[0])
+        self.assertEqual(metrics.registry._routes['notification-list'].budget_exceeded, {'queries': 1})
+
+        with self.assertNoLogs('api.performance', 'WARNING'):
+            self.client.get('/api/notifications/unread_count/')
+
+    @override_settings(REQUEST_METRICS_ENABLED=False)
+    def test_disabled(self):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get('/api/notifications/')
+        self.assertNotIn('Server-Timing', response)
+        self.assertEqual(metrics.registry.render().count('api_requests_total{'), 0)
+
+    def test_streamed_body_is_recorded_when_sent(self):
+        base_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, base_dir, True)
+        report_dir = os.path.join(base_dir, 'reports', 'report_20250101_000000', 'academic')
+        os.makedirs(report_dir)
+        with open(os.path.join(report_dir, 'academic.csv'), 'wb') as f:
+            f.write(b'1,student,90\n' * 5000)
+
+        self.client.force_authenticate(user=self.admin)
+        with override_settings(BASE_DIR=base_dir):
+            response = self.client.get(
+                '/api/report-management/report_20250101_000000/download/?path=academic/academic.csv',
+                HTTP_ACCEPT_ENCODING='gzip'
+            )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Server-Timing', response)
+        self.assertEqual(metrics.registry.render().count('api_requests_total{'), 0)
+
+        body = b''.join(response.streaming_content)
+        self.assertEqual(len(gzip.decompress(body)), 13 * 5000)
+        [stats] = metrics.registry._routes.values()
+        self.assertEqual((stats.count, stats.bytes), (1, len(body)))
+
+
+class StreamInstrumentationTest(TestCase):
+    """Test cases for instrumenting async streaming responses."""
+
+    def setUp(self):
+        cache.clear()
+        metrics.registry.reset()
+        self.user = User.objects.create_user(username='metrics_streamer', password='pass', role=User.Role.STUDENT)
+        self.first = Notification.objects.create(user=self.user, title='First', message='Body')
+        Notification.objects.create(user=self.user, title='Second', message='Body')
+
+    async def test_event_stream_is_recorded_when_closed(self):
+        ticket = await sync_to_async(notifications.issue_stream_ticket)(self.user.pk)
+        with override_settings(NOTIFICATION_STREAM_TIMEOUT=0.1, NOTIFICATION_STREAM_HEARTBEAT=0.05):
+            response = await self.async_client.get(f'/api/notifications/stream/?ticket={ticket}',
+                                                   headers={'Last-Event-ID': str(self.first.pk)})
+            self.assertNotIn('notification_stream', metrics.registry._routes)
+            chunks = [chunk async for chunk in response.streaming_content]
+
+        stats = metrics.registry._routes['notification_stream']
+        self.assertEqual((stats.count, stats.bytes), (1, sum(len(chunk) for chunk in chunks)))
+        self.assertGreaterEqual(stats.duration, 0.1)
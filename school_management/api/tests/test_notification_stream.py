@@ -0,0 +1,152 @@
+import asyncio
+import json
+import threading
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from ..models import *
+from .. import notifications, pubsub
+
+
+def events(chunks):
+    """The notification events among streamed chunks."""
+    found = []
+    for chunk in chunks:
+        chunk = chunk.decode() if isinstance(chunk, bytes) else chunk
+        for line in chunk.splitlines():
+            if line.startswith('data: '):
+                found.append(json.loads(line[len('data: '):]))
+    return found
+
+
+class PubSubHubTest(TestCase):
+    """Test cases for the in-process pub/sub hub."""
+
+    async def test_publish_from_another_thread(self):
+        subscription = pubsub.subscribe('test:hub')
+        try:
+            self.assertEqual(pubsub.hub.subscriber_count('test:hub'), 1)
+            thread = threading.Thread(target=pubsub.publish, args=('test:hub', {'id': 1}))
+            thread.start()
+            thread.join()
+            self.assertEqual(await subscription.get(timeout=1), {'id': 1})
+            pubsub.publish('test:other', {'id': 2})
+            with self.assertRaises(asyncio.TimeoutError):
+                await subscription.get(timeout=0.05)
+        finally:
+            pubsub.unsubscribe(subscription)
+        self.assertEqual(pubsub.hub.subscriber_count('test:hub'), 0)
+
+    async def test_slow_reader_is_cut_off(self):
+        subscription = pubsub.hub.subscribe('test:slow')
+        subscription.queue = asyncio.Queue(2)
+        try:
+            for i in range(3):
+                pubsub.publish('test:slow', {'id': i})
+            await asyncio.sleep(0)
+            # The oldest message makes room for the end-of-stream marker
+            self.assertEqual(await subscription.get(timeout=1), {'id': 1})
+            self.assertIsNone(await subscription.get(timeout=1))
+        finally:
+            pubsub.unsubscribe(subscription)
+
+
+class NotificationStreamTest(TestCase):
+    """Test cases for the server-sent notification stream."""
+
+    url = '/api/notifications/stream/'
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='stream_user', password='pass', role=User.Role.STUDENT)
+        self.other = User.objects.create_user(username='stream_other', password='pass', role=User.Role.STUDENT)
+        self.token = str(RefreshToken.for_user(self.user).access_token)
+
+    def ticket(self):
+        return notifications.issue_stream_ticket(self.user.pk)
+
+    def notify(self, user, title):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Notification.objects.create(user=user, title=title, message='Body')
+
+    async def test_live_events(self):
+        response = await self.async_client.get(self.url, headers={'Authorization': f'Bearer {self.token}'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = aiter(response.streaming_content)
+        self.assertTrue((await anext(chunks)).startswith(b'retry: '))
+
+        await sync_to_async(self.notify)(self.other, 'Not yours')
+        await sync_to_async(self.notify)(self.user, 'Hello')
+        chunk = await asyncio.wait_for(anext(chunks), 2)
+        self.assertEqual([event['title'] for event in events([chunk])], ['Hello'])
+
+    async def test_resume_after_last_event_id(self):
+        first = await sync_to_async(self.notify)(self.user, 'First')
+        await sync_to_async(self.notify)(self.user, 'Second')
+        with override_settings(NOTIFICATION_STREAM_TIMEOUT=0.2, NOTIFICATION_STREAM_HEARTBEAT=0.1):
+            response = await self.async_client.get(f'{self.url}?ticket={await sync_to_async(self.ticket)()}',
+                                                   headers={'Last-Event-ID': str(first.pk)})
+            chunks = [chunk async for chunk in response.streaming_content]
+        self.assertEqual([event['title'] for event in events(chunks)], ['Second'])
+        self.assertIn(b': keepalive\n\n', chunks)
+        self.assertEqual(pubsub.hub.subscriber_count(notifications.channel(self.user.pk)), 0)
+
+    async def test_resume_replays_more_than_a_batch(self):
+        first = await sync_to_async(self.notify)(self.user, 'First')
+        count = notifications.REPLAY_BATCH_SIZE * 2 + 50
+        await sync_to_async(Notification.objects.bulk_create)([
+            Notification(user=self.user, title=f'Missed {i}', message='Body') for i in range(count)
+        ])
+        with override_settings(NOTIFICATION_STREAM_TIMEOUT=0.1, NOTIFICATION_STREAM_HEARTBEAT=0.1):
+            response = await self.async_client.get(f'{self.url}?ticket={await sync_to_async(self.ticket)()}',
+                                                   headers={'Last-Event-ID': str(first.pk)})
+            chunks = [chunk async for chunk in response.streaming_content]
+        self.assertEqual([event['title'] for event in events(chunks)], [f'Missed {i}' for i in range(count)])
+
+    async def test_rejects_missing_or_bad_credentials(self):
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response.status_code, 401)
+        response = await self.async_client.get(self.url, headers={'Authorization': 'Bearer nonsense'})
+        self.assertEqual(response.status_code, 401)
+        response = await self.async_client.get(f'{self.url}?ticket=nonsense')
+        self.assertEqual(response.status_code, 401)
+        # Access tokens are not accepted in the URL
+        response = await self.async_client.get(f'{self.url}?token={self.token}')
+        self.assertEqual(response.status_code, 401)
+
+    async def test_ticket_works_once(self):
+        response = await self.async_client.post('/api/notifications/stream_ticket/',
+                                                 headers={'Authorization': f'Bearer {self.token}'})
+        self.assertEqual(response.status_code, 201)
+        url = f"{self.url}?ticket={response.json()['ticket']}"
+        with override_settings(NOTIFICATION_STREAM_TIMEOUT=0.1):
+            first = await self.async_client.get(url)
+            self.assertEqual(first.status_code, 200)
+            [chunk async for chunk in first.streaming_content]
+        second = await self.async_client.get(url)
+        self.assertEqual(second.status_code, 401)
+
+    def test_ticket_needs_authentication(self):
+        response = self.client.post('/api/notifications/stream_ticket/')
+        self.assertEqual(response.status_code, 401)
+
+    def test_needs_asgi(self):
+        response = self.client.get(f'{self.url}?ticket={self.ticket()}')
+        self.assertEqual(response.status_code, 501)
+
+    async def test_bulk_creates_are_published(self):
+        subscription = pubsub.subscribe(notifications.channel(self.user.pk))
+        try:
+            await sync_to_async(self.broadcast)()
+            received = [await subscription.get(timeout=1) for _ in range(2)]
+        finally:
+            pubsub.unsubscribe(subscription)
+        self.assertEqual([event['title'] for event in received], ['Closure', 'Closure'])
+
+    def broadcast(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            notifications.broadcast([self.user.pk, self.other.pk, self.user.pk], 'Closure', 'Tomorrow')
@@ -0,0 +1,105 @@
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+
+from ..models import *
+from .. import notifications
+
+
+class NotificationInboxTest(APITestCase):
+    """Test cases for the cached unread counter and the inbox endpoints."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='inbox_user', password='pass', role=User.Role.STUDENT)
+        self.other = User.objects.create_user(username='inbox_other', password='pass', role=User.Role.STUDENT)
+        self.client.force_authenticate(user=self.user)
+
+    def notify(self, user=None, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Notification.objects.create(user=user or self.user, title='Hello', message='World', **kwargs)
+
+    def test_counter_follows_writes(self):
+        self.notify()
+        self.notify(is_read=True)
+        self.assertEqual(notifications.unread_count(self.user.pk), 1)
+
+        # Cached: no query, and kept in step by later creates and deletes
+        with self.assertNumQueries(0):
+            self.assertEqual(notifications.unread_count(self.user.pk), 1)
+        latest = self.notify()
+        self.notify(user=self.other)
+        with self.assertNumQueries(0):
+            self.assertEqual(notifications.unread_count(self.user.pk), 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            latest.delete()
+        self.assertEqual(notifications.unread_count(self.user.pk), 1)
+
+        # An edit drops the counter and the next read recounts
+        first = Notification.objects.filter(user=self.user, is_read=False).get()
+        first.is_read = True
+        with self.captureOnCommitCallbacks(execute=True):
+            first.save()
+        self.assertEqual(notifications.unread_count(self.user.pk), 0)
+
+    def test_endpoints(self):
+        first = self.notify()
+        for _ in range(3):
+            self.notify()
+        self.notify(user=self.other)
+
+        response = self.client.get('/api/notifications/unread_count/')
+        self.assertEqual(response.data, {'unread': 4})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'/api/notifications/{first.pk}/mark_read/')
+        self.assertEqual(response.data, {'marked': 1})
+        response = self.client.get('/api/notifications/?unread=true')
+        self.assertEqual(len(response.data), 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertNumQueries(1):
+                response = self.client.post('/api/notifications/mark_all_read/')
+        self.assertEqual(response.data['marked'], 3)
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/notifications/unread_count/')
+        self.assertEqual(response.data, {'unread': 0})
+        self.assertEqual(notifications.unread_count(self.other.pk), 1)
+
+        # Other users' notifications are not reachable
+        other = Notification.objects.get(user=self.other)
+        response = self.client.post(f'/api/notifications/{other.pk}/mark_read/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class BroadcastTest(APITestCase):
+    """Test cases for broadcasting a notification to many users."""
+
+    def setUp(self):
+        cache.clear()
+        self.users = [User.objects.create_user(username=f'broadcast_{i}', password='pass') for i in range(25)]
+
+    def test_broadcast_in_chunks(self):
+        users = User.objects.filter(username__startswith='broadcast_')
+        # One user query plus one insert per chunk of ten, inside a savepoint
+        with self.assertNumQueries(6):
+            created = notifications.broadcast(users, 'Closure', 'School is closed tomorrow', batch_size=10)
+        self.assertEqual(created, 25)
+        self.assertEqual(Notification.objects.filter(title='Closure').count(), 25)
+
+    def test_dedupe_and_counters(self):
+        ids = [user.pk for user in self.users]
+        self.assertEqual(notifications.unread_count(ids[0]), 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            notifications.broadcast(ids[:5], 'Exam', 'Exams start Monday')
+        self.assertEqual(notifications.unread_count(ids[0]), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            created = notifications.broadcast(ids, 'Exam', 'Exams start Monday', dedupe=True)
+        self.assertEqual(created, 20)
+        self.assertEqual(notifications.unread_count(ids[0]), 1)
+        self.assertEqual(Notification.objects.filter(title='Exam').count(), 25)
+
+        # Without dedupe the message is sent again
+        self.assertEqual(notifications.broadcast(ids[:2], 'Exam', 'Exams start Monday'), 2)
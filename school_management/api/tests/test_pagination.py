@@ -0,0 +1,113 @@
+import re
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+
+from ..models import *
+
+
+def parse_link_header(response):
+    """Return the Link header as a {rel: url} dict."""
+    return {
+        rel: url
+        for url, rel in re.findall(r'<([^>]+)>;\s*rel="(\w+)"', response.get('Link', ''))
+    }
+
+
+class CursorPaginationTest(APITestCase):
+    """Test cases for keyset pagination with Link headers."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.principal = User.objects.create_user(username='page_principal', password='pass', role=User.Role.PRINCIPAL)
+        self.client.force_authenticate(user=self.principal)
+        user = User.objects.create_user(username='page_student', password='pass')
+        self.student = Student.objects.create(user=user)
+        today = timezone.now().date()
+        for offset in range(5):
+            Attendance.objects.create(
+                student=self.student, date=today - timezone.timedelta(days=offset), status=Attendance.Status.PRESENT
+            )
+
+    def test_pages_follow_link_header(self):
+        seen = []
+        url = '/api/attendance/?page_size=2'
+        pages = 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertIsInstance(response.data, list)
+            self.assertLessEqual(len(response.data), 2)
+            seen.extend(row['date'] for row in response.data)
+            url = parse_link_header(response).get('next')
+            pages += 1
+
+        self.assertEqual(pages, 3)
+        self.assertEqual(len(seen), 5)
+        self.assertEqual(seen, sorted(seen, reverse=True))
+
+    def test_rows_sharing_a_date_page_by_id(self):
+        today = timezone.now().date()
+        for index in range(5):
+            user = User.objects.create_user(username=f'page_same_day_{index}', password='pass')
+            Attendance.objects.create(
+                student=Student.objects.create(user=user), date=today, status=Attendance.Status.ABSENT
+            )
+        expected = list(Attendance.objects.order_by('-date', '-id').values_list('id', flat=True))
+
+        seen = []
+        url = '/api/attendance/?page_size=2'
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            page_query = [query['sql'] for query in queries if 'api_attendance' in query['sql']][-1]
+            self.assertNotIn('OFFSET', page_query)
+            seen.extend(row['id'] for row in response.data)
+            url = parse_link_header(response).get('next')
+        self.assertEqual(seen, expected)
+
+        # And back again from the last page
+        back = self.client.get(parse_link_header(response)['prev'])
+        self.assertEqual([row['id'] for row in back.data], expected[-4:-2])
+
+    def test_bad_cursor(self):
+        response = self.client.get('/api/attendance/?cursor=cD1qdW5r')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_previous_link(self):
+        first = self.client.get('/api/attendance/?page_size=2')
+        second = self.client.get(parse_link_header(first)['next'])
+        links = parse_link_header(second)
+        self.assertIn('prev', links)
+        self.assertEqual(self.client.get(links['prev']).data, first.data)
+
+    def test_single_page_has_no_link_header(self):
+        response = self.client.get('/api/attendance/')
+        self.assertEqual(len(response.data), 5)
+        self.assertNotIn('Link', response)
+
+    def test_notifications_page_size(self):
+        for index in range(3):
+            Notification.objects.create(user=self.principal, title=f'Notice {index}', message='Hello')
+        response = self.client.get('/api/notifications/?page_size=1')
+        self.assertEqual(len(response.data), 1)
+        self.assertIn('next', parse_link_header(response))
+
+    def test_link_header_is_readable_cross_origin(self):
+        response = self.client.get('/api/attendance/?page_size=2', HTTP_ORIGIN='http://localhost:3000')
+        self.assertIn('Link', response['Access-Control-Expose-Headers'])
+
+    def test_students_filtered_by_class(self):
+        school_class = SchoolClass.objects.create(name='Page 1A')
+        for index in range(2):
+            user = User.objects.create_user(username=f'page_classmate_{index}', password='pass')
+            Student.objects.create(user=user, school_class=school_class)
+        response = self.client.get(f'/api/students/?class={school_class.pk}')
+        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(self.client.get('/api/students/').data), 3)
+        self.assertEqual(self.client.get('/api/students/?class=nope').data, [])
@@ -0,0 +1,94 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from ..models import *
+from .. import ratelimit
+
+POLICIES = [
+    {'name': 'auth', 'prefixes': ['/api/auth/'], 'requests': 3, 'window': 60},
+    {'name': 'api', 'prefixes': ['/api/'], 'requests': 5, 'window': 60},
+]
+
+
+class SlidingWindowTest(TestCase):
+    """Test cases for the sliding-window counter."""
+
+    def setUp(self):
+        cache.clear()
+        self.policy = ratelimit.RatePolicy('test', 10, 60)
+
+    def test_limit_within_window(self):
+        results = [ratelimit.hit(self.policy, 'client', now=6000.0 + i) for i in range(11)]
+        self.assertTrue(all(result.allowed for result in results[:10]))
+        self.assertFalse(results[10].allowed)
+        self.assertEqual(results[9].remaining, 0)
+        self.assertEqual(results[0].reset_time, 6060)
+
+    def test_previous_window_is_weighted(self):
+        for _ in range(10):
+            ratelimit.hit(self.policy, 'client', now=6000.0)
+        # A quarter into the next window, 75% of the previous count still applies
+        allowed = [ratelimit.hit(self.policy, 'client', now=6075.0).allowed for _ in range(3)]
+        self.assertEqual(allowed, [True, True, False])
+        # Three quarters in, only 25% does
+        allowed = [ratelimit.hit(self.policy, 'client', now=6105.0).allowed for _ in range(6)]
+        self.assertEqual(allowed, [True] * 5 + [False])
+
+    def test_rejected_requests_are_not_counted(self):
+        for _ in range(15):
+            ratelimit.hit(self.policy, 'client', now=6000.0)
+        self.assertEqual(cache.get('ratelimit:test:client:100'), 10)
+
+    def test_clients_are_independent(self):
+        for _ in range(10):
+            ratelimit.hit(self.policy, 'first', now=6000.0)
+        self.assertTrue(ratelimit.hit(self.policy, 'second', now=6000.0).allowed)
+
+    def test_concurrent_increments_are_not_lost(self):
+        policy = ratelimit.RatePolicy('busy', 10000, 60)
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(lambda _: ratelimit.hit(policy, 'client', now=6000.0), range(800)))
+        self.assertEqual(cache.get('ratelimit:busy:client:100'), 800)
+
+
+@override_settings(RATE_LIMIT_ENABLED=True, RATE_LIMIT_POLICIES=POLICIES)
+class RateLimitMiddlewareTest(TestCase):
+    """Test cases for route-group rate limiting in the middleware."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_group_counter_is_shared_across_paths(self):
+        for path in ('/api/users/', '/api/students/', '/api/teachers/', '/api/users/?page=2', '/api/fees/'):
+            response = self.client.get(path)
+            self.assertNotEqual(response.status_code, 429)
+        response = self.client.get('/api/classes/')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(response['X-RateLimit-Remaining'], '0')
+        self.assertEqual(len([key for key in cache._cache if 'ratelimit' in key]), 1)
+
+    def test_groups_are_independent(self):
+        for _ in range(5):
+            self.client.get('/api/users/')
+        response = self.client.get('/api/auth/user/')
+        self.assertNotEqual(response.status_code, 429)
+        self.assertEqual(response['X-RateLimit-Limit'], '3')
+
+    def test_exempt_paths(self):
+        for _ in range(7):
+            response = self.client.get('/health/')
+        self.assertFalse(response.has_header('X-RateLimit-Limit'))
+
+    def test_login_attempts(self):
+        User.objects.create_user(username='limited', password='correct-horse')
+        with self.settings(RATE_LIMIT_ENABLED=False):
+            statuses = [
+                self.client.post('/api/auth/login/', {'username': 'limited', 'password': 'wrong'}).status_code
+                for _ in range(6)
+            ]
+        self.assertEqual(statuses[-1], 429)
@@ -0,0 +1,131 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+
+from ..models import *
+from .. import report_catalog
+
+
+class ReportCatalogTestCase(APITestCase):
+
+    def setUp(self):
+        self.base_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.base_dir, True)
+        settings_override = override_settings(BASE_DIR=self.base_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.client = APIClient()
+        self.principal = User.objects.create_user(username='catalog_principal', password='pass', role=User.Role.PRINCIPAL)
+        self.client.force_authenticate(user=self.principal)
+
+    def write_report(self, report_id, report_type='academic', days_ago=0, content=b'a,b\n1,2\n'):
+        directory = os.path.join(self.base_dir, 'reports', report_id)
+        os.makedirs(os.path.join(directory, report_type))
+        with open(os.path.join(directory, report_type, 'data.csv'), 'wb') as f:
+            f.write(content)
+        metadata = {
+            'report_id': report_id, 'report_type': report_type, 'format': 'csv', 'version': '1.0',
+            'generated_at': (timezone.now() - timedelta(days=days_ago)).isoformat(),
+            'includes': {report_type: True, 'summary': True},
+        }
+        with open(os.path.join(directory, 'metadata.json'), 'w') as f:
+            json.dump(metadata, f)
+        return directory
+
+
+class ReportCatalogTest(ReportCatalogTestCase):
+    """Test cases for indexing, syncing and pruning the report catalog."""
+
+    def test_generate_reports_indexes_the_report(self):
+        call_command('generate_reports', report_type='academic', format='json',
+                     report_id='report_catalog_test', stdout=StringIO())
+        report = Report.objects.get(report_id='report_catalog_test')
+        self.assertEqual((report.report_type, report.output_format), ('academic', 'json'))
+        paths = {item['path']: item for item in report.files}
+        self.assertIn('metadata.json', paths)
+        self.assertIn('academic/academic_reports.json', paths)
+        self.assertEqual(report.total_size, sum(item['size'] for item in report.files))
+
+        full_path = os.path.join(self.base_dir, 'reports', 'report_catalog_test', 'academic', 'academic_reports.json')
+        with open(full_path, 'rb') as f:
+            self.assertEqual(paths['academic/academic_reports.json']['sha256'], hashlib.sha256(f.read()).hexdigest())
+
+    def test_sync(self):
+        self.write_report('report_20240101_000000')
+        # Still being written: no metadata yet
+        os.makedirs(os.path.join(self.base_dir, 'reports', 'report_20240102_000000'))
+        Report.objects.create(report_id='report_gone', report_type='academic', generated_at=timezone.now())
+
+        added, removed = report_catalog.sync()
+        self.assertEqual(added, ['report_20240101_000000'])
+        self.assertEqual(removed, ['report_gone'])
+        self.assertEqual(list(Report.objects.values_list('report_id', flat=True)), ['report_20240101_000000'])
+
+    def test_prune_keeps_latest(self):
+        for days in (200, 150, 100, 5):
+            report_catalog.catalog_report(os.path.basename(self.write_report(f'report_{days}', days_ago=days)))
+
+        self.assertEqual(sorted(report_catalog.prune(days=90, keep_latest=2, dry_run=True)), ['report_150', 'report_200'])
+        self.assertEqual(Report.objects.count(), 4)
+
+        call_command('report_catalog', '--prune', '--days', '90', '--keep-latest', '2', stdout=StringIO())
+        self.assertEqual(sorted(Report.objects.values_list('report_id', flat=True)), ['report_100', 'report_5'])
+        self.assertFalse(os.path.exists(os.path.join(self.base_dir, 'reports', 'report_200')))
+        self.assertTrue(os.path.exists(os.path.join(self.base_dir, 'reports', 'report_100')))
+
+
+class ReportCatalogViewTest(ReportCatalogTestCase):
+    """Test cases for the catalog-backed report management endpoints."""
+
+    def setUp(self):
+        super().setUp()
+        for index, report_type in enumerate(['academic', 'financial', 'academic']):
+            self.write_report(f'report_2025010{index + 1}_000000', report_type=report_type, days_ago=10 - index)
+
+    def test_first_listing_indexes_existing_reports(self):
+        response = self.client.get('/api/report-management/list_reports/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total'], 3)
+        self.assertEqual(response.data['reports'][0]['report_id'], 'report_20250103_000000')
+        self.assertEqual(Report.objects.count(), 3)
+
+    def test_filters_and_pagination(self):
+        report_catalog.sync()
+        response = self.client.get('/api/report-management/list_reports/?report_type=academic&page_size=1')
+        self.assertEqual(response.data['total'], 2)
+        self.assertEqual(len(response.data['reports']), 1)
+        self.assertIn('rel="next"', response['Link'])
+
+        after = (timezone.now() - timedelta(days=9, hours=1)).date().isoformat()
+        response = self.client.get(f'/api/report-management/list_reports/?generated_after={after}')
+        self.assertEqual({r['report_id'] for r in response.data['reports']},
+                         {'report_20250102_000000', 'report_20250103_000000'})
+
+        response = self.client.get('/api/report-management/list_reports/?generated_after=yesterday')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_files_come_from_the_catalog(self):
+        report_catalog.sync()
+        shutil.rmtree(os.path.join(self.base_dir, 'reports', 'report_20250101_000000', 'academic'))
+        response = self.client.get('/api/report-management/report_20250101_000000/files/')
+        self.assertEqual(response.data['total_files'], 2)
+        self.assertTrue(all(len(item['sha256']) == 64 for item in response.data['files']))
+
+    def test_delete(self):
+        report_catalog.sync()
+        response = self.client.delete('/api/report-management/report_20250101_000000/delete/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(Report.objects.filter(report_id='report_20250101_000000').exists())
+        self.assertFalse(os.path.exists(os.path.join(self.base_dir, 'reports', 'report_20250101_000000')))
+        self.assertEqual(self.client.delete('/api/report-management/report_20250101_000000/delete/').status_code,
+                         status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,74 @@
+import gzip
+import os
+import shutil
+import tempfile
+
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+
+from ..models import *
+
+CSV = ''.join(f'{i},student_{i},{i % 100}\n' for i in range(5000)).encode()
+
+
+class ReportDownloadTest(APITestCase):
+    """Test cases for streaming report downloads."""
+
+    def setUp(self):
+        self.base_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.base_dir, True)
+        settings_override = override_settings(BASE_DIR=self.base_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        report_dir = os.path.join(self.base_dir, 'reports', 'report_20250101_000000', 'academic')
+        os.makedirs(report_dir)
+        with open(os.path.join(report_dir, 'academic.csv'), 'wb') as f:
+            f.write(CSV)
+        with open(os.path.join(report_dir, 'academic.pdf'), 'wb') as f:
+            f.write(b'%PDF-1.4 fake')
+
+        self.client = APIClient()
+        user = User.objects.create_user(username='report_reader', password='pass', role=User.Role.PRINCIPAL)
+        self.client.force_authenticate(user=user)
+        self.url = '/api/report-management/report_20250101_000000/download/?path=academic/academic.csv'
+
+    def test_streams_file(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(b''.join(response.streaming_content), CSV)
+        self.assertEqual(response['Content-Length'], str(len(CSV)))
+        self.assertIn('academic.csv', response['Content-Disposition'])
+
+    def test_range(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(b''.join(response.streaming_content), CSV[10:20])
+
+    def test_etag_changes_with_file(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code,
+                         status.HTTP_304_NOT_MODIFIED)
+
+        path = os.path.join(self.base_dir, 'reports', 'report_20250101_000000', 'academic', 'academic.csv')
+        with open(path, 'ab') as f:
+            f.write(b'extra\n')
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+    def test_gzip_for_text_reports(self):
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), CSV)
+        self.assertNotEqual(response['ETag'], self.client.get(self.url)['ETag'])
+
+        pdf = self.client.get(self.url.replace('.csv', '.pdf'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(pdf.has_header('Content-Encoding'))
+
+    def test_directory_traversal(self):
+        os.makedirs(os.path.join(self.base_dir, 'reports_private'))
+        response = self.client.get('/api/report-management/report_20250101_000000/download/'
+                                   '?path=../../reports_private/x')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,107 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+
+from ..models import *
+from .. import response_cache
+
+
+class ResponseCacheTest(APITestCase):
+    """Test cases for the versioned, signal-invalidated response cache."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.admin = User.objects.create_user(
+            username='cache_admin', password='pass', role=User.Role.PRINCIPAL, is_staff=True
+        )
+        self.client.force_authenticate(user=self.admin)
+        self.school_class = SchoolClass.objects.create(name='Grade 3')
+
+    def add_student(self, username):
+        user = User.objects.create_user(username=username, password='pass')
+        return Student.objects.create(user=user, school_class=self.school_class)
+
+    def test_hit_after_miss(self):
+        first = self.client.get('/api/teachers/')
+        self.assertEqual(first['X-Cache'], 'MISS')
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.get('/api/teachers/')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second['ETag'], first['ETag'])
+        # A hit is served without touching the database
+        self.assertEqual(len(queries), 0)
+
+    def test_evicted_version_does_not_revive_entries(self):
+        self.client.get('/api/teachers/')
+        # The cache drops a version key, e.g. under LocMem's cull
+        cache.delete(response_cache.version_key('api.Teacher'))
+        self.assertEqual(self.client.get('/api/teachers/')['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get('/api/teachers/')['X-Cache'], 'HIT')
+
+    def test_write_invalidates(self):
+        self.assertEqual(self.client.get('/api/reports/academic/').data['total_students'], 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.add_student('cache_student')
+        response = self.client.get('/api/reports/academic/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['total_students'], 1)
+
+    def test_delete_invalidates(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            student = self.add_student('cache_leaver')
+        self.assertEqual(self.client.get('/api/reports/academic/').data['total_students'], 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            student.delete()
+        self.assertEqual(self.client.get('/api/reports/academic/').data['total_students'], 0)
+
+    def test_etag_returns_304(self):
+        etag = self.client.get('/api/users/')['ETag']
+        response = self.client.get('/api/users/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertFalse(response.content)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.create_user(username='cache_newcomer', password='pass')
+        response = self.client.get('/api/users/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_login_does_not_invalidate_users(self):
+        etag = self.client.get('/api/users/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.admin.last_login = timezone.now()
+            self.admin.save(update_fields=['last_login'])
+        self.assertEqual(self.client.get('/api/users/', HTTP_IF_NONE_MATCH=etag).status_code,
+                         status.HTTP_304_NOT_MODIFIED)
+
+    def test_query_params_and_role_are_part_of_the_key(self):
+        etag = self.client.get('/api/users/')['ETag']
+        self.assertNotEqual(self.client.get('/api/users/?page_size=5')['ETag'], etag)
+
+        teacher = User.objects.create_user(username='cache_teacher', password='pass', role=User.Role.TEACHER)
+        self.client.force_authenticate(user=teacher)
+        response = self.client.get('/api/reports/academic/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(response.has_header('X-Cache'))
+
+    def test_bulk_fee_assignment_invalidates(self):
+        student = self.add_student('cache_payer')
+        self.assertEqual(self.client.get('/api/reports/fees-summary/').data['pie_chart']['unpaid_count'], 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            Fee.bulk_assign([student.pk], Decimal('500.00'), timezone.now().date() + timezone.timedelta(days=10))
+        self.assertEqual(self.client.get('/api/reports/fees-summary/').data['pie_chart']['unpaid_count'], 1)
+
+    def test_paginated_list_keeps_link_header(self):
+        for i in range(3):
+            self.add_student(f'cache_page_{i}')
+        first = self.client.get('/api/students/?page_size=2')
+        second = self.client.get('/api/students/?page_size=2')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second['Link'], first['Link'])
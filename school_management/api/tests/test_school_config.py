@@ -0,0 +1,89 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+
+from ..models import *
+from .. import school_config
+
+
+class SchoolConfigViewTest(APITestCase):
+    """Test cases for the cached public school configuration."""
+
+    def setUp(self):
+        school_config.clear()
+        cache.clear()
+        self.client = APIClient()
+        self.school = School.objects.create(name='Config High', email='office@example.com')
+        SchoolSetting.objects.create(school=self.school, key='primary_color', label='Primary', value='#ff0000')
+        SchoolSetting.objects.create(
+            school=self.school, key='brochure', label='Brochure', setting_type=SchoolSetting.SettingType.FILE,
+            file_data=b'x' * 4096, file_name='brochure.pdf'
+        )
+
+    def test_config_document(self):
+        response = self.client.get('/api/config/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['branding']['school_name'], 'Config High')
+        self.assertEqual(response.data['branding']['primary_color'], '#ff0000')
+        self.assertEqual(response.data['contact']['email'], 'office@example.com')
+        self.assertIn('public', response['Cache-Control'])
+        self.assertTrue(response.has_header('ETag'))
+
+    def test_blobs_are_not_loaded(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/config/')
+        self.assertEqual(len(queries), 2)
+        self.assertFalse(any('file_data' in query['sql'] for query in queries))
+
+    def test_cached_in_process(self):
+        self.client.get('/api/config/')
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/config/')
+        self.assertEqual(len(queries), 0)
+
+    def test_etag_returns_304(self):
+        etag = self.client.get('/api/config/')['ETag']
+        response = self.client.get('/api/config/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_setting_change_invalidates(self):
+        etag = self.client.get('/api/config/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            SchoolSetting.objects.filter(key='primary_color').get().delete()
+        response = self.client.get('/api/config/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['branding']['primary_color'], '#3b82f6')
+
+    def test_school_change_invalidates(self):
+        self.client.get('/api/config/')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.school.name = 'Renamed High'
+            self.school.save()
+        self.assertEqual(self.client.get('/api/config/').data['branding']['school_name'], 'Renamed High')
+
+    def test_defaults_without_school(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            School.objects.all().delete()
+        response = self.client.get('/api/config/')
+        self.assertEqual(response.data['branding']['school_name'], 'School Management System')
+
+    def test_build_racing_a_change_is_not_kept(self):
+        build = school_config.build_config
+
+        def build_then_change():
+            config = build()
+            # The change commits after the build read the database
+            with self.captureOnCommitCallbacks(execute=True):
+                self.school.name = 'Renamed High'
+                self.school.save()
+            return config
+
+        with mock.patch.object(school_config, 'build_config', build_then_change):
+            self.assertEqual(school_config.get_config()['config']['branding']['school_name'], 'Config High')
+        school_config._local.clear()
+        self.assertEqual(school_config.get_config()['config']['branding']['school_name'], 'Renamed High')
@@ -0,0 +1,236 @@
+import gzip
+import json
+from decimal import Decimal
+
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+
+from ..models import *
+from .. import notifications
+
+
+def read_snapshot(response, compressed=False):
+    """Collect a streamed snapshot response into a list of parsed lines."""
+    body = b''.join(response.streaming_content)
+    if compressed:
+        body = gzip.decompress(body)
+    return [json.loads(line) for line in body.decode('utf-8').splitlines()]
+
+
+def table_rows(lines, table):
+    """Return (header, rows, footer) for one table of a parsed snapshot."""
+    start = next(i for i, line in enumerate(lines) if isinstance(line, dict) and line.get('table') == table)
+    header = lines[start]
+    rows = []
+    for line in lines[start + 1:]:
+        if isinstance(line, dict):
+            return header, rows, line
+        rows.append(dict(zip(header['fields'], line)))
+    raise AssertionError(f'No footer for table {table}')
+
+
+class SnapshotExportTest(APITestCase):
+    """Test cases for the streaming NDJSON snapshot export."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_user(
+            username='snapshot_admin', password='pass', role=User.Role.PRINCIPAL, is_staff=True
+        )
+        self.client.force_authenticate(user=self.admin)
+        student_user = User.objects.create_user(username='snapshot_student', password='pass')
+        self.student = Student.objects.create(user=student_user)
+        self.fee = Fee.objects.create(
+            student=self.student, amount=Decimal('2500.00'),
+            due_date=timezone.now().date() + timezone.timedelta(days=30)
+        )
+
+    def test_streams_ndjson(self):
+        response = self.client.get('/api/snapshot/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+
+        lines = read_snapshot(response)
+        self.assertEqual(lines[0]['type'], 'snapshot')
+        self.assertIn('fees', lines[0]['tables'])
+
+        header, rows, footer = table_rows(lines, 'fees')
+        self.assertEqual(header['model'], 'api.fee')
+        self.assertEqual(footer['rows'], 1)
+        self.assertEqual(rows[0]['student_id'], self.student.pk)
+        self.assertEqual(rows[0]['amount'], '2500.00')
+
+    def test_tables_filter(self):
+        lines = read_snapshot(self.client.get('/api/snapshot/?tables=students,fees'))
+        self.assertEqual(lines[0]['tables'], ['students', 'fees'])
+        exported = [line['table'] for line in lines if isinstance(line, dict) and line['type'] == 'table']
+        self.assertEqual(exported, ['students', 'fees'])
+
+    def test_since_filter(self):
+        Fee.objects.filter(pk=self.fee.pk).update(updated_at=timezone.now() - timezone.timedelta(days=10))
+        recent = Fee.objects.create(
+            student=self.student, amount=Decimal('100.00'),
+            due_date=timezone.now().date() + timezone.timedelta(days=5)
+        )
+        since = (timezone.now() - timezone.timedelta(days=1)).date().isoformat()
+
+        header, rows, _ = table_rows(read_snapshot(self.client.get(f'/api/snapshot/?tables=fees&since={since}')), 'fees')
+        self.assertTrue(header['incremental'])
+        self.assertEqual([row['id'] for row in rows], [recent.pk])
+
+    def test_since_includes_later_changes(self):
+        old = timezone.now() - timezone.timedelta(days=10)
+        changed = Payment.objects.create(fee=self.fee, amount=Decimal('100.00'), status=Payment.Status.COMPLETED)
+        untouched = Payment.objects.create(fee=self.fee, amount=Decimal('50.00'), status=Payment.Status.COMPLETED)
+        note = Notification.objects.create(user=self.student.user, title='Old', message='Unread')
+        Payment.objects.filter(pk__in=[changed.pk, untouched.pk]).update(payment_date=old, updated_at=old)
+        Notification.objects.filter(pk=note.pk).update(created_at=old, updated_at=old)
+
+        # A refund and a mark-read long after the rows were created
+        changed.status = Payment.Status.REFUNDED
+        changed.save()
+        notifications.mark_read(self.student.user.pk)
+
+        since = (timezone.now() - timezone.timedelta(days=1)).date().isoformat()
+        lines = read_snapshot(self.client.get(f'/api/snapshot/?tables=payments,notifications&since={since}'))
+        _, payments, _ = table_rows(lines, 'payments')
+        self.assertEqual([(row['id'], row['status']) for row in payments], [(changed.pk, 'refunded')])
+        _, rows, _ = table_rows(lines, 'notifications')
+        self.assertEqual([(row['id'], row['is_read']) for row in rows], [(note.pk, True)])
+
+    def test_gzip(self):
+        response = self.client.get('/api/snapshot/?tables=fees&compress=gzip')
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertIn('.ndjson.gz', response['Content-Disposition'])
+        _, rows, _ = table_rows(read_snapshot(response, compressed=True), 'fees')
+        self.assertEqual(len(rows), 1)
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.client.get('/api/snapshot/?tables=nope').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get('/api/snapshot/?since=yesterday').status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_requires_admin(self):
+        self.client.force_authenticate(user=self.student.user)
+        self.assertEqual(self.client.get('/api/snapshot/').status_code, status.HTTP_403_FORBIDDEN)
+
+
+class SnapshotImportTest(APITestCase):
+    """Test cases for restoring NDJSON snapshots."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_user(
+            username='restore_admin', password='pass', role=User.Role.PRINCIPAL, is_staff=True
+        )
+        self.client.force_authenticate(user=self.admin)
+        self.school_class = SchoolClass.objects.create(name='Grade 9')
+        student_user = User.objects.create_user(username='restore_student', password='pass')
+        self.student = Student.objects.create(user=student_user, school_class=self.school_class)
+        self.fee = Fee.objects.create(
+            student=self.student, amount=Decimal('2000.00'),
+            due_date=timezone.now().date() + timezone.timedelta(days=30)
+        )
+        Payment.objects.create(fee=self.fee, amount=Decimal('500.00'), status=Payment.Status.COMPLETED)
+        self.created_at = timezone.now() - timezone.timedelta(days=40)
+        Fee.objects.filter(pk=self.fee.pk).update(created_at=self.created_at)
+
+    def export(self, tables='users,school_classes,students,fees,payments'):
+        return b''.join(self.client.get(f'/api/snapshot/?tables={tables}').streaming_content)
+
+    def wipe(self):
+        User.objects.exclude(pk=self.admin.pk).delete()
+        SchoolClass.objects.all().delete()
+
+    def restore(self, body, params='', content_type='application/x-ndjson'):
+        return self.client.generic('POST', f'/api/snapshot/{params}', body, content_type=content_type)
+
+    def test_round_trip(self):
+        body = self.export()
+        self.wipe()
+        self.assertFalse(Fee.objects.exists())
+
+        response = self.restore(body, '?conflicts=skip')
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+
+        fee = Fee.objects.get(pk=self.fee.pk)
+        self.assertEqual(fee.student.school_class.name, 'Grade 9')
+        self.assertEqual(fee.created_at, self.created_at)
+        self.assertEqual(FeeLedger.objects.get(fee=fee).outstanding, Decimal('1500.00'))
+
+        tables = {row['table']: row for row in response.data['tables']}
+        self.assertEqual(tables['users']['rows'], 2)
+        self.assertEqual(tables['users']['written'], 1)
+        self.assertEqual(tables['payments']['rows'], 1)
+        self.assertIn('rows_per_second', response.data)
+
+        # Restored primary keys must not collide with new rows
+        new_fee = Fee.objects.create(student=fee.student, amount=Decimal('10.00'), due_date=fee.due_date)
+        self.assertGreater(new_fee.pk, fee.pk)
+
+    def test_restore_rebuilds_rollups_and_stats(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Attendance.objects.create(student=self.student, date=timezone.localdate(), status=Attendance.Status.PRESENT)
+        body = self.export('users,school_classes,students,attendances')
+        self.wipe()
+        LibraryStats.objects.all().delete()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.restore(body, '?conflicts=skip')
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertEqual(StudentMonthlyAttendance.objects.get(student=self.student.pk).present, 1)
+        self.assertEqual(ClassMonthlyAttendance.objects.get(school_class=self.school_class.pk).present, 1)
+        # The stats refresh runs once the restore commits
+        self.assertTrue(LibraryStats.objects.filter(student=self.student.pk).exists())
+
+    def test_dry_run_rolls_back(self):
+        body = self.export()
+        self.wipe()
+        response = self.restore(body, '?conflicts=skip&dry_run=true')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['dry_run'])
+        self.assertEqual(response.data['total_rows'], 6)
+        self.assertFalse(Fee.objects.exists())
+
+    def test_gzip_upload(self):
+        body = b''.join(self.client.get('/api/snapshot/?tables=school_classes&compress=gzip').streaming_content)
+        self.wipe()
+        response = self.restore(body, content_type='application/gzip')
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertTrue(SchoolClass.objects.filter(name='Grade 9').exists())
+
+    def test_conflicts(self):
+        body = self.export('school_classes')
+        self.assertEqual(self.restore(body).status_code, status.HTTP_409_CONFLICT)
+
+        SchoolClass.objects.filter(pk=self.school_class.pk).update(name='Renamed')
+        response = self.restore(body, '?conflicts=update')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(SchoolClass.objects.get(pk=self.school_class.pk).name, 'Grade 9')
+
+    def test_tables_out_of_dependency_order(self):
+        lines = self.export('school_classes,students').decode().splitlines()
+        header, rest = lines[0], lines[1:]
+        classes_end = next(i for i, line in enumerate(rest) if '"type":"end"' in line) + 1
+        reordered = '\n'.join([header] + rest[classes_end:] + rest[:classes_end]).encode()
+        Student.objects.all().delete()
+        SchoolClass.objects.all().delete()
+
+        response = self.restore(reordered)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertEqual([row['table'] for row in response.data['tables']], ['school_classes', 'students'])
+        self.assertEqual(Student.objects.get().school_class.name, 'Grade 9')
+
+    def test_truncated_snapshot_is_rejected(self):
+        lines = self.export('school_classes').decode().splitlines()
+        SchoolClass.objects.all().delete()
+        response = self.restore('\n'.join(lines[:-1]).encode())
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(SchoolClass.objects.exists())
+
+    def test_dependency_order(self):
+        from ..snapshots import dependency_order, SNAPSHOT_TABLES
+        order = dependency_order(['payments', 'fees', 'students', 'users', 'school_classes'])
+        self.assertEqual(order, ['users', 'school_classes', 'students', 'fees', 'payments'])
+        self.assertEqual(dependency_order(list(SNAPSHOT_TABLES)), list(SNAPSHOT_TABLES))
@@ -0,0 +1,128 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from ..models import *
+from .. import stats
+
+
+class StatsRefreshTest(TestCase):
+    """Test cases for the precomputed dashboard stats."""
+
+    def setUp(self):
+        self.teacher_user = User.objects.create_user(username='stats_teacher', password='pass', role=User.Role.TEACHER)
+        self.teacher = Teacher.objects.create(user=self.teacher_user)
+        self.school_class = SchoolClass.objects.create(name='Grade 5', teacher=self.teacher_user)
+        self.students = [
+            Student.objects.create(
+                user=User.objects.create_user(username=f'stats_student_{i}', password='pass'),
+                school_class=self.school_class
+            )
+            for i in range(3)
+        ]
+        self.today = timezone.localdate()
+        self.assignment = Assignment.objects.create(
+            title='Project', due_date=self.today, school_class=self.school_class, teacher=self.teacher
+        )
+
+    def test_attendance_stats(self):
+        yesterday = self.today - timezone.timedelta(days=1)
+        Attendance.objects.create(student=self.students[0], date=self.today, status='present')
+        Attendance.objects.create(student=self.students[1], date=self.today, status='late')
+        Attendance.objects.create(student=self.students[2], date=self.today, status='absent')
+        Attendance.objects.create(student=self.students[0], date=yesterday, status='absent')
+
+        stats.refresh_all(['attendance'])
+        row = TeacherAttendanceStats.objects.get(teacher=self.teacher)
+        self.assertEqual((row.present_today, row.late_today, row.absent_today), (1, 1, 1))
+        self.assertEqual(row.today_attendance_rate, Decimal('66.67'))
+        self.assertEqual(row.overall_attendance_rate, Decimal('50.00'))
+
+    def test_assignment_grade_and_reimbursement_stats(self):
+        AssignmentSubmission.objects.create(assignment=self.assignment, student=self.students[0])
+        AssignmentSubmission.objects.create(
+            assignment=self.assignment, student=self.students[1], grade=80, graded_at=timezone.now(),
+            status=AssignmentSubmission.Status.GRADED
+        )
+        AssignmentSubmission.objects.create(
+            assignment=self.assignment, student=self.students[2], grade=90, status=AssignmentSubmission.Status.LATE
+        )
+        reimbursement_type = ReimbursementType.objects.create(name='Travel')
+        for amount, state in (('100.00', 'pending'), ('250.00', 'approved'), ('50.00', 'paid')):
+            Reimbursement.objects.create(
+                teacher=self.teacher, reimbursement_type=reimbursement_type,
+                amount=Decimal(amount), description='Trip', status=state
+            )
+
+        stats.refresh_all(['assignments', 'grades', 'reimbursements'])
+        assignments = TeacherAssignmentStats.objects.get(teacher=self.teacher)
+        self.assertEqual((assignments.total_assignments, assignments.pending_submissions, assignments.graded_assignments),
+                         (1, 1, 2))
+        grades = TeacherGradeStats.objects.get(teacher=self.teacher)
+        self.assertEqual((grades.pending_grades, grades.graded_today, grades.late_submissions), (1, 1, 1))
+        self.assertEqual(grades.average_grade, Decimal('85.00'))
+        money = TeacherReimbursementStats.objects.get(teacher=self.teacher)
+        self.assertEqual(money.total_requested, Decimal('400.00'))
+        self.assertEqual(money.pending_approval, Decimal('100.00'))
+        self.assertEqual(money.approved_amount, Decimal('250.00'))
+        self.assertEqual(money.paid_amount, Decimal('50.00'))
+
+    def test_class_ranks_use_window(self):
+        other = Assignment.objects.create(
+            title='Quiz', due_date=self.today, school_class=self.school_class, teacher=self.teacher
+        )
+        for student, scores in zip(self.students[:2], ((70, 90), (95, 85))):
+            Grade.objects.create(student=student, assignment=self.assignment, score=scores[0])
+            Grade.objects.create(student=student, assignment=other, score=scores[1])
+
+        stats.refresh_class_ranks()
+        ranks = dict(StudentClassRank.objects.values_list('student', 'rank'))
+        self.assertEqual(ranks, {self.students[1].pk: 1, self.students[0].pk: 2, self.students[2].pk: 3})
+        self.assertEqual(set(StudentClassRank.objects.values_list('total_students', flat=True)), {3})
+
+    def test_refresh_query_count_is_constant(self):
+        def refresh():
+            with CaptureQueriesContext(connection) as queries:
+                stats.refresh_all()
+            return len(queries)
+
+        small = refresh()
+        for i in range(5):
+            user = User.objects.create_user(username=f'stats_extra_{i}', password='pass', role=User.Role.TEACHER)
+            Teacher.objects.create(user=user)
+            Student.objects.create(
+                user=User.objects.create_user(username=f'stats_extra_student_{i}', password='pass'),
+                school_class=self.school_class
+            )
+        self.assertEqual(refresh(), small)
+        self.assertEqual(LibraryStats.objects.count(), 8)
+
+    def test_incremental_refresh_on_write(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Attendance.objects.create(student=self.students[0], date=self.today, status='present')
+        self.assertEqual(TeacherAttendanceStats.objects.get(teacher=self.teacher).present_today, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Grade.objects.create(student=self.students[2], assignment=self.assignment, score=99)
+        self.assertEqual(StudentClassRank.objects.get(student=self.students[2]).rank, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            AssignmentSubmission.objects.create(assignment=self.assignment, student=self.students[1])
+        self.assertEqual(TeacherGradeStats.objects.get(teacher=self.teacher).pending_grades, 1)
+
+    def test_incremental_refresh_can_be_disabled(self):
+        with self.settings(STATS_REFRESH_ON_WRITE=False), self.captureOnCommitCallbacks(execute=True):
+            Attendance.objects.create(student=self.students[0], date=self.today, status='present')
+        self.assertFalse(TeacherAttendanceStats.objects.exists())
+
+    def test_command(self):
+        out = StringIO()
+        call_command('refresh_stats', '--only', 'ranks,library', stdout=out)
+        self.assertIn('ranks: 3 rows', out.getvalue())
+        self.assertEqual(StudentClassRank.objects.count(), 3)
+        self.assertFalse(TeacherAttendanceStats.objects.exists())
@@ -0,0 +1,151 @@
+from datetime import datetime, time
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+
+from ..models import *
+from .. import dashboard
+
+
+class StudentDashboardTest(APITestCase):
+    """Test cases for the computed and cached student dashboard."""
+
+    url = '/api/student/dashboard/'
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.teacher_user = User.objects.create_user(
+            username='dash_teacher', password='pass', role=User.Role.TEACHER, first_name='Ada', last_name='Lovelace'
+        )
+        self.teacher = Teacher.objects.create(user=self.teacher_user)
+        self.school_class = SchoolClass.objects.create(name='Grade 4')
+        self.student_user = User.objects.create_user(username='dash_student', password='pass', role=User.Role.STUDENT)
+        self.student = Student.objects.create(user=self.student_user, school_class=self.school_class)
+        self.today = timezone.localdate()
+        self.client.force_authenticate(user=self.student_user)
+
+    def add_assignment(self, title, days_until_due=7):
+        return Assignment.objects.create(
+            title=title, due_date=self.today + timezone.timedelta(days=days_until_due),
+            school_class=self.school_class, teacher=self.teacher
+        )
+
+    def fetch(self):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, len(queries)
+
+    def test_real_stats(self):
+        first, second = self.add_assignment('Essay'), self.add_assignment('Lab')
+        self.add_assignment('Old', days_until_due=-3)
+        AssignmentSubmission.objects.create(assignment=first, student=self.student)
+        Grade.objects.create(student=self.student, assignment=first, score=95)
+        Grade.objects.create(student=self.student, assignment=second, score=85)
+        for offset, state in ((1, 'present'), (2, 'late'), (3, 'absent'), (4, 'present')):
+            Attendance.objects.create(student=self.student, date=self.today - timezone.timedelta(days=offset), status=state)
+
+        stats = self.fetch()[0].data['stats']
+        self.assertEqual(stats['attendanceRate'], 75.0)
+        self.assertEqual(stats['currentGPA'], 3.5)
+        self.assertEqual(stats['currentGrade'], 'A-')
+        self.assertEqual(stats['completedAssignments'], 1)
+        self.assertEqual(stats['totalAssignments'], 3)
+        self.assertEqual(stats['upcomingDeadlines'], 1)
+
+    def test_subjects(self):
+        Period.objects.create(period_number=1, start_time=time(9, 0), end_time=time(9, 45))
+        for day in ('MON', 'WED'):
+            Timetable.objects.create(
+                school_class=self.school_class, day_of_week=day, start_time=time(9, 0), end_time=time(9, 45),
+                subject='Mathematics', teacher=self.teacher
+            )
+        assignment = self.add_assignment('Algebra')
+        Grade.objects.create(student=self.student, assignment=assignment, score=88)
+        monday = self.today - timezone.timedelta(days=self.today.weekday() + 7)
+        Attendance.objects.create(student=self.student, date=monday, status='present')
+        Attendance.objects.create(student=self.student, date=monday + timezone.timedelta(days=2), status='absent')
+        Attendance.objects.create(student=self.student, date=monday + timezone.timedelta(days=1), status='absent')
+
+        response = self.fetch()[0]
+        subject = response.data['subjects'][0]
+        self.assertEqual(subject['name'], 'Mathematics')
+        self.assertEqual(subject['teacher'], 'Ada Lovelace')
+        self.assertEqual(subject['grade'], 'B+')
+        self.assertEqual(subject['attendance'], 50.0)
+        self.assertIn('9:00 AM (Period 1)', subject['nextClass'])
+        self.assertEqual([entry['day_of_week'] for entry in response.data['schedule']], ['MON', 'WED'])
+
+    def test_query_count_is_constant(self):
+        _, empty = self.fetch()
+        for i in range(5):
+            assignment = self.add_assignment(f'Assignment {i}')
+            Grade.objects.create(student=self.student, assignment=assignment, score=70 + i)
+            AssignmentSubmission.objects.create(assignment=assignment, student=self.student)
+            Attendance.objects.create(student=self.student, date=self.today - timezone.timedelta(days=i), status='present')
+            Timetable.objects.create(
+                school_class=self.school_class, day_of_week='TUE', start_time=time(10 + i, 0),
+                end_time=time(10 + i, 45), subject=f'Subject {i}', teacher=self.teacher
+            )
+        _, full = self.fetch()
+        self.assertEqual(empty, full)
+
+    def test_cached_until_student_data_changes(self):
+        assignment = self.add_assignment('Essay')
+        self.assertEqual(self.client.get(self.url).data['stats']['currentGrade'], 'N/A')
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url)
+        self.assertEqual(len(queries), 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Grade.objects.create(student=self.student, assignment=assignment, score=91)
+        self.assertEqual(self.client.get(self.url).data['stats']['currentGrade'], 'A-')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Attendance.objects.create(student=self.student, date=self.today, status='absent')
+        self.assertEqual(self.client.get(self.url).data['stats']['attendanceRate'], 0.0)
+
+    def test_time_dependent_fields_follow_the_clock(self):
+        self.add_assignment('Essay', days_until_due=1)
+        Timetable.objects.create(
+            school_class=self.school_class, day_of_week='MON', start_time=time(9, 0), end_time=time(9, 45),
+            subject='Mathematics', teacher=self.teacher
+        )
+        monday = self.today - timezone.timedelta(days=self.today.weekday())
+        before_class = timezone.make_aware(datetime.combine(monday, time(8, 0)))
+        with mock.patch.object(dashboard.timezone, 'localtime', return_value=before_class):
+            response = self.client.get(self.url)
+        self.assertEqual(response.data['subjects'][0]['nextClass'], 'Today 9:00 AM')
+
+        # Served from the cache, but computed for the time of the request
+        later = before_class.replace(hour=10) + timezone.timedelta(days=(self.today - monday).days + 2)
+        with mock.patch.object(dashboard.timezone, 'localtime', return_value=later), \
+                CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(response.data['stats']['upcomingDeadlines'], 0)
+        self.assertNotEqual(response.data['subjects'][0]['nextClass'], 'Today 9:00 AM')
+
+    def test_class_changes_invalidate(self):
+        self.assertEqual(self.client.get(self.url).data['stats']['totalAssignments'], 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.add_assignment('Essay')
+        self.assertEqual(self.client.get(self.url).data['stats']['totalAssignments'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Timetable.objects.create(
+                school_class=self.school_class, day_of_week='FRI', start_time=time(8, 0), end_time=time(8, 45),
+                subject='Art', teacher=self.teacher
+            )
+        self.assertEqual(len(self.client.get(self.url).data['schedule']), 1)
+
+    def test_requires_student(self):
+        self.client.force_authenticate(user=self.teacher_user)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,114 @@
+from datetime import time
+from io import StringIO
+
+from django.core.management import call_command
+from django.db.models import Count
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+
+from ..models import *
+from .. import timetable
+
+
+class TimetableTestCase(APITestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.principal = User.objects.create_user(username='tt_principal', password='pass', role=User.Role.PRINCIPAL)
+        self.client.force_authenticate(user=self.principal)
+        self.classes = [SchoolClass.objects.create(name=f'TT Class {i}') for i in range(3)]
+        self.teachers = []
+        for i, subject in enumerate(['Mathematics', 'Mathematics', 'English', 'History']):
+            user = User.objects.create_user(username=f'tt_teacher_{i}', password='pass', role=User.Role.TEACHER)
+            UserProfile.objects.create(user=user, subject=subject)
+            self.teachers.append(Teacher.objects.create(user=user))
+        self.periods = [
+            Period.objects.create(period_number=number, start_time=time(8 + number), end_time=time(8 + number, 50))
+            for number in (1, 2, 3)
+        ]
+
+    def book(self, school_class, teacher, day='MON', start=time(9), end=time(9, 50)):
+        return Timetable.objects.create(school_class=school_class, teacher=teacher, day_of_week=day,
+                                        start_time=start, end_time=end, subject='Mathematics')
+
+
+class ClashDetectionTest(TimetableTestCase):
+    """Test cases for timetable clash detection."""
+
+    def test_slot_matrix(self):
+        entry = self.book(self.classes[0], self.teachers[0])
+        matrix = timetable.SlotMatrix.load()
+
+        clashes = matrix.clashes(self.classes[1].pk, self.teachers[0].pk, 'MON', time(9), time(9, 50))
+        self.assertEqual([(clash.kind, clash.entry_id) for clash in clashes], [('teacher', entry.pk)])
+        # Overlapping without sharing a start time
+        clashes = matrix.clashes(self.classes[0].pk, None, 'MON', time(9, 30), time(10, 20))
+        self.assertEqual([clash.kind for clash in clashes], ['class'])
+        self.assertEqual(matrix.clashes(self.classes[0].pk, self.teachers[0].pk, 'MON', time(9), time(9, 50),
+                                        exclude=entry.pk), [])
+        self.assertTrue(matrix.is_free(self.classes[0].pk, self.teachers[0].pk, 'TUE', time(9), time(9, 50)))
+
+    def test_single_check_is_one_query(self):
+        self.book(self.classes[0], self.teachers[0])
+        with self.assertNumQueries(1):
+            clashes = timetable.find_clashes(self.classes[1].pk, self.teachers[0].pk, 'MON', time(9), time(9, 50))
+        self.assertEqual(len(clashes), 1)
+
+    def test_api_rejects_double_booking(self):
+        entry = self.book(self.classes[0], self.teachers[0])
+        data = {'school_class': self.classes[1].pk, 'teacher_id': self.teachers[0].pk, 'day_of_week': 'MON',
+                'start_time': '09:15', 'end_time': '10:00', 'subject': 'Mathematics'}
+        response = self.client.post('/api/timetable/', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('Teacher', response.data['non_field_errors'][0])
+
+        data['teacher_id'] = self.teachers[1].pk
+        response = self.client.post('/api/timetable/', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Timetable.objects.get(pk=response.data['id']).teacher, self.teachers[1])
+
+        # Updating an entry does not clash with itself
+        response = self.client.patch(f'/api/timetable/{entry.pk}/', {'end_time': '09:10'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class TimetableGeneratorTest(TimetableTestCase):
+    """Test cases for generating the school's week."""
+
+    def assert_no_double_booking(self):
+        for field in ('school_class', 'teacher'):
+            doubled = Timetable.objects.values(field, 'day_of_week', 'start_time').annotate(
+                n=Count('id')).filter(n__gt=1)
+            self.assertFalse(doubled.exists(), field)
+
+    def test_generate_week(self):
+        week = timetable.generate_week()
+        # Three classes, three periods, five days, and never more than one teacher per subject per slot
+        self.assertEqual(len(week.entries), 45)
+        self.assertEqual(week.unfilled, [])
+        self.assert_no_double_booking()
+        self.assertEqual(WeeklyTimetable.objects.count(), 45)
+        for school_class in self.classes:
+            subjects = set(Timetable.objects.filter(school_class=school_class, day_of_week='MON')
+                           .values_list('subject', flat=True))
+            self.assertEqual(subjects, {'Mathematics', 'English', 'History'})
+
+    def test_keep_existing(self):
+        self.book(self.classes[0], self.teachers[2], start=time(9), end=time(9, 50))
+        week = timetable.generate_week(replace=False)
+        self.assertEqual(len(week.entries), 44)
+        self.assert_no_double_booking()
+
+    def test_command_and_endpoint(self):
+        out = StringIO()
+        call_command('generate_timetable', '--dry-run', stdout=out)
+        self.assertIn('Planned 45 entries', out.getvalue())
+        self.assertFalse(Timetable.objects.exists())
+
+        response = self.client.post('/api/timetable/generate/', {'classes': [self.classes[0].pk]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual((response.data['created'], response.data['classes']), (15, 1))
+
+        self.client.force_authenticate(user=self.teachers[0].user)
+        response = self.client.post('/api/timetable/generate/', {}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,70 @@
+from datetime import time
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+
+from ..models import *
+
+
+class TimetableOverviewTest(APITestCase):
+    """Test cases for the timetable overview."""
+
+    url = '/api/timetable/overview/'
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.principal = User.objects.create_user(username='overview_principal', password='pass',
+                                                  role=User.Role.PRINCIPAL)
+        self.client.force_authenticate(user=self.principal)
+        self.teachers = []
+        for i in range(3):
+            user = User.objects.create_user(username=f'overview_teacher_{i}', password='pass',
+                                            first_name='Teacher', last_name=str(i), role=User.Role.TEACHER)
+            self.teachers.append(Teacher.objects.create(user=user))
+
+    def add_classes(self, count):
+        for _ in range(count):
+            school_class = SchoolClass.objects.create(name=f'Overview Class {SchoolClass.objects.count()}')
+            for hour, teacher in zip((8, 9, 10), self.teachers):
+                Timetable.objects.create(school_class=school_class, teacher=teacher, day_of_week='MON',
+                                         start_time=time(hour), end_time=time(hour, 50), subject=f'Subject {hour}')
+        cache.clear()
+
+    def test_overview(self):
+        self.add_classes(2)
+        SchoolClass.objects.create(name='Empty Class')
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data['total_classes'], response.data['total_timetable_entries']), (3, 6))
+        first = response.data['classes_overview'][0]
+        self.assertEqual((first['total_slots'], first['unique_subjects'], first['unique_teachers']), (3, 3, 3))
+        self.assertEqual(first['teachers_list'], ['Teacher 0', 'Teacher 1', 'Teacher 2'])
+        self.assertEqual(response.data['classes_overview'][2]['total_slots'], 0)
+
+    def test_query_count_is_flat(self):
+        counts = []
+        for added in (2, 38):
+            self.add_classes(added)
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(self.url)
+            self.assertEqual(response['X-Cache'], 'MISS')
+            counts.append(len(queries))
+        self.assertEqual(response.data['total_classes'], 40)
+        self.assertEqual(counts[0], counts[1])
+
+    def test_cached_until_the_timetable_changes(self):
+        self.add_classes(1)
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual((response['X-Cache'], len(queries)), ('HIT', 0))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Timetable.objects.filter(subject='Subject 8').delete()
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['total_timetable_entries'], 2)
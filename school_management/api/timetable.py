@@ -0,0 +1,241 @@
+"""
+Timetable slot matrix, clash detection and week generator.
+
+``SlotMatrix`` holds the booked slots of ``Timetable`` as two maps, class x
+day and teacher x day, each from a slot's start time to its end time and
+entry. It is loaded with one query (for a single write, only the class's and
+teacher's rows for that day, which the ``(school_class, day_of_week)`` and
+``(teacher, day_of_week)`` indexes serve). A clash check is a dictionary
+lookup for the slot's start time followed by an overlap test against that
+day's handful of slots, so it never rescans the table.
+
+``generate_week`` fills every class's week from the ``Period`` rows, the
+classes and the teachers' subjects (``UserProfile.subject``), never booking a
+class or a teacher twice in one slot, and writes ``Timetable`` and
+``WeeklyTimetable`` rows in bulk.
+"""
+import logging
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+
+from django.db import transaction
+from django.db.models import Q
+
+from . import response_cache
+from .models import Period, SchoolClass, Teacher, Timetable, WeeklyTimetable
+
+logger = logging.getLogger('api.timetable')
+
+BATCH_SIZE = 1000
+# WeeklyTimetable spells days out; Timetable uses three-letter codes
+WEEKLY_DAYS = dict(zip(Timetable.Day.values, ['monday', 'tuesday', 'wednesday', 'thursday', 'friday']))
+
+
+class TimetableError(ValueError):
+    """The timetable cannot be generated from the current data."""
+
+
+@dataclass
+class Clash:
+    kind: str  # 'class' or 'teacher'
+    owner_id: int
+    entry_id: int
+    day: str
+    start_time: object
+    end_time: object
+
+    def message(self):
+        owner = 'Class' if self.kind == 'class' else 'Teacher'
+        return (f"{owner} {self.owner_id} is already booked on {self.day} "
+                f"{self.start_time:%H:%M}-{self.end_time:%H:%M} (entry {self.entry_id})")
+
+
+@dataclass
+class SlotMatrix:
+    """Booked slots per (class, day) and (teacher, day): ``{start_time: (end_time, entry_id)}``."""
+    classes: dict = field(default_factory=lambda: defaultdict(dict))
+    teachers: dict = field(default_factory=lambda: defaultdict(dict))
+
+    @classmethod
+    def load(cls, queryset=None):
+        matrix = cls()
+        queryset = Timetable.objects.all() if queryset is None else queryset
+        for pk, class_id, teacher_id, day, start, end in queryset.values_list(
+            'pk', 'school_class', 'teacher', 'day_of_week', 'start_time', 'end_time'
+        ):
+            matrix.add(class_id, teacher_id, day, start, end, pk)
+        return matrix
+
+    @classmethod
+    def for_entry(cls, class_id, teacher_id, day):
+        """Only the rows an entry for ``class_id``/``teacher_id`` on ``day`` can clash with."""
+        owners = Q(school_class=class_id)
+        if teacher_id is not None:
+            owners |= Q(teacher=teacher_id)
+        return cls.load(Timetable.objects.filter(owners, day_of_week=day))
+
+    def add(self, class_id, teacher_id, day, start, end, entry_id=None):
+        self.classes[(class_id, day)][start] = (end, entry_id)
+        if teacher_id is not None:
+            self.teachers[(teacher_id, day)][start] = (end, entry_id)
+
+    def booked(self, slots, start, end, exclude=None):
+        """The ``(start, end, entry_id)`` in ``slots`` overlapping ``start``..``end``, or None."""
+        def counts(entry_id):
+            return exclude is None or entry_id != exclude
+
+        # Slots aligned to periods share start times: a dictionary hit in the common case
+        if start in slots and counts(slots[start][1]):
+            return (start, *slots[start])
+        for other_start, (other_end, entry_id) in slots.items():
+            if counts(entry_id) and other_start < end and start < other_end:
+                return other_start, other_end, entry_id
+        return None
+
+    def clashes(self, class_id, teacher_id, day, start, end, exclude=None):
+        """Clashes of a prospective entry; ``exclude`` is the entry being updated."""
+        found = []
+        for kind, owner_id, index in (('class', class_id, self.classes), ('teacher', teacher_id, self.teachers)):
+            if owner_id is None:
+                continue
+            booking = self.booked(index.get((owner_id, day), {}), start, end, exclude)
+            if booking is not None:
+                found.append(Clash(kind, owner_id, booking[2], day, booking[0], booking[1]))
+        return found
+
+    def is_free(self, class_id, teacher_id, day, start, end):
+        return not self.clashes(class_id, teacher_id, day, start, end)
+
+
+def find_clashes(class_id, teacher_id, day, start, end, exclude=None):
+    """Clashes of a single create or update, from one indexed query."""
+    return SlotMatrix.for_entry(class_id, teacher_id, day).clashes(class_id, teacher_id, day, start, end, exclude)
+
+
+@dataclass
+class GeneratedWeek:
+    entries: list
+    unfilled: list  # (class_id, day, period_number) slots no free teacher could take
+
+    def summary(self):
+        return {
+            'created': len(self.entries),
+            'unfilled': len(self.unfilled),
+            'classes': len({entry.school_class_id for entry in self.entries}),
+            'teacher_load': dict(Counter(entry.teacher_id for entry in self.entries)),
+        }
+
+
+def teacher_subjects(teachers=None):
+    """``{subject: [teacher_id, ...]}`` from the teachers' profiles."""
+    teachers = Teacher.objects.all() if teachers is None else teachers
+    subjects = defaultdict(list)
+    for teacher_id, subject in teachers.filter(
+        user__profile__subject__isnull=False
+    ).exclude(user__profile__subject='').values_list('pk', 'user__profile__subject').order_by('pk'):
+        subjects[subject].append(teacher_id)
+    return dict(subjects)
+
+
+def plan_week(classes, periods, subjects, matrix=None, days=Timetable.Day.values):
+    """
+    Assign a subject and a free teacher to every (class, day, period) slot.
+
+    A greedy constraint fill: each slot prefers the subject the class has had
+    least this week and not yet today, then the least loaded free teacher of
+    it. ``matrix`` holds slots that are already booked and is updated as the
+    plan is made. Returns a ``GeneratedWeek`` of unsaved entries.
+    """
+    matrix = SlotMatrix() if matrix is None else matrix
+    class_ids = [school_class.pk for school_class in classes]
+    weekly = {class_id: Counter() for class_id in class_ids}
+    load = Counter()
+    entries, unfilled = [], []
+
+    for day in days:
+        today = {class_id: set() for class_id in class_ids}
+        for index, period in enumerate(periods):
+            # Rotate the class order so no class always picks first
+            offset = index % len(class_ids) if class_ids else 0
+            for class_id in class_ids[offset:] + class_ids[:offset]:
+                if matrix.booked(matrix.classes.get((class_id, day), {}), period.start_time, period.end_time):
+                    # Kept from the existing timetable
+                    continue
+                choice = None
+                for subject in sorted(subjects, key=lambda s: (s in today[class_id], weekly[class_id][s], s)):
+                    free = [
+                        teacher_id for teacher_id in subjects[subject]
+                        if matrix.is_free(class_id, teacher_id, day, period.start_time, period.end_time)
+                    ]
+                    if free:
+                        choice = subject, min(free, key=lambda teacher_id: (load[teacher_id], teacher_id))
+                        break
+                if choice is None:
+                    unfilled.append((class_id, day, period.period_number))
+                    continue
+                subject, teacher_id = choice
+                matrix.add(class_id, teacher_id, day, period.start_time, period.end_time)
+                weekly[class_id][subject] += 1
+                today[class_id].add(subject)
+                load[teacher_id] += 1
+                entries.append(Timetable(
+                    school_class_id=class_id, day_of_week=day, start_time=period.start_time,
+                    end_time=period.end_time, subject=subject, teacher_id=teacher_id,
+                ))
+    return GeneratedWeek(entries, unfilled)
+
+
+def generate_week(class_ids=None, replace=True, dry_run=False):
+    """
+    Generate the week for ``class_ids`` (default every class) and save it.
+
+    With ``replace`` the classes' current entries are dropped first;
+    otherwise they are kept and only free slots are filled. Both
+    ``Timetable`` and ``WeeklyTimetable`` rows are written.
+    """
+    periods = list(Period.objects.order_by('period_number'))
+    if not periods:
+        raise TimetableError('No periods are defined')
+    subjects = teacher_subjects()
+    if not subjects:
+        raise TimetableError('No teacher has a subject set in their profile')
+    classes = SchoolClass.objects.order_by('pk')
+    if class_ids is not None:
+        classes = classes.filter(pk__in=class_ids)
+    classes = list(classes)
+
+    with transaction.atomic():
+        existing = Timetable.objects.all()
+        if replace:
+            # Other classes' bookings still constrain the teachers
+            existing = existing.exclude(school_class__in=classes)
+        week = plan_week(classes, periods, subjects, SlotMatrix.load(existing))
+        if dry_run:
+            return week
+
+        if replace:
+            Timetable.objects.filter(school_class__in=classes).delete()
+            WeeklyTimetable.objects.filter(school_class__in=classes).delete()
+        Timetable.objects.bulk_create(week.entries, batch_size=BATCH_SIZE)
+        period_numbers = {period.start_time: period.period_number for period in periods}
+        WeeklyTimetable.objects.bulk_create(
+            [
+                WeeklyTimetable(
+                    school_class_id=entry.school_class_id, day_of_week=WEEKLY_DAYS[entry.day_of_week],
+                    period_number=period_numbers[entry.start_time], subject=entry.subject,
+                    teacher_id=entry.teacher_id, start_time=entry.start_time, end_time=entry.end_time,
+                )
+                for entry in week.entries
+            ],
+            batch_size=BATCH_SIZE, ignore_conflicts=True,
+        )
+
+        # bulk_create sends no signals. dashboard imports the serializers, which import this module
+        from . import dashboard
+
+        for school_class in classes:
+            dashboard.invalidate_class(school_class.pk)
+        response_cache.bump_versions([Timetable._meta.label, WeeklyTimetable._meta.label])
+    logger.info(f"Generated {len(week.entries)} timetable entries for {len(classes)} classes, "
+                f"{len(week.unfilled)} slots unfilled")
+    return week
@@ -71,17 +71,22 @@ urlpatterns = [
     path('auth/password-reset-confirm/', views.PasswordResetConfirmView.as_view(), name='password_reset_confirm'),
     path('config/', views.SchoolConfigView.as_view(), name='school_config'),
     path('snapshot/', DatabaseSnapshotView.as_view(), name='database_snapshot'),
+    path('metrics/', views.MetricsView.as_view(), name='metrics'),
+    path('files/<str:kind>/<int:pk>/', views.BlobDownloadView.as_view(), name='file_download'),
 
     # Fee Management Web Interface URLs
     path('fees/dashboard/', student_fee_dashboard, name='fee_student_dashboard'),
     path('fees/admin/', admin_fee_dashboard, name='fee_admin_dashboard'),
-    path('fees/', FeeListView.as_view(), name='fee_list'),
-    path('fees/add/', FeeCreateView.as_view(), name='fee_add'),
-    path('fees/<int:pk>/', FeeDetailView.as_view(), name='fee_detail'),
-    path('fees/<int:pk>/edit/', FeeUpdateView.as_view(), name='fee_edit'),
+    # List/detail pages live under manage/ so they do not shadow the fees API routes
+    path('fees/manage/', FeeListView.as_view(), name='fee_list'),
+    path('fees/manage/add/', FeeCreateView.as_view(), name='fee_add'),
+    path('fees/manage/<int:pk>/', FeeDetailView.as_view(), name='fee_detail'),
+    path('fees/manage/<int:pk>/edit/', FeeUpdateView.as_view(), name='fee_edit'),
     path('fees/<int:fee_id>/pay/', PaymentCreateView.as_view(), name='fee_pay'),
     path('fees/<int:fee_id>/discount/', apply_discount, name='fee_discount'),
     path('payments/<int:payment_id>/refund/', process_refund, name='payment_refund'),
 
+    # Before the router, whose notification detail route would match 'stream'
+    path('notifications/stream/', views.notification_stream, name='notification_stream'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -4,16 +4,22 @@ from rest_framework.permissions import IsAuthenticated, AllowAny, IsAdminUser
 from rest_framework.response import Response
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework_simplejwt.tokens import RefreshToken
-from django.http import HttpResponse
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
 from django.template.loader import render_to_string
-from django.db import models
-from django.db.models import Sum, Count, Avg, F, Q
+from django.db import models, transaction, IntegrityError
+from django.db.models import Sum, Count, Avg, F, Q, OuterRef, Subquery, Prefetch
+from django.db.models.functions import Coalesce
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 from django.views.decorators.cache import cache_page
 from django.utils.decorators import method_decorator
 from django.core.cache import cache
 from asgiref.sync import sync_to_async
 from datetime import timedelta
+from decimal import Decimal
 import asyncio
 import logging
 import json
@@ -21,6 +27,12 @@ from functools import wraps
 import stripe
 from .models import *
 from .serializers import *
+from . import attendance_rollups, blobstore, dashboard, downloads, ingest, jobs, metrics, notifications, ratelimit, report_catalog, report_renderers, school_config, snapshots, timetable
+from .response_cache import cached_response
+from .pagination import (
+    StudentPagination, AttendancePagination, PaymentPagination,
+    NotificationPagination, LeaveRequestPagination, ReportPagination,
+)
 from .forms import *
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
@@ -44,7 +56,7 @@ payment_logger = logging.getLogger('api.payment_processing')
 def require_fee_permission(view_func):
     """Decorator to check fee-related permissions."""
     @wraps(view_func)
-    def wrapper(request, *args, **kwargs):
+    def wrapper(view, request, *args, **kwargs):
         if not request.user.is_authenticated:
             raise PermissionDenied("Authentication required")
 
@@ -58,13 +70,13 @@ def require_fee_permission(view_func):
             except Fee.DoesNotExist:
                 raise PermissionDenied("Fee not found")
 
-        return view_func(request, *args, **kwargs)
+        return view_func(view, request, *args, **kwargs)
     return wrapper
 
 def require_payment_permission(view_func):
     """Decorator to check payment-related permissions."""
     @wraps(view_func)
-    def wrapper(request, *args, **kwargs):
+    def wrapper(view, request, *args, **kwargs):
         if not request.user.is_authenticated:
             raise PermissionDenied("Authentication required")
 
@@ -78,17 +90,17 @@ def require_payment_permission(view_func):
             except Payment.DoesNotExist:
                 raise PermissionDenied("Payment not found")
 
-        return view_func(request, *args, **kwargs)
+        return view_func(view, request, *args, **kwargs)
     return wrapper
 
 def audit_log(action):
     """Decorator to log audit events."""
     def decorator(view_func):
         @wraps(view_func)
-        def wrapper(request, *args, **kwargs):
+        def wrapper(view, request, *args, **kwargs):
             user = request.user.username if request.user.is_authenticated else 'Anonymous'
             audit_logger.info(f"AUDIT: {user} performed {action} - {request.method} {request.path}")
-            return view_func(request, *args, **kwargs)
+            return view_func(view, request, *args, **kwargs)
         return wrapper
     return decorator
 
@@ -102,36 +114,12 @@ class RateLimitMixin:
         Check if the request exceeds rate limit.
         Returns (is_allowed, remaining_attempts, reset_time)
         """
-        # Get client IP
-        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-        if x_forwarded_for:
-            ip = x_forwarded_for.split(',')[0]
-        else:
-            ip = request.META.get('REMOTE_ADDR')
-
-        cache_key = f"login_attempts_{ip}"
-        current_time = timezone.now().timestamp()
-
-        # Get existing attempts from cache
-        attempts_data = cache.get(cache_key, {'count': 0, 'first_attempt': current_time})
-
-        # Reset if window has passed
-        if current_time - attempts_data['first_attempt'] > window_seconds:
-            attempts_data = {'count': 0, 'first_attempt': current_time}
+        policy = ratelimit.RatePolicy('login', max_attempts, window_seconds)
+        result = ratelimit.hit(policy, self.get_client_ip(request))
+        return result.allowed, result.remaining, result.reset_time
 
-        # Check if limit exceeded
-        if attempts_data['count'] >= max_attempts:
-            reset_time = attempts_data['first_attempt'] + window_seconds
-            return False, 0, reset_time
-
-        # Increment attempts
-        attempts_data['count'] += 1
-        cache.set(cache_key, attempts_data, window_seconds)
-
-        remaining_attempts = max_attempts - attempts_data['count']
-        reset_time = attempts_data['first_attempt'] + window_seconds
-
-        return True, remaining_attempts, reset_time
+    def get_client_ip(self, request):
+        return ratelimit.client_ip(request)
 
 # === Public & Authentication Views ===
 
@@ -286,61 +274,21 @@ class SchoolConfigView(views.APIView):
 
     def get(self, request):
         try:
-            # Get the school (assuming single school setup)
-            school = School.objects.first()
-            if not school:
-                return Response({
-                    'login_methods': ['username', 'email'],
-                    'branding': {
-                        'school_name': 'School Management System',
-                        'logo_url': None,
-                        'primary_color': '#3b82f6',
-                        'secondary_color': '#64748b'
-                    },
-                    'features': {
-                        'remember_login': True,
-                        'password_reset': True,
-                        'rate_limiting': True
-                    }
-                })
-
-            # Get school settings
-            settings = SchoolSetting.objects.filter(school=school)
-            settings_dict = {setting.key: setting.value for setting in settings}
-
-            # Build configuration response
-            config = {
-                'login_methods': settings_dict.get('login_methods', 'username,email').split(','),
-                'branding': {
-                    'school_name': school.name,
-                    'logo_url': school.logo.url if school.logo else None,
-                    'primary_color': settings_dict.get('primary_color', '#3b82f6'),
-                    'secondary_color': settings_dict.get('secondary_color', '#64748b'),
-                    'school_timings': school.school_timings,
-                    'academic_year': school.academic_year
-                },
-                'features': {
-                    'remember_login': settings_dict.get('remember_login', 'true').lower() == 'true',
-                    'password_reset': settings_dict.get('password_reset', 'true').lower() == 'true',
-                    'rate_limiting': settings_dict.get('rate_limiting', 'true').lower() == 'true',
-                    'max_login_attempts': int(settings_dict.get('max_login_attempts', '5')),
-                    'login_window_seconds': int(settings_dict.get('login_window_seconds', '300'))
-                },
-                'contact': {
-                    'email': school.email,
-                    'phone': school.phone,
-                    'address': school.address,
-                    'website': school.website
-                }
-            }
-
-            return Response(config)
-
+            entry = school_config.get_config()
         except Exception as e:
             return Response({
                 'error': f'Failed to load configuration: {str(e)}'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+        if request.META.get('HTTP_IF_NONE_MATCH') == entry['etag']:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(entry['config'])
+        response['ETag'] = entry['etag']
+        # Public and anonymous, so shared caches may keep it; revalidation is a cheap 304
+        response['Cache-Control'] = school_config.cache_control()
+        return response
+
 # === Dashboard Stats Views ===
 
 class LibraryStatsViewSet(viewsets.ReadOnlyModelViewSet):
@@ -459,60 +407,13 @@ class StudentDashboardView(views.APIView):
         if user.role != User.Role.STUDENT:
             return Response({"error": "User is not a student"}, status=status.HTTP_403_FORBIDDEN)
 
-        try:
-            student = Student.objects.select_related('user').get(user=user)
-        except Student.DoesNotExist:
-            return Response({"error": "Student profile not found"}, status=status.HTTP_404_NOT_FOUND)
-
-        # Get attendance records
-        attendance_records = student.attendance_records.all()
-        total_days = attendance_records.count()
-        present_days = attendance_records.filter(
-            status__in=[Attendance.Status.PRESENT, Attendance.Status.LATE]
-        ).count()
-        attendance_rate = (present_days / total_days * 100) if total_days > 0 else 100
-
-        # Get schedule, grades, and assignments
-        schedule_data = Timetable.objects.filter(school_class=student.school_class)
-        grades_data = student.grades.all().order_by('-graded_date')
-        assignments_data = Assignment.objects.filter(school_class=student.school_class).order_by('due_date')
-
-        stats_data = {
-            "attendanceRate": round(attendance_rate, 1),
-            "currentGPA": 3.7,
-            "completedAssignments": 28,
-            "totalAssignments": 32,
-            "upcomingDeadlines": 5,
-            "currentGrade": "A-"
-        }
-
-        # Process subjects data
-        subjects_data = []
-        unique_subjects = set((entry.subject, entry.teacher_id) for entry in schedule_data)
-
-        # Batch fetch teachers
-        teacher_ids = [teacher_id for _, teacher_id in unique_subjects if teacher_id]
-        teachers = {teacher.user_id: teacher for teacher in Teacher.objects.filter(user_id__in=teacher_ids).select_related('user')}
-
-        for idx, (subject, teacher_id) in enumerate(unique_subjects):
-            teacher = teachers.get(teacher_id)
-            teacher_name = f"{teacher.user.first_name} {teacher.user.last_name}" if teacher else "Unknown"
-            subjects_data.append({
-                "id": idx + 1,
-                "name": subject,
-                "teacher": teacher_name,
-                "grade": "A-",
-                "attendance": 95,
-                "nextClass": "Tomorrow 9:00 AM"
-            })
-
-        payload = {
-            "stats": stats_data,
-            "subjects": subjects_data,
-            "assignments": AssignmentSerializer(assignments_data, many=True).data,
-            "schedule": TimetableSerializer(schedule_data, many=True).data,
-            "grades": GradeSerializer(grades_data, many=True).data,
-        }
+        payload = dashboard.get_cached_dashboard(user.pk)
+        if payload is None:
+            try:
+                student = Student.objects.get(user=user)
+            except Student.DoesNotExist:
+                return Response({"error": "Student profile not found"}, status=status.HTTP_404_NOT_FOUND)
+            payload, _ = dashboard.get_student_dashboard(student)
         return Response(payload)
 
 # === Admin Action Views ===
@@ -535,22 +436,69 @@ class AdminUserUpdateView(generics.GenericAPIView):
 class FeeActionsView(views.APIView):
     """Handles complex actions and reports related to fees."""
     permission_classes = [IsAdminUser]
+    BATCH_SIZE = 1000
+
     def post(self, request, *args, **kwargs):
         action = request.data.get("action")
         if action == "create_class_fee":
-            school_class = SchoolClass.objects.get(pk=request.data.get("class_id"))
-            count = 0
-            for student in school_class.students.all():
-                Fee.objects.create(student=student, amount=request.data.get("amount"), due_date=request.data.get("due_date"))
-                count += 1
-            return Response({"message": f"Fee created for {count} students in {school_class.name}."}, status=status.HTTP_201_CREATED)
+            return self.create_class_fee(request)
         elif action == "send_reminders":
-            count = 0
-            for fee in Fee.objects.filter(status__in=[Fee.Status.UNPAID, Fee.Status.PARTIAL]):
-                Notification.objects.create(user=fee.student.user, title="Fee Payment Reminder", message=f"Reminder: Fee of ${fee.amount} due on {fee.due_date}.")
-                count += 1
-            return Response({"message": f"{count} payment reminders sent."}, status=status.HTTP_200_OK)
+            return self.send_reminders(request)
         return Response({"error": "Invalid action."}, status=status.HTTP_400_BAD_REQUEST)
+
+    def create_class_fee(self, request):
+        """Assign one fee to every student in a class using batched inserts."""
+        serializer = ClassFeeActionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        school_class = serializer.validated_data['school_class']
+        amount = serializer.validated_data['amount']
+        due_date = serializer.validated_data['due_date']
+
+        student_ids = school_class.students.values_list('pk', flat=True)
+        try:
+            with transaction.atomic():
+                count = Fee.bulk_assign(student_ids, amount, due_date, batch_size=self.BATCH_SIZE)
+                AuditLog.objects.create(
+                    model_name='Fee',
+                    object_id=school_class.pk,
+                    user=request.user,
+                    action='bulk_create_class_fee',
+                    new_value=json.dumps({'count': count, 'amount': str(amount), 'due_date': str(due_date)}),
+                )
+        except ValidationError as e:
+            return Response({"error": e.messages}, status=status.HTTP_400_BAD_REQUEST)
+
+        audit_logger.info(
+            f"AUDIT: {request.user.username} created {count} fees of {amount} due {due_date} for class {school_class.name}"
+        )
+        return Response({"message": f"Fee created for {count} students in {school_class.name}."}, status=status.HTTP_201_CREATED)
+
+    def send_reminders(self, request):
+        """Queue a reminder notification for every unpaid or partially paid fee in batches."""
+        fees = Fee.objects.filter(
+            status__in=[Fee.Status.UNPAID, Fee.Status.PARTIAL]
+        ).order_by('pk').values_list('student__user_id', 'amount', 'due_date')
+
+        reminders = (
+            Notification(
+                user_id=user_id,
+                title="Fee Payment Reminder",
+                message=f"Reminder: Fee of ${amount} due on {due_date}.",
+            )
+            for user_id, amount, due_date in fees.iterator(chunk_size=self.BATCH_SIZE)
+        )
+        with transaction.atomic():
+            count = notifications.create_many(reminders, batch_size=self.BATCH_SIZE)
+            AuditLog.objects.create(
+                model_name='Notification',
+                object_id=0,
+                user=request.user,
+                action='bulk_send_fee_reminders',
+                new_value=json.dumps({'count': count}),
+            )
+
+        audit_logger.info(f"AUDIT: {request.user.username} sent {count} fee reminders")
+        return Response({"message": f"{count} payment reminders sent."}, status=status.HTTP_200_OK)
     
     def get(self, request, *args, **kwargs):
         if request.query_params.get("action") == "generate_report":
@@ -566,23 +514,34 @@ class UserViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = UserSerializer
     permission_classes = [IsAdminUser]
 
-    @method_decorator(cache_page(600))  # Cache for 10 minutes
+    @cached_response(User, UserProfile)
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
 class StudentViewSet(viewsets.ModelViewSet):
-    queryset = Student.objects.select_related('user').all()
+    queryset = Student.objects.select_related('user__profile', 'school_class').all()
     serializer_class = StudentSerializer
+    pagination_class = StudentPagination
 
-    @method_decorator(cache_page(600))  # Cache for 10 minutes
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        class_id = self.request.query_params.get('class')
+        if self.action == 'list' and class_id:
+            # One class is small enough for a client to read every page of
+            if not class_id.isdigit():
+                return queryset.none()
+            queryset = queryset.filter(school_class=class_id)
+        return queryset
+
+    @cached_response(Student, User, UserProfile, SchoolClass)
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
 class TeacherViewSet(viewsets.ModelViewSet):
-    queryset = Teacher.objects.select_related('user').all()
+    queryset = Teacher.objects.select_related('user__profile').all()
     serializer_class = TeacherSerializer
 
-    @method_decorator(cache_page(600))  # Cache for 10 minutes
+    @cached_response(Teacher, User, UserProfile)
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
@@ -636,7 +595,7 @@ class SchoolSettingViewSet(viewsets.ModelViewSet):
         # Get settings for the current school (assuming single school setup)
         school = School.objects.first()
         if school:
-            return SchoolSetting.objects.filter(school=school)
+            return SchoolSetting.objects.filter(school=school).defer('file_data')
         return SchoolSetting.objects.none()
 
     def perform_create(self, serializer):
@@ -664,10 +623,25 @@ class FeeViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         try:
-            queryset = Fee.objects.select_related('student__user').prefetch_related(
-                'payments', 'discounts', 'payment_plan'
+            queryset = Fee.objects.select_related(
+                'student__user__profile', 'student__school_class', 'ledger'
             )
 
+            # Only prefetch the nested collections the response will render
+            requested = EnhancedFeeSerializer.requested_fields(self.request)
+            if requested is None or 'payments' in requested:
+                queryset = queryset.prefetch_related(Prefetch(
+                    'payments',
+                    queryset=Payment.objects.select_related('processed_by__profile')
+                ))
+            if requested is None or 'discounts' in requested:
+                queryset = queryset.prefetch_related(Prefetch(
+                    'discounts',
+                    queryset=Discount.objects.select_related(
+                        'student__user__profile', 'student__school_class', 'applied_by__profile'
+                    )
+                ))
+
             # Filter by student if provided
             student_id = self.request.query_params.get('student_id', None)
             if student_id is not None:
@@ -747,18 +721,20 @@ class FeeViewSet(viewsets.ModelViewSet):
                 return Response({'error': 'Amount is required'}, status=status.HTTP_400_BAD_REQUEST)
 
             try:
-                amount = float(amount)
+                amount = Decimal(str(amount))
                 if amount <= 0:
                     raise ValueError()
-            except (ValueError, TypeError):
+            except (ValueError, TypeError, ArithmeticError):
                 return Response({'error': 'Invalid amount'}, status=status.HTTP_400_BAD_REQUEST)
 
-            if amount > fee.get_outstanding_amount():
-                return Response({'error': 'Waiver amount exceeds outstanding balance'}, status=status.HTTP_400_BAD_REQUEST)
+            with transaction.atomic():
+                # Lock the fee so concurrent waivers can't both pass the balance check
+                fee = Fee.objects.select_for_update().get(pk=fee.pk)
+                if amount > fee.get_outstanding_amount():
+                    return Response({'error': 'Waiver amount exceeds outstanding balance'}, status=status.HTTP_400_BAD_REQUEST)
 
-            old_waived = fee.waived_amount
-            fee.waived_amount += amount
-            fee.save()
+                fee.waived_amount += amount
+                fee.save()
 
             logger.info(f"Fee waiver: ₹{amount} waived on fee {fee.id}")
             audit_logger.info(f"FEE_WAIVED: ₹{amount} waived on fee {fee.id} by {request.user.username}")
@@ -796,6 +772,7 @@ class PaymentViewSet(viewsets.ModelViewSet):
     """
     serializer_class = EnhancedPaymentSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = PaymentPagination
 
     def get_queryset(self):
         try:
@@ -1123,27 +1100,196 @@ class NotificationViewSet(viewsets.ModelViewSet):
     """
     serializer_class = NotificationSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = NotificationPagination
 
     def get_queryset(self):
-        """Return notifications for the current user."""
-        return Notification.objects.filter(user=self.request.user).order_by('-created_at')
+        """Return notifications for the current user, optionally only unread ones (``?unread=true``)."""
+        queryset = Notification.objects.filter(user=self.request.user)
+        if self.request.query_params.get('unread') in ('1', 'true'):
+            queryset = queryset.filter(is_read=False)
+        return queryset.order_by('-created_at')
 
     def perform_create(self, serializer):
         """Set the user when creating a notification."""
         serializer.save(user=self.request.user)
 
+    @action(detail=False, methods=['get'])
+    def unread_count(self, request):
+        """The current user's unread count, served from cache."""
+        return Response({'unread': notifications.unread_count(request.user.pk)})
+
+    @action(detail=False, methods=['post'])
+    def mark_all_read(self, request):
+        """Mark every notification of the current user read in one update."""
+        marked = notifications.mark_read(request.user.pk)
+        return Response({'marked': marked, 'unread': 0})
+
+    @action(detail=True, methods=['post'])
+    def mark_read(self, request, pk=None):
+        """Mark one notification read."""
+        notification = self.get_object()
+        marked = notifications.mark_read(request.user.pk, [notification.pk])
+        return Response({'marked': marked})
+
+    @action(detail=False, methods=['post'])
+    def stream_ticket(self, request):
+        """A short-lived, single-use ticket for opening the stream with ``?ticket=``."""
+        return Response({
+            'ticket': notifications.issue_stream_ticket(request.user.pk),
+            'expires_in': notifications.ticket_timeout(),
+        }, status=status.HTTP_201_CREATED)
+
+async def notification_stream(request):
+    """
+    Server-sent events carrying the current user's new notifications.
+
+    ``EventSource`` cannot send headers, so besides ``Authorization: Bearer``
+    it accepts ``?ticket=`` with a ticket from ``POST
+    /api/notifications/stream_ticket/``; access tokens are never taken from
+    the URL. Resumes after the ``Last-Event-ID`` header (or
+    ``?last_event_id=``) when given.
+    """
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Method not allowed'}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
+    if not isinstance(request, ASGIRequest):
+        # A WSGI worker would be held for the whole connection
+        return JsonResponse(
+            {'error': 'The notification stream needs an ASGI server; poll /api/notifications/ instead.'},
+            status=status.HTTP_501_NOT_IMPLEMENTED
+        )
+
+    authenticator = JWTAuthentication()
+    header = authenticator.get_header(request)
+    ticket = request.GET.get('ticket')
+    if header:
+        raw_token = authenticator.get_raw_token(header)
+        if raw_token is None:
+            return JsonResponse({'error': 'Authentication credentials were not provided.'},
+                                status=status.HTTP_401_UNAUTHORIZED)
+        try:
+            token = authenticator.get_validated_token(raw_token)
+            user = await sync_to_async(authenticator.get_user)(token)
+        except (InvalidToken, AuthenticationFailed):
+            return JsonResponse({'error': 'Token is invalid or expired'}, status=status.HTTP_401_UNAUTHORIZED)
+        user_id = user.pk
+    elif ticket:
+        user_id = await sync_to_async(notifications.redeem_stream_ticket)(ticket)
+        if user_id is None or not await User.objects.filter(pk=user_id, is_active=True).aexists():
+            return JsonResponse({'error': 'Ticket is invalid, expired or already used'},
+                                status=status.HTTP_401_UNAUTHORIZED)
+    else:
+        return JsonResponse({'error': 'Authentication credentials were not provided.'},
+                            status=status.HTTP_401_UNAUTHORIZED)
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+
+    response = StreamingHttpResponse(
+        notifications.stream(user_id, last_event_id), content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
 class LeaveRequestViewSet(viewsets.ModelViewSet):
-    queryset = LeaveRequest.objects.all().order_by('-id')
+    queryset = LeaveRequest.objects.select_related('user__profile').order_by('-id')
     serializer_class = LeaveRequestSerializer
+    pagination_class = LeaveRequestPagination
 
 class AttendanceViewSet(viewsets.ModelViewSet):
     queryset = Attendance.objects.all()
     serializer_class = AttendanceSerializer
+    pagination_class = AttendancePagination
+
+    @action(detail=False, methods=['get'])
+    def summary(self, request):
+        """
+        Attendance counts and rates over a date range, read from the rollups
+
+        Query parameters: ``from`` and ``to`` (inclusive ISO dates; default the
+        365 days up to today) and ``class`` (default every class). With a
+        class, per-student totals are included; students only see their own.
+        """
+        def date_param(name):
+            value = request.query_params.get(name)
+            if not value:
+                return None
+            parsed = parse_date(value)
+            if parsed is None:
+                raise ValueError(value)
+            return parsed
+
+        try:
+            end = date_param('to') or timezone.localdate()
+            start = date_param('from') or end - timedelta(days=364)
+            class_id = int(request.query_params['class']) if request.query_params.get('class') else None
+        except ValueError:
+            return Response(
+                {'error': 'from and to must be YYYY-MM-DD dates and class a class id'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if start > end:
+            return Response({'error': 'from must not be after to'}, status=status.HTTP_400_BAD_REQUEST)
+        if class_id is not None and not SchoolClass.objects.filter(pk=class_id).exists():
+            return Response({'error': 'Class not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        data = {
+            'class': class_id,
+            'from': start.isoformat(),
+            'to': end.isoformat(),
+            **attendance_rollups.class_totals(start, end, [class_id] if class_id is not None else None),
+        }
+        if class_id is not None:
+            student_ids = None
+            if request.user.role == User.Role.STUDENT:
+                student_ids = list(Student.objects.filter(user=request.user).values_list('pk', flat=True))
+            totals = attendance_rollups.student_totals(start, end, student_ids=student_ids, class_id=class_id)
+            students = Student.objects.filter(pk__in=totals).select_related('user').order_by('user__last_name', 'pk')
+            data['students'] = [
+                {'student': student.pk, 'name': student.user.get_full_name(), **totals[student.pk]}
+                for student in students
+            ]
+        return Response(data)
 
 class TimetableViewSet(viewsets.ModelViewSet):
     queryset = Timetable.objects.all()
     serializer_class = TimetableSerializer
 
+    @action(detail=False, methods=['post'])
+    def generate(self, request):
+        """
+        Generate the school's week from the periods, classes and teacher subjects
+
+        Body: ``classes`` (ids; default every class), ``keep_existing`` (fill
+        only free slots instead of replacing the classes' timetables) and
+        ``dry_run``. Principals and staff only.
+        """
+        if request.user.role != User.Role.PRINCIPAL and not request.user.is_staff:
+            return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+        class_ids = request.data.get('classes')
+        if class_ids is not None and (
+            not isinstance(class_ids, list) or not all(isinstance(pk, int) for pk in class_ids)
+        ):
+            return Response({'error': 'classes must be a list of class ids'}, status=status.HTTP_400_BAD_REQUEST)
+        dry_run = bool(request.data.get('dry_run', False))
+        try:
+            week = timetable.generate_week(
+                class_ids, replace=not request.data.get('keep_existing', False), dry_run=dry_run
+            )
+        except timetable.TimetableError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(
+            {**week.summary(), 'dry_run': dry_run, 'unfilled_slots': [
+                {'class_id': class_id, 'day_of_week': day, 'period_number': number}
+                for class_id, day, number in week.unfilled
+            ]},
+            status=status.HTTP_200_OK if dry_run else status.HTTP_201_CREATED
+        )
+
     @action(detail=False, methods=['get'], url_path='class/(?P<class_id>\d+)')
     def by_class(self, request, class_id=None):
         """Get timetable entries for a specific class."""
@@ -1158,32 +1304,45 @@ class TimetableViewSet(viewsets.ModelViewSet):
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
     @action(detail=False, methods=['get'], url_path='overview')
+    @cached_response(Timetable, SchoolClass, Teacher, User)
     def overview(self, request):
-        """Get a comprehensive overview of all timetable data."""
+        """
+        Get a comprehensive overview of all timetable data.
+
+        One scan of the timetable with the teachers joined in, grouped per
+        class in Python; cached until a timetable, class, teacher or user
+        write bumps one of their versions.
+        """
         try:
-            # Get all classes with their timetable statistics
-            classes = SchoolClass.objects.all()
-            overview_data = []
-
-            for school_class in classes:
-                timetable_entries = Timetable.objects.filter(school_class=school_class)
-                teachers = set()
-                subjects = set()
-
-                for entry in timetable_entries:
-                    subjects.add(entry.subject)
-                    if entry.teacher:
-                        teachers.add(f"{entry.teacher.user.first_name} {entry.teacher.user.last_name}")
-
-                overview_data.append({
-                    'class_id': school_class.id,
-                    'class_name': school_class.name,
-                    'total_slots': timetable_entries.count(),
-                    'unique_subjects': len(subjects),
-                    'unique_teachers': len(teachers),
-                    'subjects_list': list(subjects),
-                    'teachers_list': list(teachers)
-                })
+            classes = {
+                school_class_id: {'name': name, 'slots': 0, 'subjects': set(), 'teachers': set()}
+                for school_class_id, name in SchoolClass.objects.order_by('pk').values_list('pk', 'name')
+            }
+            entries = Timetable.objects.values_list(
+                'school_class', 'subject', 'teacher__user__first_name', 'teacher__user__last_name', 'teacher'
+            )
+            for school_class_id, subject, first_name, last_name, teacher_id in entries:
+                group = classes.get(school_class_id)
+                if group is None:
+                    # Class created after the class list was read
+                    continue
+                group['slots'] += 1
+                group['subjects'].add(subject)
+                if teacher_id is not None:
+                    group['teachers'].add(f"{first_name} {last_name}")
+
+            overview_data = [
+                {
+                    'class_id': school_class_id,
+                    'class_name': group['name'],
+                    'total_slots': group['slots'],
+                    'unique_subjects': len(group['subjects']),
+                    'unique_teachers': len(group['teachers']),
+                    'subjects_list': sorted(group['subjects']),
+                    'teachers_list': sorted(group['teachers'])
+                }
+                for school_class_id, group in classes.items()
+            ]
 
             return Response({
                 'total_classes': len(overview_data),
@@ -1196,8 +1355,8 @@ class TimetableViewSet(viewsets.ModelViewSet):
 class ReportViewSet(viewsets.ViewSet):
     permission_classes = [IsAdminUser]
 
-    @method_decorator(cache_page(600))  # Cache for 10 minutes
     @action(detail=False, methods=['get'])
+    @cached_response(Student, Teacher, SchoolClass)
     def academic(self, request):
         return Response({
             "total_students": Student.objects.count(),
@@ -1205,8 +1364,8 @@ class ReportViewSet(viewsets.ViewSet):
             "total_classes": SchoolClass.objects.count(),
         })
 
-    @method_decorator(cache_page(600))  # Cache for 10 minutes
     @action(detail=False, methods=['get'], url_path='fees-summary')
+    @cached_response(Fee, Student, SchoolClass)
     def fees_summary(self, request):
         paid_fees = Fee.objects.filter(status='paid')
         unpaid_fees = Fee.objects.filter(status__in=['unpaid', 'partial'])
@@ -1257,13 +1416,14 @@ class StudentDetailView(views.APIView):
             attendance_records = student.attendance_records.all()
             grades = student.grades.all().order_by('-graded_date')
             fees = Fee.objects.filter(student=student)
+            attendance_totals = attendance_rollups.student_totals(student_ids=[student.pk]).get(student.pk)
 
             data = {
                 'student': StudentSerializer(student).data,
                 'attendance': AttendanceSerializer(attendance_records, many=True).data,
                 'grades': GradeSerializer(grades, many=True).data,
                 'fees': FeeSerializer(fees, many=True).data,
-                'attendance_rate': (attendance_records.filter(status__in=['present', 'late']).count() / attendance_records.count() * 100) if attendance_records.count() > 0 else 0
+                'attendance_rate': attendance_totals['attendance_rate'] if attendance_totals else 0
             }
             return Response(data)
         except Student.DoesNotExist:
@@ -1352,154 +1512,88 @@ class DatabaseSnapshotView(views.APIView):
     """Create and manage database snapshots for backup purposes."""
     permission_classes = [IsAdminUser]
 
-    async def get(self, request, *args, **kwargs):
-        """Export complete database snapshot in JSON format."""
-        try:
-            # Use async database queries for better performance
-            async def get_users():
-                return await sync_to_async(lambda: UserSerializer(User.objects.all(), many=True).data)()
-
-            async def get_students():
-                return await sync_to_async(lambda: StudentSerializer(Student.objects.select_related('user').all(), many=True).data)()
-
-            async def get_teachers():
-                return await sync_to_async(lambda: TeacherSerializer(Teacher.objects.select_related('user').all(), many=True).data)()
-
-            async def get_classes():
-                return await sync_to_async(lambda: SchoolClassSerializer(SchoolClass.objects.all(), many=True).data)()
-
-            async def get_fees():
-                return await sync_to_async(lambda: FeeSerializer(Fee.objects.select_related('student__user').all(), many=True).data)()
-
-            async def get_fee_types():
-                return await sync_to_async(lambda: FeeTypeSerializer(FeeType.objects.all(), many=True).data)()
-
-            async def get_leave_requests():
-                return await sync_to_async(lambda: LeaveRequestSerializer(LeaveRequest.objects.all(), many=True).data)()
-
-            async def get_attendances():
-                return await sync_to_async(lambda: AttendanceSerializer(Attendance.objects.all(), many=True).data)()
-
-            async def get_timetables():
-                return await sync_to_async(lambda: TimetableSerializer(Timetable.objects.select_related('teacher__user', 'school_class').all(), many=True).data)()
-
-            async def get_assignments():
-                return await sync_to_async(lambda: AssignmentSerializer(Assignment.objects.all(), many=True).data)()
+    def get(self, request, *args, **kwargs):
+        """
+        Stream a database snapshot as NDJSON.
 
-            async def get_grades():
-                return await sync_to_async(lambda: GradeSerializer(Grade.objects.all(), many=True).data)()
+        Optional query parameters: ``tables`` (comma-separated table names),
+        ``since`` (ISO date/datetime; incremental tables then hold only rows
+        created or changed since, by ``updated_at``) and
+        ``compress=gzip``.
+        """
+        try:
+            tables = snapshots.resolve_tables(request.query_params.get('tables'))
+            since = snapshots.parse_since(request.query_params.get('since'))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-            async def get_tasks():
-                return await sync_to_async(lambda: TaskSerializer(Task.objects.all(), many=True).data)()
+        chunks = snapshots.iter_encoded(snapshots.iter_snapshot_lines(tables, since))
+        filename = f"snapshot-{timezone.now():%Y%m%d-%H%M%S}.ndjson"
+        if request.query_params.get('compress') == 'gzip':
+            chunks = snapshots.iter_gzip(chunks)
+            content_type = 'application/gzip'
+            filename += '.gz'
+        else:
+            content_type = 'application/x-ndjson'
 
-            async def get_periods():
-                return await sync_to_async(lambda: PeriodSerializer(Period.objects.all(), many=True).data)()
+        response = StreamingHttpResponse(chunks, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
 
-            async def get_notifications():
-                return await sync_to_async(lambda: NotificationSerializer(Notification.objects.all(), many=True).data)()
+    def post(self, request, *args, **kwargs):
+        """
+        Restore a snapshot produced by ``get``.
 
-            # Parallel async queries for maximum performance
-            data_tasks = await asyncio.gather(
-                get_users(),
-                get_students(),
-                get_teachers(),
-                get_classes(),
-                get_fees(),
-                get_fee_types(),
-                get_leave_requests(),
-                get_attendances(),
-                get_timetables(),
-                get_assignments(),
-                get_grades(),
-                get_tasks(),
-                get_periods(),
-                get_notifications()
+        The snapshot is read either from the request body (``application/x-ndjson``
+        or ``application/gzip``) or from a multipart ``file`` upload. Query
+        parameters: ``dry_run``, ``conflicts`` (error|skip|update) and ``batch_size``.
+        """
+        dry_run = request.query_params.get('dry_run', '').lower() in ('1', 'true', 'yes')
+        conflicts = request.query_params.get('conflicts', 'error')
+        try:
+            batch_size = int(request.query_params.get('batch_size', snapshots.DEFAULT_CHUNK_SIZE))
+        except ValueError:
+            return Response({'error': "'batch_size' must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+
+        if (request.content_type or '').startswith('multipart/'):
+            upload = request.FILES.get('file')
+            if upload is None:
+                return Response({'error': "Upload the snapshot as 'file'."}, status=status.HTTP_400_BAD_REQUEST)
+            compressed = upload.name.endswith('.gz') or upload.content_type in ('application/gzip', 'application/x-gzip')
+            lines = snapshots.iter_lines(upload, compressed=compressed)
+        else:
+            compressed = (
+                'gzip' in (request.content_type or '') or
+                request.META.get('HTTP_CONTENT_ENCODING') == 'gzip'
             )
+            lines = snapshots.iter_lines(request._request, compressed=compressed)
 
-            # Statistics queries
-            stats_tasks = await asyncio.gather(
-                sync_to_async(User.objects.count)(),
-                sync_to_async(Student.objects.count)(),
-                sync_to_async(Teacher.objects.count)(),
-                sync_to_async(SchoolClass.objects.count)(),
-                sync_to_async(Fee.objects.count)(),
-                sync_to_async(LeaveRequest.objects.count)(),
-                sync_to_async(Attendance.objects.count)(),
-                sync_to_async(Timetable.objects.count)(),
-                sync_to_async(Assignment.objects.count)(),
-                sync_to_async(Grade.objects.count)(),
-                sync_to_async(Task.objects.count)(),
+        try:
+            result = snapshots.import_snapshot(
+                lines, batch_size=batch_size, conflicts=conflicts, dry_run=dry_run
             )
-
-            # Collect all data from all models
-            snapshot_data = {
-                'metadata': {
-                    'timestamp': timezone.now().isoformat(),
-                    'version': '1.0',
-                    'description': 'Complete database snapshot'
-                },
-                'data': {
-                    'users': data_tasks[0],
-                    'students': data_tasks[1],
-                    'teachers': data_tasks[2],
-                    'school_classes': data_tasks[3],
-                    'fees': data_tasks[4],
-                    'fee_types': data_tasks[5],
-                    'leave_requests': data_tasks[6],
-                    'attendances': data_tasks[7],
-                    'timetables': data_tasks[8],
-                    'assignments': data_tasks[9],
-                    'grades': data_tasks[10],
-                    'tasks': data_tasks[11],
-                    'periods': data_tasks[12],
-                    'notifications': data_tasks[13],
-                },
-                'statistics': {
-                    'total_users': stats_tasks[0],
-                    'total_students': stats_tasks[1],
-                    'total_teachers': stats_tasks[2],
-                    'total_classes': stats_tasks[3],
-                    'total_fees': stats_tasks[4],
-                    'total_leave_requests': stats_tasks[5],
-                    'total_attendances': stats_tasks[6],
-                    'total_timetable_entries': stats_tasks[7],
-                    'total_assignments': stats_tasks[8],
-                    'total_grades': stats_tasks[9],
-                    'total_tasks': stats_tasks[10],
-                }
-            }
-
-            return Response(snapshot_data)
-
-        except Exception as e:
+        except (snapshots.SnapshotError, OSError, EOFError) as e:
+            return Response({'error': f'Invalid snapshot: {e}'}, status=status.HTTP_400_BAD_REQUEST)
+        except IntegrityError as e:
             return Response(
-                {'error': f'Failed to create database snapshot: {str(e)}'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                {'error': f'Snapshot conflicts with existing data: {e}. Retry with conflicts=skip or conflicts=update.'},
+                status=status.HTTP_409_CONFLICT
             )
 
-    async def post(self, request, *args, **kwargs):
-        """Import database snapshot from JSON data."""
-        try:
-            snapshot_data = request.data
+        audit_logger.info(
+            f"Snapshot {'dry run' if dry_run else 'restore'} by {request.user.username}: "
+            f"{result['total_rows']} rows in {result['seconds']}s"
+        )
+        return Response(result)
 
-            if not isinstance(snapshot_data, dict) or 'data' not in snapshot_data:
-                return Response(
-                    {'error': 'Invalid snapshot format'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
+# === Instrumentation ===
 
-            # This would require careful implementation to avoid data conflicts
-            # For now, return a message that import is not implemented
-            return Response({
-                'message': 'Database import functionality is not yet implemented',
-                'received_data_keys': list(snapshot_data.get('data', {}).keys())
-            })
+class MetricsView(views.APIView):
+    """Per-route request metrics of this process in the Prometheus text format."""
+    permission_classes = [IsAdminUser]
 
-        except Exception as e:
-            return Response(
-                {'error': f'Failed to import database snapshot: {str(e)}'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+    def get(self, request, *args, **kwargs):
+        return HttpResponse(metrics.registry.render(), content_type=metrics.CONTENT_TYPE)
 
 # === Async Task Processing ===
 
@@ -1508,35 +1602,31 @@ class AsyncTaskViewSet(viewsets.ViewSet):
     permission_classes = [IsAuthenticated]
 
     @action(detail=False, methods=['post'])
-    async def process_bulk_data(self, request):
-        """Process bulk data operations asynchronously"""
-        try:
-            operation_type = request.data.get('operation')
-            data = request.data.get('data', [])
+    def process_bulk_data(self, request):
+        """Upsert a batch of grades or attendance rows and report per-row errors"""
+        operation_type = request.data.get('operation')
+        data = request.data.get('data', [])
 
-            if operation_type == 'bulk_grade_update':
-                # Simulate async bulk grade processing
-                await asyncio.sleep(0.1)  # Simulate processing time
-                return Response({
-                    'message': f'Processed {len(data)} grade updates asynchronously',
-                    'status': 'completed'
-                })
+        if request.user.role not in (User.Role.TEACHER, User.Role.PRINCIPAL) and not request.user.is_staff:
+            return Response({'error': 'Only teachers and administrators can ingest bulk data'}, status=status.HTTP_403_FORBIDDEN)
 
+        try:
+            if operation_type == 'bulk_grade_update':
+                result = ingest.ingest_grades(data, request.user)
             elif operation_type == 'bulk_attendance':
-                # Simulate async bulk attendance processing
-                await asyncio.sleep(0.1)
-                return Response({
-                    'message': f'Processed {len(data)} attendance records asynchronously',
-                    'status': 'completed'
-                })
-
-            return Response({'error': 'Unknown operation type'}, status=status.HTTP_400_BAD_REQUEST)
+                result = ingest.ingest_attendance(data, request.user, default_date=request.data.get('date'))
+            else:
+                return Response({'error': 'Unknown operation type'}, status=status.HTTP_400_BAD_REQUEST)
+        except ingest.IngestError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        except Exception as e:
-            return Response(
-                {'error': f'Async processing failed: {str(e)}'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+        audit_logger.info(
+            f"AUDIT: {request.user.username} ran {operation_type}: "
+            f"{result.written} written, {len(result.errors)} rejected of {result.received}"
+        )
+        body = result.as_dict()
+        response_status = status.HTTP_400_BAD_REQUEST if body['status'] == 'failed' else status.HTTP_200_OK
+        return Response(body, status=response_status)
 
     @action(detail=False, methods=['post'])
     async def generate_report_async(self, request):
@@ -1561,90 +1651,96 @@ class AsyncTaskViewSet(viewsets.ViewSet):
 
 # === Report Management Views ===
 
+# Report formats worth gzipping on download; PDFs are already compressed
+REPORT_COMPRESSIBLE_TYPES = {'text/csv', 'application/json'}
+
 class ReportManagementViewSet(viewsets.ViewSet):
     """Manage report generation, storage, and retrieval"""
     permission_classes = [IsAuthenticated]
 
     @action(detail=False, methods=['post'])
     def generate(self, request):
-        """Generate a new report"""
-        from django.core.management import call_command
-        from django.conf import settings
-        import os
-
+        """Queue report generation and return the job to poll"""
         report_type = request.data.get('report_type', 'all')
         output_format = request.data.get('format', 'json')
 
-        try:
-            # Generate report using management command
-            call_command('generate_reports',
-                        report_type=report_type,
-                        format=output_format)
-
-            # Find the latest report directory
-            reports_base_dir = os.path.join(settings.BASE_DIR, 'reports')
-            if os.path.exists(reports_base_dir):
-                report_dirs = [d for d in os.listdir(reports_base_dir)
-                             if d.startswith('report_')]
-                if report_dirs:
-                    latest_report = max(report_dirs)
-                    report_path = os.path.join(reports_base_dir, latest_report)
-
-                    return Response({
-                        'message': 'Report generated successfully',
-                        'report_id': latest_report,
-                        'report_path': report_path,
-                        'generated_at': timezone.now().isoformat()
-                    })
-
-            return Response({'message': 'Report generated successfully'})
-
-        except Exception as e:
+        if report_type not in jobs.REPORT_TYPES:
             return Response(
-                {'error': f'Failed to generate report: {str(e)}'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                {'error': f"report_type must be one of: {', '.join(jobs.REPORT_TYPES)}"},
+                status=status.HTTP_400_BAD_REQUEST
             )
+        try:
+            output_format = ','.join(report_renderers.parse_formats(output_format))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        job = jobs.enqueue(
+            BackgroundJob.JobType.GENERATE_REPORTS,
+            {'report_type': report_type, 'format': output_format},
+            user=request.user,
+        )
+        return Response({
+            'message': 'Report generation queued',
+            'job_id': job.pk,
+            'status': job.status,
+            'status_url': reverse('report-management-job', kwargs={'job_id': job.pk}),
+        }, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=False, methods=['get'], url_path=r'jobs/(?P<job_id>\d+)', url_name='job')
+    def job(self, request, job_id=None):
+        """Poll the status, progress and produced report id of a generation job"""
+        queryset = BackgroundJob.objects.select_related('requested_by')
+        if request.user.role != User.Role.PRINCIPAL and not request.user.is_staff:
+            queryset = queryset.filter(requested_by=request.user)
+        job = get_object_or_404(queryset, pk=job_id)
+        return Response(BackgroundJobSerializer(job).data)
 
     @action(detail=False, methods=['get'])
     def list_reports(self, request):
-        """List all available reports"""
-        from django.conf import settings
-        import os
-
-        reports_base_dir = os.path.join(settings.BASE_DIR, 'reports')
-        reports = []
-
-        if os.path.exists(reports_base_dir):
-            for item in os.listdir(reports_base_dir):
-                item_path = os.path.join(reports_base_dir, item)
-                if os.path.isdir(item_path) and item.startswith('report_'):
-                    metadata_file = os.path.join(item_path, 'metadata.json')
-                    if os.path.exists(metadata_file):
-                        try:
-                            with open(metadata_file, 'r') as f:
-                                metadata = json.load(f)
-                            reports.append(metadata)
-                        except:
-                            # If metadata can't be read, create basic info
-                            reports.append({
-                                'report_id': item,
-                                'generated_at': item.replace('report_', '').replace('_', 'T'),
-                                'report_type': 'unknown'
-                            })
-
-        # Sort by generation date (newest first)
-        reports.sort(key=lambda x: x.get('generated_at', ''), reverse=True)
+        """
+        List reports from the catalog, newest first
 
-        return Response({
-            'reports': reports,
-            'total': len(reports)
+        Filters: ``report_type``, ``format``, ``generated_after`` and
+        ``generated_before`` (ISO dates or datetimes). Paginated by cursor
+        through the ``Link`` header.
+        """
+        if not Report.objects.exists():
+            # First listing after an upgrade: index the directories written before the catalog
+            report_catalog.sync()
+
+        queryset = Report.objects.all()
+        if request.query_params.get('report_type'):
+            queryset = queryset.filter(report_type=request.query_params['report_type'])
+        if request.query_params.get('format'):
+            # output_format lists every format a run rendered, e.g. 'json,csv'
+            fmt = request.query_params['format']
+            queryset = queryset.filter(
+                Q(output_format=fmt) | Q(output_format__startswith=f'{fmt},') |
+                Q(output_format__endswith=f',{fmt}') | Q(output_format__contains=f',{fmt},')
+            )
+        for param, lookup in (('generated_after', 'generated_at__gte'), ('generated_before', 'generated_at__lt')):
+            try:
+                moment = snapshots.parse_since(request.query_params.get(param))
+            except ValueError:
+                return Response(
+                    {'error': f'{param} must be an ISO date or datetime'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            if moment is not None:
+                queryset = queryset.filter(**{lookup: moment})
+
+        paginator = ReportPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        return paginator.get_paginated_response({
+            'reports': ReportSerializer(page, many=True).data,
+            'total': queryset.count()
         })
 
     @action(detail=True, methods=['get'])
     def download(self, request, pk=None):
-        """Download a specific report file"""
+        """Stream a specific report file, with Range, ETag and gzip support"""
         from django.conf import settings
-        from django.http import HttpResponse, Http404
+        from django.http import Http404
         import os
         import mimetypes
 
@@ -1656,17 +1752,17 @@ class ReportManagementViewSet(viewsets.ViewSet):
             )
 
         # Security check - ensure path is within reports directory
-        reports_base_dir = os.path.join(settings.BASE_DIR, 'reports')
-        full_path = os.path.join(reports_base_dir, pk, file_path)
+        reports_base_dir = os.path.realpath(os.path.join(settings.BASE_DIR, 'reports'))
+        full_path = os.path.realpath(os.path.join(reports_base_dir, pk, file_path))
 
-        # Prevent directory traversal
-        if not os.path.abspath(full_path).startswith(os.path.abspath(reports_base_dir)):
+        # Prevent directory traversal (a sibling such as reports_old/ shares the prefix)
+        if os.path.commonpath([reports_base_dir, full_path]) != reports_base_dir:
             return Response(
                 {'error': 'Invalid file path'},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        if not os.path.exists(full_path) or not os.path.isfile(full_path):
+        if not os.path.isfile(full_path):
             raise Http404("File not found")
 
         # Determine content type
@@ -1674,53 +1770,33 @@ class ReportManagementViewSet(viewsets.ViewSet):
         if content_type is None:
             content_type = 'application/octet-stream'
 
-        # Read file and return response
-        with open(full_path, 'rb') as f:
-            file_data = f.read()
-
-        response = HttpResponse(file_data, content_type=content_type)
-        response['Content-Disposition'] = f'attachment; filename="{os.path.basename(full_path)}"'
-        return response
+        return downloads.serve_file(
+            request, full_path, content_type, os.path.basename(full_path),
+            compress=content_type in REPORT_COMPRESSIBLE_TYPES,
+        )
 
     @action(detail=True, methods=['get'])
     def files(self, request, pk=None):
-        """List files in a specific report directory"""
-        from django.conf import settings
-        import os
-
-        reports_base_dir = os.path.join(settings.BASE_DIR, 'reports')
-        report_dir = os.path.join(reports_base_dir, pk)
-
-        if not os.path.exists(report_dir):
+        """List files in a specific report, with sizes and checksums, from the catalog"""
+        report = Report.objects.filter(report_id=pk).only('report_id', 'files').first()
+        if report is None and pk.startswith('report_') and report_catalog.read_metadata(report_catalog.report_dir(pk)):
+            report = report_catalog.catalog_report(pk)
+        if report is None:
             return Response(
                 {'error': 'Report not found'},
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        files = []
-        for root, dirs, filenames in os.walk(report_dir):
-            for filename in filenames:
-                full_path = os.path.join(root, filename)
-                rel_path = os.path.relpath(full_path, report_dir)
-                file_size = os.path.getsize(full_path)
-                files.append({
-                    'name': filename,
-                    'path': rel_path,
-                    'size': file_size,
-                    'type': filename.split('.')[-1] if '.' in filename else 'unknown'
-                })
-
         return Response({
             'report_id': pk,
-            'files': files,
-            'total_files': len(files)
+            'files': report.files,
+            'total_files': len(report.files)
         })
 
     @action(detail=True, methods=['delete'])
     def delete(self, request, pk=None):
         """Delete a specific report"""
-        from django.conf import settings
-        import shutil
+        import os
 
         # Only allow principals to delete reports
         if request.user.role != User.Role.PRINCIPAL:
@@ -1729,17 +1805,16 @@ class ReportManagementViewSet(viewsets.ViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
 
-        reports_base_dir = os.path.join(settings.BASE_DIR, 'reports')
-        report_dir = os.path.join(reports_base_dir, pk)
-
-        if not os.path.exists(report_dir):
+        if not pk.startswith('report_') or not (
+            Report.objects.filter(report_id=pk).exists() or os.path.isdir(report_catalog.report_dir(pk))
+        ):
             return Response(
                 {'error': 'Report not found'},
                 status=status.HTTP_404_NOT_FOUND
             )
 
         try:
-            shutil.rmtree(report_dir)
+            report_catalog.delete_reports([pk])
             return Response({'message': f'Report {pk} deleted successfully'})
         except Exception as e:
             return Response(
@@ -1772,8 +1847,11 @@ class AssignmentViewSet(viewsets.ModelViewSet):
     def submissions(self, request, pk=None):
         """Get all submissions for a specific assignment."""
         assignment = self.get_object()
-        submissions = AssignmentSubmission.objects.filter(assignment=assignment).select_related('student__user', 'graded_by__user')
-        serializer = AssignmentSubmissionSerializer(submissions, many=True)
+        submissions = (
+            AssignmentSubmission.objects.filter(assignment=assignment)
+            .select_related('student__user', 'graded_by__user').defer('file_data')
+        )
+        serializer = AssignmentSubmissionSerializer(submissions, many=True, context={'request': request})
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'])
@@ -1799,6 +1877,10 @@ class AssignmentSubmissionViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
+        # The legacy inline blob is never serialized; see BlobDownloadView
+        return self.get_role_queryset().defer('file_data')
+
+    def get_role_queryset(self):
         """Return submissions based on user role."""
         if self.request.user.role == User.Role.STUDENT:
             try:
@@ -1862,6 +1944,10 @@ class ReimbursementViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
+        # The legacy inline blob is never serialized; see BlobDownloadView
+        return self.get_role_queryset().defer('receipt_file_data')
+
+    def get_role_queryset(self):
         """Return reimbursements based on user role."""
         if self.request.user.role == User.Role.TEACHER:
             try:
@@ -1922,6 +2008,61 @@ class ReimbursementViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(reimbursement)
         return Response(serializer.data)
 
+# === File Downloads ===
+
+class BlobDownloadView(views.APIView):
+    """
+    Streams an uploaded file (submission, reimbursement receipt or school
+    setting file) from the blob store, with Range and ETag support.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self, kind):
+        user = self.request.user
+        model = blobstore.get_model(kind)
+        if kind == 'settings':
+            return model.objects.all() if user.is_staff else model.objects.none()
+        if user.role == User.Role.PRINCIPAL:
+            return model.objects.all()
+        if kind == 'submissions':
+            if user.role == User.Role.STUDENT:
+                return model.objects.filter(student__user=user)
+            if user.role == User.Role.TEACHER:
+                return model.objects.filter(assignment__teacher__user=user)
+        if kind == 'reimbursements' and user.role == User.Role.TEACHER:
+            return model.objects.filter(teacher__user=user)
+        return model.objects.none()
+
+    def get(self, request, kind, pk):
+        if kind not in blobstore.BLOB_KINDS:
+            return Response({'error': 'Unknown file type'}, status=status.HTTP_404_NOT_FOUND)
+        prefix = blobstore.BLOB_KINDS[kind].prefix
+        fields = [f'{prefix}_{name}' for name in ('sha256', 'name', 'mime_type')]
+        row = self.get_queryset(kind).filter(pk=pk).values(*fields).first()
+        if row is None:
+            return Response({'error': 'File not found'}, status=status.HTTP_404_NOT_FOUND)
+        digest, filename, mime_type = (row[field] for field in fields)
+
+        if not digest:
+            # Not moved out of the table yet: move this row now and serve it from the store
+            blobstore.move_legacy_blobs(kind, pks=[pk])
+            digest = self.get_queryset(kind).filter(pk=pk).values_list(fields[0], flat=True).first()
+            if not digest:
+                return Response({'error': 'File not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        store = blobstore.get_store()
+        etag = f'"{digest}"'
+        path = store.path(digest)
+        if path is None:
+            try:
+                return FileResponse(store.open(digest), as_attachment=True, filename=filename,
+                                    content_type=mime_type or 'application/octet-stream', headers={'ETag': etag})
+            except blobstore.BlobNotFound:
+                return Response({'error': 'File not found'}, status=status.HTTP_404_NOT_FOUND)
+        if not store.exists(digest):
+            return Response({'error': 'File not found'}, status=status.HTTP_404_NOT_FOUND)
+        return downloads.serve_file(request, path, mime_type or 'application/octet-stream', filename or digest, etag)
+
 # === Fee Management ViewSets ===
 
 class FeeStructureViewSet(viewsets.ModelViewSet):
@@ -2088,8 +2229,8 @@ class StudentFeesView(generics.ListAPIView):
     def get_queryset(self):
         student_id = self.kwargs['student_id']
         return Fee.objects.filter(student_id=student_id).select_related(
-            'student__user'
-        ).prefetch_related('payments', 'discounts', 'payment_plan')
+            'student__user', 'ledger'
+        ).prefetch_related('payments', 'discounts')
 
 # === Report Generation Views ===
 
@@ -2214,23 +2355,24 @@ def student_fee_dashboard(request):
         messages.error(request, "Student profile not found.")
         return redirect('home')
 
-    # Get student's fees
-    fees = Fee.objects.filter(student=student).select_related('fee_type').prefetch_related('payments')
+    # Get student's fees with their ledger balances
+    fees = Fee.objects.filter(student=student).annotate(
+        outstanding_amount=Coalesce('ledger__outstanding', F('amount') - F('waived_amount'))
+    )
 
     # Calculate summary data
     total_outstanding = 0
     paid_fees_count = 0
     pending_fees_count = 0
     overdue_fees_count = 0
+    today = timezone.now().date()
 
     for fee in fees:
-        outstanding = fee.amount - fee.waived_amount
-        for payment in fee.payments.filter(status='completed'):
-            outstanding -= payment.amount
+        outstanding = fee.outstanding_amount
 
         if outstanding <= 0:
             paid_fees_count += 1
-        elif fee.due_date < timezone.now().date():
+        elif fee.due_date < today:
             overdue_fees_count += 1
             total_outstanding += outstanding
         else:
@@ -2240,7 +2382,7 @@ def student_fee_dashboard(request):
     # Get recent payments
     payments = Payment.objects.filter(
         fee__student=student
-    ).select_related('fee__fee_type').order_by('-payment_date')[:10]
+    ).select_related('fee').order_by('-payment_date')[:10]
 
     context = {
         'fees': fees,
@@ -2260,84 +2402,69 @@ def admin_fee_dashboard(request):
         messages.error(request, "Access denied. Admin access required.")
         return redirect('student_fee_dashboard')
 
-    # Calculate key metrics
-    total_collected = Payment.objects.filter(
-        status='completed'
-    ).aggregate(total=Sum('amount'))['total'] or 0
-
-    monthly_collected = Payment.objects.filter(
-        status='completed',
-        payment_date__month=timezone.now().month,
-        payment_date__year=timezone.now().year
-    ).aggregate(total=Sum('amount'))['total'] or 0
-
-    # Outstanding balances
-    outstanding_fees = Fee.objects.filter(status__in=['unpaid', 'partial'])
-    total_outstanding = 0
-    for fee in outstanding_fees:
-        outstanding = fee.amount - fee.waived_amount
-        for payment in fee.payments.filter(status='completed'):
-            outstanding -= payment.amount
-        if outstanding > 0:
-            total_outstanding += outstanding
-
-    outstanding_count = outstanding_fees.count()
-
-    # Overdue fees
-    overdue_fees = Fee.objects.filter(
-        due_date__lt=timezone.now().date(),
-        status__in=['unpaid', 'partial']
+    today = timezone.now().date()
+    open_fee = Q(status__in=['unpaid', 'partial'])
+    overdue_fee = open_fee & Q(due_date__lt=today)
+
+    # Collections (one query)
+    payment_totals = Payment.objects.filter(status='completed').aggregate(
+        total_collected=Coalesce(Sum('amount'), Decimal('0.00')),
+        monthly_collected=Coalesce(Sum(
+            'amount',
+            filter=Q(payment_date__month=today.month, payment_date__year=today.year)
+        ), Decimal('0.00')),
     )
-    overdue_amount = 0
-    for fee in overdue_fees:
-        outstanding = fee.amount - fee.waived_amount
-        for payment in fee.payments.filter(status='completed'):
-            outstanding -= payment.amount
-        if outstanding > 0:
-            overdue_amount += outstanding
-
-    overdue_count = overdue_fees.count()
 
-    # Active students with fees
-    active_students_count = Student.objects.filter(fees__isnull=False).distinct().count()
+    # Outstanding and overdue balances (one query over the fee ledger)
+    fee_totals = Fee.objects.aggregate(
+        total_outstanding=Coalesce(Sum('ledger__outstanding', filter=open_fee), Decimal('0.00')),
+        outstanding_count=Count('id', filter=open_fee),
+        overdue_amount=Coalesce(Sum('ledger__outstanding', filter=overdue_fee), Decimal('0.00')),
+        overdue_count=Count('id', filter=overdue_fee),
+        active_students_count=Count('student', distinct=True),
+    )
 
     # Recent payments
     recent_payments = Payment.objects.select_related(
         'fee__student__user', 'processed_by'
     ).order_by('-payment_date')[:5]
 
-    # Class-wise summary
-    class_summary = []
-    for school_class in SchoolClass.objects.all():
-        class_fees = Fee.objects.filter(student__school_class=school_class)
-        total_fees = class_fees.aggregate(total=Sum('amount'))['total'] or 0
-        total_collected = Payment.objects.filter(
-            fee__student__school_class=school_class,
-            status='completed'
-        ).aggregate(total=Sum('amount'))['total'] or 0
-
-        total_outstanding = total_fees - total_collected
-        collection_rate = (total_collected / total_fees * 100) if total_fees > 0 else 0
+    # Class-wise summary: one grouped query for fees, one subquery for completed payments
+    completed_payments = Payment.objects.filter(
+        fee=OuterRef('pk'), status='completed'
+    ).values('fee').annotate(total=Sum('amount')).values('total')
+    class_totals = {
+        row['student__school_class']: row
+        for row in Fee.objects.filter(student__school_class__isnull=False)
+        .values('student__school_class')
+        .annotate(
+            total_fees=Coalesce(Sum('amount'), Decimal('0.00')),
+            total_collected=Coalesce(Sum(Subquery(completed_payments)), Decimal('0.00')),
+        )
+        .order_by()
+    }
 
+    class_summary = []
+    for school_class in SchoolClass.objects.annotate(student_count=Count('students')).order_by('name'):
+        totals = class_totals.get(school_class.id, {})
+        total_fees = totals.get('total_fees', Decimal('0.00'))
+        collected = totals.get('total_collected', Decimal('0.00'))
         class_summary.append({
             'class_name': school_class.name,
-            'student_count': Student.objects.filter(school_class=school_class).count(),
+            'student_count': school_class.student_count,
             'total_fees': total_fees,
-            'total_collected': total_collected,
-            'total_outstanding': total_outstanding,
-            'collection_rate': collection_rate,
+            'total_collected': collected,
+            'total_outstanding': total_fees - collected,
+            'collection_rate': (collected / total_fees * 100) if total_fees > 0 else 0,
         })
 
     context = {
-        'total_collected': total_collected,
-        'monthly_collected': monthly_collected,
-        'total_outstanding': total_outstanding,
-        'outstanding_count': outstanding_count,
-        'overdue_amount': overdue_amount,
-        'overdue_count': overdue_count,
-        'active_students_count': active_students_count,
+        **payment_totals,
+        **fee_totals,
         'recent_payments': recent_payments,
-        'overdue_fees': overdue_fees.select_related('student__user', 'fee_type')[:5],
+        'overdue_fees': Fee.objects.filter(overdue_fee).select_related('student__user').annotate(
+            outstanding_amount=F('ledger__outstanding')
+        ).order_by('due_date')[:5],
         'class_summary': class_summary,
     }
 
@@ -2386,15 +2513,18 @@ class FeeDetailView(FeeManagementMixin, DetailView):
     template_name = 'fee_management/fee_detail.html'
     context_object_name = 'fee'
 
+    def get_queryset(self):
+        return Fee.objects.select_related('student__user', 'student__school_class', 'ledger')
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        fee = self.get_object()
+        fee = self.object
 
-        # Calculate outstanding amount
-        outstanding = fee.amount - fee.waived_amount
-        for payment in fee.payments.filter(status='completed'):
-            outstanding -= payment.amount
-        context['outstanding_amount'] = outstanding
+        # Outstanding amount comes straight from the fee ledger
+        try:
+            context['outstanding_amount'] = fee.ledger.outstanding
+        except FeeLedger.DoesNotExist:
+            context['outstanding_amount'] = FeeLedger.refresh(fee).outstanding
 
         # Get payment history
         context['payments'] = fee.payments.select_related('processed_by').order_by('-payment_date')
@@ -2488,6 +2618,7 @@ def apply_discount(request, fee_id):
             else:
                 discount_amount = float(value)
 
+            # Discount.save refreshes the fee ledger, so the waived amount is left untouched
             Discount.objects.create(
                 student=fee.student,
                 fee=fee,
@@ -2497,10 +2628,6 @@ def apply_discount(request, fee_id):
                 applied_by=request.user
             )
 
-            # Update fee waived amount
-            fee.waived_amount += discount_amount
-            fee.save()
-
             messages.success(request, f"Discount of ₹{discount_amount:.2f} applied successfully.")
             return redirect('fee_detail', pk=fee.pk)
 
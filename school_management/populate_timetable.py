@@ -9,6 +9,7 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'school_management.settings')
 django.setup()
 
 from api.models import *
+from api import timetable
 
 def populate_sample_data():
     print("Creating sample timetable data...")
@@ -34,10 +35,10 @@ def populate_sample_data():
 
     # Create sample teachers
     teachers_data = [
-        {'username': 'john_doe', 'first_name': 'John', 'last_name': 'Doe'},
-        {'username': 'jane_smith', 'first_name': 'Jane', 'last_name': 'Smith'},
-        {'username': 'bob_johnson', 'first_name': 'Bob', 'last_name': 'Johnson'},
-        {'username': 'alice_brown', 'first_name': 'Alice', 'last_name': 'Brown'},
+        {'username': 'john_doe', 'first_name': 'John', 'last_name': 'Doe', 'subject': 'Mathematics'},
+        {'username': 'jane_smith', 'first_name': 'Jane', 'last_name': 'Smith', 'subject': 'Physics'},
+        {'username': 'bob_johnson', 'first_name': 'Bob', 'last_name': 'Johnson', 'subject': 'English'},
+        {'username': 'alice_brown', 'first_name': 'Alice', 'last_name': 'Brown', 'subject': 'History'},
     ]
 
     teachers = []
@@ -54,13 +55,13 @@ def populate_sample_data():
             user=user,
             defaults={}
         )
+        # The timetable generator assigns teachers by their profile subject
+        UserProfile.objects.get_or_create(user=user, defaults={'subject': teacher_data['subject']})
         teachers.append(teacher)
         if user_created or teacher_created:
             print(f"Created teacher: {teacher.user.get_full_name()}")
 
-    # Create sample timetable entries
-    subjects = ['Mathematics', 'Physics', 'Chemistry', 'Biology', 'English', 'History', 'Geography', 'Computer Science']
-    days = ['MON', 'TUE', 'WED', 'THU', 'FRI']
+    # Create the periods and a clash-free week for every class
     time_slots = [
         ('08:00:00', '09:00:00'),
         ('09:00:00', '10:00:00'),
@@ -70,34 +71,11 @@ def populate_sample_data():
         ('14:00:00', '15:00:00'),
         ('15:00:00', '16:00:00'),
     ]
+    for number, (start_time, end_time) in enumerate(time_slots, start=1):
+        Period.objects.get_or_create(period_number=number, defaults={'start_time': start_time, 'end_time': end_time})
 
-    timetable_count = 0
-    for cls in classes:
-        for day in days:
-            # Create 4-6 subjects per day per class
-            import random
-            num_subjects = random.randint(4, 6)
-            selected_slots = random.sample(time_slots, num_subjects)
-
-            for i, (start_time, end_time) in enumerate(selected_slots):
-                subject = random.choice(subjects)
-                teacher = random.choice(teachers)
-
-                timetable, created = Timetable.objects.get_or_create(
-                    school_class=cls,
-                    day_of_week=day,
-                    start_time=start_time,
-                    defaults={
-                        'end_time': end_time,
-                        'subject': subject,
-                        'teacher': teacher
-                    }
-                )
-
-                if created:
-                    timetable_count += 1
-
-    print(f"Created {timetable_count} timetable entries")
+    week = timetable.generate_week([cls.pk for cls in classes])
+    print(f"Created {len(week.entries)} timetable entries ({len(week.unfilled)} slots without a free teacher)")
     print("Sample data population completed!")
 
 if __name__ == '__main__':
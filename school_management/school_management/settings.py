@@ -38,6 +38,8 @@ AUTHENTICATION_BACKENDS = [
 ]
 
 MIDDLEWARE = [
+    # First, so it measures everything below it
+    'api.middleware.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware', # Add this BEFORE CommonMiddleware
@@ -78,6 +80,9 @@ CORS_ALLOW_HEADERS = [
     'x-requested-with',
 ]
 
+# Paginated lists put the next page in the Link header; let the frontend read it
+CORS_EXPOSE_HEADERS = ['Link']
+
 # Allow all methods
 CORS_ALLOW_METHODS = [
     'DELETE',
@@ -88,6 +93,20 @@ CORS_ALLOW_METHODS = [
     'PUT',
 ]
 
+# Per-request query counts and timings (see api/metrics.py): reported in the
+# Server-Timing header and as Prometheus metrics at /api/metrics/ (staff only)
+REQUEST_METRICS_ENABLED = True
+
+# Limits per URL name on top of 'default'; requests over any of them log a
+# warning on api.performance. Keys: queries, db_ms, serializer_ms, total_ms, bytes
+REQUEST_BUDGETS = {
+    'default': {'queries': 50, 'db_ms': 500, 'total_ms': 2000},
+    'fee_admin_dashboard': {'queries': 20},
+    'timetable-overview': {'queries': 5},
+    'fee-list': {'queries': 10},
+    'fee-detail': {'queries': 10},
+}
+
 ROOT_URLCONF = 'school_management.urls'
 
 # Django REST Framework settings
@@ -155,9 +174,23 @@ CSRF_TRUSTED_ORIGINS = [
 
 # Rate Limiting Settings
 RATE_LIMIT_ENABLED = True
-RATE_LIMIT_REQUESTS = 100  # requests per window
+RATE_LIMIT_CACHE = 'default'  # must support incr(); see api/ratelimit.py
+RATE_LIMIT_REQUESTS = 100  # requests per window for paths outside every group below
 RATE_LIMIT_WINDOW = 900  # 15 minutes in seconds
 
+# Route groups, matched by path prefix (first match wins). Each group has one
+# sliding-window counter per client IP.
+RATE_LIMIT_POLICIES = [
+    {'name': 'auth', 'prefixes': ['/api/auth/'], 'requests': 30, 'window': 300},
+    {
+        'name': 'bulk',
+        'prefixes': ['/api/snapshot/', '/api/async-tasks/', '/api/report-management/generate/', '/api/fees/actions/'],
+        'requests': 120,
+        'window': 60,
+    },
+    {'name': 'api', 'prefixes': ['/api/'], 'requests': 1200, 'window': 60},
+]
+
 ROOT_URLCONF = 'school_management.urls'
 
 TEMPLATES = [
@@ -293,6 +326,49 @@ CACHE_MIDDLEWARE_KEY_PREFIX = 'school_api'
 API_CACHE_TIMEOUT = 300  # 5 minutes for API responses
 API_CACHE_KEY_PREFIX = 'api_v1'
 
+# Public /api/config/ document: browser/proxy max-age, and how long each process
+# serves its in-memory copy before rechecking the shared cache
+SCHOOL_CONFIG_MAX_AGE = 60
+SCHOOL_CONFIG_LOCAL_TIMEOUT = 5
+
+# Generated reports older than this are deleted by `manage.py report_catalog --prune`,
+# except for the newest REPORT_RETENTION_KEEP_LATEST
+REPORT_RETENTION_DAYS = 90
+REPORT_RETENTION_KEEP_LATEST = 10
+
+# Processes generate_reports uses to render report files; with several
+# formats (--format json,csv,pdf) each (family, format) pair is one task
+REPORT_RENDER_WORKERS = min(4, os.cpu_count() or 1)
+
+# Lifetime of the cached per-user unread notification counters (see api/notifications.py)
+NOTIFICATION_UNREAD_TIMEOUT = 24 * 60 * 60
+
+# Server-sent events at /api/notifications/stream/ (ASGI only): keepalive comment
+# interval and connection lifetime in seconds; clients reconnect with Last-Event-ID
+NOTIFICATION_STREAM_HEARTBEAT = 15
+NOTIFICATION_STREAM_TIMEOUT = 300
+# Lifetime in seconds of the single-use tickets browsers open the stream with
+NOTIFICATION_STREAM_TICKET_TIMEOUT = 30
+
+# Fan-out for event streams (see api/pubsub.py). With several ASGI worker
+# processes use {'BACKEND': 'api.pubsub.RedisBroker', 'OPTIONS': {'url': REDIS_URL}}
+PUBSUB_BROKER = {
+    'BACKEND': 'api.pubsub.LocalBroker',
+    'OPTIONS': {},
+}
+
+# Content-addressed store for uploaded files (see api/blobstore.py)
+BLOB_STORE = {
+    'BACKEND': 'api.blobstore.FileSystemBlobStore',
+    'OPTIONS': {'root': BASE_DIR / 'blobs'},
+}
+
+# Hand file downloads to the web server instead of streaming them from Django:
+# 'X-Sendfile' (Apache/lighttpd) or 'X-Accel-Redirect' (nginx). For nginx, map each
+# served directory to its internal location, e.g. {BASE_DIR / 'blobs': '/protected/blobs/'}
+SENDFILE_HEADER = None
+SENDFILE_LOCATIONS = {}
+
 # Cache page timeout for specific views
 CACHE_PAGE_TIMEOUT = 300
 
@@ -304,6 +380,10 @@ REDIS_URL = 'redis://127.0.0.1:6379/1'
 CACHE_MIDDLEWARE_GZIP = True
 CACHE_MIDDLEWARE_COMPRESS = True
 
+# Recompute dashboard stats for the affected teachers/classes after each write.
+# Set to False to rely on a scheduled `manage.py refresh_stats` instead.
+STATS_REFRESH_ON_WRITE = True
+
 # ===== STRIPE CONFIGURATION =====
 import stripe
 
@@ -388,5 +468,20 @@ LOGGING = {
             'level': 'INFO',
             'propagate': False,
         },
+        'api.jobs': {
+            'handlers': ['console', 'file'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'api.stats': {
+            'handlers': ['console', 'file'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'api.performance': {
+            'handlers': ['console', 'file'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
     },
 }